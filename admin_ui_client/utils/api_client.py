@@ -5,11 +5,19 @@
 - 使用 session_token（由后端生成，不再使用 Google ID Token）
 - 封装 GET / POST / PUT / DELETE
 - 自动处理错误
+- 支持通过 CancelToken 中止已过期的请求
+- 报表等大文件流式写入磁盘，支持 HTTP Range 断点续传
 """
 
+import contextlib
 import json
+import os
+import socket
+import threading
+import time
 import httpx
-from typing import Any, Dict, Optional, List, Tuple
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, List, Set, Tuple
 from datetime import date
 
 from utils.config_manager import ConfigManager
@@ -27,6 +35,58 @@ class AuthError(Exception):
     pass
 
 
+class RequestCancelled(ApiError):
+    """请求已被取消（筛选条件变化等原因被新请求取代），调用方应直接丢弃结果。"""
+    pass
+
+
+# ==== 请求取消 ====
+
+class CancelToken:
+    """
+    请求取消令牌：同一批请求（如某次筛选的所有分页请求）共用一个令牌。
+    cancel() 可在任意线程调用：对正在使用的连接执行 socket shutdown，阻塞中的请求立即失败
+    （仅 close 在部分平台上无法唤醒阻塞的 recv），之后绑定该令牌的请求抛出 RequestCancelled。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancelled = False
+        self._sockets: Set[socket.socket] = set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._cancelled:
+                return
+            self._cancelled = True
+            sockets = list(self._sockets)
+            self._sockets.clear()
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def raise_if_cancelled(self) -> None:
+        if self._cancelled:
+            raise RequestCancelled("请求已取消")
+
+    def _attach(self, sock: socket.socket) -> None:
+        with self._lock:
+            if not self._cancelled:
+                self._sockets.add(sock)
+                return
+        raise RequestCancelled("请求已取消")
+
+    def _detach(self, sock: socket.socket) -> None:
+        with self._lock:
+            self._sockets.discard(sock)
+
+
 # ==== 客户端实现 ====
 
 class AdminApiClient:
@@ -35,9 +95,14 @@ class AdminApiClient:
     使用后端签发的 session_token，不再使用 Google ID Token。
     """
 
-    def __init__(self, base_url: str, session_token: str):
+    def __init__(self, base_url: str, session_token: str, cancel_token: Optional[CancelToken] = None):
         self.base_url = base_url.rstrip("/")
         self.session_token = session_token
+        self.cancel_token = cancel_token
+
+    def with_cancel_token(self, cancel_token: Optional[CancelToken]) -> "AdminApiClient":
+        """返回绑定了取消令牌的新客户端（不影响当前实例，可用于共享的客户端）"""
+        return AdminApiClient(self.base_url, self.session_token, cancel_token=cancel_token)
 
     # ---------- 工厂方法 ----------
     @classmethod
@@ -71,12 +136,72 @@ class AdminApiClient:
             "Content-Type": "application/json",
         }
 
+    # ---------- 发送请求 ----------
+    @staticmethod
+    def _trace_sockets(token: CancelToken, sockets: List[socket.socket]) -> Callable[[str, Dict[str, Any]], None]:
+        """httpx trace 扩展回调：拿到新建连接的 socket 并登记到令牌，供 cancel() 中止"""
+        def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if event_name != "connection.connect_tcp.complete":
+                return
+            stream = info.get("return_value")
+            sock = stream.get_extra_info("socket") if stream is not None else None
+            if sock is not None:
+                token._attach(sock)
+                sockets.append(sock)
+        return trace
+
+    def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """发送请求；绑定了取消令牌时，请求期间令牌被取消会中止连接并抛出 RequestCancelled"""
+        token = self.cancel_token
+        if token is None:
+            return httpx.request(method, url, **kwargs)
+        token.raise_if_cancelled()
+        sockets: List[socket.socket] = []
+
+        try:
+            with httpx.Client() as client:
+                r = client.request(method, url, extensions={"trace": self._trace_sockets(token, sockets)}, **kwargs)
+        except Exception:
+            token.raise_if_cancelled()
+            raise
+        finally:
+            for sock in sockets:
+                token._detach(sock)
+        # 响应已返回但期间被取消：结果同样作废
+        token.raise_if_cancelled()
+        return r
+
+    @contextlib.contextmanager
+    def _stream(self, method: str, url: str, **kwargs) -> Iterator[httpx.Response]:
+        """流式请求（下载大文件），响应体需在 with 块内读取；取消语义与 _request 相同"""
+        token = self.cancel_token
+        sockets: List[socket.socket] = []
+        extensions = {}
+        if token is not None:
+            token.raise_if_cancelled()
+            extensions["trace"] = self._trace_sockets(token, sockets)
+        try:
+            with httpx.Client() as client:
+                with client.stream(method, url, extensions=extensions, **kwargs) as r:
+                    yield r
+        except RequestCancelled:
+            raise
+        except Exception:
+            if token is not None:
+                token.raise_if_cancelled()
+            raise
+        finally:
+            for sock in sockets:
+                token._detach(sock)
+
     # ---------- GET ----------
     def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
         url = f"{self.base_url}{path}"
 
         try:
-            r = httpx.get(url, headers=self._headers(), params=params, timeout=30)
+            r = self._request("GET", url, headers=self._headers(), params=params, timeout=30)
+        except RequestCancelled:
+            raise
         except Exception as e:
             raise ApiError(f"网络异常：{type(e).__name__}: {e}")
 
@@ -88,7 +213,7 @@ class AdminApiClient:
         url = f"{self.base_url}{path}"
         
         try:
-            r = httpx.get(url, headers=self._headers(), timeout=300)  # 5分钟超时
+            r = self._request("GET", url, headers=self._headers(), timeout=300)  # 5分钟超时
             if r.status_code == 401:
                 raise AuthError("需要重新登录")
             if r.status_code != 200:
@@ -104,8 +229,10 @@ class AdminApiClient:
         url = f"{self.base_url}{path}"
 
         try:
-            r = httpx.post(url, headers=self._headers(),
-                           content=json.dumps(payload), timeout=30)
+            r = self._request("POST", url, headers=self._headers(),
+                              content=json.dumps(payload), timeout=30)
+        except RequestCancelled:
+            raise
         except Exception as e:
             raise ApiError(f"网络异常：{type(e).__name__}: {e}")
 
@@ -116,8 +243,10 @@ class AdminApiClient:
         url = f"{self.base_url}{path}"
 
         try:
-            r = httpx.put(url, headers=self._headers(),
-                          content=json.dumps(payload), timeout=30)
+            r = self._request("PUT", url, headers=self._headers(),
+                              content=json.dumps(payload), timeout=30)
+        except RequestCancelled:
+            raise
         except Exception as e:
             raise ApiError(f"网络异常：{type(e).__name__}: {e}")
 
@@ -128,7 +257,9 @@ class AdminApiClient:
         url = f"{self.base_url}{path}"
 
         try:
-            r = httpx.delete(url, headers=self._headers(), timeout=30)
+            r = self._request("DELETE", url, headers=self._headers(), timeout=30)
+        except RequestCancelled:
+            raise
         except Exception as e:
             raise ApiError(f"网络异常：{type(e).__name__}: {e}")
 
@@ -639,13 +770,15 @@ class AdminApiClient:
         salary_ratio_filter: Optional[str] = None,
         sort_by: Optional[str] = "final_score",
         sort_order: Optional[str] = "desc",
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         GET /admin/api/monthly_scores
-        获取月度评分列表
+        获取月度评分列表（不传 offset/limit 时返回全部）
         返回格式：{"status": "success", "items": [...], "total": 0, "message": null}
         """
-        params = {}
+        params: Dict[str, Any] = {}
         if month:
             params["month"] = month
         if user_id:
@@ -656,6 +789,10 @@ class AdminApiClient:
             params["sort_by"] = sort_by
         if sort_order:
             params["sort_order"] = sort_order
+        if offset is not None:
+            params["offset"] = offset
+        if limit is not None:
+            params["limit"] = limit
         return self._get("/admin/api/monthly_scores", params=params if params else None)
     
     def lock_month_rank(self, month: str) -> Dict[str, Any]:
@@ -740,6 +877,143 @@ class AdminApiClient:
         except Exception as e:
             raise ApiError(f"网络异常：{type(e).__name__}: {e}")
 
+    DOWNLOAD_CHUNK_SIZE = 256 * 1024
+    DOWNLOAD_MAX_ATTEMPTS = 3
+
+    def download_report_to_file(
+        self,
+        log_id: int,
+        dest_path: str,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Optional[str]:
+        """
+        GET /admin/api/download_report/{log_id}
+        将报表流式写入 dest_path，返回后端提供的文件名（如果有）
+
+        - 先写入 dest_path + ".part"，下载完整后原子替换为目标文件
+        - .part 已存在（上次中断或取消）或传输中断时，用 HTTP Range 从已下载位置续传；
+          ETag/Last-Modified 保存在 .part.json，通过 If-Range 校验，服务器文件已变化时返回完整内容并从头写
+        - progress(已下载字节, 总字节)，总字节未知时为 0
+        - 取消（RequestCancelled）时保留 .part，下次下载同一路径时续传
+        """
+        url = f"{self.base_url}/admin/api/download_report/{log_id}"
+        dest = Path(dest_path)
+        part_path = dest.with_name(dest.name + ".part")
+        meta_path = dest.with_name(dest.name + ".part.json")
+        filename: Optional[str] = None
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.DOWNLOAD_MAX_ATTEMPTS):
+            if attempt:
+                time.sleep(2 ** (attempt - 1))  # 1s, 2s 退避后续传
+            meta = self._read_part_meta(meta_path, log_id) if part_path.exists() else None
+            offset = part_path.stat().st_size if meta is not None else 0
+            headers = self._headers()
+            # 续传按字节偏移计算，必须禁止压缩传输
+            headers["Accept-Encoding"] = "identity"
+            if offset:
+                headers["Range"] = f"bytes={offset}-"
+                etag = meta.get("etag") or ""
+                # If-Range 只接受强 ETag，弱 ETag 时改用 Last-Modified
+                validator = etag if etag and not etag.startswith("W/") else meta.get("last_modified")
+                if validator:
+                    headers["If-Range"] = validator
+            try:
+                with self._stream("GET", url, headers=headers, timeout=300, follow_redirects=True) as r:
+                    if r.status_code == 401:
+                        raise AuthError("需要重新登录")
+                    if r.status_code == 416:
+                        # 已下载部分与服务器文件不一致，丢弃后从头下载
+                        self._discard_part(part_path, meta_path)
+                        last_error = ApiError("下载失败: HTTP 416")
+                        continue
+                    if r.status_code not in (200, 206):
+                        raise ApiError(f"下载失败: HTTP {r.status_code}")
+
+                    filename = self._content_disposition_filename(r.headers) or filename
+                    total = 0
+                    if r.status_code == 206 and offset:
+                        start, total = self._parse_content_range(r.headers.get("content-range"))
+                        if start != offset:
+                            self._discard_part(part_path, meta_path)
+                            last_error = ApiError("下载失败: 续传位置不一致")
+                            continue
+                        mode = "ab"
+                    else:
+                        # 200：服务器不支持 Range 或文件已变化，从头写
+                        offset = 0
+                        total = int(r.headers.get("content-length") or 0)
+                        mode = "wb"
+                    dest.parent.mkdir(parents=True, exist_ok=True)
+                    meta_path.write_text(json.dumps({
+                        "log_id": log_id,
+                        "etag": r.headers.get("etag"),
+                        "last_modified": r.headers.get("last-modified"),
+                    }), encoding="utf-8")
+
+                    done = offset
+                    with open(part_path, mode) as f:
+                        if progress is not None:
+                            progress(done, total)
+                        for chunk in r.iter_bytes(self.DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                            done += len(chunk)
+                            if progress is not None:
+                                progress(done, total)
+                if total and done < total:
+                    last_error = ApiError(f"下载不完整：{done}/{total} 字节")
+                    continue
+                os.replace(part_path, dest)
+                meta_path.unlink(missing_ok=True)
+                return filename
+            except (ApiError, AuthError):
+                raise
+            except httpx.TransportError as e:
+                # 网络中断：保留已下载部分，下一轮续传
+                last_error = e
+            except OSError as e:
+                raise ApiError(f"写入文件失败：{e}")
+
+        if isinstance(last_error, ApiError):
+            raise last_error
+        raise ApiError(f"网络异常：{type(last_error).__name__}: {last_error}")
+
+    @staticmethod
+    def _read_part_meta(meta_path: Path, log_id: int) -> Optional[Dict[str, Any]]:
+        """读取续传信息；不存在、损坏或属于其他报表时返回 None（从头下载）"""
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not isinstance(meta, dict) or meta.get("log_id") != log_id:
+            return None
+        return meta
+
+    @staticmethod
+    def _discard_part(part_path: Path, meta_path: Path) -> None:
+        for path in (part_path, meta_path):
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _content_disposition_filename(headers: httpx.Headers) -> Optional[str]:
+        cd = headers.get("content-disposition")
+        if cd and "filename=" in cd:
+            return cd.split("filename=", 1)[1].strip().strip('"')
+        return None
+
+    @staticmethod
+    def _parse_content_range(value: Optional[str]) -> Tuple[int, int]:
+        """解析 "bytes 100-199/200"，返回 (起始偏移, 总字节)；总字节未知（*）时为 0"""
+        try:
+            unit_range, _, size = (value or "").partition("/")
+            start = int(unit_range.split()[-1].split("-")[0])
+            return start, int(size) if size.strip().isdigit() else 0
+        except (ValueError, IndexError):
+            return -1, 0
+
     def download_report(self, log_id: int) -> bytes:
         """
         兼容旧接口：仅返回报表二进制数据
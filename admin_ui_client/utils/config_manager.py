@@ -39,6 +39,8 @@ DEFAULT_CONFIG = {
     "notifications": True,
     # 日志保留时长（小时），默认仅保留最近 1 小时
     "log_retention_hours": 1,
+    # 审计日志本地全文索引最多保留的条数（超出淘汰最早的），0 表示关闭（默认关闭，需在设置页开启）
+    "log_search_index_max_entries": 0,
     "client_version": "1.1.2",  # 客户端版本号（格式：x.x.x）
     "update_dialog_dismissed_date": "",  # 非强制升级弹窗关闭的日期（格式：YYYY-MM-DD），用于当天不再弹出
     # SSH 配置（用于服务管理）
@@ -91,6 +93,7 @@ USER_DATA_FIELDS = {
     "auto_refresh",  # 自动刷新
     "notifications",  # 通知设置
     "log_retention_hours",  # 日志保留时长
+    "log_search_index_max_entries",  # 审计日志本地索引上限
     # 管理端特有的用户数据字段
     "ssh_host",
     "ssh_port",
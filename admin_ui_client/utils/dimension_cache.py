@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+维度数据缓存（团队、角色、职级、薪级、员工、GitHub Teams 等）
+
+- 两级缓存：内存在前、磁盘在后，磁盘文件每个进程只读一次，之后命中内存直接返回
+- 新鲜期内（默认 24 小时）直接使用；过期但未超过保留期时先返回旧值，
+  同时在后台刷新（stale-while-revalidate），同一 key 同时只刷新一次
+- 管理员修改员工/组长后调用 invalidate 使相关 key 失效
+- 磁盘使用紧凑 JSON（无缩进），原子替换写入；兼容旧版 ISO 时间格式的缓存文件
+
+线程约定：全部方法线程安全，且不触碰任何 Qt 对象，可在 Worker 或后台线程中调用。
+"""
+
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from utils.config_manager import CONFIG_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class DimensionCache:
+    """维度数据缓存（全局共享，类方法调用）"""
+
+    CACHE_DIR = CONFIG_PATH.parent / "cache"
+    FRESH_SECONDS = 24 * 3600  # 新鲜期
+    STALE_SECONDS = 7 * 24 * 3600  # 保留期：超过新鲜期但在此期限内可先用旧值再后台刷新
+
+    _lock = threading.Lock()
+    # cache_key -> (缓存时间戳, 数据)；已从磁盘确认不存在的 key 不放入
+    _memory: Dict[str, Tuple[float, Any]] = {}
+    # 已尝试从磁盘加载过的 key（无论是否存在），避免每次 get 都访问磁盘
+    _disk_checked: Set[str] = set()
+    _refreshing: Set[str] = set()
+    # 每次 invalidate 递增，后台刷新期间被失效时丢弃刷新结果
+    _invalidations: Dict[str, int] = {}
+
+    # ---------------- 读写 ----------------
+
+    @classmethod
+    def get(cls, cache_key: str, allow_stale: bool = False) -> Optional[Any]:
+        """获取缓存数据：默认只返回新鲜期内的数据，allow_stale 时保留期内的旧数据也返回"""
+        entry = cls._entry(cache_key)
+        if entry is None:
+            return None
+        age = time.time() - entry[0]
+        limit = cls.STALE_SECONDS if allow_stale else cls.FRESH_SECONDS
+        return entry[1] if age <= limit else None
+
+    @classmethod
+    def set(cls, cache_key: str, data: Any) -> None:
+        """写入内存并落盘（落盘失败不影响功能）"""
+        cached_at = time.time()
+        with cls._lock:
+            cls._memory[cache_key] = (cached_at, data)
+            cls._disk_checked.add(cache_key)
+        cls._write_disk(cache_key, cached_at, data)
+
+    @classmethod
+    def get_or_fetch(cls, cache_key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        获取数据，缓存不可用时调用 fetch() 拉取并写入缓存。
+
+        - 新鲜：直接返回
+        - 过期但在保留期内：立即返回旧值，后台线程调用 fetch() 刷新
+        - 缺失：同步调用 fetch()，异常直接抛给调用方
+        """
+        entry = cls._entry(cache_key)
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age <= cls.FRESH_SECONDS:
+                return entry[1]
+            if age <= cls.STALE_SECONDS:
+                cls._refresh_in_background(cache_key, fetch)
+                return entry[1]
+        data = fetch()
+        cls.set(cache_key, data)
+        return data
+
+    # ---------------- 失效 ----------------
+
+    @classmethod
+    def invalidate(cls, *cache_keys: str, prefix: Optional[str] = None) -> None:
+        """使指定 key（或以 prefix 开头的所有 key）失效，内存与磁盘同时删除"""
+        keys = set(cache_keys)
+        if prefix:
+            with cls._lock:
+                keys.update(k for k in cls._memory if k.startswith(prefix))
+            try:
+                if cls.CACHE_DIR.exists():
+                    keys.update(p.stem for p in cls.CACHE_DIR.glob(f"{prefix}*.json"))
+            except Exception as e:
+                logger.debug(f"[DimensionCache] 扫描缓存目录失败: {e}")
+        with cls._lock:
+            for key in keys:
+                cls._memory.pop(key, None)
+                cls._invalidations[key] = cls._invalidations.get(key, 0) + 1
+                # 标记为已检查：删除后无需再读磁盘
+                cls._disk_checked.add(key)
+        for key in keys:
+            try:
+                cls._path(key).unlink(missing_ok=True)
+            except Exception as e:
+                logger.debug(f"[DimensionCache] 删除缓存文件失败: {e}")
+
+    @classmethod
+    def clear(cls) -> None:
+        """清除全部缓存（设置页“清除缓存”），磁盘删除失败时抛出异常"""
+        with cls._lock:
+            for key in cls._memory:
+                cls._invalidations[key] = cls._invalidations.get(key, 0) + 1
+            cls._memory.clear()
+            cls._disk_checked.clear()
+        if cls.CACHE_DIR.exists() and cls.CACHE_DIR.is_dir():
+            for cache_file in cls.CACHE_DIR.iterdir():
+                if cache_file.is_file():
+                    cache_file.unlink()
+                elif cache_file.is_dir():
+                    shutil.rmtree(cache_file)
+
+    # ---------------- 内部实现 ----------------
+
+    @classmethod
+    def _path(cls, cache_key: str) -> Path:
+        return cls.CACHE_DIR / f"{cache_key}.json"
+
+    @classmethod
+    def _entry(cls, cache_key: str) -> Optional[Tuple[float, Any]]:
+        with cls._lock:
+            entry = cls._memory.get(cache_key)
+            if entry is not None or cache_key in cls._disk_checked:
+                return entry
+        entry = cls._read_disk(cache_key)
+        with cls._lock:
+            # 读盘期间其他线程可能已写入更新的数据
+            if cache_key in cls._disk_checked:
+                return cls._memory.get(cache_key)
+            cls._disk_checked.add(cache_key)
+            if entry is not None:
+                cls._memory[cache_key] = entry
+        return entry
+
+    @classmethod
+    def _read_disk(cls, cache_key: str) -> Optional[Tuple[float, Any]]:
+        cache_path = cls._path(cache_key)
+        if not cache_path.exists():
+            return None
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache_data = json.load(f)
+            cached_at = cache_data.get('cached_at')
+            if isinstance(cached_at, str):
+                # 旧版缓存文件：ISO 时间字符串
+                cached_at = datetime.fromisoformat(cached_at).timestamp()
+            if not isinstance(cached_at, (int, float)):
+                return None
+            return float(cached_at), cache_data.get('data')
+        except Exception:
+            # 缓存文件损坏，删除它
+            try:
+                cache_path.unlink()
+            except Exception:
+                pass
+            return None
+
+    @classmethod
+    def _write_disk(cls, cache_key: str, cached_at: float, data: Any) -> None:
+        cache_path = cls._path(cache_key)
+        tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+        try:
+            cls.CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'cached_at': cached_at, 'data': data}, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            # 缓存写入失败不影响功能，只记录日志
+            logger.debug(f"[DimensionCache] 写入缓存失败 {cache_key}: {e}")
+
+    @classmethod
+    def _refresh_in_background(cls, cache_key: str, fetch: Callable[[], Any]) -> None:
+        with cls._lock:
+            if cache_key in cls._refreshing:
+                return
+            cls._refreshing.add(cache_key)
+            version = cls._invalidations.get(cache_key, 0)
+
+        def _run():
+            try:
+                data = fetch()
+                with cls._lock:
+                    stale = cls._invalidations.get(cache_key, 0) != version
+                if not stale:
+                    cls.set(cache_key, data)
+            except Exception as e:
+                logger.debug(f"[DimensionCache] 后台刷新失败 {cache_key}: {e}")
+            finally:
+                with cls._lock:
+                    cls._refreshing.discard(cache_key)
+
+        threading.Thread(target=_run, name=f"dimension-cache-{cache_key}", daemon=True).start()
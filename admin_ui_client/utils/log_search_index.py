@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+审计日志本地全文索引（操作日志 / AI 调用日志 / ETL 日志）
+
+- 各日志页面的 Worker 每拉到一页就写入索引，本地搜索只覆盖已加载过的日志
+- SQLite FTS5 建索引：路径/模型/任务名、管理员邮箱/用户ID、请求/响应内容、错误信息
+- 优先使用 trigram 分词（支持中文和任意子串），SQLite 版本过旧时退回 unicode61；
+  trigram 下不足 3 个字符的关键词改用 LIKE 匹配
+- 条数上限由配置项 log_search_index_max_entries 控制，超出时淘汰最早写入的；0 表示关闭（默认）
+- 数据库为明文存储，写入前对密码/令牌/密钥/Cookie 等敏感字段脱敏（redact），原始数据和索引文本都不落盘
+- 当前 SQLite 不支持 FTS5 时整个功能不可用（available 为 False），页面隐藏搜索框
+
+线程约定：全部方法线程安全（单连接 + 锁），不触碰任何 Qt 对象，可在 Worker 线程中调用。
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.config_manager import CONFIG_PATH, ConfigManager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LogSearchDoc:
+    """一条待索引的日志"""
+    key: str  # 同一来源内唯一（通常为日志 id），重复写入时覆盖
+    created_at: str  # 用于按时间倒序返回搜索结果
+    path: str = ""
+    actor: str = ""
+    body: str = ""
+    error: str = ""
+    item: Dict[str, Any] = field(default_factory=dict)  # 原始数据，搜索结果直接返回给表格
+
+
+def doc_key(item: Dict[str, Any]) -> str:
+    """日志唯一键：优先使用 id，没有 id 时用内容摘要"""
+    log_id = item.get("id")
+    if log_id is not None and log_id != "":
+        return str(log_id)
+    raw = json.dumps(item, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def json_text(*values: Any) -> str:
+    """把请求/响应等 JSON 字段拼成可索引的文本（空值跳过）"""
+    parts = []
+    for value in values:
+        if value is None or value == "" or value == {} or value == []:
+            continue
+        parts.append(value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str))
+    return "\n".join(parts)
+
+
+# 敏感字段名（去掉非字母数字后比较，如 access_token / X-Api-Key / Set-Cookie）
+_SENSITIVE_KEY_SUFFIXES = (
+    "password", "passwd", "pwd", "secret", "token", "apikey", "authorization",
+    "cookie", "credential", "credentials", "privatekey", "sessionid", "signature",
+)
+# 文本中的 key=value / "key": "value" 形式；token 后紧跟字母（如 max_tokens）不匹配
+_SENSITIVE_TEXT = re.compile(
+    r'(?i)((?:[a-z0-9_\-]*)(?:password|passwd|pwd|secret|token|api[_\-]?key|authorization|cookie|credentials?'
+    r'|private[_\-]?key|session[_\-]?id|signature)"?\s*[:=]\s*)("(?:[^"\\]|\\.)*"|[^\s,&;}\]]+)'
+)
+_BEARER_TEXT = re.compile(r"(?i)\b(bearer|basic)\s+[A-Za-z0-9\-._~+/]+=*")
+REDACTED = "***"
+
+
+def _is_sensitive_key(key: Any) -> bool:
+    norm = re.sub(r"[^a-z0-9]", "", str(key).lower())
+    return norm.endswith(_SENSITIVE_KEY_SUFFIXES)
+
+
+def redact_text(text: str) -> str:
+    """脱敏自由文本（JSON 字符串、查询参数、日志消息等）"""
+    # 先处理 Bearer/Basic 凭据，避免 "Authorization: Bearer xxx" 只替换掉 Bearer
+    text = _BEARER_TEXT.sub(lambda m: f"{m.group(1)} {REDACTED}", text)
+    return _SENSITIVE_TEXT.sub(
+        lambda m: m.group(1) + ('"***"' if m.group(2).startswith('"') else REDACTED), text
+    )
+
+
+def redact(value: Any) -> Any:
+    """递归脱敏：敏感字段名的值替换为 ***，字符串按 redact_text 处理"""
+    if isinstance(value, dict):
+        return {k: (REDACTED if _is_sensitive_key(k) and v not in (None, "") else redact(v)) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    if isinstance(value, str):
+        return redact_text(value)
+    return value
+
+
+class LogSearchIndex:
+    """审计日志本地全文索引，通过 LogSearchIndex.instance() 获取"""
+
+    DEFAULT_MAX_ENTRIES = 0  # 默认关闭，需在设置页开启
+    MAX_BODY_CHARS = 64 * 1024  # 单条日志请求/响应文本最多索引的字符数，避免超大 AI 响应撑大数据库
+
+    _instance: Optional["LogSearchIndex"] = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> "LogSearchIndex":
+        with cls._instance_lock:
+            if cls._instance is None:
+                try:
+                    max_entries = int(ConfigManager.load().get("log_search_index_max_entries", cls.DEFAULT_MAX_ENTRIES))
+                except Exception:
+                    max_entries = cls.DEFAULT_MAX_ENTRIES
+                cls._instance = cls(CONFIG_PATH.parent / "log_index" / "audit_logs.sqlite3", max_entries)
+            return cls._instance
+
+    def __init__(self, db_path: Path, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self._db_path = db_path
+        self._max_entries = max(0, int(max_entries))
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._trigram = False
+        self._available = True  # 打开数据库或创建 FTS5 表失败后置为 False
+        # 连接延迟到第一次使用时创建
+
+    # ---------------- 状态 ----------------
+
+    @property
+    def available(self) -> bool:
+        """当前环境是否支持（SQLite 含 FTS5 且数据库可打开）"""
+        with self._lock:
+            return self._ensure_conn()
+
+    @property
+    def enabled(self) -> bool:
+        """已开启（上限大于 0）且可用；关闭状态下不创建数据库文件"""
+        return self._max_entries > 0 and self.available
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries
+
+    def set_max_entries(self, max_entries: int) -> None:
+        """修改条数上限（设置页调用），超出部分立即淘汰；设为 0 时清空索引"""
+        self._max_entries = max(0, int(max_entries))
+        if self._max_entries == 0:
+            self.clear()
+            return
+        with self._lock:
+            if self._ensure_conn():
+                self._run(self._prune)
+
+    # ---------------- 写入 ----------------
+
+    def add(self, source: str, docs: Iterable[LogSearchDoc]) -> None:
+        """写入一批日志（同一来源内按 key 覆盖），失败只记录日志，不影响页面加载"""
+        if not self.enabled:
+            return
+        docs = list(docs)
+        if not docs:
+            return
+        with self._lock:
+            if not self._ensure_conn():
+                return
+            self._run(lambda conn: self._add(conn, source, docs))
+
+    def _add(self, conn: sqlite3.Connection, source: str, docs: List[LogSearchDoc]) -> None:
+        with conn:
+            for doc in docs:
+                # 原始数据与索引文本都先脱敏再落盘
+                item_json = json.dumps(redact(doc.item), ensure_ascii=False, default=str)
+                row = conn.execute(
+                    "SELECT id FROM log_entries WHERE source = ? AND entry_key = ?", (source, doc.key)
+                ).fetchone()
+                if row is not None:
+                    entry_id = row[0]
+                    conn.execute(
+                        "UPDATE log_entries SET created_at = ?, item_json = ? WHERE id = ?",
+                        (doc.created_at, item_json, entry_id),
+                    )
+                    conn.execute("DELETE FROM log_fts WHERE rowid = ?", (entry_id,))
+                else:
+                    entry_id = conn.execute(
+                        "INSERT INTO log_entries (source, entry_key, created_at, item_json) VALUES (?, ?, ?, ?)",
+                        (source, doc.key, doc.created_at, item_json),
+                    ).lastrowid
+                conn.execute(
+                    "INSERT INTO log_fts (rowid, path, actor, body, error) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        entry_id,
+                        redact_text(doc.path or ""),
+                        doc.actor or "",
+                        redact_text((doc.body or "")[:self.MAX_BODY_CHARS]),
+                        redact_text(doc.error or ""),
+                    ),
+                )
+        self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """超出上限时删除最早写入的条目"""
+        count = conn.execute("SELECT COUNT(*) FROM log_entries").fetchone()[0]
+        excess = count - self._max_entries
+        if excess <= 0:
+            return
+        with conn:
+            conn.execute(
+                "DELETE FROM log_fts WHERE rowid IN (SELECT id FROM log_entries ORDER BY id LIMIT ?)", (excess,)
+            )
+            conn.execute("DELETE FROM log_entries WHERE id IN (SELECT id FROM log_entries ORDER BY id LIMIT ?)", (excess,))
+
+    # ---------------- 查询 ----------------
+
+    def search(self, source: str, query: str, offset: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """在指定来源中搜索，多个关键词（空格分隔）需同时命中，结果按时间倒序"""
+        terms = [t for t in (query or "").split() if t]
+        if not terms or not self.enabled:
+            return []
+        with self._lock:
+            if not self._ensure_conn():
+                return []
+            rows = self._run(lambda conn: self._search(conn, source, terms, offset, limit)) or []
+        items = []
+        for (item_json,) in rows:
+            try:
+                items.append(json.loads(item_json))
+            except ValueError:
+                continue
+        return items
+
+    def _search(self, conn: sqlite3.Connection, source: str, terms: List[str], offset: int, limit: int):
+        # trigram 分词要求关键词至少 3 个字符，更短的关键词退回 LIKE（数据量受上限约束，扫描可接受）
+        if self._trigram and any(len(t) < 3 for t in terms):
+            conditions = []
+            params: List[Any] = [source]
+            for term in terms:
+                pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+                conditions.append(
+                    "(f.path LIKE ? ESCAPE '\\' OR f.actor LIKE ? ESCAPE '\\' "
+                    "OR f.body LIKE ? ESCAPE '\\' OR f.error LIKE ? ESCAPE '\\')"
+                )
+                params.extend([pattern] * 4)
+            where = " AND ".join(conditions)
+        else:
+            # 每个关键词作为短语匹配，避免用户输入被解析成 FTS 语法
+            where = "log_fts MATCH ?"
+            params = [source, " AND ".join('"' + t.replace('"', '""') + '"' for t in terms)]
+        sql = (
+            "SELECT e.item_json FROM log_fts f JOIN log_entries e ON e.id = f.rowid "
+            f"WHERE e.source = ? AND {where} ORDER BY e.created_at DESC, e.id DESC LIMIT ? OFFSET ?"
+        )
+        return conn.execute(sql, params + [limit, offset]).fetchall()
+
+    # ---------------- 清理 ----------------
+
+    def clear(self) -> None:
+        """清空索引（设置页“清除缓存”或关闭索引时调用）"""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._run(self._clear)
+
+    @staticmethod
+    def _clear(conn: sqlite3.Connection) -> None:
+        with conn:
+            conn.execute("DELETE FROM log_fts")
+            conn.execute("DELETE FROM log_entries")
+        conn.execute("VACUUM")
+
+    # ---------------- 内部实现（调用方持有 _lock） ----------------
+
+    def _run(self, fn):
+        try:
+            return fn(self._conn)
+        except sqlite3.Error as e:
+            logger.warning(f"[LogSearchIndex] 索引操作失败: {e}")
+            return None
+
+    def _ensure_conn(self) -> bool:
+        if self._conn is not None:
+            return True
+        if not self._available:
+            return False
+        try:
+            self._db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self._db_path), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS log_entries ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, source TEXT NOT NULL, entry_key TEXT NOT NULL, "
+                "created_at TEXT NOT NULL DEFAULT '', item_json TEXT NOT NULL, UNIQUE (source, entry_key))"
+            )
+            self._trigram = self._create_fts(conn)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"[LogSearchIndex] 本地日志索引不可用: {e}")
+            self._available = False
+            return False
+        self._conn = conn
+        return True
+
+    @staticmethod
+    def _create_fts(conn: sqlite3.Connection) -> bool:
+        """创建 FTS5 表，返回是否使用 trigram 分词（已存在时按原表定义判断）"""
+        row = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'log_fts'").fetchone()
+        if row is not None:
+            return "trigram" in (row[0] or "")
+        try:
+            conn.execute("CREATE VIRTUAL TABLE log_fts USING fts5(path, actor, body, error, tokenize = 'trigram')")
+            return True
+        except sqlite3.OperationalError:
+            # SQLite < 3.34 没有 trigram 分词器
+            conn.execute("CREATE VIRTUAL TABLE log_fts USING fts5(path, actor, body, error, tokenize = 'unicode61')")
+            return False
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式表格导出（CSV / XLSX / JSON）
+
+- 逐行写入，内存占用与总行数无关，适合分页拉取后边拉边写
+- 先写入同目录的临时文件，commit() 时原子替换为目标文件；abort() 删除临时文件
+- XLSX 直接用 zipfile 流式写出最小工作簿（内联字符串，无共享字符串表），不依赖 openpyxl
+
+线程约定：不触碰任何 Qt 对象，可在 Worker 线程中使用。
+"""
+
+import abc
+import csv
+import json
+import math
+import os
+import re
+import zipfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+# (字段名, 表头)
+ExportColumn = Tuple[str, str]
+
+EXPORT_FORMATS = ("csv", "xlsx", "json")
+
+
+def export_format_for_path(path: str, default: str = "csv") -> str:
+    """根据文件扩展名判断导出格式"""
+    suffix = Path(path).suffix.lower().lstrip(".")
+    return suffix if suffix in EXPORT_FORMATS else default
+
+
+class TabularExportWriter(abc.ABC):
+    """流式导出基类：write_row() 逐行写入，commit() 完成，abort() 放弃"""
+
+    def __init__(self, path: str, columns: Sequence[ExportColumn], meta: Optional[Dict[str, Any]] = None):
+        self._path = Path(path)
+        self._tmp_path = self._path.with_name(self._path.name + ".part")
+        self._columns = list(columns)
+        self._meta = dict(meta or {})
+        self._row_count = 0
+        self._closed = False
+        self._open()
+
+    @property
+    def row_count(self) -> int:
+        return self._row_count
+
+    def write_row(self, row: Dict[str, Any]) -> None:
+        self._write_values([row.get(key) for key, _ in self._columns], row)
+        self._row_count += 1
+
+    def commit(self) -> None:
+        """写完收尾并原子替换目标文件"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._finish()
+        except Exception:
+            self._discard()
+            raise
+        os.replace(self._tmp_path, self._path)
+
+    def abort(self) -> None:
+        """放弃导出，删除临时文件（目标文件保持原样）"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._finish()
+        except Exception:
+            pass
+        self._discard()
+
+    def __enter__(self) -> "TabularExportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # 正常退出但未 commit 视为放弃，避免留下半截文件
+        self.abort()
+
+    def _discard(self) -> None:
+        try:
+            self._tmp_path.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    # 子类实现
+    @abc.abstractmethod
+    def _open(self) -> None:
+        """创建临时文件并写入表头"""
+
+    @abc.abstractmethod
+    def _write_values(self, values: List[Any], row: Dict[str, Any]) -> None:
+        """写入一行（values 与列定义一一对应）"""
+
+    @abc.abstractmethod
+    def _finish(self) -> None:
+        """写入收尾内容并关闭临时文件"""
+
+
+class CsvExportWriter(TabularExportWriter):
+    """CSV：UTF-8 带 BOM，Excel 直接打开中文不乱码"""
+
+    def _open(self) -> None:
+        self._file = open(self._tmp_path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([header for _, header in self._columns])
+
+    def _write_values(self, values: List[Any], row: Dict[str, Any]) -> None:
+        self._writer.writerow(["" if v is None else v for v in values])
+
+    def _finish(self) -> None:
+        self._file.close()
+
+
+class JsonExportWriter(TabularExportWriter):
+    """JSON：meta 字段在前，data 数组逐条追加，total_count 写在最后"""
+
+    def _open(self) -> None:
+        self._file = open(self._tmp_path, "w", encoding="utf-8")
+        self._file.write("{\n")
+        for key, value in self._meta.items():
+            self._file.write(f"  {json.dumps(key, ensure_ascii=False)}: {json.dumps(value, ensure_ascii=False)},\n")
+        self._file.write('  "data": [')
+
+    def _write_values(self, values: List[Any], row: Dict[str, Any]) -> None:
+        item = {key: value for (key, _), value in zip(self._columns, values)}
+        self._file.write(("," if self._row_count else "") + "\n    " + json.dumps(item, ensure_ascii=False))
+
+    def _finish(self) -> None:
+        self._file.write(("\n  " if self._row_count else "") + f'],\n  "total_count": {self._row_count}\n}}\n')
+        self._file.close()
+
+
+# XML 1.0 不允许的控制字符
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+_XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+_XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+class XlsxExportWriter(TabularExportWriter):
+    """XLSX：单工作表，数值写为数字单元格，其余写为内联字符串"""
+
+    SHEET_NAME = "Sheet1"
+
+    def _open(self) -> None:
+        self._zip = zipfile.ZipFile(self._tmp_path, "w", compression=zipfile.ZIP_DEFLATED)
+        sheet_name = escape(str(self._meta.get("sheet_name") or self.SHEET_NAME)[:31], {'"': "&quot;"})
+        # 工作表流打开期间不能写其他条目，静态部分先写
+        self._zip.writestr("[Content_Types].xml", _XLSX_CONTENT_TYPES)
+        self._zip.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        self._zip.writestr("xl/workbook.xml", _XLSX_WORKBOOK.format(sheet_name=sheet_name))
+        self._zip.writestr("xl/_rels/workbook.xml.rels", _XLSX_WORKBOOK_RELS)
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+        self._sheet.write(
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+        )
+        self._write_cells([header for _, header in self._columns])
+
+    def _write_values(self, values: List[Any], row: Dict[str, Any]) -> None:
+        self._write_cells(values)
+
+    def _write_cells(self, values: Sequence[Any]) -> None:
+        cells = []
+        for value in values:
+            if value is None:
+                cells.append("<c/>")
+            elif isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+                cells.append(f"<c><v>{value!r}</v></c>")
+            else:
+                text = escape(_XML_ILLEGAL.sub("", str(value)))
+                cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+        self._sheet.write(f"<row>{''.join(cells)}</row>".encode("utf-8"))
+
+    def _finish(self) -> None:
+        try:
+            self._sheet.write(b"</sheetData></worksheet>")
+            self._sheet.close()
+        finally:
+            self._zip.close()
+
+
+_WRITERS = {
+    "csv": CsvExportWriter,
+    "xlsx": XlsxExportWriter,
+    "json": JsonExportWriter,
+}
+
+
+def open_export_writer(
+    path: str,
+    columns: Sequence[ExportColumn],
+    export_format: Optional[str] = None,
+    meta: Optional[Dict[str, Any]] = None,
+) -> TabularExportWriter:
+    """按格式（缺省按扩展名）创建流式导出写入器"""
+    export_format = export_format or export_format_for_path(path)
+    writer_cls = _WRITERS.get(export_format)
+    if writer_cls is None:
+        raise ValueError(f"不支持的导出格式：{export_format}")
+    return writer_cls(path, columns, meta)
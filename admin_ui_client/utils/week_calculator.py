@@ -7,21 +7,23 @@
 周数计算规则：
 - 基准：2025年11月第一个工作日（11-03）所在周是第6周
 - 周数从第6周开始（11月第一个工作日所在周），一直到现在的周数（自动算）
+
+周内工作日（get_week_workdays）使用 utils.workday_calendar 中已加载的日历（未加载时按周一至周五），
+周数基准固定按默认规则计算，不随日历调整变化。
 """
 
 from datetime import date, timedelta
-from typing import Tuple
+from typing import List, Tuple
 
 
-# 基准：2025年11月第一个工作日（11-03）所在周是第6周
-# 使用简单的默认规则：周一至周五为工作日
 def _is_workday(target_date: date) -> bool:
     """简单的默认规则：周一至周五为工作日"""
     weekday = target_date.weekday()  # 0=周一，6=周日
     return weekday < 5  # 周一至周五（0-4）为工作日
 
 
-# 找到11月第一个工作日
+# 基准：2025年11月第一个工作日（11-03）所在周是第6周
+# 找到11月第一个工作日（固定使用默认规则，保证周数基准稳定）
 NOV_FIRST_WORKDAY = None
 for day in range(1, 8):  # 检查11月1-7日
     test_date = date(2025, 11, day)
@@ -87,6 +89,21 @@ def get_week_date_range(week_number: int) -> Tuple[date, date]:
     return target_week_monday, target_week_sunday
 
 
+def get_week_workdays(week_number: int) -> List[date]:
+    """
+    获取指定周内的工作日（按工作日日历）
+    
+    Args:
+        week_number: 周数（从1开始）
+        
+    Returns:
+        该周的工作日列表（按日期升序），整周放假时为空
+    """
+    from utils.workday_calendar import WorkdayCalendar
+    week_start, week_end = get_week_date_range(week_number)
+    return WorkdayCalendar.workdays_between(week_start, week_end)
+
+
 def get_current_week_number() -> int:
     """
     获取当前日期是第几周
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+工作日日历本地存储（后端 /admin/api/workdays 的整年缓存）
+
+- 按整年加载：每年只请求一次，之后翻页/跳转直接读内存；“刷新”时强制重新加载
+- 加载后预计算 日期 -> (是否工作日, 备注) 查找表，报表按周取工作日（week_calculator.get_week_workdays）直接查表
+- 编辑先写入本地并进入待提交队列，flush() 时把连续且取值相同的日期合并为区间，
+  每个区间一次 batch_update_workdays（连续设置同一状态时只需一次请求）
+- 提交失败时丢弃对应编辑并把涉及的年份标记为待重新加载，以后端为准
+- 未加载的年份、或后端没有记录的日期按默认规则（周一至周五为工作日）
+
+线程约定：全部方法线程安全，且不触碰任何 Qt 对象，可在 Worker 或后台线程中调用。
+"""
+
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from utils.api_client import AdminApiClient, ApiError
+
+logger = logging.getLogger(__name__)
+
+
+def default_is_workday(target_date: date) -> bool:
+    """默认规则：周一至周五为工作日"""
+    return target_date.weekday() < 5
+
+
+@dataclass(frozen=True)
+class WorkdayInfo:
+    """某一天的日历信息"""
+    is_workday: bool
+    note: str = ""
+    known: bool = False  # 后端（或本地待提交编辑）有记录；False 表示按默认规则推算
+
+
+@dataclass(frozen=True)
+class WorkdayRange:
+    """一次批量提交：start_date ~ end_date（含）统一设为 is_workday"""
+    start_date: date
+    end_date: date
+    is_workday: bool
+    note: Optional[str] = None
+
+
+class WorkdayCalendar:
+    """工作日日历（全局共享，类方法调用）"""
+
+    _lock = threading.Lock()
+    _items: Dict[date, Dict[str, Any]] = {}  # 后端记录（叠加了本地编辑）
+    _lookup: Dict[date, WorkdayInfo] = {}  # 已加载年份的逐日查找表
+    _loaded_years: Set[int] = set()
+    _preloading: Set[int] = set()
+    # 本地编辑：尚未提交 / 正在提交；重新加载年份时叠加在后端数据之上，避免被旧数据覆盖
+    _pending: Dict[date, Tuple[bool, Optional[str]]] = {}
+    _in_flight: Dict[date, Tuple[bool, Optional[str]]] = {}
+
+    # ---------------- 加载 ----------------
+
+    @classmethod
+    def is_year_loaded(cls, year: int) -> bool:
+        with cls._lock:
+            return year in cls._loaded_years
+
+    @classmethod
+    def load_years(cls, client: AdminApiClient, years: Iterable[int], force: bool = False) -> None:
+        """加载指定年份（已加载的跳过，force 时重新加载），失败抛出 ApiError"""
+        with cls._lock:
+            todo = sorted({int(y) for y in years if force or int(y) not in cls._loaded_years})
+        for year in todo:
+            data = client.get_workdays(start_date=date(year, 1, 1), end_date=date(year, 12, 31))
+            if not isinstance(data, dict) or data.get("status") != "success":
+                message = data.get("message") if isinstance(data, dict) else None
+                raise ApiError(message or f"获取 {year} 年工作日失败")
+            cls._store_year(year, data.get("items") or [])
+
+    @classmethod
+    def preload_in_background(cls, years: Iterable[int]) -> None:
+        """后台线程加载（报表等页面启动时调用，已登录才加载，失败只记录日志）"""
+        with cls._lock:
+            todo = {int(y) for y in years} - cls._loaded_years - cls._preloading
+            if not todo:
+                return
+            cls._preloading.update(todo)
+
+        def _run():
+            try:
+                if AdminApiClient.is_logged_in():
+                    cls.load_years(AdminApiClient.from_config(), todo)
+            except Exception as e:
+                logger.debug(f"[WorkdayCalendar] 预加载工作日失败: {e}")
+            finally:
+                with cls._lock:
+                    cls._preloading.difference_update(todo)
+
+        threading.Thread(target=_run, name="workday-calendar-preload", daemon=True).start()
+
+    @classmethod
+    def invalidate_years(cls, years: Optional[Iterable[int]] = None) -> None:
+        """标记年份待重新加载（None 表示全部）；已有数据保留到重新加载完成，避免页面闪空"""
+        with cls._lock:
+            if years is None:
+                cls._loaded_years.clear()
+            else:
+                cls._loaded_years.difference_update(int(y) for y in years)
+
+    # ---------------- 查询 ----------------
+
+    @classmethod
+    def info(cls, target_date: date) -> WorkdayInfo:
+        """某一天的工作日状态（未加载的年份按默认规则）"""
+        with cls._lock:
+            info = cls._lookup.get(target_date)
+            if info is not None:
+                return info
+            item = cls._items.get(target_date)
+        return cls._make_info(target_date, item)
+
+    @classmethod
+    def is_workday(cls, target_date: date) -> bool:
+        return cls.info(target_date).is_workday
+
+    @classmethod
+    def workdays_between(cls, start_date: date, end_date: date) -> List[date]:
+        """start_date ~ end_date（含）之间的工作日"""
+        days = []
+        current = start_date
+        while current <= end_date:
+            if cls.is_workday(current):
+                days.append(current)
+            current += timedelta(days=1)
+        return days
+
+    @classmethod
+    def items_between(cls, start_date: date, end_date: date) -> Dict[date, Dict[str, Any]]:
+        """区间内有记录的日期（日历页面显示用，返回副本）"""
+        with cls._lock:
+            return {d: dict(item) for d, item in cls._items.items() if start_date <= d <= end_date}
+
+    # ---------------- 编辑 ----------------
+
+    @classmethod
+    def stage_edit(cls, start_date: date, end_date: date, is_workday: bool, note: Optional[str] = None) -> None:
+        """本地修改 start_date ~ end_date（含），立即生效并等待 flush() 提交"""
+        with cls._lock:
+            current = start_date
+            while current <= end_date:
+                cls._pending[current] = (bool(is_workday), note)
+                cls._apply_locked(current, bool(is_workday), note)
+                current += timedelta(days=1)
+
+    @classmethod
+    def pending_count(cls) -> int:
+        with cls._lock:
+            return len(cls._pending)
+
+    @classmethod
+    def flush(cls, client: AdminApiClient) -> int:
+        """
+        提交全部待提交编辑，返回请求次数。
+        某个区间失败时其余区间不再提交，涉及的年份标记为待重新加载，异常抛给调用方。
+        """
+        with cls._lock:
+            edits = dict(cls._pending)
+            cls._pending.clear()
+            cls._in_flight.update(edits)
+        ranges = cls._coalesce(edits)
+        try:
+            for index, edit_range in enumerate(ranges):
+                try:
+                    data = client.batch_update_workdays(
+                        edit_range.start_date, edit_range.end_date, edit_range.is_workday, edit_range.note
+                    )
+                    if not isinstance(data, dict) or data.get("status") != "success":
+                        message = data.get("message") if isinstance(data, dict) else None
+                        raise ApiError(message or "批量设置工作日失败")
+                except Exception:
+                    years = set()
+                    for failed in ranges[index:]:
+                        years.update(range(failed.start_date.year, failed.end_date.year + 1))
+                    cls.invalidate_years(years)
+                    raise
+        finally:
+            with cls._lock:
+                for day, edit in edits.items():
+                    if cls._in_flight.get(day) == edit:
+                        del cls._in_flight[day]
+        return len(ranges)
+
+    @staticmethod
+    def _coalesce(edits: Dict[date, Tuple[bool, Optional[str]]]) -> List[WorkdayRange]:
+        """把连续且取值相同的日期合并为区间"""
+        ranges: List[WorkdayRange] = []
+        for day in sorted(edits):
+            is_workday, note = edits[day]
+            last = ranges[-1] if ranges else None
+            if (
+                last is not None
+                and last.end_date + timedelta(days=1) == day
+                and last.is_workday == is_workday
+                and last.note == note
+            ):
+                ranges[-1] = WorkdayRange(last.start_date, day, is_workday, note)
+            else:
+                ranges.append(WorkdayRange(day, day, is_workday, note))
+        return ranges
+
+    # ---------------- 内部实现 ----------------
+
+    @classmethod
+    def _store_year(cls, year: int, items: List[Dict[str, Any]]) -> None:
+        year_items: Dict[date, Dict[str, Any]] = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            day = item.get("date")
+            try:
+                if isinstance(day, str):
+                    day = datetime.fromisoformat(day).date()
+            except ValueError:
+                continue
+            if isinstance(day, date) and day.year == year:
+                year_items[day] = item
+
+        with cls._lock:
+            for day in [d for d in cls._items if d.year == year]:
+                del cls._items[day]
+            cls._items.update(year_items)
+            # 未提交/提交中的本地编辑以本地为准
+            for edits in (cls._in_flight, cls._pending):
+                for day, (is_workday, note) in edits.items():
+                    if day.year == year:
+                        cls._apply_locked(day, is_workday, note)
+
+            current = date(year, 1, 1)
+            while current.year == year:
+                cls._lookup[current] = cls._make_info(current, cls._items.get(current))
+                current += timedelta(days=1)
+            cls._loaded_years.add(year)
+
+    @classmethod
+    def _apply_locked(cls, day: date, is_workday: bool, note: Optional[str]) -> None:
+        item = dict(cls._items.get(day) or {"date": day.isoformat()})
+        item["is_workday"] = is_workday
+        item["note"] = note or ""
+        cls._items[day] = item
+        cls._lookup[day] = cls._make_info(day, item)
+
+    @staticmethod
+    def _make_info(day: date, item: Optional[Dict[str, Any]]) -> WorkdayInfo:
+        if item is None:
+            return WorkdayInfo(default_is_workday(day))
+        return WorkdayInfo(
+            bool(item.get("is_workday", default_is_workday(day))),
+            str(item.get("note") or ""),
+            True,
+        )
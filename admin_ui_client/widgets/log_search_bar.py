@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+日志页面的本地搜索栏（配合 utils.log_search_index 使用）
+
+输入停顿后才发出 query_changed，避免每敲一个字就重新查询；
+搜索本身由 LogSearchWorker 在后台线程执行（短关键词会退回 LIKE 扫描，不能阻塞界面）。
+"""
+
+from PySide6.QtWidgets import QHBoxLayout, QLabel, QLineEdit, QWidget
+from PySide6.QtCore import QObject, QRunnable, QTimer, Signal, Slot
+
+from utils.log_search_index import LogSearchIndex
+
+
+class _LogSearchWorkerSignals(QObject):
+    finished = Signal(int, int, list)  # generation, offset, List[Dict]
+
+
+class LogSearchWorker(QRunnable):
+    """后台线程：从本地索引取一页搜索结果（参数与 PagedTableModel.page_loaded 对应）"""
+    def __init__(self, source: str, query: str, generation: int, offset: int, limit: int):
+        super().__init__()
+        self._source = source
+        self._query = query
+        self._generation = generation
+        self._offset = offset
+        self._limit = limit
+        self.signals = _LogSearchWorkerSignals()
+
+    @Slot()
+    def run(self) -> None:
+        # search 内部已吞掉 SQLite 异常（返回空列表）
+        items = LogSearchIndex.instance().search(self._source, self._query, self._offset, self._limit)
+        self.signals.finished.emit(self._generation, self._offset, items)
+
+
+class LogSearchBar(QWidget):
+    """本地全文搜索输入框"""
+
+    query_changed = Signal(str)  # 去除首尾空白后的关键词，清空时为空字符串
+
+    DEBOUNCE_MS = 200
+
+    def __init__(self, placeholder: str, parent=None):
+        super().__init__(parent)
+        self._last_query = ""
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(6)
+
+        layout.addWidget(QLabel("本地搜索："))
+        self._edit = QLineEdit()
+        self._edit.setPlaceholderText(placeholder)
+        self._edit.setClearButtonEnabled(True)
+        self._edit.setFixedHeight(28)
+        self._edit.textChanged.connect(self._on_text_changed)
+        layout.addWidget(self._edit, 1)
+
+        hint = QLabel("仅搜索本机已加载过的日志，多个关键词用空格分隔")
+        hint.setStyleSheet("color: #666;")
+        layout.addWidget(hint)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DEBOUNCE_MS)
+        self._timer.timeout.connect(self._emit_query)
+
+    def refresh_visibility(self):
+        """
+        按本地索引是否开启显示/隐藏（页面显示时调用，设置页开关后无需重启）；
+        关闭时若正在搜索则清空关键词并发出 query_changed("")，页面恢复服务器数据
+        """
+        enabled = LogSearchIndex.instance().enabled
+        self.setVisible(enabled)
+        if not enabled and self._last_query:
+            self.clear_silently()
+            self.query_changed.emit("")
+
+    def query(self) -> str:
+        return self._edit.text().strip()
+
+    def clear_silently(self):
+        """清空输入但不发出 query_changed（切换回服务器筛选时调用）"""
+        self._timer.stop()
+        self._edit.blockSignals(True)
+        self._edit.clear()
+        self._edit.blockSignals(False)
+        self._last_query = ""
+
+    def _on_text_changed(self, _text: str):
+        self._timer.start()
+
+    def _emit_query(self):
+        query = self.query()
+        if query != self._last_query:
+            self._last_query = query
+            self.query_changed.emit(query)
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+paged_table.py
+
+分页加载（无限滚动）表格，供各日志/记录列表页面共用。
+
+设计要点：
+- PagedTableModel 通过 canFetchMore/fetchMore 由视图驱动加载下一页，
+  真正的请求由页面在 page_requested 信号里发起（各页面的 Worker 不变）；
+- 已加载的行按页缓存，超过 max_rows 时淘汰离当前可视区最远的页，
+  滚回被淘汰的区域时自动重新请求该页，内存占用不随滚动行数增长；
+- 被淘汰页重新加载失败时记录下来，按退避间隔重试（reset 时清空），避免每次重绘都重新请求；
+- 每次 reset 递增 generation 并取消上一批请求的 CancelToken：进行中的 HTTP 请求被中止，
+  迟到的结果按 generation 丢弃；
+- 显示文本在每页到达时一次算好，data() 只做取值；
+- 操作列由 PagedActionDelegate 绘制按钮，不再为每行创建 QPushButton。
+"""
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from PySide6.QtWidgets import (
+    QAbstractItemView, QApplication, QHeaderView, QStyle, QStyledItemDelegate,
+    QStyleOptionButton, QTableView
+)
+from PySide6.QtCore import QAbstractTableModel, QEvent, QModelIndex, QPoint, QRect, QSize, Qt, Signal
+from PySide6.QtGui import QColor, QFont, QFontMetrics
+
+from utils.api_client import CancelToken
+
+
+@dataclass
+class PagedColumn:
+    """表格列定义"""
+    title: str
+    text: Callable[[Dict[str, Any]], str]  # 单元格文本；操作列返回按钮文字，空字符串表示不显示按钮
+    align: int = int(Qt.AlignLeft | Qt.AlignVCenter)
+    resize_mode: QHeaderView.ResizeMode = QHeaderView.ResizeToContents
+    width: int = 0  # resize_mode 为 Fixed 时的列宽
+    color: Optional[Callable[[Dict[str, Any]], Optional[QColor]]] = None  # 文字颜色
+    tooltip: Optional[Callable[[Dict[str, Any]], str]] = None
+    is_action: bool = False
+
+
+# 操作列按钮文字
+ACTION_ROLE = Qt.UserRole + 1
+
+
+def format_datetime_text(value: Any) -> str:
+    """ISO 时间格式化为 yyyy-MM-dd HH:mm:ss，解析失败原样显示"""
+    if not value:
+        return ""
+    if isinstance(value, str):
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            return dt.strftime("%Y-%m-%d %H:%M:%S")
+        except Exception:
+            return value
+    return str(value)
+
+
+class PagedTableModel(QAbstractTableModel):
+    """分页加载的只读表格模型"""
+
+    page_requested = Signal(int, int, int)  # (generation, offset, limit)
+    state_changed = Signal()  # 行数/加载状态变化，用于刷新状态栏
+
+    PLACEHOLDER = "加载中..."
+    FAILED_PLACEHOLDER = "加载失败，稍后重试"
+    RETRY_BASE_DELAY = 2.0  # 失败页首次重试间隔（秒），之后每次翻倍
+    RETRY_MAX_DELAY = 60.0
+
+    def __init__(self, columns: List[PagedColumn], page_size: int = 50, max_rows: int = 2000, parent=None):
+        super().__init__(parent)
+        self._columns = columns
+        self._page_size = page_size
+        self._max_pages = max(3, max_rows // page_size)
+        # 页号 -> [(原始数据, 各列文本)]
+        self._pages: Dict[int, List[Tuple[Dict[str, Any], Tuple[str, ...]]]] = {}
+        self._pending_pages: Set[int] = set()
+        # 重新加载失败的页 -> (连续失败次数, 允许重试的 monotonic 时间)
+        self._failed_pages: Dict[int, Tuple[int, float]] = {}
+        self._row_count = 0
+        self._has_more = True
+        self._focus_page = 0  # 最近一次被视图读取的页，淘汰时保留其附近的页
+        # 每次 reset 递增，过期请求的结果直接丢弃
+        self._generation = 0
+        # 当前 generation 的请求共用的取消令牌，reset 时取消
+        self._cancel_token = CancelToken()
+
+    # ---------------- 加载控制 ----------------
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def cancel_token(self) -> CancelToken:
+        """当前 generation 的取消令牌，页面发起请求时传给 Worker"""
+        return self._cancel_token
+
+    @property
+    def page_size(self) -> int:
+        return self._page_size
+
+    @property
+    def loaded_count(self) -> int:
+        return self._row_count
+
+    @property
+    def has_more(self) -> bool:
+        return self._has_more
+
+    @property
+    def is_loading(self) -> bool:
+        return bool(self._pending_pages)
+
+    def reset(self):
+        """清空数据并作废进行中的请求（筛选条件变化时调用），随后调用 fetchMore 加载第一页"""
+        self.beginResetModel()
+        self._generation += 1
+        self._cancel_token.cancel()
+        self._cancel_token = CancelToken()
+        self._pages.clear()
+        self._pending_pages.clear()
+        self._failed_pages.clear()
+        self._row_count = 0
+        self._has_more = True
+        self._focus_page = 0
+        self.endResetModel()
+        self.state_changed.emit()
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        if parent.isValid():
+            return False
+        return self._has_more and self._tail_page() not in self._pending_pages
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self._request_page(self._tail_page())
+
+    def _tail_page(self) -> int:
+        return self._row_count // self._page_size
+
+    def _request_page(self, page: int):
+        self._pending_pages.add(page)
+        self.page_requested.emit(self._generation, page * self._page_size, self._page_size)
+        self.state_changed.emit()
+
+    def page_loaded(self, generation: int, offset: int, items: List[Dict[str, Any]]):
+        """页面 Worker 返回数据后调用；generation 与当前不一致时忽略"""
+        if generation != self._generation:
+            return
+        page = offset // self._page_size
+        self._pending_pages.discard(page)
+        self._failed_pages.pop(page, None)
+        rows = self._build_rows(items)
+        self._pages[page] = rows
+        if page == self._tail_page() and offset == self._row_count:
+            # 追加新行
+            if rows:
+                self.beginInsertRows(QModelIndex(), self._row_count, self._row_count + len(rows) - 1)
+                self._row_count += len(rows)
+                self.endInsertRows()
+            self._has_more = len(items) >= self._page_size
+        else:
+            # 重新加载被淘汰的页
+            first = offset
+            last = min(offset + self._page_size, self._row_count) - 1
+            if last >= first:
+                self.dataChanged.emit(self.index(first, 0), self.index(last, len(self._columns) - 1))
+        self._evict_far_pages()
+        self.state_changed.emit()
+
+    def page_failed(self, generation: int, offset: int):
+        """
+        页面请求失败时调用：末尾页停止继续自动加载，直到下次 reset；
+        被淘汰页记为失败，退避间隔内不再因重绘重新请求
+        """
+        if generation != self._generation:
+            return
+        page = offset // self._page_size
+        self._pending_pages.discard(page)
+        if offset >= self._row_count:
+            self._has_more = False
+        else:
+            failures = self._failed_pages.get(page, (0, 0.0))[0] + 1
+            delay = min(self.RETRY_BASE_DELAY * (2 ** (failures - 1)), self.RETRY_MAX_DELAY)
+            self._failed_pages[page] = (failures, time.monotonic() + delay)
+            first = offset
+            last = min(offset + self._page_size, self._row_count) - 1
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(self._columns) - 1))
+        self.state_changed.emit()
+
+    def refresh_texts(self):
+        """列文本依赖的外部数据变化后（如团队映射加载完成），重新计算已缓存页的显示文本"""
+        for page, rows in self._pages.items():
+            self._pages[page] = self._build_rows([item for item, _ in rows])
+        if self._row_count:
+            self.dataChanged.emit(self.index(0, 0), self.index(self._row_count - 1, len(self._columns) - 1))
+
+    def _evict_far_pages(self):
+        while len(self._pages) > self._max_pages:
+            farthest = max(self._pages, key=lambda p: abs(p - self._focus_page))
+            del self._pages[farthest]
+
+    def status_text(self) -> str:
+        """状态栏文字（与各页面原有提示保持一致）"""
+        if self.is_loading:
+            return "加载中..."
+        if self._row_count == 0:
+            return "暂无数据" if not self._has_more else ""
+        if not self._has_more:
+            return f"已加载全部数据（共 {self._row_count} 条）"
+        return f"已加载 {self._row_count} 条，滚动到底部加载更多"
+
+    # ---------------- 取数 ----------------
+
+    def _build_rows(self, items: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], Tuple[str, ...]]]:
+        return [(item, tuple(self._cell_text(column, item) for column in self._columns)) for item in items]
+
+    @staticmethod
+    def _cell_text(column: PagedColumn, item: Dict[str, Any]) -> str:
+        try:
+            return column.text(item) or ""
+        except Exception:
+            return ""
+
+    def _row(self, row: int) -> Optional[Tuple[Dict[str, Any], Tuple[str, ...]]]:
+        page, pos = divmod(row, self._page_size)
+        self._focus_page = page
+        rows = self._pages.get(page)
+        if rows is None:
+            if page not in self._pending_pages and row < self._row_count and not self._retry_pending(page):
+                self._request_page(page)
+            return None
+        return rows[pos] if pos < len(rows) else None
+
+    def _retry_pending(self, page: int) -> bool:
+        """该页上次加载失败且仍在退避间隔内"""
+        failed = self._failed_pages.get(page)
+        return failed is not None and time.monotonic() < failed[1]
+
+    def item_at(self, row: int) -> Optional[Dict[str, Any]]:
+        entry = self._row(row)
+        return entry[0] if entry is not None else None
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+
+    def headerData(self, section: int, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and 0 <= section < len(self._columns):
+            return self._columns[section].title
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = self._columns[index.column()]
+        entry = self._row(index.row())
+        if entry is None:
+            if role == Qt.DisplayRole and index.column() == 0:
+                page = index.row() // self._page_size
+                return self.FAILED_PLACEHOLDER if page in self._failed_pages and page not in self._pending_pages else self.PLACEHOLDER
+            return None
+        item, texts = entry
+        if role == Qt.DisplayRole:
+            return None if column.is_action else texts[index.column()]
+        if role == ACTION_ROLE:
+            return texts[index.column()] if column.is_action else None
+        if role == Qt.TextAlignmentRole:
+            return column.align
+        if role == Qt.ForegroundRole and column.color is not None:
+            return column.color(item)
+        if role == Qt.ToolTipRole and column.tooltip is not None:
+            return column.tooltip(item)
+        if role == Qt.UserRole:
+            return item
+        return None
+
+
+class PagedActionDelegate(QStyledItemDelegate):
+    """操作列：绘制按钮，点击后发出 action_clicked(行数据, 全局坐标)"""
+
+    action_clicked = Signal(object, QPoint)
+
+    BUTTON_WIDTH = 52  # 最小宽度，文字较长时按文字加宽
+    BUTTON_HEIGHT = 22
+    FONT_POINT_SIZE = 9
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._font = QFont()
+        self._font.setPointSize(self.FONT_POINT_SIZE)
+        self._font_metrics = QFontMetrics(self._font)
+
+    def _button_width(self, label: str) -> int:
+        return max(self.BUTTON_WIDTH, self._font_metrics.horizontalAdvance(label) + 16)
+
+    def _button_rect(self, rect: QRect, label: str) -> QRect:
+        width = min(self._button_width(label), rect.width() - 4)
+        height = min(self.BUTTON_HEIGHT, rect.height() - 2)
+        return QRect(rect.x() + (rect.width() - width) // 2, rect.y() + (rect.height() - height) // 2, width, height)
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        label = index.data(ACTION_ROLE)
+        if not label:
+            return
+        opt = QStyleOptionButton()
+        opt.rect = self._button_rect(option.rect, label)
+        opt.text = label
+        opt.state = QStyle.State_Enabled | QStyle.State_Raised | (option.state & QStyle.State_MouseOver)
+        opt.palette = option.palette
+        opt.fontMetrics = self._font_metrics
+        painter.save()
+        painter.setFont(self._font)
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, opt, painter, option.widget)
+        painter.restore()
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(self._button_width(index.data(ACTION_ROLE) or "") + 8, self.BUTTON_HEIGHT + 6)
+
+    def editorEvent(self, event, model, option, index) -> bool:
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton and index.data(ACTION_ROLE):
+            rect = self._button_rect(option.rect, index.data(ACTION_ROLE))
+            if rect.contains(event.position().toPoint()) and option.widget is not None:
+                item = index.data(Qt.UserRole)
+                if item is not None:
+                    self.action_clicked.emit(item, option.widget.viewport().mapToGlobal(rect.bottomLeft()))
+                return True
+        return super().editorEvent(event, model, option, index)
+
+
+class PagedTableView(QTableView):
+    """配合 PagedTableModel 使用的表格：按列定义设置列宽策略并挂上操作列代理"""
+
+    action_clicked = Signal(object, QPoint)  # (行数据, 全局坐标)
+
+    def __init__(self, model: PagedTableModel, columns: List[PagedColumn], parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self._action_delegate = PagedActionDelegate(self)
+        self._action_delegate.action_clicked.connect(self.action_clicked)
+        header = self.horizontalHeader()
+        header.setStretchLastSection(False)
+        for i, column in enumerate(columns):
+            header.setSectionResizeMode(i, column.resize_mode)
+            if column.width:
+                self.setColumnWidth(i, column.width)
+            if column.is_action:
+                self.setItemDelegateForColumn(i, self._action_delegate)
+        # 按内容计算列宽时只看可视区域，避免触发已淘汰页的重新加载
+        header.setResizeContentsPrecision(0)
+        self.verticalHeader().setDefaultSectionSize(PagedActionDelegate.BUTTON_HEIGHT + 8)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setMouseTracking(True)  # 操作按钮悬停效果
+
+    def item_at(self, index: QModelIndex) -> Optional[Dict[str, Any]]:
+        return index.data(Qt.UserRole) if index.isValid() else None
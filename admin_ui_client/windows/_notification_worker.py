@@ -4,8 +4,10 @@
 通知列表加载工作线程
 """
 
+from typing import Optional
+
 from PySide6.QtCore import QRunnable, QObject, Signal, Slot
-from utils.api_client import AdminApiClient, ApiError, AuthError
+from utils.api_client import AdminApiClient, ApiError, AuthError, CancelToken, RequestCancelled
 
 
 class _NotificationListWorkerSignals(QObject):
@@ -15,15 +17,26 @@ class _NotificationListWorkerSignals(QObject):
 
 class _NotificationListWorker(QRunnable):
     """后台加载通知列表数据"""
-    def __init__(self, api_client: AdminApiClient, limit: int = 30, offset: int = 0):
+    def __init__(
+        self,
+        api_client: AdminApiClient,
+        limit: int = 30,
+        offset: int = 0,
+        cancel_token: Optional[CancelToken] = None
+    ):
         super().__init__()
-        self.api_client = api_client
+        # 共享的客户端不直接绑定令牌，复制一份绑定后使用
+        self.api_client = api_client.with_cancel_token(cancel_token) if cancel_token is not None else api_client
+        self.cancel_token = cancel_token
         self.limit = limit
         self.offset = offset
         self.signals = _NotificationListWorkerSignals()
 
     @Slot()
     def run(self) -> None:
+        # 排队期间已被刷新取代，不再发起请求
+        if self.cancel_token is not None and self.cancel_token.cancelled:
+            return
         try:
             response = self.api_client._get("/admin/api/notifications", params={"limit": self.limit, "offset": self.offset})
             if response.get("status") == "success":
@@ -31,6 +44,8 @@ class _NotificationListWorker(QRunnable):
                 self.signals.finished.emit(items)
             else:
                 self.signals.error.emit(response.get("message", "未知错误"))
+        except RequestCancelled:
+            return  # 已被刷新取代，结果直接丢弃
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
         except Exception as e:
@@ -18,21 +18,19 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QComboBox,
-    QTableWidget,
-    QTableWidgetItem,
     QPushButton,
     QDialog,
     QTextEdit,
     QHeaderView,
     QDateEdit,
     QLineEdit,
-    QAbstractItemView,
 )
-from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate
+from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate, QPoint
 from PySide6.QtGui import QFont
 
-from utils.api_client import AdminApiClient, ApiError, AuthError
+from utils.api_client import AdminApiClient, ApiError, AuthError, CancelToken, RequestCancelled
 from utils.error_handler import handle_api_error
+from widgets.paged_table import PagedColumn, PagedTableModel, PagedTableView, format_datetime_text
 
 
 CHECK_TYPE_LABELS: Dict[str, str] = {
@@ -94,6 +92,42 @@ def _get_weekday_text(date_val: Union[str, date, Any]) -> str:
         return ""
 
 
+def _daily_row_texts(it: Dict[str, Any]) -> Dict[str, str]:
+    """日汇总一行中需要组合计算的显示文本"""
+    # 兼容 ISO 格式，显示到秒
+    first_check_time = format_datetime_text(str(it.get("first_check_time") or ""))
+    last_check_time = format_datetime_text(str(it.get("last_check_time") or ""))
+    presence_minutes = int(it.get("presence_minutes") or 0)
+    record_count = int(it.get("record_count") or 0)
+
+    # 解释：当 record_count < 2 时，无法用“首末差”估算在岗时长（通常是缺少上下班其中一次、或当前还未下班）。
+    # 为避免误解，UI 里直接标注。
+    if record_count <= 0:
+        return {"presence": "—", "first": first_check_time, "last": last_check_time}
+    if record_count == 1:
+        return {
+            "presence": "—（仅1次打卡）",
+            "first": f"{first_check_time}（仅1次）" if first_check_time else "",
+            "last": f"{last_check_time}（仅1次）" if last_check_time else "",
+        }
+    return {"presence": str(presence_minutes), "first": first_check_time, "last": last_check_time}
+
+
+_ATTENDANCE_DAILY_COLUMNS = [
+    PagedColumn("日期", lambda it: str(it.get("date") or "")),
+    PagedColumn("星期", lambda it: _get_weekday_text(str(it.get("date") or ""))),
+    PagedColumn("用户ID", lambda it: str(it.get("user_id") or "")),
+    PagedColumn("姓名", lambda it: str(it.get("user_name") or "")),
+    PagedColumn("最早打卡", lambda it: _daily_row_texts(it)["first"]),
+    PagedColumn("最晚打卡", lambda it: _daily_row_texts(it)["last"]),
+    PagedColumn("在岗(分钟)", lambda it: _daily_row_texts(it)["presence"]),
+    PagedColumn("记录数", lambda it: str(int(it.get("record_count") or 0))),
+    PagedColumn("类型统计", lambda it: _format_counts_by_type(it.get("counts_by_type") or {}),
+                resize_mode=QHeaderView.Stretch),
+    PagedColumn("操作", lambda it: "查看", is_action=True),
+]
+
+
 class _AttendanceDailyWorkerSignals(QObject):
     finished = Signal(list)  # items
     error = Signal(str)
@@ -109,6 +143,7 @@ class _AttendanceDailyWorker(QRunnable):
         abnormal: Optional[str],
         offset: int,
         limit: int,
+        cancel_token: Optional[CancelToken] = None,
     ) -> None:
         super().__init__()
         self._start_date = start_date
@@ -117,15 +152,19 @@ class _AttendanceDailyWorker(QRunnable):
         self._abnormal = (abnormal or "").strip() or None
         self._offset = offset
         self._limit = limit
+        self._cancel_token = cancel_token
         self.signals = _AttendanceDailyWorkerSignals()
 
     @Slot()
     def run(self) -> None:
+        # 排队期间已被新请求取代（筛选条件变化），不再发起请求
+        if self._cancel_token is not None and self._cancel_token.cancelled:
+            return
         if not AdminApiClient.is_logged_in():
             self.signals.error.emit("需要先登录")
             return
         try:
-            client = AdminApiClient.from_config()
+            client = AdminApiClient.from_config().with_cancel_token(self._cancel_token)
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
             return
@@ -146,6 +185,8 @@ class _AttendanceDailyWorker(QRunnable):
             if not isinstance(items, list):
                 items = []
             self.signals.finished.emit(items)
+        except RequestCancelled:
+            return  # 已被新请求取代，结果直接丢弃
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
         except Exception as e:
@@ -194,10 +235,7 @@ class AttendanceDailyView(QWidget):
         super().__init__()
 
         # 分页状态
-        self._current_offset = 0
         self._page_size = 50
-        self._is_loading = False
-        self._has_more = True
         self._current_filters: Dict[str, Any] = {}
 
         layout = QVBoxLayout(self)
@@ -256,25 +294,12 @@ class AttendanceDailyView(QWidget):
         fl.addStretch()
         layout.addWidget(filter_frame)
 
-        # 表格
-        self._table = QTableWidget(0, 10)
-        self._table.setHorizontalHeaderLabels(["日期", "星期", "用户ID", "姓名", "最早打卡", "最晚打卡", "在岗(分钟)", "记录数", "类型统计", "操作"])
-        header = self._table.horizontalHeader()
-        header.setStretchLastSection(False)
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(6, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(7, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(8, QHeaderView.Stretch)
-        header.setSectionResizeMode(9, QHeaderView.ResizeToContents)
-        self._table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self._table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        scroll_bar = self._table.verticalScrollBar()
-        scroll_bar.valueChanged.connect(self._on_scroll_changed)
+        # 表格（滚动到底部时由模型自动加载下一页）
+        self._model = PagedTableModel(_ATTENDANCE_DAILY_COLUMNS, page_size=self._page_size, parent=self)
+        self._model.page_requested.connect(self._on_page_requested)
+        self._model.state_changed.connect(self._on_model_state_changed)
+        self._table = PagedTableView(self._model, _ATTENDANCE_DAILY_COLUMNS)
+        self._table.action_clicked.connect(self._on_view_clicked)
         layout.addWidget(self._table, 1)
 
         self._status_label = QLabel("")
@@ -285,13 +310,6 @@ class AttendanceDailyView(QWidget):
     def reload_from_api(self):
         self._on_filter_clicked()
 
-    def _on_scroll_changed(self, value: int):
-        if self._is_loading or not self._has_more:
-            return
-        sb = self._table.verticalScrollBar()
-        if value >= sb.maximum() - 50:
-            self._load_more()
-
     def _on_clear_filter(self):
         self._start_date.setDate(QDate.currentDate().addDays(-7))
         self._end_date.setDate(QDate.currentDate())
@@ -306,123 +324,42 @@ class AttendanceDailyView(QWidget):
         abnormal = self._abnormal_combo.currentData()
 
         self._current_filters = {"start_date": start_date, "end_date": end_date, "keyword": keyword, "abnormal": abnormal}
-        self._current_offset = 0
-        self._has_more = True
-        self._table.setRowCount(0)
-        self._load_more(first=True)
-
-    def _load_more(self, first: bool = False):
-        if self._is_loading or not self._has_more:
-            return
-        self._is_loading = True
-        self._status_label.setText("加载中...")
 
         mw = self.window()
-        if first and hasattr(mw, "show_loading"):
+        if hasattr(mw, "show_loading"):
             mw.show_loading("加载考勤日汇总中...")
 
+        # 重置分页状态（进行中的旧请求结果会被丢弃）并加载第一页
+        self._model.reset()
+        self._model.fetchMore()
+
+    def _on_page_requested(self, generation: int, offset: int, limit: int):
         worker = _AttendanceDailyWorker(
             start_date=self._current_filters.get("start_date"),
             end_date=self._current_filters.get("end_date"),
             keyword=self._current_filters.get("keyword"),
             abnormal=self._current_filters.get("abnormal"),
-            offset=self._current_offset,
-            limit=self._page_size,
+            offset=offset,
+            limit=limit,
+            cancel_token=self._model.cancel_token,
         )
-        worker.signals.finished.connect(lambda items: self._on_loaded(items, first=first))
-        worker.signals.error.connect(self._on_error)
+        worker.signals.finished.connect(lambda items, g=generation, o=offset: self._on_loaded(g, o, items))
+        worker.signals.error.connect(lambda msg, g=generation, o=offset: self._on_error(msg, g, o))
         QThreadPool.globalInstance().start(worker)
 
-    def _on_loaded(self, items: List[Dict[str, Any]], *, first: bool):
-        mw = self.window()
-        if first and hasattr(mw, "hide_loading"):
-            mw.hide_loading()
-
-        self._is_loading = False
-        self._apply_rows(items)
+    def _on_loaded(self, generation: int, offset: int, items: List[Dict[str, Any]]):
+        if offset == 0 and generation == self._model.generation:
+            mw = self.window()
+            if hasattr(mw, "hide_loading"):
+                mw.hide_loading()
+        self._model.page_loaded(generation, offset, items)
 
-        self._current_offset += len(items)
-        self._has_more = len(items) >= self._page_size
+    def _on_model_state_changed(self):
+        self._status_label.setText(self._model.status_text())
 
-        if not items and self._current_offset == 0:
-            self._status_label.setText("暂无数据")
-        elif not self._has_more:
-            self._status_label.setText(f"已加载全部数据（共 {self._current_offset} 条）")
-        else:
-            self._status_label.setText(f"已加载 {self._current_offset} 条，滚动到底部加载更多")
-
-    def _apply_rows(self, items: List[Dict[str, Any]]):
-        start_row = self._table.rowCount()
-        self._table.setRowCount(start_row + len(items))
-
-        for idx, it in enumerate(items):
-            row = start_row + idx
-            d = str(it.get("date") or "")
-            user_id = str(it.get("user_id") or "")
-            user_name = str(it.get("user_name") or "")
-
-            first_check_time = str(it.get("first_check_time") or "")
-            last_check_time = str(it.get("last_check_time") or "")
-            # 兼容 ISO 格式，显示到秒
-            if isinstance(first_check_time, str) and "T" in first_check_time:
-                try:
-                    dt = datetime.fromisoformat(first_check_time.replace("Z", "+00:00"))
-                    first_check_time = dt.strftime("%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    pass
-            if isinstance(last_check_time, str) and "T" in last_check_time:
-                try:
-                    dt = datetime.fromisoformat(last_check_time.replace("Z", "+00:00"))
-                    last_check_time = dt.strftime("%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    pass
-
-            presence_minutes = int(it.get("presence_minutes") or 0)
-            record_count = int(it.get("record_count") or 0)
-            counts_by_type = it.get("counts_by_type") or {}
-
-            # 解释：当 record_count < 2 时，无法用“首末差”估算在岗时长（通常是缺少上下班其中一次、或当前还未下班）。
-            # 为避免误解，UI 里直接标注。
-            if record_count <= 0:
-                presence_text = "—"
-                first_check_time_disp = first_check_time
-                last_check_time_disp = last_check_time
-            elif record_count == 1:
-                presence_text = "—（仅1次打卡）"
-                first_check_time_disp = f"{first_check_time}（仅1次）" if first_check_time else ""
-                last_check_time_disp = f"{last_check_time}（仅1次）" if last_check_time else ""
-            else:
-                presence_text = str(presence_minutes)
-                first_check_time_disp = first_check_time
-                last_check_time_disp = last_check_time
-
-            # 计算星期几
-            weekday_text = _get_weekday_text(d)
-
-            self._table.setItem(row, 0, QTableWidgetItem(d))
-            self._table.setItem(row, 1, QTableWidgetItem(weekday_text))
-            self._table.setItem(row, 2, QTableWidgetItem(user_id))
-            self._table.setItem(row, 3, QTableWidgetItem(user_name))
-            self._table.setItem(row, 4, QTableWidgetItem(first_check_time_disp))
-            self._table.setItem(row, 5, QTableWidgetItem(last_check_time_disp))
-            self._table.setItem(row, 6, QTableWidgetItem(presence_text))
-            self._table.setItem(row, 7, QTableWidgetItem(str(record_count)))
-            self._table.setItem(row, 8, QTableWidgetItem(_format_counts_by_type(counts_by_type)))
-
-            btn = QPushButton("查看")
-            btn.setFixedSize(52, 22)
-            btn.setStyleSheet("QPushButton { font-size: 9pt; padding: 0px; }")
-            btn.setProperty("date", d)
-            btn.setProperty("user_id", user_id)
-            btn.clicked.connect(self._on_view_clicked)
-            self._table.setCellWidget(row, 9, btn)
-
-    def _on_view_clicked(self):
-        btn = self.sender()
-        if not btn:
-            return
-        d = str(btn.property("date") or "")
-        user_id = str(btn.property("user_id") or "")
+    def _on_view_clicked(self, item: Dict[str, Any], _pos: QPoint):
+        d = str(item.get("date") or "")
+        user_id = str(item.get("user_id") or "")
         if not d or not user_id:
             return
 
@@ -432,7 +369,7 @@ class AttendanceDailyView(QWidget):
 
         worker = _AttendanceDailyDetailWorker(d, user_id)
         worker.signals.finished.connect(self._show_detail_dialog)
-        worker.signals.error.connect(self._on_error)
+        worker.signals.error.connect(self._on_detail_error)
         QThreadPool.globalInstance().start(worker)
 
     def _show_detail_dialog(self, item: Dict[str, Any]):
@@ -460,11 +397,19 @@ class AttendanceDailyView(QWidget):
 
         dlg.exec()
 
-    def _on_error(self, msg: str):
-        self._is_loading = False
+    def _on_error(self, msg: str, generation: int, offset: int):
+        # 已被新筛选作废的请求不再提示
+        if generation != self._model.generation:
+            return
+        self._model.page_failed(generation, offset)
         mw = self.window()
         if hasattr(mw, "hide_loading"):
             mw.hide_loading()
         self._status_label.setText(f"加载失败：{msg}")
         handle_api_error(self, Exception(msg), "加载失败")
 
+    def _on_detail_error(self, msg: str):
+        mw = self.window()
+        if hasattr(mw, "hide_loading"):
+            mw.hide_loading()
+        handle_api_error(self, Exception(msg), "加载失败")
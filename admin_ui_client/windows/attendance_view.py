@@ -9,8 +9,10 @@
 """
 
 import json
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
 from PySide6.QtWidgets import (
     QWidget,
@@ -18,8 +20,6 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QLabel,
     QComboBox,
-    QTableWidget,
-    QTableWidgetItem,
     QPushButton,
     QDialog,
     QTextEdit,
@@ -27,13 +27,14 @@ from PySide6.QtWidgets import (
     QDateEdit,
     QLineEdit,
     QMessageBox,
-    QAbstractItemView,
+    QProgressDialog,
 )
-from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate
+from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate, QPoint
 from PySide6.QtGui import QFont
 
-from utils.api_client import AdminApiClient, ApiError, AuthError
+from utils.api_client import AdminApiClient, ApiError, AuthError, CancelToken, RequestCancelled
 from utils.error_handler import handle_api_error
+from widgets.paged_table import PagedColumn, PagedTableModel, PagedTableView, format_datetime_text
 
 
 CHECK_TYPE_LABELS: Dict[str, str] = {
@@ -58,6 +59,19 @@ def _check_type_text(code: str) -> str:
     return f"{label}({c})" if label else c
 
 
+_ATTENDANCE_CHECKIN_COLUMNS = [
+    PagedColumn("日期", lambda it: str(it.get("check_date") or "")),
+    # 兼容 ISO 格式，显示到秒
+    PagedColumn("时间", lambda it: format_datetime_text(str(it.get("check_time_local") or ""))),
+    PagedColumn("用户ID", lambda it: str(it.get("user_id") or "")),
+    PagedColumn("姓名", lambda it: str(it.get("user_name") or "")),
+    PagedColumn("得力云ID", lambda it: str(it.get("delicloud_user_id") or "")),
+    PagedColumn("类型", lambda it: _check_type_text(str(it.get("check_type") or ""))),
+    PagedColumn("终端", lambda it: str(it.get("terminal_id") or ""), resize_mode=QHeaderView.Stretch),
+    PagedColumn("操作", lambda it: "查看", is_action=True),
+]
+
+
 class _AttendanceCheckinWorkerSignals(QObject):
     finished = Signal(list)  # items
     error = Signal(str)
@@ -73,6 +87,7 @@ class _AttendanceCheckinWorker(QRunnable):
         check_type: Optional[str],
         offset: int,
         limit: int,
+        cancel_token: Optional[CancelToken] = None,
     ) -> None:
         super().__init__()
         self._start_date = start_date
@@ -81,15 +96,19 @@ class _AttendanceCheckinWorker(QRunnable):
         self._check_type = check_type
         self._offset = offset
         self._limit = limit
+        self._cancel_token = cancel_token
         self.signals = _AttendanceCheckinWorkerSignals()
 
     @Slot()
     def run(self) -> None:
+        # 排队期间已被新请求取代（筛选条件变化），不再发起请求
+        if self._cancel_token is not None and self._cancel_token.cancelled:
+            return
         if not AdminApiClient.is_logged_in():
             self.signals.error.emit("需要先登录")
             return
         try:
-            client = AdminApiClient.from_config()
+            client = AdminApiClient.from_config().with_cancel_token(self._cancel_token)
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
             return
@@ -110,6 +129,8 @@ class _AttendanceCheckinWorker(QRunnable):
             if not isinstance(items, list):
                 items = []
             self.signals.finished.emit(items)
+        except RequestCancelled:
+            return  # 已被新请求取代，结果直接丢弃
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
         except Exception as e:
@@ -152,18 +173,73 @@ class _AttendanceCheckinDetailWorker(QRunnable):
             self.signals.error.emit(f"加载详情失败：{e}")
 
 
+# 批量补录：超过一批的数据分批并发提交，各批不重算日汇总，全部提交后统一重算一次
+MANUAL_ADD_CHUNK_SIZE = 200
+MANUAL_ADD_MAX_CONCURRENCY = 4
+_MANUAL_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+@dataclass
+class _ManualAddRow:
+    """粘贴数据中的一行：解析/校验失败时 item 为 None，error 为原因"""
+    line_no: int  # 文本为行号，JSON 为数组下标 + 1
+    source: Any  # 原始行文本或 JSON 对象，失败后回填到输入框
+    item: Optional[Dict[str, Any]] = None
+    error: str = ""
+
+
+def _validate_manual_item(item: Dict[str, Any]) -> str:
+    """本地校验一条补录数据，返回错误原因（空字符串表示通过）"""
+    if not str(item.get("user_id") or "").strip():
+        return "user_id 为空"
+    check_type = str(item.get("check_type") or "").strip()
+    if not check_type or any(ch.isspace() for ch in check_type):
+        return f"打卡类型无效：{check_type or '（空）'}"
+    if "check_time_ts" in item:
+        try:
+            check_time = datetime.fromtimestamp(int(item["check_time_ts"]))
+        except (TypeError, ValueError, OverflowError, OSError):
+            return f"时间戳无效：{item.get('check_time_ts')}"
+    else:
+        try:
+            check_time = datetime.strptime(str(item.get("check_time_local") or ""), _MANUAL_TIME_FORMAT)
+        except ValueError:
+            return f"时间格式无效：{item.get('check_time_local')}（应为 yyyy-MM-dd HH:mm:ss）"
+    if check_time.year < 2000:
+        return f"打卡时间过早：{check_time:%Y-%m-%d %H:%M:%S}"
+    if check_time > datetime.now() + timedelta(days=1):
+        return f"打卡时间晚于当前时间：{check_time:%Y-%m-%d %H:%M:%S}"
+    return ""
+
+
 class _AttendanceManualAddWorkerSignals(QObject):
-    finished = Signal(dict)  # resp
+    progress = Signal(int, int)  # 已处理行数, 总行数
+    rebuilding = Signal()  # 开始提交带 rebuild_daily=True 的最后一批
+    finished = Signal(dict)  # 汇总结果（见 _AttendanceManualAddWorker.run）
     error = Signal(str)
 
 
 class _AttendanceManualAddWorker(QRunnable):
-    def __init__(self, items: List[Dict[str, Any]], note: str):
+    """
+    批量补录：
+    - 不超过一批时与原来一样单次提交并重算日汇总
+    - 否则按 MANUAL_ADD_CHUNK_SIZE 分批，除最后一批外最多 MANUAL_ADD_MAX_CONCURRENCY 批并发提交
+      （rebuild_daily=False）；其余批次全部结束后再提交最后一批（rebuild_daily=True），日汇总只重算一次
+    - 某批失败不影响其他批次，失败行逐行记录原因
+    - cancel() 后不再提交未开始的批次（包括最后一批，此时不重算日汇总）
+    """
+
+    def __init__(self, rows: List[_ManualAddRow], note: str):
         super().__init__()
-        self._items = items
+        self._rows = rows
         self._note = note
+        self._cancelled = False
+        self._auth_failed = False
         self.signals = _AttendanceManualAddWorkerSignals()
 
+    def cancel(self) -> None:
+        self._cancelled = True
+
     @Slot()
     def run(self) -> None:
         if not AdminApiClient.is_logged_in():
@@ -179,15 +255,104 @@ class _AttendanceManualAddWorker(QRunnable):
             return
 
         try:
-            resp = client.manual_add_attendance_checkins(items=self._items, rebuild_daily=True, note=self._note or "")
-            if not isinstance(resp, dict):
-                resp = {"status": "error", "message": "后端返回非JSON对象"}
-            self.signals.finished.emit(resp)
-        except (ApiError, AuthError) as e:
-            self.signals.error.emit(str(e))
+            self.signals.finished.emit(self._import(client))
         except Exception as e:
             self.signals.error.emit(f"补录失败：{type(e).__name__}: {e}")
 
+    def _import(self, client: AdminApiClient) -> Dict[str, Any]:
+        rows = self._rows
+        chunks = [rows[i:i + MANUAL_ADD_CHUNK_SIZE] for i in range(0, len(rows), MANUAL_ADD_CHUNK_SIZE)]
+        result: Dict[str, Any] = {
+            "total": len(rows),
+            "inserted": 0,
+            "skipped": 0,
+            "rebuilt": 0,
+            "rebuild_error": "",
+            "failures": [],  # [(行, 原因)]
+            "unreported_failed": 0,  # 后端统计为失败但未返回明细的条数
+            "cancelled": False,
+        }
+        done = 0
+        self.signals.progress.emit(0, len(rows))
+
+        # 最后一批留到其他批次结束后单独提交，并负责重算日汇总
+        final_chunk = chunks.pop()
+        if chunks:
+            with ThreadPoolExecutor(max_workers=min(MANUAL_ADD_MAX_CONCURRENCY, len(chunks))) as pool:
+                futures = {pool.submit(self._submit_chunk, client, chunk, False): chunk for chunk in chunks}
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    self._merge_chunk(result, chunk, self._chunk_response(future.result))
+                    done += len(chunk)
+                    self.signals.progress.emit(done, len(rows))
+
+        if not self._cancelled and not self._auth_failed:
+            self.signals.rebuilding.emit()
+        resp = self._chunk_response(lambda: self._submit_chunk(client, final_chunk, True))
+        self._merge_chunk(result, final_chunk, resp)
+        if resp is not None and resp.get("status") == "success":
+            result["rebuilt"] = int(resp.get("rebuilt_daily_rows") or 0)
+        elif resp is not None:
+            result["rebuild_error"] = str(resp.get("message") or resp)
+        self.signals.progress.emit(len(rows), len(rows))
+        return result
+
+    @staticmethod
+    def _chunk_response(call) -> Optional[Dict[str, Any]]:
+        """取得一批的提交结果，异常转为错误响应（不影响其他批次）"""
+        try:
+            return call()
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    def _merge_chunk(self, result: Dict[str, Any], chunk: List[_ManualAddRow], resp: Optional[Dict[str, Any]]) -> None:
+        if resp is None:
+            result["cancelled"] = True
+            result["failures"].extend((row, "已取消，未提交") for row in chunk)
+        elif resp.get("status") != "success":
+            message = str(resp.get("message") or resp)
+            result["failures"].extend((row, message) for row in chunk)
+        else:
+            self._merge_chunk_result(result, chunk, resp)
+
+    def _submit_chunk(self, client: AdminApiClient, chunk: List[_ManualAddRow], rebuild_daily: bool) -> Optional[Dict[str, Any]]:
+        """提交一批，已取消时返回 None；登录失效后其余批次不再提交"""
+        if self._cancelled:
+            return None
+        if self._auth_failed:
+            return {"status": "error", "message": "登录已失效，未提交"}
+        try:
+            resp = client.manual_add_attendance_checkins(
+                items=[row.item for row in chunk], rebuild_daily=rebuild_daily, note=self._note or ""
+            )
+        except AuthError:
+            self._auth_failed = True
+            raise
+        if not isinstance(resp, dict):
+            resp = {"status": "error", "message": "后端返回非JSON对象"}
+        return resp
+
+    @staticmethod
+    def _merge_chunk_result(result: Dict[str, Any], chunk: List[_ManualAddRow], resp: Dict[str, Any]) -> None:
+        result["inserted"] += int(resp.get("inserted") or 0)
+        result["skipped"] += int(resp.get("skipped") or 0)
+        failed = int(resp.get("failed") or 0)
+        if failed <= 0:
+            return
+        # 后端返回 errors 明细（index 为批内下标）时逐行记录，否则只记条数
+        reported = 0
+        errors = resp.get("errors")
+        if isinstance(errors, list):
+            for err in errors:
+                if not isinstance(err, dict):
+                    continue
+                try:
+                    row = chunk[int(err.get("index"))]
+                except (TypeError, ValueError, IndexError):
+                    continue
+                result["failures"].append((row, str(err.get("message") or err.get("error") or "后端处理失败")))
+                reported += 1
+        result["unreported_failed"] += max(0, failed - reported)
 
 class AttendanceManualAddDialog(QDialog):
     def __init__(self, parent: QWidget):
@@ -263,8 +428,12 @@ class AttendanceManualAddDialog(QDialog):
         self._btn_close.clicked.connect(self.reject)
         self._btn_submit.clicked.connect(self._on_submit)
 
-    def _parse_items(self) -> List[Dict[str, Any]]:
+        self._input_is_json = False  # 最近一次解析的输入是否为 JSON（失败行按原格式回填）
+
+    def _parse_items(self) -> List[_ManualAddRow]:
+        """解析输入并逐行本地校验；无法解析或校验失败的行也会返回（带 error），便于逐行提示"""
         txt = (self._text.toPlainText() or "").strip()
+        self._input_is_json = False
         if not txt:
             return []
 
@@ -278,49 +447,59 @@ class AttendanceManualAddDialog(QDialog):
             if isinstance(obj, dict):
                 # 兼容 {"data": [...]} 或 {"data": {"data": [...]}}
                 if isinstance(obj.get("data"), dict) and isinstance(obj["data"].get("data"), list):
-                    rows = obj["data"]["data"]
+                    data_rows = obj["data"]["data"]
                 elif isinstance(obj.get("data"), list):
-                    rows = obj["data"]
+                    data_rows = obj["data"]
                 else:
                     raise ValueError("JSON 结构不支持：请粘贴数组，或包含 data 的对象")
             elif isinstance(obj, list):
-                rows = obj
+                data_rows = obj
             else:
                 raise ValueError("JSON 顶层必须是数组或对象")
 
-            items: List[Dict[str, Any]] = []
-            for r in rows:
+            self._input_is_json = True
+            rows: List[_ManualAddRow] = []
+            for idx, r in enumerate(data_rows, start=1):
+                row = _ManualAddRow(line_no=idx, source=r)
+                rows.append(row)
                 if not isinstance(r, dict):
+                    row.error = "不是 JSON 对象"
                     continue
                 user_key = r.get("user_id")
                 check_time = r.get("check_time")
                 check_type = r.get("check_type")
                 if user_key is None or check_time is None or not check_type:
+                    row.error = "缺少 user_id / check_time / check_type"
+                    continue
+                try:
+                    check_time_ts = int(float(check_time))
+                except (TypeError, ValueError):
+                    row.error = f"check_time 不是时间戳：{check_time}"
                     continue
-                items.append(
-                    {
-                        "id": r.get("id"),
-                        "user_id": str(user_key),
-                        "check_type": str(check_type),
-                        "check_time_ts": int(float(check_time)),
-                        "terminal_id": r.get("terminal_id"),
-                        "ext_id": r.get("ext_id"),
-                        "check_data": r.get("check_data"),
-                        "raw": r,
-                    }
-                )
-            return items
+                row.item = {
+                    "id": r.get("id"),
+                    "user_id": str(user_key),
+                    "check_type": str(check_type),
+                    "check_time_ts": check_time_ts,
+                    "terminal_id": r.get("terminal_id"),
+                    "ext_id": r.get("ext_id"),
+                    "check_data": r.get("check_data"),
+                    "raw": r,
+                }
+            return self._validate_rows(rows)
 
         # 文本行（CSV/TSV）
         default_date = self._default_date.date().toString("yyyy-MM-dd")
         default_type = str(self._default_type.currentData() or "fa")
         default_terminal = (self._default_terminal.text() or "").strip() or "manual"
 
-        items: List[Dict[str, Any]] = []
-        for raw_line in txt.splitlines():
+        rows = []
+        for line_no, raw_line in enumerate(txt.splitlines(), start=1):
             line = raw_line.strip()
             if not line or line.startswith("#"):
                 continue
+            row = _ManualAddRow(line_no=line_no, source=raw_line)
+            rows.append(row)
             # 允许逗号/Tab 分隔
             if "\t" in line:
                 parts = [p.strip() for p in line.split("\t") if p.strip()]
@@ -328,6 +507,7 @@ class AttendanceManualAddDialog(QDialog):
                 parts = [p.strip() for p in line.split(",") if p.strip()]
 
             if len(parts) < 2:
+                row.error = "至少需要 user_id 和时间两列"
                 continue
             user_key = parts[0]
             t = parts[1]
@@ -349,65 +529,144 @@ class AttendanceManualAddDialog(QDialog):
             if terminal:
                 payload["terminal_id"] = terminal
 
-            items.append(payload)
+            row.item = payload
+
+        return self._validate_rows(rows)
 
-        return items
+    @staticmethod
+    def _validate_rows(rows: List[_ManualAddRow]) -> List[_ManualAddRow]:
+        """逐行校验，并标记粘贴数据内部的重复记录（同一 user_id + 类型 + 时间）"""
+        seen: Dict[tuple, int] = {}
+        for row in rows:
+            if row.item is None:
+                continue
+            row.error = _validate_manual_item(row.item)
+            if row.error:
+                row.item = None
+                continue
+            key = (
+                row.item["user_id"],
+                row.item["check_type"],
+                row.item.get("check_time_ts", row.item.get("check_time_local")),
+            )
+            if key in seen:
+                row.error = f"与第 {seen[key]} 行重复"
+                row.item = None
+            else:
+                seen[key] = row.line_no
+        return rows
+
+    @staticmethod
+    def _failure_text(failures: List[Tuple[_ManualAddRow, str]]) -> str:
+        return "\n".join(f"第 {row.line_no} 行：{reason}" for row, reason in sorted(failures, key=lambda f: f[0].line_no))
+
+    def _show_only_rows(self, rows: List[_ManualAddRow]) -> None:
+        """输入框只保留指定行（失败行），修正后可直接再次提交"""
+        rows = sorted(rows, key=lambda r: r.line_no)
+        if self._input_is_json:
+            self._text.setPlainText(json.dumps([r.source for r in rows], ensure_ascii=False, indent=2))
+        else:
+            self._text.setPlainText("\n".join(str(r.source) for r in rows))
 
     def _on_submit(self):
         try:
-            items = self._parse_items()
+            rows = self._parse_items()
         except Exception as e:
             QMessageBox.warning(self, "解析失败", str(e))
             return
 
-        if not items:
-            QMessageBox.warning(self, "提示", "没有可提交的数据")
+        valid_rows = [r for r in rows if r.item is not None]
+        invalid = [(r, r.error) for r in rows if r.item is None]
+
+        if not valid_rows:
+            if invalid:
+                box = QMessageBox(QMessageBox.Warning, "校验失败", f"全部 {len(invalid)} 行校验失败，没有可提交的数据。", QMessageBox.Ok, self)
+                box.setDetailedText(self._failure_text(invalid))
+                box.exec()
+            else:
+                QMessageBox.warning(self, "提示", "没有可提交的数据")
             return
 
+        if invalid:
+            box = QMessageBox(
+                QMessageBox.Question,
+                "校验失败",
+                f"{len(invalid)} 行校验失败（详见明细），是否仅提交其余 {len(valid_rows)} 行？",
+                QMessageBox.Yes | QMessageBox.No,
+                self,
+            )
+            box.setDetailedText(self._failure_text(invalid))
+            if box.exec() != QMessageBox.Yes:
+                return
+
         self._btn_submit.setEnabled(False)
         self._btn_close.setEnabled(False)
 
         note = (self._note_edit.text() or "").strip()
 
-        mw = self.parent()
-        if hasattr(mw, "show_loading"):
-            mw.show_loading("正在补录并重算日汇总...", closeable=False)
+        progress = QProgressDialog(f"正在补录 {len(valid_rows)} 条打卡记录...", "取消", 0, len(valid_rows), self)
+        progress.setWindowTitle("补录考勤")
+        progress.setWindowModality(Qt.WindowModal)
+        progress.setMinimumDuration(300)
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
 
-        worker = _AttendanceManualAddWorker(items=items, note=note)
+        worker = _AttendanceManualAddWorker(rows=valid_rows, note=note)
+        progress.canceled.connect(worker.cancel)
 
-        def _on_ok(resp: Dict[str, Any]):
-            try:
-                if hasattr(mw, "hide_loading"):
-                    mw.hide_loading()
-            except Exception:
-                pass
+        def _on_progress(done: int, total: int):
+            if progress.wasCanceled():
+                return
+            progress.setValue(done)
 
+        def _on_rebuilding():
+            if not progress.wasCanceled():
+                progress.setLabelText("正在提交最后一批并重算日汇总...")
+
+        def _close_progress():
+            progress.blockSignals(True)  # 关闭时不再触发 canceled
+            progress.close()
+            progress.deleteLater()
             self._btn_submit.setEnabled(True)
             self._btn_close.setEnabled(True)
 
-            if resp.get("status") != "success":
-                QMessageBox.warning(self, "补录失败", str(resp.get("message") or resp))
-                return
+        def _on_ok(result: Dict[str, Any]):
+            _close_progress()
 
-            inserted = int(resp.get("inserted") or 0)
-            skipped = int(resp.get("skipped") or 0)
-            failed = int(resp.get("failed") or 0)
-            rebuilt = int(resp.get("rebuilt_daily_rows") or 0)
+            failures: List[Tuple[_ManualAddRow, str]] = invalid + list(result.get("failures") or [])
+            unreported = int(result.get("unreported_failed") or 0)
+            failed = len(failures) + unreported
+
+            msg = (
+                f"补录完成：新增 {result.get('inserted', 0)} 条，跳过 {result.get('skipped', 0)} 条，失败 {failed} 条；"
+                f"已重算日汇总 {result.get('rebuilt', 0)} 行。"
+            )
+            if result.get("cancelled"):
+                msg += "\n已取消，剩余数据未提交，日汇总未重算。"
+            if unreported:
+                msg += f"\n其中 {unreported} 条后端处理失败但未返回明细。"
+            if result.get("rebuild_error"):
+                msg += f"\n日汇总重算失败：{result['rebuild_error']}\n其余已写入的打卡记录不受影响，失败的行重新提交时会重算日汇总。"
+
+            if not failures and not result.get("rebuild_error") and not unreported:
+                QMessageBox.information(self, "补录成功", msg)
+                self.accept()
+                return
 
-            msg = f"补录完成：新增 {inserted} 条，跳过 {skipped} 条，失败 {failed} 条；已重算日汇总 {rebuilt} 行。"
-            QMessageBox.information(self, "补录成功", msg)
-            self.accept()
+            if failures:
+                msg += "\n\n输入框已只保留失败的行，修正后可再次提交。"
+                self._show_only_rows([row for row, _ in failures])
+            box = QMessageBox(QMessageBox.Warning, "部分补录失败", msg, QMessageBox.Ok, self)
+            if failures:
+                box.setDetailedText(self._failure_text(failures))
+            box.exec()
 
         def _on_err(err: str):
-            try:
-                if hasattr(mw, "hide_loading"):
-                    mw.hide_loading()
-            except Exception:
-                pass
-            self._btn_submit.setEnabled(True)
-            self._btn_close.setEnabled(True)
+            _close_progress()
             QMessageBox.warning(self, "补录失败", err)
 
+        worker.signals.progress.connect(_on_progress)
+        worker.signals.rebuilding.connect(_on_rebuilding)
         worker.signals.finished.connect(_on_ok)
         worker.signals.error.connect(_on_err)
         QThreadPool.globalInstance().start(worker)
@@ -418,10 +677,7 @@ class AttendanceView(QWidget):
         super().__init__()
 
         # 分页状态
-        self._current_offset = 0
         self._page_size = 50
-        self._is_loading = False
-        self._has_more = True
         self._current_filters: Dict[str, Any] = {}
 
         layout = QVBoxLayout(self)
@@ -484,23 +740,12 @@ class AttendanceView(QWidget):
         fl.addStretch()
         layout.addWidget(filter_frame)
 
-        # 表格
-        self._table = QTableWidget(0, 8)
-        self._table.setHorizontalHeaderLabels(["日期", "时间", "用户ID", "姓名", "得力云ID", "类型", "终端", "操作"])
-        header = self._table.horizontalHeader()
-        header.setStretchLastSection(False)
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)
-        header.setSectionResizeMode(6, QHeaderView.Stretch)
-        header.setSectionResizeMode(7, QHeaderView.ResizeToContents)
-        self._table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self._table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        scroll_bar = self._table.verticalScrollBar()
-        scroll_bar.valueChanged.connect(self._on_scroll_changed)
+        # 表格（滚动到底部时由模型自动加载下一页）
+        self._model = PagedTableModel(_ATTENDANCE_CHECKIN_COLUMNS, page_size=self._page_size, parent=self)
+        self._model.page_requested.connect(self._on_page_requested)
+        self._model.state_changed.connect(self._on_model_state_changed)
+        self._table = PagedTableView(self._model, _ATTENDANCE_CHECKIN_COLUMNS)
+        self._table.action_clicked.connect(self._on_view_clicked)
         layout.addWidget(self._table, 1)
 
         self._status_label = QLabel("")
@@ -517,13 +762,6 @@ class AttendanceView(QWidget):
             # 补录完成后刷新列表
             self.reload_from_api()
 
-    def _on_scroll_changed(self, value: int):
-        if self._is_loading or not self._has_more:
-            return
-        sb = self._table.verticalScrollBar()
-        if value >= sb.maximum() - 50:
-            self._load_more()
-
     def _on_clear_filter(self):
         self._start_date.setDate(QDate.currentDate().addDays(-7))
         self._end_date.setDate(QDate.currentDate())
@@ -543,92 +781,41 @@ class AttendanceView(QWidget):
             "user_id": user_id,
             "check_type": check_type,
         }
-        self._current_offset = 0
-        self._has_more = True
-        self._table.setRowCount(0)
-        self._load_more(first=True)
-
-    def _load_more(self, first: bool = False):
-        if self._is_loading or not self._has_more:
-            return
-        self._is_loading = True
-        self._status_label.setText("加载中...")
 
         mw = self.window()
-        if first and hasattr(mw, "show_loading"):
+        if hasattr(mw, "show_loading"):
             mw.show_loading("加载考勤记录中...")
 
+        # 重置分页状态（进行中的旧请求结果会被丢弃）并加载第一页
+        self._model.reset()
+        self._model.fetchMore()
+
+    def _on_page_requested(self, generation: int, offset: int, limit: int):
         worker = _AttendanceCheckinWorker(
             start_date=self._current_filters.get("start_date"),
             end_date=self._current_filters.get("end_date"),
             user_id=self._current_filters.get("user_id"),
             check_type=self._current_filters.get("check_type"),
-            offset=self._current_offset,
-            limit=self._page_size,
+            offset=offset,
+            limit=limit,
+            cancel_token=self._model.cancel_token,
         )
-        worker.signals.finished.connect(lambda items: self._on_loaded(items, first=first))
-        worker.signals.error.connect(self._on_error)
+        worker.signals.finished.connect(lambda items, g=generation, o=offset: self._on_loaded(g, o, items))
+        worker.signals.error.connect(lambda msg, g=generation, o=offset: self._on_error(msg, g, o))
         QThreadPool.globalInstance().start(worker)
 
-    def _on_loaded(self, items: List[Dict[str, Any]], *, first: bool):
-        mw = self.window()
-        if first and hasattr(mw, "hide_loading"):
-            mw.hide_loading()
+    def _on_loaded(self, generation: int, offset: int, items: List[Dict[str, Any]]):
+        if offset == 0 and generation == self._model.generation:
+            mw = self.window()
+            if hasattr(mw, "hide_loading"):
+                mw.hide_loading()
+        self._model.page_loaded(generation, offset, items)
 
-        self._is_loading = False
-        self._apply_rows(items)
+    def _on_model_state_changed(self):
+        self._status_label.setText(self._model.status_text())
 
-        self._current_offset += len(items)
-        self._has_more = len(items) >= self._page_size
-        if not items and self._current_offset == 0:
-            self._status_label.setText("暂无数据")
-        elif not self._has_more:
-            self._status_label.setText(f"已加载全部数据（共 {self._current_offset} 条）")
-        else:
-            self._status_label.setText(f"已加载 {self._current_offset} 条，滚动到底部加载更多")
-
-    def _apply_rows(self, items: List[Dict[str, Any]]):
-        start_row = self._table.rowCount()
-        self._table.setRowCount(start_row + len(items))
-
-        for idx, it in enumerate(items):
-            row = start_row + idx
-            check_date = str(it.get("check_date") or "")
-            check_time_local = str(it.get("check_time_local") or "")
-            # 兼容 ISO 格式，显示到秒
-            if isinstance(check_time_local, str) and "T" in check_time_local:
-                try:
-                    dt = datetime.fromisoformat(check_time_local.replace("Z", "+00:00"))
-                    check_time_local = dt.strftime("%Y-%m-%d %H:%M:%S")
-                except Exception:
-                    pass
-
-            user_id = str(it.get("user_id") or "")
-            user_name = str(it.get("user_name") or "")
-            delicloud_user_id = str(it.get("delicloud_user_id") or "")
-            check_type = str(it.get("check_type") or "")
-            terminal_id = str(it.get("terminal_id") or "")
-
-            self._table.setItem(row, 0, QTableWidgetItem(check_date))
-            self._table.setItem(row, 1, QTableWidgetItem(check_time_local))
-            self._table.setItem(row, 2, QTableWidgetItem(user_id))
-            self._table.setItem(row, 3, QTableWidgetItem(user_name))
-            self._table.setItem(row, 4, QTableWidgetItem(delicloud_user_id))
-            self._table.setItem(row, 5, QTableWidgetItem(_check_type_text(check_type)))
-            self._table.setItem(row, 6, QTableWidgetItem(terminal_id))
-
-            btn = QPushButton("查看")
-            btn.setFixedSize(52, 22)
-            btn.setStyleSheet("QPushButton { font-size: 9pt; padding: 0px; }")
-            btn.setProperty("checkin_id", int(it.get("id") or 0))
-            btn.clicked.connect(self._on_view_clicked)
-            self._table.setCellWidget(row, 7, btn)
-
-    def _on_view_clicked(self):
-        btn = self.sender()
-        if not btn:
-            return
-        checkin_id = int(btn.property("checkin_id") or 0)
+    def _on_view_clicked(self, item: Dict[str, Any], _pos: QPoint):
+        checkin_id = int(item.get("id") or 0)
         if checkin_id <= 0:
             return
 
@@ -638,7 +825,7 @@ class AttendanceView(QWidget):
 
         worker = _AttendanceCheckinDetailWorker(checkin_id)
         worker.signals.finished.connect(self._show_detail_dialog)
-        worker.signals.error.connect(self._on_error)
+        worker.signals.error.connect(self._on_detail_error)
         QThreadPool.globalInstance().start(worker)
 
     def _show_detail_dialog(self, item: Dict[str, Any]):
@@ -666,11 +853,19 @@ class AttendanceView(QWidget):
 
         dlg.exec()
 
-    def _on_error(self, msg: str):
-        self._is_loading = False
+    def _on_error(self, msg: str, generation: int, offset: int):
+        # 已被新筛选作废的请求不再提示
+        if generation != self._model.generation:
+            return
+        self._model.page_failed(generation, offset)
         mw = self.window()
         if hasattr(mw, "hide_loading"):
             mw.hide_loading()
         self._status_label.setText(f"加载失败：{msg}")
         handle_api_error(self, Exception(msg), "加载失败")
 
+    def _on_detail_error(self, msg: str):
+        mw = self.window()
+        if hasattr(mw, "hide_loading"):
+            mw.hide_loading()
+        handle_api_error(self, Exception(msg), "加载失败")
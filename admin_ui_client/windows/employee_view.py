@@ -10,88 +10,31 @@
 """
 
 import json
-from typing import List, Dict, Any, Optional
-from datetime import date, datetime, timedelta
-from pathlib import Path
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Set, Tuple
+from datetime import date, timedelta
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QTableWidget, QTableWidgetItem, QDialog, QFormLayout,
     QLineEdit, QComboBox, QDateEdit, QMessageBox, QHeaderView,
     QAbstractItemView, QTextEdit, QGroupBox, QTabWidget, QMenu, QApplication, QFrame,
-    QListWidget, QListWidgetItem, QSplitter
+    QListWidget, QListWidgetItem, QSplitter, QTableView, QStyledItemDelegate, QStyle, QStyleOptionComboBox
+)
+from PySide6.QtCore import (
+    Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate, QTimer,
+    QAbstractTableModel, QSortFilterProxyModel, QModelIndex, QEvent, QPoint, QRect, QSize
 )
-from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate, QTimer
 from PySide6.QtGui import QFont, QAction
 
 from utils.api_client import AdminApiClient, ApiError, AuthError
 from utils.error_handler import handle_api_error
 from widgets.toast import Toast
-from utils.config_manager import CONFIG_PATH
-
-
-class _DataCache:
-    """数据缓存工具类，用于缓存团队、角色、职级、薪级等数据（缓存1天）"""
-    
-    CACHE_DIR = CONFIG_PATH.parent / "cache"
-    CACHE_EXPIRE_HOURS = 24  # 缓存24小时
-    
-    @classmethod
-    def _get_cache_path(cls, cache_key: str) -> Path:
-        """获取缓存文件路径"""
-        cls.CACHE_DIR.mkdir(exist_ok=True)
-        return cls.CACHE_DIR / f"{cache_key}.json"
-    
-    @classmethod
-    def get(cls, cache_key: str) -> Optional[Dict[str, Any]]:
-        """获取缓存数据，如果过期或不存在则返回None"""
-        cache_path = cls._get_cache_path(cache_key)
-        if not cache_path.exists():
-            return None
-        
-        try:
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-            
-            # 检查时间戳
-            cached_time_str = cache_data.get('cached_at')
-            if not cached_time_str:
-                return None
-            
-            cached_time = datetime.fromisoformat(cached_time_str)
-            now = datetime.now()
-            
-            # 检查是否过期（超过24小时）
-            if (now - cached_time).total_seconds() > cls.CACHE_EXPIRE_HOURS * 3600:
-                return None
-            
-            return cache_data.get('data')
-        except Exception as e:
-            # 缓存文件损坏，删除它
-            try:
-                cache_path.unlink()
-            except:
-                pass
-            return None
-    
-    @classmethod
-    def set(cls, cache_key: str, data: Any):
-        """设置缓存数据"""
-        cache_path = cls._get_cache_path(cache_key)
-        try:
-            cache_data = {
-                'cached_at': datetime.now().isoformat(),
-                'data': data
-            }
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            # 缓存写入失败不影响功能，只记录错误
-            pass
+from utils.dimension_cache import DimensionCache
 
 
 class _EmployeeWorkerSignals(QObject):
-    finished = Signal(list)  # List[Dict]
+    finished = Signal(list)  # List[_EmployeeRow]
     error = Signal(str)
 
 
@@ -119,7 +62,10 @@ class _EmployeeWorker(QRunnable):
         try:
             resp = client.get_employees()
             items = resp.get("items", []) if isinstance(resp, dict) else []
-            self.signals.finished.emit(items)
+            # 顺带刷新共享缓存，其他页面（团队映射等）直接使用最新员工数据
+            DimensionCache.set("employees", items)
+            # 显示文本、在职天数等派生字段在后台一次算好
+            self.signals.finished.emit(_build_employee_rows(items))
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
         except Exception as e:
@@ -209,66 +155,40 @@ class _DialogDataWorker(QRunnable):
             # 加载团队列表（带缓存）
             if self._need_teams:
                 try:
-                    cached_teams = _DataCache.get("teams")
-                    if cached_teams is not None:
-                        self.signals.teams_loaded.emit(cached_teams)
-                    else:
-                        teams = client.get_teams()
-                        _DataCache.set("teams", teams)
-                        self.signals.teams_loaded.emit(teams)
+                    self.signals.teams_loaded.emit(DimensionCache.get_or_fetch("teams", client.get_teams))
                 except Exception as e:
                     self.signals.error.emit("teams", str(e))
             
             # 加载角色列表（带缓存）
             if self._need_roles:
                 try:
-                    cached_roles = _DataCache.get("roles")
-                    if cached_roles is not None:
-                        self.signals.roles_loaded.emit(cached_roles)
-                    else:
-                        roles = client.get_roles()
-                        _DataCache.set("roles", roles)
-                        self.signals.roles_loaded.emit(roles)
+                    self.signals.roles_loaded.emit(DimensionCache.get_or_fetch("roles", client.get_roles))
                 except Exception as e:
                     self.signals.error.emit("roles", str(e))
             
             # 加载职级列表（带缓存）
             if self._need_levels:
                 try:
-                    cached_levels = _DataCache.get("levels")
-                    if cached_levels is not None:
-                        self.signals.levels_loaded.emit(cached_levels)
-                    else:
-                        levels = client.get_levels()
-                        _DataCache.set("levels", levels)
-                        self.signals.levels_loaded.emit(levels)
+                    self.signals.levels_loaded.emit(DimensionCache.get_or_fetch("levels", client.get_levels))
                 except Exception as e:
                     self.signals.error.emit("levels", str(e))
             
             # 加载薪级列表（带缓存）
             if self._need_salary_bands:
                 try:
-                    cached_salary_bands = _DataCache.get("salary_bands")
-                    if cached_salary_bands is not None:
-                        self.signals.salary_bands_loaded.emit(cached_salary_bands)
-                    else:
-                        salary_bands = client.get_salary_bands()
-                        _DataCache.set("salary_bands", salary_bands)
-                        self.signals.salary_bands_loaded.emit(salary_bands)
+                    salary_bands = DimensionCache.get_or_fetch("salary_bands", client.get_salary_bands)
+                    self.signals.salary_bands_loaded.emit(salary_bands)
                 except Exception as e:
                     self.signals.error.emit("salary_bands", str(e))
             
             # 加载子角色列表（带缓存，按role_id缓存）
             if self._need_subroles and self._role_id:
                 try:
-                    cache_key = f"subroles_{self._role_id}"
-                    cached_subroles = _DataCache.get(cache_key)
-                    if cached_subroles is not None:
-                        self.signals.subroles_loaded.emit(cached_subroles, self._role_id)
-                    else:
-                        subroles = client.get_subroles(role_id=self._role_id)
-                        _DataCache.set(cache_key, subroles)
-                        self.signals.subroles_loaded.emit(subroles, self._role_id)
+                    role_id = self._role_id
+                    subroles = DimensionCache.get_or_fetch(
+                        f"subroles_{role_id}", lambda: client.get_subroles(role_id=role_id)
+                    )
+                    self.signals.subroles_loaded.emit(subroles, role_id)
                 except Exception as e:
                     self.signals.error.emit("subroles", str(e))
         
@@ -650,27 +570,9 @@ class EmployeeEditDialog(QDialog):
         if not AdminApiClient.is_logged_in():
             return
         
-        # 先尝试从缓存加载
-        cached_teams = _DataCache.get("teams")
-        if cached_teams is not None:
-            self._teams_data = {}
-            for team in cached_teams:
-                team_id = team["id"]
-                team_name = team["name"]
-                team_leader = team.get("team_leader")
-                self._teams_data[team_id] = {
-                    "name": team_name,
-                    "team_leader": team_leader
-                }
-                self._team_combo.addItem(team_name, team_id)
-            return
-        
-        # 缓存不存在或过期，从API加载
+        # 优先使用缓存（内存/磁盘），缓存缺失时从API加载
         try:
-            client = AdminApiClient.from_config()
-            teams = client.get_teams()
-            # 更新缓存
-            _DataCache.set("teams", teams)
+            teams = DimensionCache.get_or_fetch("teams", lambda: AdminApiClient.from_config().get_teams())
             
             self._teams_data = {}  # 存储团队数据 {team_id: {name, team_leader}}
             for team in teams:
@@ -692,20 +594,9 @@ class EmployeeEditDialog(QDialog):
         if not AdminApiClient.is_logged_in():
             return
         
-        # 先尝试从缓存加载
-        cached_roles = _DataCache.get("roles")
-        if cached_roles is not None:
-            for role in cached_roles:
-                self._role_combo.addItem(role["name"], role["id"])
-            return
-        
-        # 缓存不存在或过期，从API加载
+        # 优先使用缓存（内存/磁盘），缓存缺失时从API加载
         try:
-            client = AdminApiClient.from_config()
-            roles = client.get_roles()
-            # 更新缓存
-            _DataCache.set("roles", roles)
-            
+            roles = DimensionCache.get_or_fetch("roles", lambda: AdminApiClient.from_config().get_roles())
             for role in roles:
                 self._role_combo.addItem(role["name"], role["id"])
         except Exception as e:
@@ -722,21 +613,11 @@ class EmployeeEditDialog(QDialog):
         if not role_id:
             return
         
-        # 先尝试从缓存加载
-        cache_key = f"subroles_{role_id}"
-        cached_subroles = _DataCache.get(cache_key)
-        if cached_subroles is not None:
-            for subrole in cached_subroles:
-                self._subrole_combo.addItem(subrole["name"], subrole["id"])
-            return
-        
-        # 缓存不存在或过期，从API加载
+        # 优先使用缓存（内存/磁盘），缓存缺失时从API加载
         try:
-            client = AdminApiClient.from_config()
-            subroles = client.get_subroles(role_id=role_id)
-            # 更新缓存
-            _DataCache.set(cache_key, subroles)
-            
+            subroles = DimensionCache.get_or_fetch(
+                f"subroles_{role_id}", lambda: AdminApiClient.from_config().get_subroles(role_id=role_id)
+            )
             for subrole in subroles:
                 self._subrole_combo.addItem(subrole["name"], subrole["id"])
         except Exception as e:
@@ -748,20 +629,9 @@ class EmployeeEditDialog(QDialog):
         if not AdminApiClient.is_logged_in():
             return
         
-        # 先尝试从缓存加载
-        cached_levels = _DataCache.get("levels")
-        if cached_levels is not None:
-            for level in cached_levels:
-                self._level_combo.addItem(level["name"], level["id"])
-            return
-        
-        # 缓存不存在或过期，从API加载
+        # 优先使用缓存（内存/磁盘），缓存缺失时从API加载
         try:
-            client = AdminApiClient.from_config()
-            levels = client.get_levels()
-            # 更新缓存
-            _DataCache.set("levels", levels)
-            
+            levels = DimensionCache.get_or_fetch("levels", lambda: AdminApiClient.from_config().get_levels())
             for level in levels:
                 self._level_combo.addItem(level["name"], level["id"])
         except Exception as e:
@@ -773,21 +643,11 @@ class EmployeeEditDialog(QDialog):
         if not AdminApiClient.is_logged_in():
             return
         
-        # 先尝试从缓存加载
-        cached_salary_bands = _DataCache.get("salary_bands")
-        if cached_salary_bands is not None:
-            for band in cached_salary_bands:
-                # 显示格式：S1 (3,000 - 4,500)
-                display_text = f"{band['band']} ({int(band['salary_min']):,} - {int(band['salary_max']):,})"
-                self._salary_band_combo.addItem(display_text, band["band"])
-            return
-        
-        # 缓存不存在或过期，从API加载
+        # 优先使用缓存（内存/磁盘），缓存缺失时从API加载
         try:
-            client = AdminApiClient.from_config()
-            salary_bands = client.get_salary_bands()
-            # 更新缓存
-            _DataCache.set("salary_bands", salary_bands)
+            salary_bands = DimensionCache.get_or_fetch(
+                "salary_bands", lambda: AdminApiClient.from_config().get_salary_bands()
+            )
             
             for band in salary_bands:
                 # 显示格式：S1 (3,000 - 4,500)
@@ -1031,7 +891,7 @@ class GitHubMemberSelectDialog(QDialog):
                     
                     # 尝试从缓存读取
                     cache_key = f"github_teams_{github_org}"
-                    cached_teams = _DataCache.get(cache_key)
+                    cached_teams = DimensionCache.get(cache_key)
                     if cached_teams is not None:
                         # 缓存命中，直接返回
                         self.signals.finished.emit(cached_teams)
@@ -1056,7 +916,7 @@ class GitHubMemberSelectDialog(QDialog):
                     if r.status_code == 200:
                         teams = r.json()
                         # 保存到缓存
-                        _DataCache.set(cache_key, teams)
+                        DimensionCache.set(cache_key, teams)
                         self.signals.finished.emit(teams)
                     elif r.status_code == 404:
                         self.signals.error.emit(f"GitHub 组织 '{github_org}' 不存在或无权访问。")
@@ -1158,7 +1018,7 @@ class GitHubMemberSelectDialog(QDialog):
                     
                     # 尝试从缓存读取
                     cache_key = f"github_team_members_{github_org}_{self._team_slug}"
-                    cached_members = _DataCache.get(cache_key)
+                    cached_members = DimensionCache.get(cache_key)
                     if cached_members is not None:
                         # 缓存命中，直接返回
                         self.signals.finished.emit(self._team_slug, cached_members)
@@ -1197,7 +1057,7 @@ class GitHubMemberSelectDialog(QDialog):
                                     full_members.append(member)
                         
                         # 保存到缓存
-                        _DataCache.set(cache_key, full_members)
+                        DimensionCache.set(cache_key, full_members)
                         self.signals.finished.emit(self._team_slug, full_members)
                     elif r.status_code == 404:
                         self.signals.error.emit(f"Team '{self._team_slug}' 不存在或无权访问。")
@@ -1339,12 +1199,7 @@ class AttendanceEmployeeSelectDialog(QDialog):
 
     def _on_refresh_clicked(self):
         # 清空缓存并刷新
-        try:
-            cache_path = _DataCache._get_cache_path(self._cache_key())
-            if cache_path.exists():
-                cache_path.unlink()
-        except Exception:
-            pass
+        DimensionCache.invalidate(self._cache_key())
         self._load_items(force_refresh=True)
 
     def _load_items(self, force_refresh: bool):
@@ -1369,7 +1224,7 @@ class AttendanceEmployeeSelectDialog(QDialog):
                 try:
                     # 1) 本地缓存
                     if not self._force_refresh:
-                        cached = _DataCache.get(self._cache_key)
+                        cached = DimensionCache.get(self._cache_key)
                         if isinstance(cached, list) and cached:
                             self.signals.finished.emit(cached)
                             return
@@ -1453,7 +1308,7 @@ class AttendanceEmployeeSelectDialog(QDialog):
                             offset += limit
 
                     # 写缓存（员工列表通常不频繁变化）
-                    _DataCache.set(self._cache_key, items)
+                    DimensionCache.set(self._cache_key, items)
                     self.signals.finished.emit(items)
                 except Exception as e:
                     self.signals.error.emit(f"加载失败：{type(e).__name__}: {e}")
@@ -2398,6 +2253,197 @@ class BindingManageDialog(QDialog):
             handle_api_error(self, e, "保存失败")
 
 
+@dataclass
+class _EmployeeRow:
+    """员工表格行：显示文本等派生字段在加载时计算一次"""
+    data: Dict[str, Any]
+    user_id: str
+    name: str  # 组长带"（组长）"后缀
+    texts: Tuple[str, ...]  # 前 10 列的显示文本
+
+
+_EMPLOYEE_STATUS_TEXT = {0: "离职", 1: "在职", 2: "休假中"}
+
+
+def _tenure_days_text(join_date: Any, today: date) -> str:
+    """在职天数；入职日期在未来显示 0，解析失败显示 -"""
+    if not join_date:
+        return "-"
+    try:
+        join_date_obj = date.fromisoformat(join_date) if isinstance(join_date, str) else join_date
+        return str(max((today - join_date_obj).days, 0))
+    except Exception:
+        return "-"
+
+
+def _build_employee_rows(items: List[Dict[str, Any]]) -> List[_EmployeeRow]:
+    """把接口返回的员工数据转换为表格行（可在后台线程调用，不涉及 Qt 对象）"""
+    today = date.today()
+    rows = []
+    for emp_data in items:
+        user_id = str(emp_data.get("user_id", ""))
+        name = emp_data.get("name", "")
+        # 如果是组长，在名字后面加"（组长）"
+        if emp_data.get("is_team_leader", False):
+            name = f"{name}（组长）"
+        # 优先显示名称，如果没有名称则显示ID
+        team_name = emp_data.get("team_name") or f"团队{emp_data.get('team_id', 0)}"
+        role_name = emp_data.get("role_name") or f"角色{emp_data.get('role_id', 0)}"
+        subrole_name = emp_data.get("subrole_name")
+        # 如果有子角色，显示"角色名称-子角色名称"，否则只显示角色名称
+        if subrole_name:
+            role_name = f"{role_name}-{subrole_name}"
+        level_name = emp_data.get("level_name") or f"职级{emp_data.get('level_id', 0)}"
+        join_date = emp_data.get("join_date") or ""
+        # 状态：0=离职，1=在职，2=休假中
+        status_text = _EMPLOYEE_STATUS_TEXT.get(emp_data.get("active", 1), "在职")
+        texts = (
+            user_id,
+            name,
+            emp_data.get("email") or "",
+            team_name,
+            role_name,
+            level_name,
+            emp_data.get("salary_band", "") or "",
+            status_text,
+            str(join_date),
+            _tenure_days_text(join_date, today),
+        )
+        rows.append(_EmployeeRow(data=emp_data, user_id=user_id, name=name, texts=texts))
+    return rows
+
+
+class EmployeeTableModel(QAbstractTableModel):
+    """员工表格模型：按团队/职级/薪级/状态预建行号索引，筛选只做集合运算"""
+
+    HEADERS = ["员工ID", "姓名", "邮箱", "团队", "角色-子角色", "职级", "薪级", "状态", "入职日期", "在职天数", "操作"]
+    ACTION_COLUMN = 10
+    EMAIL_COLUMN = 2
+    # 筛选字段 -> 员工数据中的键
+    INDEXED_FIELDS = {
+        "team_id": "team_id",
+        "level_id": "level_id",
+        "salary_band": "salary_band",
+        "active": "active",
+    }
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows: List[_EmployeeRow] = []
+        self._indexes: Dict[str, Dict[Any, Set[int]]] = {}
+
+    def set_rows(self, rows: List[_EmployeeRow]):
+        self.beginResetModel()
+        self._rows = rows
+        self._indexes = {field: {} for field in self.INDEXED_FIELDS}
+        for i, row in enumerate(rows):
+            for field, key in self.INDEXED_FIELDS.items():
+                value = row.data.get(key, 1 if key == "active" else None)
+                self._indexes[field].setdefault(value, set()).add(i)
+        self.endResetModel()
+
+    def row_at(self, row: int) -> Optional[_EmployeeRow]:
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+    def matching_rows(self, filters: Dict[str, Any]) -> Optional[Set[int]]:
+        """返回满足所有筛选条件的行号集合；没有筛选条件时返回 None（全部显示）"""
+        result: Optional[Set[int]] = None
+        # 从最小的集合开始求交集
+        candidates = sorted(
+            (self._indexes.get(field, {}).get(value, set()) for field, value in filters.items()
+             if field in self.INDEXED_FIELDS and value not in (None, "")),
+            key=len,
+        )
+        for rows in candidates:
+            result = set(rows) if result is None else result & rows
+            if not result:
+                break
+        return result
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and 0 <= section < len(self.HEADERS):
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            return row.texts[column] if column < len(row.texts) else None
+        if role == Qt.TextAlignmentRole:
+            # 除了邮箱列，其他都居中
+            if column == self.EMAIL_COLUMN:
+                return int(Qt.AlignLeft | Qt.AlignVCenter)
+            return int(Qt.AlignCenter)
+        if role == Qt.UserRole:
+            return row.data
+        return None
+
+
+class EmployeeFilterProxyModel(QSortFilterProxyModel):
+    """按预先算好的行号集合过滤，不逐行比较字段"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._allowed_rows: Optional[Set[int]] = None
+
+    def set_allowed_rows(self, rows: Optional[Set[int]]):
+        self._allowed_rows = rows
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        return self._allowed_rows is None or source_row in self._allowed_rows
+
+
+class _EmployeeActionDelegate(QStyledItemDelegate):
+    """操作列：绘制成下拉框样式，点击后弹出操作菜单（不再为每行创建 QComboBox）"""
+
+    action_requested = Signal(QModelIndex, QPoint)  # (索引, 菜单弹出位置-全局坐标)
+
+    COMBO_WIDTH = 100
+    COMBO_HEIGHT = 24
+    PLACEHOLDER = "选择操作"
+
+    def _combo_rect(self, rect: QRect) -> QRect:
+        width = min(self.COMBO_WIDTH, rect.width() - 4)
+        height = min(self.COMBO_HEIGHT, rect.height() - 2)
+        return QRect(rect.x() + (rect.width() - width) // 2, rect.y() + (rect.height() - height) // 2, width, height)
+
+    def paint(self, painter, option, index):
+        super().paint(painter, option, index)
+        opt = QStyleOptionComboBox()
+        opt.rect = self._combo_rect(option.rect)
+        opt.state = QStyle.State_Enabled | (option.state & QStyle.State_MouseOver)
+        opt.currentText = self.PLACEHOLDER
+        opt.palette = option.palette
+        style = option.widget.style() if option.widget is not None else QApplication.style()
+        style.drawComplexControl(QStyle.CC_ComboBox, opt, painter, option.widget)
+        style.drawControl(QStyle.CE_ComboBoxLabel, opt, painter, option.widget)
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(self.COMBO_WIDTH + 8, self.COMBO_HEIGHT + 6)
+
+    def editorEvent(self, event, model, option, index) -> bool:
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            rect = self._combo_rect(option.rect)
+            if rect.contains(event.position().toPoint()) and option.widget is not None:
+                viewport = getattr(option.widget, "viewport", None)
+                target = viewport() if viewport is not None else option.widget
+                self.action_requested.emit(index, target.mapToGlobal(rect.bottomLeft()))
+                return True
+        return super().editorEvent(event, model, option, index)
+
+
 class EmployeeView(QWidget):
     def __init__(self):
         super().__init__()
@@ -2406,10 +2452,9 @@ class EmployeeView(QWidget):
         self._current_filters = {
             "team_id": None,
             "level_id": None,
-            "salary_band": None
+            "salary_band": None,
+            "active": None,
         }
-        # 保存所有员工数据（用于筛选）
-        self._all_employee_data = []
         self._setup_ui()
         # 初始化时加载筛选维度数据
         self._load_filter_dimensions()
@@ -2463,6 +2508,15 @@ class EmployeeView(QWidget):
         self._salary_band_filter_combo.setEnabled(False)  # 初始状态禁用，等待数据加载
         filter_row.addWidget(self._salary_band_filter_combo)
         
+        # 状态筛选
+        filter_row.addWidget(QLabel("状态："))
+        self._status_filter_combo = QComboBox()
+        self._status_filter_combo.setEditable(False)
+        self._status_filter_combo.addItem("全部", None)
+        for active in (1, 2, 0):
+            self._status_filter_combo.addItem(_EMPLOYEE_STATUS_TEXT[active], active)
+        filter_row.addWidget(self._status_filter_combo)
+        
         filter_row.addStretch()
         
         # 所有按钮放在一起
@@ -2493,12 +2547,16 @@ class EmployeeView(QWidget):
         filter_layout.addLayout(filter_row)
         layout.addWidget(filter_frame)
         
-        # 表格
-        self._table = QTableWidget()
-        self._table.setColumnCount(11)
-        self._table.setHorizontalHeaderLabels([
-            "员工ID", "姓名", "邮箱", "团队", "角色-子角色", "职级", "薪级", "状态", "入职日期", "在职天数", "操作"
-        ])
+        # 表格（模型 + 过滤代理，筛选不重建控件）
+        self._model = EmployeeTableModel(self)
+        self._proxy = EmployeeFilterProxyModel(self)
+        self._proxy.setSourceModel(self._model)
+        self._table = QTableView()
+        self._table.setModel(self._proxy)
+        self._action_delegate = _EmployeeActionDelegate(self._table)
+        self._action_delegate.action_requested.connect(self._on_action_requested)
+        self._table.setItemDelegateForColumn(EmployeeTableModel.ACTION_COLUMN, self._action_delegate)
+        self._table.setMouseTracking(True)  # 操作列悬停效果
         header = self._table.horizontalHeader()
         # 设置各列的宽度策略
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # 员工ID
@@ -2512,6 +2570,9 @@ class EmployeeView(QWidget):
         header.setSectionResizeMode(8, QHeaderView.ResizeToContents)  # 入职日期
         header.setSectionResizeMode(9, QHeaderView.ResizeToContents)  # 在职天数
         header.setSectionResizeMode(10, QHeaderView.ResizeToContents)  # 操作
+        # 按内容计算列宽时只采样部分行，避免数千行时逐行测量
+        header.setResizeContentsPrecision(200)
+        self._table.verticalHeader().setDefaultSectionSize(_EmployeeActionDelegate.COMBO_HEIGHT + 8)
         self._table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self._table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         # 启用右键菜单
@@ -2534,127 +2595,20 @@ class EmployeeView(QWidget):
         # 加载维度数据（团队、职级、薪级）用于筛选下拉框
         self._load_filter_dimensions()
     
-    def _on_data_loaded(self, items: List[Dict]):
+    def _on_data_loaded(self, rows: List[_EmployeeRow]):
         main_window = self.window()
         if hasattr(main_window, "hide_loading"):
             main_window.hide_loading()
         
-        # 保存所有员工数据
-        self._all_employee_data = items
+        # 重建模型及筛选索引
+        self._model.set_rows(rows)
         
         # 应用筛选条件
         self._apply_filters()
     
     def _apply_filters(self):
-        """应用筛选条件并显示数据"""
-        # 根据筛选条件过滤数据
-        filtered_items = self._all_employee_data.copy()
-        
-        # 团队筛选
-        team_id = self._current_filters.get("team_id")
-        if team_id is not None:
-            filtered_items = [item for item in filtered_items if item.get("team_id") == team_id]
-        
-        # 职级筛选
-        level_id = self._current_filters.get("level_id")
-        if level_id is not None:
-            filtered_items = [item for item in filtered_items if item.get("level_id") == level_id]
-        
-        # 薪级筛选
-        salary_band = self._current_filters.get("salary_band")
-        if salary_band:
-            filtered_items = [item for item in filtered_items if item.get("salary_band") == salary_band]
-        
-        # 显示筛选后的数据
-        self._table.setRowCount(0)
-        
-        for emp_data in filtered_items:
-            row = self._table.rowCount()
-            self._table.insertRow(row)
-            
-            user_id = str(emp_data.get("user_id", ""))
-            name = emp_data.get("name", "")
-            is_team_leader = emp_data.get("is_team_leader", False)
-            # 如果是组长，在名字后面加"（组长）"
-            if is_team_leader:
-                name = f"{name}（组长）"
-            email = emp_data.get("email") or ""
-            # 优先显示名称，如果没有名称则显示ID
-            team_name = emp_data.get("team_name") or f"团队{emp_data.get('team_id', 0)}"
-            role_name = emp_data.get("role_name") or f"角色{emp_data.get('role_id', 0)}"
-            subrole_name = emp_data.get("subrole_name")
-            # 如果有子角色，显示"角色名称-子角色名称"，否则只显示角色名称
-            if subrole_name:
-                role_name = f"{role_name}-{subrole_name}"
-            level_name = emp_data.get("level_name") or f"职级{emp_data.get('level_id', 0)}"
-            salary_band = emp_data.get("salary_band", "")
-            active = emp_data.get("active", 1)
-            join_date = emp_data.get("join_date") or ""
-            
-            # 状态：0=离职，1=在职，2=休假中
-            if active == 0:
-                status_text = "离职"
-            elif active == 2:
-                status_text = "休假中"
-            else:
-                status_text = "在职"
-            
-            # 计算在职天数
-            days_text = "-"
-            if join_date:
-                try:
-                    # 解析入职日期
-                    if isinstance(join_date, str):
-                        join_date_obj = date.fromisoformat(join_date)
-                    else:
-                        join_date_obj = join_date
-                    
-                    # 计算天数差
-                    today = date.today()
-                    days_diff = (today - join_date_obj).days
-                    if days_diff >= 0:
-                        days_text = str(days_diff)
-                    else:
-                        days_text = "0"  # 如果入职日期在未来，显示0
-                except Exception:
-                    days_text = "-"  # 解析失败显示"-"
-            
-            # 设置单元格内容和对齐方式（除了邮箱列，其他都居中）
-            items_data = [
-                (0, user_id, Qt.AlignCenter),
-                (1, name, Qt.AlignCenter),
-                (2, email, Qt.AlignLeft),  # 邮箱列左对齐
-                (3, team_name, Qt.AlignCenter),
-                (4, role_name, Qt.AlignCenter),
-                (5, level_name, Qt.AlignCenter),
-                (6, salary_band, Qt.AlignCenter),
-                (7, status_text, Qt.AlignCenter),
-                (8, join_date, Qt.AlignCenter),
-                (9, days_text, Qt.AlignCenter),  # 在职天数
-            ]
-            
-            for col, text, alignment in items_data:
-                cell_item = QTableWidgetItem(text)
-                cell_item.setTextAlignment(alignment)
-                self._table.setItem(row, col, cell_item)
-            
-            # 操作下拉框（移除删除功能，因为编辑可以改状态）
-            action_combo = QComboBox()
-            action_combo.addItems(["选择操作", "编辑", "账号绑定", "设为组长"])
-            action_combo.setCurrentIndex(0)  # 默认选中"选择操作"
-            action_combo.setFixedWidth(100)  # 设置固定宽度，不要撑满
-            
-            # 存储当前行的员工数据字典，用于回调
-            action_combo.setProperty("row_data", emp_data)
-            action_combo.setProperty("user_id", user_id)
-            action_combo.setProperty("user_name", name)
-            
-            # 连接信号
-            action_combo.currentTextChanged.connect(
-                lambda text, combo=action_combo: self._on_action_selected(text, combo)
-            )
-            
-            self._table.setCellWidget(row, 10, action_combo)  # 操作列在第10列（索引从0开始）
+        """应用筛选条件：索引求交集得到行号集合，交给代理模型过滤"""
+        self._proxy.set_allowed_rows(self._model.matching_rows(self._current_filters))
     
     def _load_filter_dimensions(self):
         """加载筛选下拉框所需的维度数据（团队、职级、薪级）"""
@@ -2709,12 +2663,14 @@ class EmployeeView(QWidget):
         team_id = self._team_filter_combo.currentData()
         level_id = self._level_filter_combo.currentData()
         salary_band = self._salary_band_filter_combo.currentData()
+        active = self._status_filter_combo.currentData()
         
         # 更新筛选条件
         self._current_filters = {
             "team_id": team_id,
             "level_id": level_id,
-            "salary_band": salary_band
+            "salary_band": salary_band,
+            "active": active,
         }
         
         # 应用筛选
@@ -2726,36 +2682,40 @@ class EmployeeView(QWidget):
         self._team_filter_combo.setCurrentIndex(0)
         self._level_filter_combo.setCurrentIndex(0)
         self._salary_band_filter_combo.setCurrentIndex(0)
+        self._status_filter_combo.setCurrentIndex(0)
         
         # 清除筛选条件
         self._current_filters = {
             "team_id": None,
             "level_id": None,
-            "salary_band": None
+            "salary_band": None,
+            "active": None,
         }
         
         # 应用筛选（显示所有数据）
         self._apply_filters()
     
-    def _on_action_selected(self, text: str, combo: QComboBox):
-        """处理操作下拉框选择"""
-        if text == "选择操作":
-            return  # 忽略默认选项
-        
-        row_data = combo.property("row_data")
-        user_id = combo.property("user_id")
-        user_name = combo.property("user_name")
-        
-        # 重置下拉框到默认选项
-        combo.setCurrentIndex(0)
-        
-        # 根据选择执行相应操作（移除删除功能，因为编辑可以改状态）
+    def _on_action_requested(self, index: QModelIndex, global_pos: QPoint):
+        """操作列点击：弹出操作菜单（移除删除功能，因为编辑可以改状态）"""
+        row = self._model.row_at(self._proxy.mapToSource(index).row())
+        if row is None:
+            return
+        self._table.selectRow(index.row())
+        menu = QMenu(self)
+        for text in ("编辑", "账号绑定", "设为组长"):
+            menu.addAction(text)
+        action = menu.exec(global_pos)
+        if action is not None:
+            self._on_action_selected(action.text(), row)
+    
+    def _on_action_selected(self, text: str, row: _EmployeeRow):
+        """处理操作菜单选择"""
         if text == "编辑":
-            self._on_edit_clicked(row_data)
+            self._on_edit_clicked(row.data)
         elif text == "账号绑定":
-            self._on_binding_clicked(user_id, user_name)
+            self._on_binding_clicked(row.user_id, row.name)
         elif text == "设为组长":
-            self._on_set_team_leader_clicked(user_id, user_name, row_data)
+            self._on_set_team_leader_clicked(row.user_id, row.name, row.data)
     
     def _on_error(self, error: str):
         main_window = self.window()
@@ -2814,6 +2774,8 @@ class EmployeeView(QWidget):
                 main_window.hide_loading()
             
             if response.get("status") == "success":
+                # 组长信息包含在团队与员工数据中，缓存失效
+                DimensionCache.invalidate("teams", "employees")
                 Toast.show_message(self, "设置成功")
                 # 刷新员工列表
                 self.reload_from_api()
@@ -2838,14 +2800,15 @@ class EmployeeView(QWidget):
             else:
                 client.update_employee(user_id, data)
                 Toast.show_message(self, "更新成功")
+            DimensionCache.invalidate("employees")
             self.reload_from_api()
         except Exception as e:
             handle_api_error(self, e, "保存失败")
     
     def _show_context_menu(self, position):
         """显示右键菜单"""
-        item = self._table.itemAt(position)
-        if item is None:
+        index = self._table.indexAt(position)
+        if not index.isValid() or index.column() == EmployeeTableModel.ACTION_COLUMN:
             return
         
         menu = QMenu(self)
@@ -2860,11 +2823,11 @@ class EmployeeView(QWidget):
     
     def _copy_selected_cell(self):
         """复制选中的单元格内容"""
-        current_item = self._table.currentItem()
-        if current_item is None:
+        current_index = self._table.currentIndex()
+        if not current_index.isValid():
             return
         
-        text = current_item.text()
+        text = current_index.data(Qt.DisplayRole)
         if text:
             clipboard = QApplication.clipboard()
             clipboard.setText(text)
@@ -8,21 +8,22 @@ ETL任务运行日志页面：
 """
 
 import json
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
 from typing import List, Dict, Any, Optional
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
-    QTableWidget, QTableWidgetItem, QPushButton, QDialog,
-    QTextEdit, QHeaderView, QDateEdit, QLineEdit, QMessageBox,
-    QAbstractItemView
+    QPushButton, QDialog, QTextEdit, QHeaderView, QDateEdit, QLineEdit, QMessageBox
 )
-from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate
-from PySide6.QtGui import QFont
+from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate, QPoint
+from PySide6.QtGui import QFont, QColor
 
-from utils.api_client import AdminApiClient, ApiError, AuthError
+from utils.api_client import AdminApiClient, ApiError, AuthError, CancelToken, RequestCancelled
 from utils.error_handler import handle_api_error
+from utils.log_search_index import LogSearchDoc, LogSearchIndex, doc_key, json_text
 from widgets.toast import Toast
+from widgets.paged_table import PagedColumn, PagedTableModel, PagedTableView, format_datetime_text
+from widgets.log_search_bar import LogSearchBar, LogSearchWorker
 
 
 class _EtlLogWorkerSignals(QObject):
@@ -39,7 +40,8 @@ class _EtlLogWorker(QRunnable):
         job_name: Optional[str] = None,
         status: Optional[str] = None,
         offset: int = 0,
-        limit: int = 50
+        limit: int = 50,
+        cancel_token: Optional[CancelToken] = None
     ):
         super().__init__()
         self._start_date = start_date
@@ -48,17 +50,21 @@ class _EtlLogWorker(QRunnable):
         self._status = status
         self._offset = offset
         self._limit = limit
+        self._cancel_token = cancel_token
         self.signals = _EtlLogWorkerSignals()
 
     @Slot()
     def run(self) -> None:
+        # 排队期间已被新请求取代（筛选条件变化），不再发起请求
+        if self._cancel_token is not None and self._cancel_token.cancelled:
+            return
         # 检查登录状态（版本升级除外）
         if not AdminApiClient.is_logged_in():
             self.signals.error.emit("需要先登录")
             return
         
         try:
-            client = AdminApiClient.from_config()
+            client = AdminApiClient.from_config().with_cancel_token(self._cancel_token)
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
             return
@@ -76,24 +82,60 @@ class _EtlLogWorker(QRunnable):
                 limit=self._limit
             )
             items = resp.get("items", []) if isinstance(resp, dict) else []
+            # 写入本地全文索引（失败不影响加载）
+            LogSearchIndex.instance().add("etl", (_search_doc(item) for item in items))
             total_count = len(items)
             self.signals.finished.emit(items, total_count)
+        except RequestCancelled:
+            return  # 已被新请求取代，结果直接丢弃
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
         except Exception as e:
             self.signals.error.emit(f"加载ETL日志失败：{e}")
 
 
+def _search_doc(item: Dict[str, Any]) -> LogSearchDoc:
+    """本地索引字段：任务名/目标日期、详情、消息"""
+    return LogSearchDoc(
+        key=doc_key(item),
+        created_at=str(item.get("started_at") or ""),
+        path=f"{item.get('job_name', '')} {item.get('target_date', '')}".strip(),
+        body=json_text(item.get("detail_json")),
+        error=" ".join(str(v) for v in (item.get("status"), item.get("message")) if v),
+        item=item,
+    )
+
+
+_STATUS_COLORS = {
+    "success": QColor(Qt.green),
+    "partial": QColor(Qt.yellow),
+    "failed": QColor(Qt.red),
+}
+
+_ETL_LOG_COLUMNS = [
+    PagedColumn("任务名", lambda it: it.get("job_name", "")),
+    PagedColumn("目标日期", lambda it: str(it.get("target_date", ""))),
+    # 状态列：根据状态设置颜色
+    PagedColumn("状态", lambda it: it.get("status", ""), align=int(Qt.AlignCenter),
+                color=lambda it: _STATUS_COLORS.get(it.get("status", ""))),
+    PagedColumn("开始时间", lambda it: format_datetime_text(it.get("started_at", ""))),  # 需要完整显示
+    PagedColumn("结束时间", lambda it: format_datetime_text(it.get("finished_at") or "")),  # 需要完整显示
+    PagedColumn("影响行数", lambda it: str(it.get("rows_affected", 0)), align=int(Qt.AlignCenter)),
+    PagedColumn("消息", lambda it: (it.get("message") or "")[:100],  # 限制长度
+                resize_mode=QHeaderView.Stretch),  # 占剩余空间
+    # 操作列：有详情或消息时显示查看按钮
+    PagedColumn("操作", lambda it: "查看" if (it.get("detail_json") or it.get("message")) else "", is_action=True),
+]
+
+
 class EtlLogView(QWidget):
     def __init__(self):
         super().__init__()
         
         # 分页相关状态
-        self._current_offset = 0
         self._page_size = 50
-        self._is_loading = False
-        self._has_more = True
         self._current_filters = {}  # 保存当前筛选条件
+        self._search_query = ""  # 本地搜索关键词，非空时表格显示本地索引的搜索结果
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(24, 24, 24, 24)
@@ -148,27 +190,18 @@ class EtlLogView(QWidget):
         filter_layout.addStretch()
         layout.addWidget(filter_frame)
 
-        # 表格区域
-        self._table = QTableWidget(0, 8)
-        self._table.setHorizontalHeaderLabels([
-            "任务名", "目标日期", "状态", "开始时间", "结束时间", "影响行数", "消息", "操作"
-        ])
-        header = self._table.horizontalHeader()
-        header.setStretchLastSection(False)
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # 任务名
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)  # 目标日期
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)  # 状态
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # 开始时间（需要完整显示）
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # 结束时间（需要完整显示）
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # 影响行数
-        header.setSectionResizeMode(6, QHeaderView.Stretch)  # 消息（占剩余空间）
-        header.setSectionResizeMode(7, QHeaderView.ResizeToContents)  # 操作
-        self._table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self._table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        
-        # 监听滚动事件，实现无限滚动
-        scroll_bar = self._table.verticalScrollBar()
-        scroll_bar.valueChanged.connect(self._on_scroll_changed)
+        # 本地全文搜索（索引不可用或已在设置中关闭时隐藏）
+        self._search_bar = LogSearchBar("搜索任务名、消息、详情...")
+        self._search_bar.query_changed.connect(self._on_search_changed)
+        self._search_bar.refresh_visibility()
+        layout.addWidget(self._search_bar)
+
+        # 表格区域（滚动到底部时由模型自动加载下一页）
+        self._model = PagedTableModel(_ETL_LOG_COLUMNS, page_size=self._page_size, parent=self)
+        self._model.page_requested.connect(self._on_page_requested)
+        self._model.state_changed.connect(self._on_model_state_changed)
+        self._table = PagedTableView(self._model, _ETL_LOG_COLUMNS)
+        self._table.action_clicked.connect(self._on_view_detail_clicked)
         
         layout.addWidget(self._table)
         
@@ -178,34 +211,27 @@ class EtlLogView(QWidget):
         self._status_label.setStyleSheet("color: #666; padding: 8px;")
         layout.addWidget(self._status_label)
 
-    def _on_scroll_changed(self, value: int):
-        """滚动事件处理：当滚动到底部时自动加载更多"""
-        if self._is_loading or not self._has_more:
+    def _on_page_requested(self, generation: int, offset: int, limit: int):
+        """模型请求加载一页数据"""
+        if self._search_query:
+            # 本地索引搜索也放到后台线程，结果经信号回到 UI 线程（不会在模型请求回调中同步修改模型）
+            worker = LogSearchWorker("etl", self._search_query, generation, offset, limit)
+            worker.signals.finished.connect(self._model.page_loaded)
+            QThreadPool.globalInstance().start(worker)
             return
-        
-        scroll_bar = self._table.verticalScrollBar()
-        # 当滚动到距离底部50像素以内时，触发加载
-        if value >= scroll_bar.maximum() - 50:
-            self._load_more()
-
-    def _load_more(self):
-        """加载更多数据"""
-        if self._is_loading or not self._has_more:
-            return
-        
-        self._is_loading = True
-        self._status_label.setText("加载中...")
-        
         worker = _EtlLogWorker(
             start_date=self._current_filters.get("start_date"),
             end_date=self._current_filters.get("end_date"),
             job_name=self._current_filters.get("job_name"),
             status=self._current_filters.get("status"),
-            offset=self._current_offset,
-            limit=self._page_size
+            offset=offset,
+            limit=limit,
+            cancel_token=self._model.cancel_token
+        )
+        worker.signals.finished.connect(
+            lambda items, _total, g=generation, o=offset: self._on_page_loaded(g, o, items)
         )
-        worker.signals.finished.connect(self._on_more_data_loaded)
-        worker.signals.error.connect(self._on_error)
+        worker.signals.error.connect(lambda error, g=generation, o=offset: self._on_error(error, g, o))
         QThreadPool.globalInstance().start(worker)
 
     def _on_filter_clicked(self):
@@ -216,6 +242,10 @@ class EtlLogView(QWidget):
         status = self._status_combo.currentText()
         status = None if status == "全部" else status
 
+        # 服务器筛选与本地搜索互斥
+        self._search_query = ""
+        self._search_bar.clear_silently()
+
         # 保存筛选条件
         self._current_filters = {
             "start_date": start_date,
@@ -224,26 +254,13 @@ class EtlLogView(QWidget):
             "status": status,
         }
         
-        # 重置分页状态
-        self._current_offset = 0
-        self._has_more = True
-        self._table.setRowCount(0)  # 清空表格
-
         main_window = self.window()
         if hasattr(main_window, "show_loading"):
             main_window.show_loading("加载ETL日志中...")
 
-        worker = _EtlLogWorker(
-            start_date=start_date,
-            end_date=end_date,
-            job_name=job_name,
-            status=status,
-            offset=0,
-            limit=self._page_size
-        )
-        worker.signals.finished.connect(self._on_data_loaded)
-        worker.signals.error.connect(self._on_error)
-        QThreadPool.globalInstance().start(worker)
+        # 重置分页状态（进行中的旧请求结果会被丢弃）并加载第一页
+        self._model.reset()
+        self._model.fetchMore()
 
     def _on_clear_filter(self):
         """清除筛选条件"""
@@ -254,125 +271,33 @@ class EtlLogView(QWidget):
         # 清除后自动执行一次筛选
         self._on_filter_clicked()
 
-    def _on_data_loaded(self, items: List[Dict[str, Any]], total_count: int):
-        """首次数据加载完成"""
-        main_window = self.window()
-        if hasattr(main_window, "hide_loading"):
-            main_window.hide_loading()
-        
-        self._is_loading = False
-        self._apply_rows_to_table(items, append=False)
-        
-        # 更新分页状态
-        self._current_offset = len(items)
-        self._has_more = len(items) >= self._page_size
-        
-        if not self._has_more and len(items) > 0:
-            self._status_label.setText(f"已加载全部数据（共 {self._current_offset} 条）")
-        elif len(items) == 0:
-            self._status_label.setText("暂无数据")
-        else:
-            self._status_label.setText(f"已加载 {self._current_offset} 条，滚动到底部加载更多")
-
-    def _on_more_data_loaded(self, items: List[Dict[str, Any]], total_count: int):
-        """加载更多数据完成"""
-        self._is_loading = False
-        self._apply_rows_to_table(items, append=True)
-        
-        # 更新分页状态
-        self._current_offset += len(items)
-        self._has_more = len(items) >= self._page_size
-        
-        if not self._has_more:
-            self._status_label.setText(f"已加载全部数据（共 {self._current_offset} 条）")
-        else:
-            self._status_label.setText(f"已加载 {self._current_offset} 条，滚动到底部加载更多")
-
-    def _apply_rows_to_table(self, items: List[Dict[str, Any]], append: bool = False):
-        """将数据应用到表格"""
-        if not append:
-            self._table.setRowCount(0)
-        
-        start_row = self._table.rowCount()
-        self._table.setRowCount(start_row + len(items))
-
-        for idx, item in enumerate(items):
-            row = start_row + idx
-            job_name = item.get("job_name", "")
-            target_date = item.get("target_date", "")
-            status = item.get("status", "")
-            started_at = item.get("started_at", "")
-            finished_at = item.get("finished_at") or ""
-            rows_affected = item.get("rows_affected", 0)
-            message = item.get("message") or ""
-            detail_json = item.get("detail_json")
-
-            # 格式化时间
-            if started_at:
-                if isinstance(started_at, str):
-                    try:
-                        dt = datetime.fromisoformat(started_at.replace("Z", "+00:00"))
-                        started_at = dt.strftime("%Y-%m-%d %H:%M:%S")
-                    except:
-                        pass
-            if finished_at:
-                if isinstance(finished_at, str):
-                    try:
-                        dt = datetime.fromisoformat(finished_at.replace("Z", "+00:00"))
-                        finished_at = dt.strftime("%Y-%m-%d %H:%M:%S")
-                    except:
-                        pass
-
-            self._table.setItem(row, 0, QTableWidgetItem(job_name))
-            self._table.setItem(row, 1, QTableWidgetItem(str(target_date)))
-            
-            # 状态列：根据状态设置颜色
-            status_item = QTableWidgetItem(status)
-            if status == "success":
-                status_item.setForeground(Qt.green)
-            elif status == "partial":
-                status_item.setForeground(Qt.yellow)
-            elif status == "failed":
-                status_item.setForeground(Qt.red)
-            status_item.setTextAlignment(Qt.AlignCenter)
-            self._table.setItem(row, 2, status_item)
-
-            self._table.setItem(row, 3, QTableWidgetItem(started_at))
-            self._table.setItem(row, 4, QTableWidgetItem(finished_at))
-            
-            rows_item = QTableWidgetItem(str(rows_affected))
-            rows_item.setTextAlignment(Qt.AlignCenter)
-            self._table.setItem(row, 5, rows_item)
-            
-            self._table.setItem(row, 6, QTableWidgetItem(message[:100] if message else ""))  # 限制长度
-
-            # 操作列：查看详情按钮（缩小尺寸，与客户端一致）
-            if detail_json or message:
-                btn_view = QPushButton("查看")
-                btn_view.setFixedSize(52, 22)  # 与客户端查看按钮尺寸一致
-                btn_view.setStyleSheet("""
-                    QPushButton {
-                        font-size: 9pt;
-                        padding: 0px;
-                    }
-                """)
-                btn_view.setProperty("detail_json", json.dumps(detail_json, ensure_ascii=False) if detail_json else "")
-                btn_view.setProperty("message", message)
-                btn_view.setProperty("job_name", job_name)
-                btn_view.setProperty("target_date", str(target_date))
-                btn_view.clicked.connect(self._on_view_detail_clicked)
-                self._table.setCellWidget(row, 7, btn_view)
-
-    def _on_view_detail_clicked(self):
+    def _on_page_loaded(self, generation: int, offset: int, items: List[Dict[str, Any]]):
+        """一页数据加载完成"""
+        if offset == 0 and generation == self._model.generation:
+            main_window = self.window()
+            if hasattr(main_window, "hide_loading"):
+                main_window.hide_loading()
+        self._model.page_loaded(generation, offset, items)
+
+    def _on_model_state_changed(self):
+        status = self._model.status_text()
+        if self._search_query:
+            status = f"本地搜索：{status or '搜索中...'}"
+        self._status_label.setText(status)
+
+    def _on_search_changed(self, query: str):
+        """本地搜索关键词变化：有关键词时表格改为分页显示本地索引的命中结果，清空后恢复服务器数据"""
+        self._search_query = query
+        self._model.reset()
+        self._model.fetchMore()
+
+    def _on_view_detail_clicked(self, item: Dict[str, Any], _pos: QPoint):
         """查看详情"""
-        btn = self.sender()
-        if not btn:
-            return
-
-        detail_json_str = btn.property("detail_json") or ""
-        message = btn.property("message") or ""
-        job_name = btn.property("job_name") or ""
-        target_date = btn.property("target_date") or ""
+        detail_json = item.get("detail_json")
+        detail_json_str = json.dumps(detail_json, ensure_ascii=False) if detail_json else ""
+        message = item.get("message") or ""
+        job_name = item.get("job_name", "")
+        target_date = str(item.get("target_date", ""))
 
         dlg = QDialog(self)
         dlg.setWindowTitle(f"{job_name} - {target_date} - 详情")
@@ -407,9 +332,11 @@ class EtlLogView(QWidget):
 
         dlg.exec()
 
-    def _on_error(self, error: str):
-        """处理错误"""
-        self._is_loading = False
+    def _on_error(self, error: str, generation: int, offset: int):
+        """处理错误（已被新筛选作废的请求不再提示）"""
+        if generation != self._model.generation:
+            return
+        self._model.page_failed(generation, offset)
         main_window = self.window()
         if hasattr(main_window, "hide_loading"):
             main_window.hide_loading()
@@ -420,3 +347,7 @@ class EtlLogView(QWidget):
         """从API重新加载数据（供主窗口调用）"""
         self._on_filter_clicked()
 
+    def showEvent(self, event):
+        """页面显示时按设置同步本地搜索框（设置页可能刚开启/关闭本地索引）"""
+        super().showEvent(event)
+        self._search_bar.refresh_visibility()
@@ -9,21 +9,22 @@
 """
 
 import json
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
 from typing import List, Dict, Any, Optional
 
 from PySide6.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
-    QTableWidget, QTableWidgetItem, QPushButton, QDialog,
-    QTextEdit, QHeaderView, QDateEdit, QLineEdit, QMessageBox,
-    QAbstractItemView, QTabWidget, QCheckBox, QDialogButtonBox
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel,
+    QPushButton, QDialog, QTextEdit, QHeaderView, QDateEdit, QLineEdit, QMessageBox,
+    QTabWidget, QCheckBox, QDialogButtonBox, QMenu
 )
-from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate
+from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate, QPoint
 from PySide6.QtGui import QFont
 
-from utils.api_client import AdminApiClient, ApiError, AuthError
+from utils.api_client import AdminApiClient, ApiError, AuthError, CancelToken, RequestCancelled
 from utils.error_handler import handle_api_error
+from utils.dimension_cache import DimensionCache
 from widgets.toast import Toast
+from widgets.paged_table import PagedColumn, PagedTableModel, PagedTableView
 
 
 class _HistoryScoreWorkerSignals(QObject):
@@ -38,24 +39,29 @@ class _HistoryScoreWorker(QRunnable):
         date_str: Optional[str] = None, 
         user_id: Optional[str] = None, 
         offset: int = 0,
-        limit: int = 50
+        limit: int = 50,
+        cancel_token: Optional[CancelToken] = None
     ):
         super().__init__()
         self._date_str = date_str
         self._user_id = user_id
         self._offset = offset
         self._limit = limit
+        self._cancel_token = cancel_token
         self.signals = _HistoryScoreWorkerSignals()
 
     @Slot()
     def run(self) -> None:
+        # 排队期间已被新请求取代（筛选条件变化），不再发起请求
+        if self._cancel_token is not None and self._cancel_token.cancelled:
+            return
         # 检查登录状态（版本升级除外）
         if not AdminApiClient.is_logged_in():
             self.signals.error.emit("需要先登录")
             return
         
         try:
-            client = AdminApiClient.from_config()
+            client = AdminApiClient.from_config().with_cancel_token(self._cancel_token)
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
             return
@@ -73,6 +79,8 @@ class _HistoryScoreWorker(QRunnable):
             items = resp.get("items", []) if isinstance(resp, dict) else []
             total_count = len(items)
             self.signals.finished.emit(items, total_count)
+        except RequestCancelled:
+            return  # 已被新请求取代，结果直接丢弃
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
         except Exception as e:
@@ -432,10 +440,7 @@ class HistoryScoreView(QWidget):
         super().__init__()
         
         # 分页相关状态
-        self._current_offset = 0
         self._page_size = 50
-        self._is_loading = False
-        self._has_more = True
         self._current_filters = {}  # 保存当前筛选条件
         self._user_team_map = {}  # user_id -> team_name 映射
         
@@ -482,20 +487,44 @@ class HistoryScoreView(QWidget):
         filter_layout.addStretch()
         layout.addLayout(filter_layout)
         
-        # 表格
-        self._table = QTableWidget()
-        self._table.setColumnCount(10)
-        self._table.setHorizontalHeaderLabels([
-            "日期", "员工ID", "姓名", "总分", "执行/质/协/思", "排名", "置信度", "复评状态", "备注", "操作"
-        ])
-        self._table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self._table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self._table.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        
-        # 监听滚动事件，实现无限滚动
-        scroll_bar = self._table.verticalScrollBar()
-        scroll_bar.valueChanged.connect(self._on_scroll_changed)
+        # 表格（滚动到底部时由模型自动加载下一页）
+        stretch = QHeaderView.Stretch
+        self._columns = [
+            PagedColumn("日期", lambda it: str(it.get("date", "")), resize_mode=stretch),
+            PagedColumn("员工ID", lambda it: str(it.get("user_id", "")), resize_mode=stretch),
+            # 姓名列：显示姓名和团队，格式如：李婷婷[QA]
+            PagedColumn("姓名", self._name_with_team, resize_mode=stretch),
+            PagedColumn("总分", lambda it: str(it.get("total_ai", 0)), resize_mode=stretch),
+            PagedColumn(
+                "执行/质/协/思",
+                lambda it: f"{it.get('execution', 0)}/{it.get('quality', 0)}/"
+                           f"{it.get('collaboration', 0)}/{it.get('reflection', 0)}",
+                resize_mode=stretch,
+            ),
+            PagedColumn("排名", lambda it: f"第{it['rank']}名" if it.get("rank") else "未锁定", resize_mode=stretch),
+            # 置信度：如果有值则显示，否则显示"-"（居中显示）
+            PagedColumn(
+                "置信度",
+                lambda it: f"{it['confidence']:.2f}" if it.get("confidence") is not None else "-",
+                align=int(Qt.AlignCenter), resize_mode=stretch,
+            ),
+            PagedColumn("复评状态", lambda it: "已复评" if it.get("is_reviewed", False) else "自动评分",
+                        resize_mode=stretch),
+            PagedColumn(
+                "备注",
+                lambda it: "参与评优" if it.get("eligible", 1) == 1 else f"不参与（{it.get('reason') or ''}）",
+                resize_mode=stretch,
+            ),
+            # 操作（合并查看输入和查看输出为"查看"）
+            PagedColumn("操作", lambda it: "选择操作", is_action=True, resize_mode=stretch),
+        ]
+        self._model = PagedTableModel(self._columns, page_size=self._page_size, parent=self)
+        self._model.page_requested.connect(self._on_page_requested)
+        self._model.state_changed.connect(self._on_model_state_changed)
+        self._table = PagedTableView(self._model, self._columns)
+        self._table.action_clicked.connect(self._on_action_clicked)
         
+        layout.addWidget(self._table)
         layout.addWidget(self._table)
         
         # 底部状态栏（显示加载状态和"没有更多数据"）
@@ -504,32 +533,19 @@ class HistoryScoreView(QWidget):
         self._status_label.setStyleSheet("color: #666; padding: 8px;")
         layout.addWidget(self._status_label)
     
-    def _on_scroll_changed(self, value: int):
-        """滚动事件处理：当滚动到底部时自动加载更多"""
-        if self._is_loading or not self._has_more:
-            return
-        
-        scroll_bar = self._table.verticalScrollBar()
-        # 当滚动到距离底部50像素以内时，触发加载
-        if value >= scroll_bar.maximum() - 50:
-            self._load_more()
-
-    def _load_more(self):
-        """加载更多数据"""
-        if self._is_loading or not self._has_more:
-            return
-        
-        self._is_loading = True
-        self._status_label.setText("加载中...")
-        
+    def _on_page_requested(self, generation: int, offset: int, limit: int):
+        """模型请求加载一页数据"""
         worker = _HistoryScoreWorker(
             date_str=self._current_filters.get("date_str"),
             user_id=self._current_filters.get("user_id"),
-            offset=self._current_offset,
-            limit=self._page_size
+            offset=offset,
+            limit=limit,
+            cancel_token=self._model.cancel_token
         )
-        worker.signals.finished.connect(self._on_more_data_loaded)
-        worker.signals.error.connect(self._on_error)
+        worker.signals.finished.connect(
+            lambda items, _total, g=generation, o=offset: self._on_page_loaded(g, o, items)
+        )
+        worker.signals.error.connect(lambda error, g=generation, o=offset: self._on_error(error, g, o))
         self._thread_pool.start(worker)
 
     def _on_filter_clicked(self):
@@ -546,25 +562,14 @@ class HistoryScoreView(QWidget):
             "user_id": user_id,
         }
         
-        # 重置分页状态
-        self._current_offset = 0
-        self._has_more = True
-        self._table.setRowCount(0)  # 清空表格
-        
         # 显示加载中
         main_window = self.window()
         if hasattr(main_window, "show_loading"):
             main_window.show_loading("加载每日评分数据...")
         
-        worker = _HistoryScoreWorker(
-            date_str=date_str,
-            user_id=user_id,
-            offset=0,
-            limit=self._page_size
-        )
-        worker.signals.finished.connect(self._on_data_loaded)
-        worker.signals.error.connect(self._on_error)
-        self._thread_pool.start(worker)
+        # 重置分页状态（进行中的旧请求结果会被丢弃）并加载第一页
+        self._model.reset()
+        self._model.fetchMore()
     
     def _on_clear_filter(self):
         """清除筛选条件"""
@@ -577,116 +582,27 @@ class HistoryScoreView(QWidget):
         """从API重新加载数据（供主窗口调用，重置分页）"""
         self._on_filter_clicked()
     
-    def _on_data_loaded(self, items: List[Dict], total_count: int):
-        """首次数据加载完成"""
-        main_window = self.window()
-        if hasattr(main_window, "hide_loading"):
-            main_window.hide_loading()
-        
-        self._is_loading = False
-        self._apply_rows_to_table(items, append=False)
-        
-        # 更新分页状态：offset 应该是已加载的数据条数
-        self._current_offset = len(items)
-        # 如果返回的数据量等于 page_size，说明可能还有更多数据
-        self._has_more = len(items) >= self._page_size
-        
-        if not self._has_more and len(items) > 0:
-            self._status_label.setText(f"已加载全部数据（共 {self._current_offset} 条）")
-        elif len(items) == 0:
-            self._status_label.setText("暂无数据")
-        else:
-            self._status_label.setText(f"已加载 {self._current_offset} 条，滚动到底部加载更多")
-
-    def _on_more_data_loaded(self, items: List[Dict], total_count: int):
-        """加载更多数据完成"""
-        self._is_loading = False
-        self._apply_rows_to_table(items, append=True)
-        
-        # 更新分页状态：offset 应该是已加载的数据条数（累加）
-        self._current_offset += len(items)
-        # 如果返回的数据量小于 page_size，说明没有更多数据了
-        self._has_more = len(items) >= self._page_size
-        
-        if not self._has_more:
-            self._status_label.setText(f"已加载全部数据（共 {self._current_offset} 条）")
-        else:
-            self._status_label.setText(f"已加载 {self._current_offset} 条，滚动到底部加载更多")
-
-    def _apply_rows_to_table(self, items: List[Dict], append: bool = False):
-        """将数据应用到表格"""
-        if not append:
-            self._table.setRowCount(0)
-        
-        start_row = self._table.rowCount()
-        self._table.setRowCount(start_row + len(items))
-        
-        for idx, item in enumerate(items):
-            row = start_row + idx
-            
-            date_str = str(item.get("date", ""))
-            user_id = str(item.get("user_id", ""))
-            name = item.get("name") or ""
-            total_ai = item.get("total_ai", 0)
-            execution = item.get("execution", 0)
-            quality = item.get("quality", 0)
-            collaboration = item.get("collaboration", 0)
-            reflection = item.get("reflection", 0)
-            rank = item.get("rank")
-            confidence = item.get("confidence")  # 置信度
-            is_reviewed = item.get("is_reviewed", False)
-            eligible = item.get("eligible", 1)
-            reason = item.get("reason") or ""
-            
-            dims_text = f"{execution}/{quality}/{collaboration}/{reflection}"
-            rank_text = f"第{rank}名" if rank else "未锁定"
-            # 置信度显示：如果有值则显示，否则显示"-"
-            confidence_text = f"{confidence:.2f}" if confidence is not None else "-"
-            review_status = "已复评" if is_reviewed else "自动评分"
-            remark = "参与评优" if eligible == 1 else f"不参与（{reason}）"
-            
-            self._table.setItem(row, 0, QTableWidgetItem(date_str))
-            self._table.setItem(row, 1, QTableWidgetItem(user_id))
-            
-            # 姓名列：显示姓名和团队，格式如：李婷婷[QA]
-            team_name = self._user_team_map.get(user_id, "") or item.get("team_name", "")
-            if team_name:
-                name_with_team = f"{name}[{team_name}]"
-            else:
-                name_with_team = name
-            self._table.setItem(row, 2, QTableWidgetItem(name_with_team))
-            
-            self._table.setItem(row, 3, QTableWidgetItem(str(total_ai)))
-            self._table.setItem(row, 4, QTableWidgetItem(dims_text))
-            self._table.setItem(row, 5, QTableWidgetItem(rank_text))
-            # 置信度列（居中显示）
-            confidence_item = QTableWidgetItem(confidence_text)
-            confidence_item.setTextAlignment(Qt.AlignCenter)
-            self._table.setItem(row, 6, confidence_item)
-            self._table.setItem(row, 7, QTableWidgetItem(review_status))
-            self._table.setItem(row, 8, QTableWidgetItem(remark))
-            
-            # 操作下拉框（合并查看输入和查看输出为"查看"）
-            action_combo = QComboBox()
-            action_combo.addItems(["选择操作", "查看", "重新拉取"])
-            action_combo.setCurrentIndex(0)  # 默认选中"选择操作"
-            action_combo.setFixedWidth(100)  # 设置固定宽度，不要撑满
-            
-            # 存储当前行的数据，用于回调
-            action_combo.setProperty("date_str", date_str)
-            action_combo.setProperty("user_id", user_id)
-            action_combo.setProperty("user_name", name)
-            action_combo.setProperty("is_reviewed", is_reviewed)  # 存储复评状态
-            
-            # 连接信号
-            action_combo.currentTextChanged.connect(
-                lambda text, combo=action_combo: self._on_action_selected(text, combo)
-            )
-            
-            self._table.setCellWidget(row, 9, action_combo)
+    def _on_page_loaded(self, generation: int, offset: int, items: List[Dict]):
+        """一页数据加载完成"""
+        if offset == 0 and generation == self._model.generation:
+            main_window = self.window()
+            if hasattr(main_window, "hide_loading"):
+                main_window.hide_loading()
+        self._model.page_loaded(generation, offset, items)
+
+    def _on_model_state_changed(self):
+        self._status_label.setText(self._model.status_text())
+
+    def _name_with_team(self, item: Dict) -> str:
+        """姓名列：姓名[团队]，团队优先取员工数据中的映射"""
+        name = item.get("name") or ""
+        team_name = self._user_team_map.get(str(item.get("user_id", "")), "") or item.get("team_name", "")
+        return f"{name}[{team_name}]" if team_name else name
     
-    def _on_error(self, error: str):
-        self._is_loading = False
+    def _on_error(self, error: str, generation: int, offset: int):
+        if generation != self._model.generation:
+            return
+        self._model.page_failed(generation, offset)
         main_window = self.window()
         if hasattr(main_window, "hide_loading"):
             main_window.hide_loading()
@@ -694,23 +610,24 @@ class HistoryScoreView(QWidget):
         # 使用统一的错误处理，如果是 detail 错误会用弹出框显示
         handle_api_error(self, Exception(error), "加载失败")
     
-    def _on_action_selected(self, text: str, combo: QComboBox):
-        """处理操作下拉框选择"""
-        if text == "选择操作":
-            return  # 忽略默认选项
-        
-        date_str = combo.property("date_str")
-        user_id = combo.property("user_id")
-        user_name = combo.property("user_name")
-        is_reviewed = combo.property("is_reviewed")  # 获取复评状态
+    def _on_action_clicked(self, item: Dict, global_pos: QPoint):
+        """操作列点击：弹出操作菜单"""
+        menu = QMenu(self)
+        menu.addAction("查看")
+        menu.addAction("重新拉取")
+        action = menu.exec(global_pos)
+        if action is None:
+            return
         
-        # 重置下拉框到默认选项
-        combo.setCurrentIndex(0)
+        date_str = str(item.get("date", ""))
+        user_id = str(item.get("user_id", ""))
+        user_name = item.get("name") or ""
+        is_reviewed = item.get("is_reviewed", False)  # 复评状态
         
         # 根据选择执行相应操作
-        if text == "查看":
+        if action.text() == "查看":
             self._show_all_data(date_str, user_id, user_name, is_reviewed)
-        elif text == "重新拉取":
+        elif action.text() == "重新拉取":
             self._rerun_etl(date_str, user_id)
     
     def _show_all_data(self, date_str: str, user_id: str, user_name: str, is_reviewed: bool):
@@ -756,41 +673,6 @@ class HistoryScoreView(QWidget):
     
     def _load_employee_data(self):
         """加载员工数据以获取团队信息（带缓存）"""
-        from pathlib import Path
-        from utils.config_manager import CONFIG_PATH
-
-        class _DataCache:
-            CACHE_DIR = CONFIG_PATH.parent / "cache"
-            CACHE_EXPIRE_HOURS = 24
-            
-            @classmethod
-            def _get_cache_path(cls, cache_key: str) -> Path:
-                cls.CACHE_DIR.mkdir(exist_ok=True)
-                return cls.CACHE_DIR / f"{cache_key}.json"
-            
-            @classmethod
-            def get(cls, cache_key: str):
-                cache_path = cls._get_cache_path(cache_key)
-                if not cache_path.exists():
-                    return None
-                try:
-                    with open(cache_path, 'r', encoding='utf-8') as f:
-                        cache_data = json.load(f)
-                    cached_time_str = cache_data.get('cached_at')
-                    if not cached_time_str:
-                        return None
-                    cached_time = datetime.fromisoformat(cached_time_str)
-                    now = datetime.now()
-                    if (now - cached_time).total_seconds() > cls.CACHE_EXPIRE_HOURS * 3600:
-                        return None
-                    return cache_data.get('data')
-                except:
-                    try:
-                        cache_path.unlink()
-                    except:
-                        pass
-                    return None
-        
         class _EmployeeDataWorkerSignals(QObject):
             finished = Signal(dict)  # user_id -> team_name 映射
             error = Signal(str)
@@ -808,21 +690,13 @@ class HistoryScoreView(QWidget):
                 
                 try:
                     client = AdminApiClient.from_config()
-                    # 先尝试从缓存加载
-                    cached_employees = _DataCache.get("employees")
-                    if cached_employees is not None:
-                        employees = cached_employees
-                    else:
+
+                    def _fetch_employees():
                         resp = client.get_employees()
-                        employees = resp.get("items", []) if isinstance(resp, dict) else []
-                        # 缓存员工数据
-                        cache_path = _DataCache._get_cache_path("employees")
-                        cache_path.parent.mkdir(exist_ok=True)
-                        with open(cache_path, 'w', encoding='utf-8') as f:
-                            json.dump({
-                                'cached_at': datetime.now().isoformat(),
-                                'data': employees
-                            }, f, ensure_ascii=False, indent=2)
+                        return resp.get("items", []) if isinstance(resp, dict) else []
+
+                    # 优先使用共享缓存（过期时先用旧数据，后台刷新）
+                    employees = DimensionCache.get_or_fetch("employees", _fetch_employees)
                     
                     # 建立 user_id -> team_name 映射
                     user_team_map = {}
@@ -845,34 +719,5 @@ class HistoryScoreView(QWidget):
         """员工数据加载完成"""
         self._user_team_map = user_team_map
         
-        # 如果表格已经有数据，需要更新姓名列
-        if self._table.rowCount() > 0:
-            self._update_name_column()
-    
-    def _update_name_column(self):
-        """更新表格中的姓名列（当员工数据加载完成后调用）"""
-        for row in range(self._table.rowCount()):
-            # 获取该行的员工ID（第1列，索引为1）
-            user_id_item = self._table.item(row, 1)
-            if user_id_item:
-                user_id = user_id_item.text()
-                # 获取姓名列（第2列，索引为2）
-                name_item = self._table.item(row, 2)
-                if name_item:
-                    # 从原始姓名中提取姓名（去掉可能已有的团队信息）
-                    original_name = name_item.text()
-                    # 如果已经有团队信息，先提取原始姓名
-                    if '[' in original_name and ']' in original_name:
-                        name = original_name.split('[')[0]
-                    else:
-                        name = original_name
-                    
-                    # 获取团队名称
-                    team_name = self._user_team_map.get(user_id, "")
-                    if team_name:
-                        name_with_team = f"{name}[{team_name}]"
-                    else:
-                        name_with_team = name
-                    
-                    name_item.setText(name_with_team)
-
+        # 姓名列带团队信息，已加载的数据重新计算显示文本
+        self._model.refresh_texts()
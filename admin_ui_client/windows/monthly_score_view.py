@@ -4,30 +4,35 @@
 月度评分管理页面：
 - 支持按月份、员工ID、工资贡献率筛选
 - 支持按 total_ai_month、salary_ratio、growth_rate、final_score 排序
+  （结果集完整时点击列标题在本地按预计算的排序键重排，不完整时才请求服务器排序）
 - 显示所有员工的月度评分数据
+- 导出为 XLSX/CSV/JSON：分页拉取、边拉边写，显示进度并可取消
 """
 
+from dataclasses import dataclass, field
 from datetime import date, datetime
 from typing import List, Dict, Any, Optional
+import platform
 from pathlib import Path
-import json
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
     QTableWidget, QTableWidgetItem, QPushButton, QHeaderView,
-    QLineEdit, QAbstractItemView, QMessageBox, QFileDialog
+    QLineEdit, QAbstractItemView, QMessageBox, QFileDialog, QProgressDialog
 )
 from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate
 from PySide6.QtGui import QFont
 
-from utils.api_client import AdminApiClient, ApiError, AuthError
+from utils.api_client import AdminApiClient, ApiError, AuthError, CancelToken, RequestCancelled
 from utils.error_handler import handle_api_error
+from utils.dimension_cache import DimensionCache
+from utils.tabular_export import EXPORT_FORMATS, open_export_writer
 from widgets.toast import Toast
 from utils.date_edit_helper import apply_theme_to_date_edit
 
 
 class _MonthlyScoreWorkerSignals(QObject):
-    finished = Signal(list, int)  # List[Dict], total_count
+    finished = Signal(object)  # _MonthlyScoreRows
     error = Signal(str)
 
 
@@ -73,61 +78,129 @@ class _LockRankWorker(QRunnable):
 
 
 class _ExportMonthlyScoreWorkerSignals(QObject):
-    finished = Signal(list)  # List[Dict] - 导出的数据
+    progress = Signal(int, int)  # 已写入行数, 总行数（未知时为0）
+    finished = Signal(int, str)  # 导出行数, 保存路径
+    cancelled = Signal()
     error = Signal(str)
 
 
+# 导出列：(字段名, 表头)
+_EXPORT_COLUMNS = [
+    ("month", "月份"),
+    ("user_id", "员工ID"),
+    ("name", "姓名"),
+    ("team_name", "团队"),
+    ("final_score", "最终综合分"),
+    ("total_ai_month", "AI综合均分"),
+    ("salary_ratio", "工资贡献率"),
+    ("growth_rate", "成长率"),
+    ("workday_count", "有效工作日"),
+]
+
+
 class _ExportMonthlyScoreWorker(QRunnable):
-    """后台导出月度评分数据"""
+    """后台导出月度评分数据：分页拉取并逐行写入文件，内存占用只与单页大小有关"""
+
+    PAGE_SIZE = 500
+
     def __init__(
         self, 
+        save_path: str,
         month: Optional[str] = None,
         user_id: Optional[str] = None,
         salary_ratio_filter: Optional[str] = None,
         sort_by: Optional[str] = "final_score",
-        sort_order: Optional[str] = "desc"
+        sort_order: Optional[str] = "desc",
+        user_team_map: Optional[Dict[str, str]] = None,
+        meta: Optional[Dict[str, Any]] = None,
     ):
         super().__init__()
+        self._save_path = save_path
         self._month = month
         self._user_id = user_id
         self._salary_ratio_filter = salary_ratio_filter
         self._sort_by = sort_by
         self._sort_order = sort_order
+        self._user_team_map = dict(user_team_map or {})
+        self._meta = meta
+        self._cancel_token = CancelToken()
         self.signals = _ExportMonthlyScoreWorkerSignals()
     
+    def cancel(self):
+        """取消导出（任意线程），正在进行的请求会立即中断"""
+        self._cancel_token.cancel()
+    
+    def _export_row(self, item: Dict) -> Dict[str, Any]:
+        user_id = str(item.get("user_id", ""))
+        return {
+            "month": _month_key(item.get("month", "")),
+            "user_id": user_id,
+            "name": item.get("name") or "",
+            "team_name": item.get("team_name") or self._user_team_map.get(user_id, ""),
+            "total_ai_month": _score_value(item.get("total_ai_month")),
+            "salary_ratio": _score_value(item.get("salary_ratio")),
+            "growth_rate": _score_value(item.get("growth_rate")),
+            "final_score": _score_value(item.get("final_score")),
+            "workday_count": int(_score_value(item.get("workday_count"))),
+        }
+    
     @Slot()
     def run(self) -> None:
+        if not AdminApiClient.is_logged_in():
+            self.signals.error.emit("需要先登录")
+            return
+        
         try:
-            if not AdminApiClient.is_logged_in():
-                self.signals.error.emit("需要先登录")
-                return
-            
-            client = AdminApiClient.from_config()
-            
-            # 获取所有数据（不限制数量）
-            resp = client.get_monthly_scores(
-                month=self._month,
-                user_id=self._user_id,
-                salary_ratio_filter=self._salary_ratio_filter,
-                sort_by=self._sort_by,
-                sort_order=self._sort_order
-            )
-            
-            if not isinstance(resp, dict):
-                self.signals.error.emit("API返回格式错误")
-                return
-            
-            if resp.get("status") != "success":
-                error_msg = resp.get("message", "获取数据失败")
-                self.signals.error.emit(error_msg)
-                return
-            
-            items = resp.get("items", [])
-            # 确保items是列表
-            if not isinstance(items, list):
-                items = []
-            
-            self.signals.finished.emit(items)
+            client = AdminApiClient.from_config().with_cancel_token(self._cancel_token)
+        except (ApiError, AuthError) as e:
+            self.signals.error.emit(str(e))
+            return
+        except Exception as e:
+            self.signals.error.emit(f"初始化客户端失败：{e}")
+            return
+        
+        try:
+            # 未 commit 就退出（出错或取消）时 writer 会删除临时文件，目标文件保持原样
+            with open_export_writer(self._save_path, _EXPORT_COLUMNS, meta=self._meta) as writer:
+                offset = 0
+                total = 0
+                while True:
+                    self._cancel_token.raise_if_cancelled()
+                    resp = client.get_monthly_scores(
+                        month=self._month,
+                        user_id=self._user_id,
+                        salary_ratio_filter=self._salary_ratio_filter,
+                        sort_by=self._sort_by,
+                        sort_order=self._sort_order,
+                        offset=offset,
+                        limit=self.PAGE_SIZE,
+                    )
+                    if not isinstance(resp, dict):
+                        self.signals.error.emit("API返回格式错误")
+                        return
+                    if resp.get("status") != "success":
+                        self.signals.error.emit(resp.get("message") or "获取数据失败")
+                        return
+                    
+                    items = resp.get("items") or []
+                    if not isinstance(items, list):
+                        items = []
+                    if isinstance(resp.get("total"), int):
+                        total = resp["total"]
+                    for item in items:
+                        writer.write_row(self._export_row(item))
+                    offset += len(items)
+                    self.signals.progress.emit(writer.row_count, max(total, writer.row_count))
+                    
+                    # 最后一页；返回条数超过 limit 说明服务器不支持分页，已一次返回全部
+                    if len(items) != self.PAGE_SIZE or (total and offset >= total):
+                        break
+                
+                self._cancel_token.raise_if_cancelled()
+                writer.commit()
+                self.signals.finished.emit(writer.row_count, self._save_path)
+        except RequestCancelled:
+            self.signals.cancelled.emit()
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
         except Exception as e:
@@ -179,14 +252,132 @@ class _MonthlyScoreWorker(QRunnable):
                 sort_order=self._sort_order
             )
             items = resp.get("items", []) if isinstance(resp, dict) else []
-            total_count = len(items)
-            self.signals.finished.emit(items, total_count)
+            total = resp.get("total") if isinstance(resp, dict) else None
+            total_count = total if isinstance(total, int) and total > len(items) else len(items)
+            # 表格文本和排序键在后台线程算好，UI 线程只负责写入表格
+            rows = _MonthlyScoreRows.from_items(items, total_count, self._sort_by, self._sort_order)
+            self.signals.finished.emit(rows)
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
         except Exception as e:
             self.signals.error.emit(f"加载月度评分失败：{e}")
 
 
+def _month_key(month: Any) -> str:
+    """统一处理月份格式为 YYYY-MM"""
+    if isinstance(month, str):
+        try:
+            month_date = datetime.strptime(month, "%Y-%m-%d").date()
+            return month_date.strftime("%Y-%m")
+        except ValueError:
+            return month
+    elif hasattr(month, 'strftime'):
+        return month.strftime("%Y-%m")
+    else:
+        return str(month)
+
+
+def _score_value(value: Any) -> float:
+    """排序键：缺失或无法解析的值按 0 处理"""
+    try:
+        return float(value) if value is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+@dataclass
+class _MonthlyScoreRows:
+    """
+    已加载的月度评分（按列存储）
+
+    每列的显示文本和可排序列的数值排序键在加载时一次算好，
+    点击列标题时只需按排序键求出行顺序，不再请求服务器。
+    """
+    month_texts: List[str] = field(default_factory=list)
+    user_ids: List[str] = field(default_factory=list)
+    name_texts: List[str] = field(default_factory=list)  # 含奖牌前缀
+    api_team_names: List[str] = field(default_factory=list)  # 接口返回的团队名（员工映射缺失时使用）
+    final_score_texts: List[str] = field(default_factory=list)
+    total_ai_texts: List[str] = field(default_factory=list)
+    salary_ratio_texts: List[str] = field(default_factory=list)
+    growth_rate_texts: List[str] = field(default_factory=list)
+    workday_texts: List[str] = field(default_factory=list)
+    # 排序字段 -> 每行的数值排序键
+    sort_keys: Dict[str, List[float]] = field(default_factory=dict)
+    # 服务器返回的行顺序对应的排序方式
+    loaded_sort_by: Optional[str] = None
+    loaded_sort_order: Optional[str] = None
+    total_count: int = 0
+
+    SORT_FIELDS = ("final_score", "total_ai_month", "salary_ratio", "growth_rate")
+
+    @classmethod
+    def from_items(
+        cls,
+        items: List[Dict],
+        total_count: int,
+        sort_by: Optional[str] = None,
+        sort_order: Optional[str] = None,
+    ) -> "_MonthlyScoreRows":
+        rows = cls(loaded_sort_by=sort_by, loaded_sort_order=sort_order, total_count=total_count)
+        rows.sort_keys = {
+            sort_field: [_score_value(item.get(sort_field)) for item in items]
+            for sort_field in cls.SORT_FIELDS
+        }
+        ranks = cls._medal_ranks(rows.sort_keys["final_score"])
+        for idx, item in enumerate(items):
+            name = item.get("name") or ""
+            rank = ranks[idx]
+            medal = ""
+            if rank == 1:
+                medal = "🥇 "  # 金牌 emoji
+            elif rank == 2:
+                medal = "🥈 "  # 银牌 emoji
+            elif rank == 3:
+                medal = "🥉 "  # 铜牌 emoji
+
+            rows.month_texts.append(_month_key(item.get("month", "")))
+            rows.user_ids.append(str(item.get("user_id", "")))
+            rows.name_texts.append(f"{medal}{name}" if name else medal.strip())
+            rows.api_team_names.append(item.get("team_name") or "")
+            rows.final_score_texts.append(f"{rows.sort_keys['final_score'][idx]:.2f}")
+            rows.total_ai_texts.append(f"{rows.sort_keys['total_ai_month'][idx]:.2f}")
+            # 工资贡献率/成长率：数据库存的是小数（如0.83表示83%），显示时乘以100取整
+            rows.salary_ratio_texts.append(f"{int(round(rows.sort_keys['salary_ratio'][idx] * 100))}%")
+            rows.growth_rate_texts.append(f"{int(round(rows.sort_keys['growth_rate'][idx] * 100))}%")
+            rows.workday_texts.append(str(item.get("workday_count", 0)))
+        return rows
+
+    @staticmethod
+    def _medal_ranks(final_scores: List[float]) -> List[int]:
+        """按最终综合分计算排名（与上一名相差不足 0.01 视为并列）"""
+        ranked = sorted(range(len(final_scores)), key=lambda i: final_scores[i], reverse=True)
+        ranks = [0] * len(final_scores)
+        for pos, idx in enumerate(ranked):
+            if pos > 0 and abs(final_scores[idx] - final_scores[ranked[pos - 1]]) < 0.01:
+                ranks[idx] = ranks[ranked[pos - 1]]
+            else:
+                ranks[idx] = pos + 1
+        return ranks
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    @property
+    def is_complete(self) -> bool:
+        """是否已加载全部结果（不完整时本地排序结果不可靠，需要服务器排序）"""
+        return self.total_count <= len(self)
+
+    def order(self, sort_by: str, sort_order: str) -> List[int]:
+        """返回按指定字段排序后的行下标（稳定排序，分数相同保持服务器原顺序）"""
+        if sort_by == self.loaded_sort_by and sort_order == self.loaded_sort_order:
+            return list(range(len(self)))
+        keys = self.sort_keys.get(sort_by)
+        if keys is None:
+            return list(range(len(self)))
+        return sorted(range(len(self)), key=keys.__getitem__, reverse=(sort_order == "desc"))
+
+
 class MonthlyScoreView(QWidget):
     def __init__(self):
         super().__init__()
@@ -196,6 +387,9 @@ class MonthlyScoreView(QWidget):
         self._current_sort_by = "final_score"  # 当前排序字段
         self._current_sort_order = "desc"  # 当前排序方向
         self._user_team_map = {}  # user_id -> team_name 映射
+        self._rows: Optional[_MonthlyScoreRows] = None  # 当前已加载的数据
+        self._export_worker: Optional[_ExportMonthlyScoreWorker] = None
+        self._export_progress: Optional[QProgressDialog] = None
         
         # 列索引到排序字段的映射
         self._column_to_sort_field = {
@@ -260,7 +454,7 @@ class MonthlyScoreView(QWidget):
         filter_layout.addWidget(self._lock_rank_btn)
         
         # 导出按钮
-        btn_export = QPushButton("导出JSON")
+        btn_export = QPushButton("导出")
         btn_export.clicked.connect(self._on_export_clicked)
         filter_layout.addWidget(btn_export)
         
@@ -357,8 +551,11 @@ class MonthlyScoreView(QWidget):
         # 更新排序指示器
         self._update_sort_indicator()
         
-        # 重新加载数据
-        self._load_data_with_current_filters()
+        # 结果集完整时直接在本地重排，否则请求服务器排序
+        if self._rows is not None and self._rows.is_complete and not self._is_loading:
+            self._apply_rows_to_table()
+        else:
+            self._load_data_with_current_filters()
     
     def _update_sort_indicator(self):
         """更新列标题的排序指示器"""
@@ -408,6 +605,7 @@ class MonthlyScoreView(QWidget):
             salary_ratio_filter = "lt100"
         
         # 显示加载中
+        self._is_loading = True
         main_window = self.window()
         if hasattr(main_window, "show_loading"):
             main_window.show_loading("加载月度评分数据...")
@@ -463,41 +661,7 @@ class MonthlyScoreView(QWidget):
     
     def _load_employee_data(self):
         """加载员工数据以获取团队信息（带缓存）"""
-        # 使用与employee_view相同的缓存机制
-        from utils.config_manager import CONFIG_PATH
-
-        class _DataCache:
-            CACHE_DIR = CONFIG_PATH.parent / "cache"
-            CACHE_EXPIRE_HOURS = 24
-            
-            @classmethod
-            def _get_cache_path(cls, cache_key: str) -> Path:
-                cls.CACHE_DIR.mkdir(exist_ok=True)
-                return cls.CACHE_DIR / f"{cache_key}.json"
-            
-            @classmethod
-            def get(cls, cache_key: str):
-                cache_path = cls._get_cache_path(cache_key)
-                if not cache_path.exists():
-                    return None
-                try:
-                    with open(cache_path, 'r', encoding='utf-8') as f:
-                        cache_data = json.load(f)
-                    cached_time_str = cache_data.get('cached_at')
-                    if not cached_time_str:
-                        return None
-                    cached_time = datetime.fromisoformat(cached_time_str)
-                    now = datetime.now()
-                    if (now - cached_time).total_seconds() > cls.CACHE_EXPIRE_HOURS * 3600:
-                        return None
-                    return cache_data.get('data')
-                except:
-                    try:
-                        cache_path.unlink()
-                    except:
-                        pass
-                    return None
-        
+        # 使用与employee_view共享的维度缓存
         class _EmployeeDataWorkerSignals(QObject):
             finished = Signal(dict)  # user_id -> team_name 映射
             error = Signal(str)
@@ -515,21 +679,13 @@ class MonthlyScoreView(QWidget):
                 
                 try:
                     client = AdminApiClient.from_config()
-                    # 先尝试从缓存加载
-                    cached_employees = _DataCache.get("employees")
-                    if cached_employees is not None:
-                        employees = cached_employees
-                    else:
+
+                    def _fetch_employees():
                         resp = client.get_employees()
-                        employees = resp.get("items", []) if isinstance(resp, dict) else []
-                        # 缓存员工数据
-                        cache_path = _DataCache._get_cache_path("employees")
-                        cache_path.parent.mkdir(exist_ok=True)
-                        with open(cache_path, 'w', encoding='utf-8') as f:
-                            json.dump({
-                                'cached_at': datetime.now().isoformat(),
-                                'data': employees
-                            }, f, ensure_ascii=False, indent=2)
+                        return resp.get("items", []) if isinstance(resp, dict) else []
+
+                    # 优先使用共享缓存（过期时先用旧数据，后台刷新）
+                    employees = DimensionCache.get_or_fetch("employees", _fetch_employees)
                     
                     # 建立 user_id -> team_name 映射
                     user_team_map = {}
@@ -573,150 +729,76 @@ class MonthlyScoreView(QWidget):
                     # 如果团队列还没有item，创建一个
                     self._table.setItem(row, 3, QTableWidgetItem(team_name))
     
-    def _on_data_loaded(self, items: List[Dict], total_count: int):
+    def _on_data_loaded(self, rows: _MonthlyScoreRows):
         """数据加载完成"""
         main_window = self.window()
         if hasattr(main_window, "hide_loading"):
             main_window.hide_loading()
         
         self._is_loading = False
-        self._apply_rows_to_table(items)
+        self._rows = rows
+        self._apply_rows_to_table()
         
-        if len(items) == 0:
+        if len(rows) == 0:
             self._status_label.setText("暂无数据")
         else:
-            self._status_label.setText(f"共 {total_count} 条记录")
+            self._status_label.setText(f"共 {rows.total_count} 条记录")
     
-    def _apply_rows_to_table(self, items: List[Dict]):
-        """将数据应用到表格"""
-        # 首先根据最终综合分确定排名（用于显示奖牌）
-        # 创建一个字典，key是(user_id, month_str)，value是排名
-        # 先统一处理month格式，确保key一致
-        def get_month_key(month):
-            """统一处理月份格式"""
-            if isinstance(month, str):
-                try:
-                    month_date = datetime.strptime(month, "%Y-%m-%d").date()
-                    return month_date.strftime("%Y-%m")
-                except:
-                    return month
-            elif hasattr(month, 'strftime'):
-                return month.strftime("%Y-%m")
-            else:
-                return str(month)
-        
-        ranked_items = sorted(items, key=lambda x: x.get("final_score", 0.0), reverse=True)
-        rank_map = {}
-        
-        for idx, item in enumerate(ranked_items):
-            final_score = item.get("final_score", 0.0)
-            user_id = str(item.get("user_id", ""))
-            month = item.get("month", "")
-            month_key = get_month_key(month)
-            
-            # 计算排名：如果和上一个分数相同，排名相同；否则排名 = 当前索引 + 1
-            if idx == 0:
-                # 第一个，排名为1
-                current_rank = 1
-            else:
-                prev_item = ranked_items[idx - 1]
-                prev_score = prev_item.get("final_score", 0.0)
-                if abs(final_score - prev_score) < 0.01:
-                    # 分数相同，使用上一个排名
-                    # 从上一个item获取排名
-                    prev_user_id = str(prev_item.get("user_id", ""))
-                    prev_month = prev_item.get("month", "")
-                    prev_month_key = get_month_key(prev_month)
-                    current_rank = rank_map.get((prev_user_id, prev_month_key), idx + 1)
-                else:
-                    # 分数不同，更新排名（排名 = 当前索引 + 1）
-                    current_rank = idx + 1
-            
-            rank_map[(user_id, month_key)] = current_rank
-        
-        self._table.setRowCount(0)
-        self._table.setRowCount(len(items))
+    @staticmethod
+    def _emoji_font() -> QFont:
+        """支持emoji的字体（跨平台），用于姓名列的奖牌图标"""
+        system = platform.system()
+        if system == "Darwin":  # macOS
+            # macOS系统字体通常支持emoji
+            return QFont("Apple Color Emoji", 12)
+        if system == "Windows":
+            return QFont("Segoe UI Emoji", 12)
+        # Linux尝试使用Noto Color Emoji，如果不存在则使用默认字体（通常也支持emoji）
+        font = QFont("Noto Color Emoji", 12)
+        if not font.exactMatch():
+            font = QFont()
+        return font
+    
+    def _apply_rows_to_table(self):
+        """按当前排序方式将已加载的数据写入表格"""
+        rows = self._rows
+        if rows is None:
+            self._table.setRowCount(0)
+            return
+        order = rows.order(self._current_sort_by, self._current_sort_order)
+        name_font = self._emoji_font()
         
-        for idx, item in enumerate(items):
-            month = item.get("month", "")
-            month_str = get_month_key(month)
-            
-            user_id = str(item.get("user_id", ""))
-            name = item.get("name") or ""
-            # 从员工数据映射中获取团队名称，如果没有则使用API返回的team_name（如果有）
-            team_name = self._user_team_map.get(user_id, "") or item.get("team_name", "")
-            total_ai_month = item.get("total_ai_month", 0.0)
-            salary_ratio = item.get("salary_ratio", 0.0)
-            growth_rate = item.get("growth_rate", 0.0)
-            final_score = item.get("final_score", 0.0)
-            workday_count = item.get("workday_count", 0)
-            
-            # 获取排名并添加奖牌图标
-            rank = rank_map.get((user_id, month_str), 0)
-            medal = ""
-            if rank == 1:
-                medal = "🥇 "  # 金牌 emoji
-            elif rank == 2:
-                medal = "🥈 "  # 银牌 emoji
-            elif rank == 3:
-                medal = "🥉 "  # 铜牌 emoji
-            
-            # 设置月份、员工ID、姓名（左对齐，姓名前加奖牌）
-            self._table.setItem(idx, 0, QTableWidgetItem(month_str))
-            self._table.setItem(idx, 1, QTableWidgetItem(user_id))
-            
-            # 创建姓名单元格，设置支持emoji的字体
-            name_text = f"{medal}{name}" if name else medal.strip()
-            name_item = QTableWidgetItem(name_text)
-            
-            # 设置支持emoji的字体（跨平台）
-            # 使用系统默认字体，通常已经支持emoji
-            import platform
-            system = platform.system()
-            if system == "Darwin":  # macOS
-                # macOS系统字体通常支持emoji
-                font = QFont("Apple Color Emoji", 12)
-            elif system == "Windows":
-                font = QFont("Segoe UI Emoji", 12)
-            else:  # Linux
-                # Linux尝试使用Noto Color Emoji，如果不存在则使用默认字体
-                font = QFont("Noto Color Emoji", 12)
-                if not font.exactMatch():
-                    # 如果字体不存在，使用默认字体（通常也支持emoji）
-                    font = QFont()
-            
-            name_item.setFont(font)
-            self._table.setItem(idx, 2, name_item)
-            
-            # 设置团队（左对齐）
-            team_item = QTableWidgetItem(team_name)
-            self._table.setItem(idx, 3, team_item)
-            
-            # 设置可排序的列（居中显示）
-            # 最终综合分（列4）
-            item_final = QTableWidgetItem(f"{final_score:.2f}")
-            item_final.setTextAlignment(Qt.AlignCenter)
-            self._table.setItem(idx, 4, item_final)
-            
-            # AI综合均分（列5）
-            item_ai = QTableWidgetItem(f"{total_ai_month:.2f}")
-            item_ai.setTextAlignment(Qt.AlignCenter)
-            self._table.setItem(idx, 5, item_ai)
-            
-            # 工资贡献率：数据库存的是小数（如0.83表示83%），显示时乘以100，显示为整数（列6）
-            item_salary = QTableWidgetItem(f"{int(round(salary_ratio * 100))}%")
-            item_salary.setTextAlignment(Qt.AlignCenter)
-            self._table.setItem(idx, 6, item_salary)
-            
-            # 成长率：数据库存的是小数（如0.10表示10%），显示时乘以100，显示为整数（列7）
-            item_growth = QTableWidgetItem(f"{int(round(growth_rate * 100))}%")
-            item_growth.setTextAlignment(Qt.AlignCenter)
-            self._table.setItem(idx, 7, item_growth)
+        self._table.setUpdatesEnabled(False)
+        try:
+            self._table.setRowCount(0)
+            self._table.setRowCount(len(order))
             
-            # 设置有效工作日（居中显示）
-            item_workday = QTableWidgetItem(str(workday_count))
-            item_workday.setTextAlignment(Qt.AlignCenter)
-            self._table.setItem(idx, 8, item_workday)
+            for row, idx in enumerate(order):
+                user_id = rows.user_ids[idx]
+                # 从员工数据映射中获取团队名称，如果没有则使用API返回的team_name（如果有）
+                team_name = self._user_team_map.get(user_id, "") or rows.api_team_names[idx]
+                
+                # 设置月份、员工ID、姓名、团队（左对齐，姓名前加奖牌）
+                self._table.setItem(row, 0, QTableWidgetItem(rows.month_texts[idx]))
+                self._table.setItem(row, 1, QTableWidgetItem(user_id))
+                name_item = QTableWidgetItem(rows.name_texts[idx])
+                name_item.setFont(name_font)
+                self._table.setItem(row, 2, name_item)
+                self._table.setItem(row, 3, QTableWidgetItem(team_name))
+                
+                # 可排序的列及有效工作日（居中显示）
+                for col, text in (
+                    (4, rows.final_score_texts[idx]),
+                    (5, rows.total_ai_texts[idx]),
+                    (6, rows.salary_ratio_texts[idx]),
+                    (7, rows.growth_rate_texts[idx]),
+                    (8, rows.workday_texts[idx]),
+                ):
+                    cell = QTableWidgetItem(text)
+                    cell.setTextAlignment(Qt.AlignCenter)
+                    self._table.setItem(row, col, cell)
+        finally:
+            self._table.setUpdatesEnabled(True)
     
     def _on_lock_rank_clicked(self):
         """锁定排名按钮点击事件"""
@@ -775,7 +857,11 @@ class MonthlyScoreView(QWidget):
         handle_api_error(self, Exception(error), "加载失败")
     
     def _on_export_clicked(self):
-        """导出JSON按钮点击事件"""
+        """导出按钮点击事件"""
+        if self._export_worker is not None:
+            Toast.show_message(self, "正在导出，请稍候")
+            return
+        
         # 获取当前筛选条件
         month = None
         if self._month_combo.currentIndex() > 0:
@@ -793,136 +879,116 @@ class MonthlyScoreView(QWidget):
             salary_ratio_filter = "lt100"
         
         # 生成默认文件名
-        filename = "monthly_scores"
         if month:
             filename = f"monthly_scores_{month}"
         else:
             filename = "monthly_scores_all"
         if user_id:
             filename += f"_{user_id}"
-        filename += ".json"
+        filename += ".xlsx"
         
         # 选择保存路径
-        save_path, _ = QFileDialog.getSaveFileName(
+        save_path, selected_filter = QFileDialog.getSaveFileName(
             self,
             "导出月度评分数据",
             filename,
-            "JSON Files (*.json);;All Files (*)"
+            "Excel Files (*.xlsx);;CSV Files (*.csv);;JSON Files (*.json)"
         )
         
         if not save_path:
             return  # 用户取消
         
-        # 显示加载中
-        main_window = self.window()
-        if hasattr(main_window, "show_loading"):
-            main_window.show_loading("正在导出数据...")
+        # 未输入扩展名时按所选文件类型补全
+        if Path(save_path).suffix.lower().lstrip(".") not in EXPORT_FORMATS:
+            for export_format in EXPORT_FORMATS:
+                if f"*.{export_format}" in (selected_filter or ""):
+                    save_path += f".{export_format}"
+                    break
+            else:
+                save_path += ".xlsx"
+        
+        meta = {
+            "export_time": datetime.now().isoformat(),
+            "filters": {
+                "month": month,
+                "user_id": user_id,
+                "salary_ratio_filter": self._salary_ratio_combo.currentText()
+            },
+            "sort": {
+                "sort_by": self._current_sort_by,
+                "sort_order": self._current_sort_order
+            },
+        }
         
-        # 保存路径到实例变量，以便在回调中使用
-        self._export_save_path = save_path
+        # 进度对话框（总数在第一页返回后才知道，先显示为忙碌状态）
+        self._export_progress = QProgressDialog("正在导出数据...", "取消", 0, 0, self)
+        self._export_progress.setWindowTitle("导出月度评分")
+        self._export_progress.setWindowModality(Qt.WindowModal)
+        self._export_progress.setMinimumDuration(0)
+        self._export_progress.setAutoClose(False)
+        self._export_progress.setAutoReset(False)
+        self._export_progress.canceled.connect(self._on_export_canceled)
         
         # 后台导出
         worker = _ExportMonthlyScoreWorker(
+            save_path,
             month=month,
             user_id=user_id,
             salary_ratio_filter=salary_ratio_filter,
             sort_by=self._current_sort_by,
-            sort_order=self._current_sort_order
+            sort_order=self._current_sort_order,
+            user_team_map=self._user_team_map,
+            meta=meta,
         )
-        worker.signals.finished.connect(self._on_export_data_ready)
+        worker.signals.progress.connect(self._on_export_progress)
+        worker.signals.finished.connect(self._on_export_success)
+        worker.signals.cancelled.connect(self._on_export_cancelled)
         worker.signals.error.connect(self._on_export_error)
+        self._export_worker = worker
         self._thread_pool.start(worker)
+        self._export_progress.show()
     
-    def _on_export_data_ready(self, items: List[Dict]):
-        """导出数据准备完成"""
-        if not hasattr(self, '_export_save_path'):
-            main_window = self.window()
-            if hasattr(main_window, "hide_loading"):
-                main_window.hide_loading()
-            QMessageBox.warning(self, "导出失败", "保存路径丢失")
+    def _on_export_progress(self, written: int, total: int):
+        """更新导出进度"""
+        progress = self._export_progress
+        if progress is None or progress.wasCanceled():
             return
-        
-        save_path = self._export_save_path
-        # 清理临时变量
-        if hasattr(self, '_export_save_path'):
-            delattr(self, '_export_save_path')
-        self._on_export_success(items, save_path)
+        if total > 0:
+            progress.setMaximum(total)
+            progress.setValue(min(written, total))
+        progress.setLabelText(f"正在导出数据...\n已写入 {written} / {total} 条")
+    
+    def _on_export_canceled(self):
+        """用户点击取消"""
+        if self._export_worker is not None:
+            self._export_worker.cancel()
+    
+    def _finish_export(self):
+        """导出结束（成功、失败或取消）后清理"""
+        self._export_worker = None
+        if self._export_progress is not None:
+            # 先断开 canceled，避免关闭对话框时再次触发取消
+            try:
+                self._export_progress.canceled.disconnect(self._on_export_canceled)
+            except (RuntimeError, TypeError):
+                pass
+            self._export_progress.close()
+            self._export_progress.deleteLater()
+            self._export_progress = None
     
-    def _on_export_success(self, items: List[Dict], save_path: str):
+    def _on_export_success(self, count: int, save_path: str):
         """导出成功"""
-        main_window = self.window()
-        if hasattr(main_window, "hide_loading"):
-            main_window.hide_loading()
-        
-        try:
-            # 构建导出数据
-            export_data = {
-                "export_time": datetime.now().isoformat(),
-                "total_count": len(items),
-                "filters": {
-                    "month": self._month_combo.currentData() if self._month_combo.currentIndex() > 0 else None,
-                    "user_id": self._user_id_edit.text().strip() or None,
-                    "salary_ratio_filter": self._salary_ratio_combo.currentText()
-                },
-                "sort": {
-                    "sort_by": self._current_sort_by,
-                    "sort_order": self._current_sort_order
-                },
-                "data": []
-            }
-            
-            # 格式化数据
-            for item in items:
-                month = item.get("month", "")
-                # 统一月份格式
-                if isinstance(month, str):
-                    try:
-                        month_date = datetime.strptime(month, "%Y-%m-%d").date()
-                        month_str = month_date.strftime("%Y-%m")
-                    except:
-                        try:
-                            # 尝试其他格式
-                            month_date = datetime.strptime(month, "%Y-%m").date()
-                            month_str = month_date.strftime("%Y-%m")
-                        except:
-                            month_str = month
-                elif hasattr(month, 'strftime'):
-                    month_str = month.strftime("%Y-%m")
-                else:
-                    month_str = str(month)
-                
-                export_item = {
-                    "month": month_str,
-                    "user_id": str(item.get("user_id", "")),
-                    "name": item.get("name") or "",
-                    "team_name": item.get("team_name") or "",
-                    "total_ai_month": float(item.get("total_ai_month", 0.0)),
-                    "salary_ratio": float(item.get("salary_ratio", 0.0)),
-                    "growth_rate": float(item.get("growth_rate", 0.0)),
-                    "final_score": float(item.get("final_score", 0.0)),
-                    "workday_count": int(item.get("workday_count", 0))
-                }
-                export_data["data"].append(export_item)
-            
-            # 保存JSON文件
-            with open(save_path, 'w', encoding='utf-8') as f:
-                json.dump(export_data, f, ensure_ascii=False, indent=2)
-            
-            Toast.show_message(self, f"导出成功：{len(items)} 条记录已保存到 {save_path}")
-        except Exception as e:
-            import traceback
-            error_msg = f"保存文件失败：{e}\n{traceback.format_exc()}"
-            QMessageBox.critical(self, "导出失败", error_msg)
+        self._finish_export()
+        Toast.show_message(self, f"导出成功：{count} 条记录已保存到 {save_path}")
+    
+    def _on_export_cancelled(self):
+        """导出已取消"""
+        self._finish_export()
+        Toast.show_message(self, "已取消导出")
     
     def _on_export_error(self, error: str):
         """导出失败"""
-        main_window = self.window()
-        if hasattr(main_window, "hide_loading"):
-            main_window.hide_loading()
-        
-        # 清理临时变量
-        if hasattr(self, '_export_save_path'):
-            delattr(self, '_export_save_path')
+        self._finish_export()
         
         # 显示详细错误信息
         QMessageBox.critical(self, "导出失败", f"导出数据失败：\n{error}")
@@ -8,8 +8,7 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit,
     QTextEdit, QPushButton, QComboBox, QMessageBox, QFrame,
-    QTableWidget, QTableWidgetItem, QHeaderView, QTabWidget,
-    QAbstractItemView
+    QHeaderView, QTabWidget
 )
 from PySide6.QtCore import Qt, QTimer, QRunnable, QThreadPool, QObject, Signal, Slot
 from PySide6.QtGui import QFont
@@ -17,9 +16,47 @@ from datetime import datetime
 from utils.api_client import AdminApiClient, ApiError
 from widgets.toast import Toast
 from widgets.loading_overlay import LoadingOverlay
+from widgets.paged_table import PagedColumn, PagedTableModel, PagedTableView, format_datetime_text
 from windows._notification_worker import _NotificationListWorker
 
 
+def _notification_target_text(item) -> str:
+    target_type = item.get("target_type", "")
+    target_id = item.get("target_id", "")
+    if target_type == "all":
+        return "所有用户"
+    if target_type == "user":
+        return f"用户: {target_id}"
+    if target_type == "team":
+        return f"团队: {target_id}"
+    return target_type
+
+
+def _notification_status_text(item) -> str:
+    expires_at = item.get("expires_at")
+    if not expires_at:
+        return "永久有效"
+    try:
+        if isinstance(expires_at, str):
+            exp_dt = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
+        else:
+            exp_dt = expires_at
+        return "已过期" if exp_dt < datetime.now() else "有效"
+    except:
+        return "有效"
+
+
+_NOTIFICATION_COLUMNS = [
+    PagedColumn("ID", lambda it: str(it.get("id", ""))),
+    PagedColumn("标题", lambda it: it.get("title", "")),
+    PagedColumn("发送目标", _notification_target_text),
+    PagedColumn("发送者", lambda it: it.get("sender_admin_email", "")),
+    PagedColumn("发送时间", lambda it: format_datetime_text(it.get("created_at", ""))),
+    PagedColumn("已读数量", lambda it: str(it.get("read_count", 0))),
+    PagedColumn("状态", _notification_status_text, resize_mode=QHeaderView.Stretch),  # 占剩余空间
+]
+
+
 class NotificationView(QWidget):
     """通知管理页面"""
     
@@ -185,34 +222,14 @@ class NotificationView(QWidget):
         toolbar.addStretch()
         layout.addLayout(toolbar)
         
-        # 通知列表表格
-        self.notification_table = QTableWidget()
-        self.notification_table.setColumnCount(7)
-        self.notification_table.setHorizontalHeaderLabels([
-            "ID", "标题", "发送目标", "发送者", "发送时间", "已读数量", "状态"
-        ])
-        header = self.notification_table.horizontalHeader()
-        header.setStretchLastSection(False)
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # ID
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)  # 标题
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)  # 发送目标
-        header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # 发送者
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # 发送时间
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # 已读数量
-        header.setSectionResizeMode(6, QHeaderView.Stretch)  # 状态（占剩余空间）
+        # 通知列表表格（滚动到底部时由模型自动加载下一页，每页30条）
+        self._page_size = 30
+        self._model = PagedTableModel(_NOTIFICATION_COLUMNS, page_size=self._page_size, parent=self)
+        self._model.page_requested.connect(self._on_page_requested)
+        self._model.state_changed.connect(self._on_model_state_changed)
+        self.notification_table = PagedTableView(self._model, _NOTIFICATION_COLUMNS)
         self.notification_table.setAlternatingRowColors(True)
-        self.notification_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.notification_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
-        self.notification_table.cellDoubleClicked.connect(self._on_notification_double_clicked)
-        
-        # 翻页相关状态
-        self._current_offset = 0
-        self._page_size = 30  # 每页加载30条
-        self._is_loading = False
-        self._has_more = True
-        
-        # 监听滚动事件，实现无限滚动
-        self.notification_table.verticalScrollBar().valueChanged.connect(self._on_scroll_changed)
+        self.notification_table.doubleClicked.connect(self._on_notification_double_clicked)
         
         layout.addWidget(self.notification_table)
         
@@ -224,57 +241,19 @@ class NotificationView(QWidget):
         
         return tab
     
-    def _on_notification_double_clicked(self, row, col):
+    def _on_notification_double_clicked(self, index):
         """双击通知行，显示详情"""
-        # 从存储的数据中获取完整信息
-        notification_id_item = self.notification_table.item(row, 0)
-        if not notification_id_item:
+        notification_data = self.notification_table.item_at(index)
+        if not notification_data:
             return
         
-        notification_data = notification_id_item.data(Qt.ItemDataRole.UserRole + 1)  # 存储完整数据
-        if not notification_data:
-            # 如果没有存储完整数据，从表格中获取
-            title_item = self.notification_table.item(row, 1)
-            target_item = self.notification_table.item(row, 2)
-            sender_item = self.notification_table.item(row, 3)
-            time_item = self.notification_table.item(row, 4)
-            read_count_item = self.notification_table.item(row, 5)
-            
-            title = title_item.text() if title_item else ""
-            target = target_item.text() if target_item else ""
-            sender = sender_item.text() if sender_item else ""
-            time_str = time_item.text() if time_item else ""
-            read_count = read_count_item.text() if read_count_item else "0"
-            message = ""
-            subtitle = ""
-        else:
-            title = notification_data.get("title", "")
-            message = notification_data.get("message", "")
-            subtitle = notification_data.get("subtitle", "")
-            target_type = notification_data.get("target_type", "")
-            target_id = notification_data.get("target_id", "")
-            if target_type == "all":
-                target = "所有用户"
-            elif target_type == "user":
-                target = f"用户: {target_id}"
-            elif target_type == "team":
-                target = f"团队: {target_id}"
-            else:
-                target = target_type
-            sender = notification_data.get("sender_admin_email", "")
-            created_at = notification_data.get("created_at", "")
-            if created_at:
-                try:
-                    if isinstance(created_at, str):
-                        dt = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                    else:
-                        dt = created_at
-                    time_str = dt.strftime("%Y-%m-%d %H:%M:%S")
-                except:
-                    time_str = str(created_at)
-            else:
-                time_str = ""
-            read_count = str(notification_data.get("read_count", 0))
+        title = notification_data.get("title", "")
+        message = notification_data.get("message", "")
+        subtitle = notification_data.get("subtitle", "")
+        target = _notification_target_text(notification_data)
+        sender = notification_data.get("sender_admin_email", "")
+        time_str = format_datetime_text(notification_data.get("created_at", ""))
+        read_count = str(notification_data.get("read_count", 0))
         
         # 显示详情对话框
         msg = QMessageBox(self)
@@ -303,172 +282,50 @@ class NotificationView(QWidget):
             QMessageBox.critical(self, "错误", f"无法初始化 API 客户端：{str(e)}\n请先登录。")
             return
         
-        # 重置翻页状态
-        self._current_offset = 0
-        self._has_more = True
-        self._is_loading = True
-        
         # 显示加载
         self.main_window.show_loading("正在加载通知列表...")
         
-        # 在后台线程中加载
-        worker = _NotificationListWorker(self.api, limit=self._page_size, offset=0)
-        worker.signals.finished.connect(self._on_notification_list_loaded)
-        worker.signals.error.connect(self._on_notification_list_error)
+        # 重置翻页状态（进行中的旧请求结果会被丢弃）并加载第一页
+        self._model.reset()
+        self._model.fetchMore()
+    
+    def _on_page_requested(self, generation: int, offset: int, limit: int):
+        """模型请求加载一页数据（在后台线程中加载）"""
+        worker = _NotificationListWorker(self.api, limit=limit, offset=offset, cancel_token=self._model.cancel_token)
+        worker.signals.finished.connect(
+            lambda items, g=generation, o=offset: self._on_notification_page_loaded(g, o, items)
+        )
+        worker.signals.error.connect(
+            lambda error_msg, g=generation, o=offset: self._on_notification_list_error(error_msg, g, o)
+        )
         QThreadPool.globalInstance().start(worker)
     
-    def _on_notification_list_loaded(self, items):
-        """通知列表加载完成（首次加载）"""
-        self.main_window.hide_loading()
-        self._is_loading = False
-        
-        # 判断是否还有更多数据
-        if len(items) >= self._page_size:
-            self._has_more = True
-            self._current_offset = len(items)
-        else:
-            self._has_more = False
-        
-        # 清空表格并重新渲染
-        self.notification_table.setRowCount(0)
-        self._apply_items_to_table(items)
-        
-        # 更新统计信息
-        total_count = self.notification_table.rowCount()
-        if self._has_more:
+    def _on_notification_page_loaded(self, generation: int, offset: int, items):
+        """一页通知加载完成"""
+        if offset == 0 and generation == self._model.generation:
+            self.main_window.hide_loading()
+        self._model.page_loaded(generation, offset, items)
+    
+    def _on_model_state_changed(self):
+        """更新统计信息"""
+        if self._model.loaded_count == 0 and self._model.has_more:
+            return  # 第一页尚未返回
+        total_count = self._model.loaded_count
+        if self._model.has_more:
             self._stats_label.setText(f"已显示 {total_count} 条通知，滚动加载更多...")
         else:
             self._stats_label.setText(f"共 {total_count} 条通知")
     
-    def _apply_items_to_table(self, items):
-        """将通知数据渲染到表格"""
-        start_row = self.notification_table.rowCount()
-        self.notification_table.setRowCount(start_row + len(items))
-        
-        for idx, item in enumerate(items):
-            row = start_row + idx
-            
-            # ID（同时存储完整数据）
-            id_item = QTableWidgetItem(str(item.get("id", "")))
-            id_item.setData(Qt.ItemDataRole.UserRole, item.get("id"))
-            id_item.setData(Qt.ItemDataRole.UserRole + 1, item)  # 存储完整数据供详情使用
-            self.notification_table.setItem(row, 0, id_item)
-            
-            # 标题
-            title_item = QTableWidgetItem(item.get("title", ""))
-            self.notification_table.setItem(row, 1, title_item)
-            
-            # 发送目标
-            target_type = item.get("target_type", "")
-            target_id = item.get("target_id", "")
-            if target_type == "all":
-                target_text = "所有用户"
-            elif target_type == "user":
-                target_text = f"用户: {target_id}"
-            elif target_type == "team":
-                target_text = f"团队: {target_id}"
-            else:
-                target_text = target_type
-            target_item = QTableWidgetItem(target_text)
-            self.notification_table.setItem(row, 2, target_item)
-            
-            # 发送者
-            sender_item = QTableWidgetItem(item.get("sender_admin_email", ""))
-            self.notification_table.setItem(row, 3, sender_item)
-            
-            # 发送时间
-            created_at = item.get("created_at", "")
-            if created_at:
-                try:
-                    if isinstance(created_at, str):
-                        dt = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-                    else:
-                        dt = created_at
-                    time_str = dt.strftime("%Y-%m-%d %H:%M:%S")
-                except:
-                    time_str = str(created_at)
-            else:
-                time_str = ""
-            time_item = QTableWidgetItem(time_str)
-            self.notification_table.setItem(row, 4, time_item)
-            
-            # 已读数量
-            read_count = item.get("read_count", 0)
-            read_item = QTableWidgetItem(str(read_count))
-            self.notification_table.setItem(row, 5, read_item)
-            
-            # 状态
-            expires_at = item.get("expires_at")
-            if expires_at:
-                try:
-                    if isinstance(expires_at, str):
-                        exp_dt = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
-                    else:
-                        exp_dt = expires_at
-                    if exp_dt < datetime.now():
-                        status = "已过期"
-                    else:
-                        status = "有效"
-                except:
-                    status = "有效"
-            else:
-                status = "永久有效"
-            status_item = QTableWidgetItem(status)
-            self.notification_table.setItem(row, 6, status_item)
-    
-    def _on_notification_list_error(self, error_msg):
-        """通知列表加载失败"""
-        self.main_window.hide_loading()
-        self._is_loading = False
-        QMessageBox.critical(self, "加载失败", f"加载通知列表失败：{error_msg}")
-    
-    def _on_scroll_changed(self, value: int):
-        """监听滚动条变化，当滚动到底部时自动加载更多"""
-        scroll_bar = self.notification_table.verticalScrollBar()
-        if scroll_bar.maximum() - value < 100:  # 距离底部100像素时触发
-            self._load_more()
-    
-    def _load_more(self):
-        """加载更多数据"""
-        if self._is_loading or not self._has_more:
+    def _on_notification_list_error(self, error_msg, generation: int, offset: int):
+        """通知列表加载失败（已被刷新作废的请求不再提示）"""
+        if generation != self._model.generation:
             return
-        
-        self._is_loading = True
-        
-        worker = _NotificationListWorker(self.api, limit=self._page_size, offset=self._current_offset)
-        worker.signals.finished.connect(self._on_more_data_loaded)
-        worker.signals.error.connect(self._on_load_more_error)
-        QThreadPool.globalInstance().start(worker)
-    
-    def _on_more_data_loaded(self, items):
-        """加载更多数据完成"""
-        self._is_loading = False
-        
-        if not items:
-            self._has_more = False
-            return
-        
-        # 判断是否还有更多数据
-        if len(items) >= self._page_size:
-            self._has_more = True
-            self._current_offset += len(items)
-        else:
-            self._has_more = False
-        
-        # 追加到表格
-        self._apply_items_to_table(items)
-        
-        # 更新统计信息
-        total_count = self.notification_table.rowCount()
-        if self._has_more:
-            self._stats_label.setText(f"已显示 {total_count} 条通知，滚动加载更多...")
+        self._model.page_failed(generation, offset)
+        if offset == 0:
+            self.main_window.hide_loading()
+            QMessageBox.critical(self, "加载失败", f"加载通知列表失败：{error_msg}")
         else:
-            self._stats_label.setText(f"共 {total_count} 条通知")
-    
-    def _on_load_more_error(self, error_msg):
-        """加载更多数据失败"""
-        self._is_loading = False
-        Toast.show_message(self, f"加载更多失败：{error_msg}")
+            Toast.show_message(self, f"加载更多失败：{error_msg}")
     
     def _on_tab_changed(self, index):
         """标签页切换"""
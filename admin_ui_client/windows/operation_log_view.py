@@ -9,21 +9,23 @@
 """
 
 import json
-from datetime import date, datetime, timedelta
+from datetime import date, timedelta
 from typing import List, Dict, Any, Optional
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
-    QTableWidget, QTableWidgetItem, QPushButton, QDialog,
-    QTextEdit, QHeaderView, QDateEdit, QLineEdit, QMessageBox,
-    QAbstractItemView, QScrollBar, QTabWidget
+    QPushButton, QDialog, QTextEdit, QHeaderView, QDateEdit, QLineEdit, QMessageBox,
+    QTabWidget
 )
-from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate
-from PySide6.QtGui import QFont
+from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate, QPoint, QTimer
+from PySide6.QtGui import QFont, QColor
 
-from utils.api_client import AdminApiClient, ApiError, AuthError
+from utils.api_client import AdminApiClient, ApiError, AuthError, CancelToken, RequestCancelled
 from utils.error_handler import handle_api_error
+from utils.log_search_index import LogSearchDoc, LogSearchIndex, doc_key, json_text
 from widgets.toast import Toast
+from widgets.paged_table import PagedColumn, PagedTableModel, PagedTableView, format_datetime_text
+from widgets.log_search_bar import LogSearchBar, LogSearchWorker
 
 
 class _OperationLogWorkerSignals(QObject):
@@ -44,7 +46,8 @@ class _OperationLogWorker(QRunnable):
         path: Optional[str] = None,
         response_status: Optional[int] = None,
         offset: int = 0,
-        limit: int = 50
+        limit: int = 50,
+        cancel_token: Optional[CancelToken] = None
     ):
         super().__init__()
         self._start_date = start_date
@@ -57,17 +60,21 @@ class _OperationLogWorker(QRunnable):
         self._response_status = response_status
         self._offset = offset
         self._limit = limit
+        self._cancel_token = cancel_token
         self.signals = _OperationLogWorkerSignals()
 
     @Slot()
     def run(self) -> None:
+        # 排队期间已被新请求取代（筛选条件变化），不再发起请求
+        if self._cancel_token is not None and self._cancel_token.cancelled:
+            return
         # 检查登录状态（版本升级除外）
         if not AdminApiClient.is_logged_in():
             self.signals.error.emit("需要先登录")
             return
         
         try:
-            client = AdminApiClient.from_config()
+            client = AdminApiClient.from_config().with_cancel_token(self._cancel_token)
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
             return
@@ -89,25 +96,91 @@ class _OperationLogWorker(QRunnable):
                 limit=self._limit
             )
             items = resp.get("items", []) if isinstance(resp, dict) else []
+            # 写入本地全文索引（失败不影响加载），管理端/员工端分开索引
+            LogSearchIndex.instance().add(
+                f"operation_{self._client_type or 'admin'}", (_search_doc(item) for item in items)
+            )
             # total_count 是返回的数据条数，用于判断是否还有更多数据
             total_count = len(items)
             self.signals.finished.emit(items, total_count)
+        except RequestCancelled:
+            return  # 已被新请求取代，结果直接丢弃
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
         except Exception as e:
             self.signals.error.emit(f"加载操作日志失败：{e}")
 
 
+def _operation_desc(item: Dict[str, Any]) -> str:
+    """优先使用后端返回的 operation_desc（人性化描述），为空时用 method + path"""
+    operation_desc = item.get("operation_desc")
+    if not operation_desc or operation_desc.strip() == "":
+        operation_desc = f"{item.get('method', '')} {item.get('path', '')}"
+    return operation_desc
+
+
+def _operator_text(item: Dict[str, Any]) -> str:
+    """操作人：管理端显示管理员邮箱，员工端显示用户ID"""
+    admin_email = item.get("admin_email")
+    user_id = item.get("user_id")
+    if item.get("client_type", "admin") == "admin" and admin_email:
+        return admin_email
+    return user_id if user_id else "-"
+
+
+def _status_color(item: Dict[str, Any]) -> Optional[QColor]:
+    """状态码颜色：2xx 绿、4xx 黄、5xx 红"""
+    response_status = item.get("response_status", 0) or 0
+    if 200 <= response_status < 300:
+        return QColor(Qt.green)
+    if 400 <= response_status < 500:
+        return QColor(Qt.yellow)
+    if response_status >= 500:
+        return QColor(Qt.red)
+    return None
+
+
+def _search_doc(item: Dict[str, Any]) -> LogSearchDoc:
+    """本地索引字段：方法/路径/操作描述、管理员邮箱/用户ID/IP、请求参数和请求/响应体、错误信息"""
+    return LogSearchDoc(
+        key=doc_key(item),
+        created_at=str(item.get("created_at") or ""),
+        path=" ".join(str(v) for v in (item.get("method"), item.get("path"), item.get("operation_desc")) if v),
+        actor=" ".join(str(v) for v in (item.get("admin_email"), item.get("user_id"), item.get("ip_address")) if v),
+        body=json_text(item.get("query_params"), item.get("request_body"), item.get("response_body")),
+        error=" ".join(str(v) for v in (item.get("response_status"), item.get("error_message")) if v),
+        item=item,
+    )
+
+
+_OPERATION_LOG_COLUMNS = [
+    PagedColumn("操作时间", lambda it: format_datetime_text(it.get("created_at", ""))),
+    PagedColumn("客户端类型", lambda it: "管理端" if it.get("client_type", "admin") == "admin" else "员工端",
+                align=int(Qt.AlignCenter)),
+    # 操作人列：固定宽度，避免占用太多空间，不需要完整显示
+    PagedColumn("操作人", _operator_text, resize_mode=QHeaderView.Fixed, width=150),
+    # 操作描述列：自动撑满剩余空间，确保完整显示
+    PagedColumn("操作描述", _operation_desc, resize_mode=QHeaderView.Stretch, tooltip=_operation_desc),
+    PagedColumn("方法", lambda it: it.get("method", "")),
+    # 路径列：固定宽度，不需要完整显示
+    PagedColumn("路径", lambda it: it.get("path", ""), resize_mode=QHeaderView.Fixed, width=200),
+    # 状态码列：根据状态码设置颜色
+    PagedColumn("状态码", lambda it: str(it.get("response_status", 0)), align=int(Qt.AlignCenter), color=_status_color),
+    PagedColumn("响应时间(ms)",
+                lambda it: str(it["response_time_ms"]) if it.get("response_time_ms") is not None else "-",
+                align=int(Qt.AlignCenter)),
+    PagedColumn("操作", lambda it: "查看", is_action=True),
+]
+
+
 class OperationLogView(QWidget):
     def __init__(self):
         super().__init__()
         
         # 分页相关状态
-        self._current_offset = 0
         self._page_size = 50
-        self._is_loading = False
-        self._has_more = True
         self._current_filters = {}  # 保存当前筛选条件
+        self._search_query = ""  # 本地搜索关键词，非空时表格显示本地索引的搜索结果
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(24, 16, 24, 24)
@@ -280,39 +353,24 @@ class OperationLogView(QWidget):
         employee_filter_container.addLayout(employee_filter_row1)
         employee_filter_container.addLayout(employee_filter_row2)
 
+        # 本地全文搜索（索引不可用或已在设置中关闭时隐藏）
+        self._search_bar = LogSearchBar("搜索路径、管理员邮箱/用户ID、请求/响应内容、错误信息...")
+        self._search_bar.query_changed.connect(self._on_search_changed)
+        self._search_bar.refresh_visibility()
+        layout.addWidget(self._search_bar)
+
 
-        # 表格区域
-        self._table = QTableWidget(0, 9)
-        self._table.setHorizontalHeaderLabels([
-            "操作时间", "客户端类型", "操作人", "操作描述", "方法", "路径", "状态码", "响应时间(ms)", "操作"
-        ])
-        header = self._table.horizontalHeader()
-        header.setStretchLastSection(False)
-        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # 操作时间
-        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)  # 客户端类型
-        # 操作人列：使用固定宽度模式，避免占用太多空间，不需要完整显示
-        header.setSectionResizeMode(2, QHeaderView.Fixed)  # 操作人（管理员/用户ID）
-        self._table.setColumnWidth(2, 150)  # 操作人列固定宽度150px
-        # 操作描述列：自动撑满剩余空间，确保完整显示
-        header.setSectionResizeMode(3, QHeaderView.Stretch)  # 操作描述（自动撑满剩余空间，完整显示）
-        header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # 方法
-        # 路径列：固定宽度，不需要完整显示
-        header.setSectionResizeMode(5, QHeaderView.Fixed)  # 路径
-        self._table.setColumnWidth(5, 200)  # 路径列固定宽度200px
-        header.setSectionResizeMode(6, QHeaderView.ResizeToContents)  # 状态码
-        header.setSectionResizeMode(7, QHeaderView.ResizeToContents)  # 响应时间
-        header.setSectionResizeMode(8, QHeaderView.ResizeToContents)  # 操作
-        self._table.setSelectionBehavior(QAbstractItemView.SelectRows)
-        self._table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # 表格区域（滚动到底部时由模型自动加载下一页）
+        self._model = PagedTableModel(_OPERATION_LOG_COLUMNS, page_size=self._page_size, parent=self)
+        self._model.page_requested.connect(self._on_page_requested)
+        self._model.state_changed.connect(self._on_model_state_changed)
+        self._table = PagedTableView(self._model, _OPERATION_LOG_COLUMNS)
+        self._table.action_clicked.connect(self._on_view_detail_clicked)
         
         # 设置表格水平撑满
         from PySide6.QtWidgets import QSizePolicy
         self._table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         
-        # 监听滚动事件，实现无限滚动
-        scroll_bar = self._table.verticalScrollBar()
-        scroll_bar.valueChanged.connect(self._on_scroll_changed)
-        
         layout.addWidget(self._table, 1)  # 添加拉伸因子，让表格撑满
         
         # 底部状态栏（显示加载状态和"没有更多数据"）
@@ -328,31 +386,18 @@ class OperationLogView(QWidget):
         else:
             self._current_client_type = "employee"
         # 切换TAB时重置分页并重新加载
-        self._current_offset = 0
-        self._has_more = True
-        self._table.setRowCount(0)
+        self._model.reset()
         # 自动执行筛选（延迟执行，避免在切换时立即触发）
-        from PySide6.QtCore import QTimer
         QTimer.singleShot(100, lambda: self._on_filter_clicked(self._current_client_type))
 
-    def _on_scroll_changed(self, value: int):
-        """滚动事件处理：当滚动到底部时自动加载更多"""
-        if self._is_loading or not self._has_more:
-            return
-        
-        scroll_bar = self._table.verticalScrollBar()
-        # 当滚动到距离底部50像素以内时，触发加载
-        if value >= scroll_bar.maximum() - 50:
-            self._load_more()
-
-    def _load_more(self):
-        """加载更多数据"""
-        if self._is_loading or not self._has_more:
+    def _on_page_requested(self, generation: int, offset: int, limit: int):
+        """模型请求加载一页数据"""
+        if self._search_query:
+            # 本地索引搜索也放到后台线程，结果经信号回到 UI 线程（不会在模型请求回调中同步修改模型）
+            worker = LogSearchWorker(f"operation_{self._current_client_type}", self._search_query, generation, offset, limit)
+            worker.signals.finished.connect(self._model.page_loaded)
+            QThreadPool.globalInstance().start(worker)
             return
-        
-        self._is_loading = True
-        self._status_label.setText("加载中...")
-        
         worker = _OperationLogWorker(
             start_date=self._current_filters.get("start_date"),
             end_date=self._current_filters.get("end_date"),
@@ -362,11 +407,14 @@ class OperationLogView(QWidget):
             method=self._current_filters.get("method"),
             path=self._current_filters.get("path"),
             response_status=self._current_filters.get("response_status"),
-            offset=self._current_offset,
-            limit=self._page_size
+            offset=offset,
+            limit=limit,
+            cancel_token=self._model.cancel_token
+        )
+        worker.signals.finished.connect(
+            lambda items, _total, g=generation, o=offset: self._on_page_loaded(g, o, items)
         )
-        worker.signals.finished.connect(self._on_more_data_loaded)
-        worker.signals.error.connect(self._on_error)
+        worker.signals.error.connect(lambda error, g=generation, o=offset: self._on_error(error, g, o))
         QThreadPool.globalInstance().start(worker)
 
     def _on_filter_clicked(self, client_type: str = None):
@@ -401,6 +449,10 @@ class OperationLogView(QWidget):
                 QMessageBox.warning(self, "输入错误", "状态码必须是数字")
                 return
 
+        # 服务器筛选与本地搜索互斥
+        self._search_query = ""
+        self._search_bar.clear_silently()
+
         # 保存筛选条件
         self._current_filters = {
             "start_date": start_date,
@@ -413,30 +465,13 @@ class OperationLogView(QWidget):
         }
         self._current_client_type = client_type
         
-        # 重置分页状态
-        self._current_offset = 0
-        self._has_more = True
-        self._table.setRowCount(0)  # 清空表格
-        
         main_window = self.window()
         if hasattr(main_window, "show_loading"):
             main_window.show_loading("加载操作日志中...")
 
-        worker = _OperationLogWorker(
-            start_date=start_date,
-            end_date=end_date,
-            client_type=client_type,
-            admin_email=admin_email,
-            user_id=user_id,
-            method=method,
-            path=path,
-            response_status=response_status,
-            offset=0,
-            limit=self._page_size
-        )
-        worker.signals.finished.connect(self._on_data_loaded)
-        worker.signals.error.connect(self._on_error)
-        QThreadPool.globalInstance().start(worker)
+        # 重置分页状态（进行中的旧请求结果会被丢弃）并加载第一页
+        self._model.reset()
+        self._model.fetchMore()
 
     def _on_clear_filter(self, client_type: str = None):
         """清除筛选条件"""
@@ -461,157 +496,39 @@ class OperationLogView(QWidget):
         # 清除后自动执行一次筛选
         self._on_filter_clicked(client_type)
 
-    def _on_data_loaded(self, items: List[Dict[str, Any]], total_count: int):
-        """首次数据加载完成"""
-        main_window = self.window()
-        if hasattr(main_window, "hide_loading"):
-            main_window.hide_loading()
-        
-        self._is_loading = False
-        self._apply_rows_to_table(items, append=False)
-        
-        # 更新分页状态：offset 应该是已加载的数据条数
-        self._current_offset = len(items)
-        # 如果返回的数据量等于 page_size，说明可能还有更多数据
-        self._has_more = len(items) >= self._page_size
-        
-        if not self._has_more and len(items) > 0:
-            self._status_label.setText(f"已加载全部数据（共 {self._current_offset} 条）")
-        elif len(items) == 0:
-            self._status_label.setText("暂无数据")
-        else:
-            self._status_label.setText(f"已加载 {self._current_offset} 条，滚动到底部加载更多")
-
-    def _on_more_data_loaded(self, items: List[Dict[str, Any]], total_count: int):
-        """加载更多数据完成"""
-        self._is_loading = False
-        self._apply_rows_to_table(items, append=True)
-        
-        # 更新分页状态：offset 应该是已加载的数据条数（累加）
-        self._current_offset += len(items)
-        # 如果返回的数据量小于 page_size，说明没有更多数据了
-        self._has_more = len(items) >= self._page_size
-        
-        if not self._has_more:
-            self._status_label.setText(f"已加载全部数据（共 {self._current_offset} 条）")
-        else:
-            self._status_label.setText(f"已加载 {self._current_offset} 条，滚动到底部加载更多")
-
-    def _apply_rows_to_table(self, items: List[Dict[str, Any]], append: bool = False):
-        """将数据应用到表格"""
-        if not append:
-            self._table.setRowCount(0)
-        
-        start_row = self._table.rowCount()
-        self._table.setRowCount(start_row + len(items))
-
-        for idx, item in enumerate(items):
-            row = start_row + idx
-            created_at = item.get("created_at", "")
-            admin_email = item.get("admin_email", "")
-            # 优先使用后端返回的 operation_desc（人性化描述）
-            # 如果后端没有返回或为空，则使用 method + path 作为 fallback
-            operation_desc = item.get("operation_desc")
-            if not operation_desc or operation_desc.strip() == "":
-                operation_desc = f"{item.get('method', '')} {item.get('path', '')}"
-            method = item.get("method", "")
-            path = item.get("path", "")
-            response_status = item.get("response_status", 0)
-            response_time_ms = item.get("response_time_ms")
-            error_message = item.get("error_message") or ""
-            query_params = item.get("query_params")
-            request_body = item.get("request_body")
-
-            # 格式化时间
-            if created_at:
-                if isinstance(created_at, str):
-                    try:
-                        dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-                        created_at = dt.strftime("%Y-%m-%d %H:%M:%S")
-                    except:
-                        pass
-
-            client_type = item.get("client_type", "admin")
-            admin_email = item.get("admin_email")
-            user_id = item.get("user_id")
-            
-            self._table.setItem(row, 0, QTableWidgetItem(created_at))
-            
-            # 客户端类型列
-            client_type_item = QTableWidgetItem("管理端" if client_type == "admin" else "员工端")
-            client_type_item.setTextAlignment(Qt.AlignCenter)
-            self._table.setItem(row, 1, client_type_item)
-            
-            # 操作人列（管理员邮箱或用户ID）
-            operator_str = admin_email if client_type == "admin" and admin_email else (user_id if user_id else "-")
-            self._table.setItem(row, 2, QTableWidgetItem(operator_str))
-            
-            # 操作描述列（人性化文字）- 确保完整显示
-            desc_item = QTableWidgetItem(operation_desc)
-            desc_item.setToolTip(operation_desc)
-            # 设置文本对齐方式，确保文本完整显示
-            desc_item.setTextAlignment(Qt.AlignLeft | Qt.AlignVCenter)
-            self._table.setItem(row, 3, desc_item)
-            
-            self._table.setItem(row, 4, QTableWidgetItem(method))
-            self._table.setItem(row, 5, QTableWidgetItem(path))
-            
-            # 状态码列：根据状态码设置颜色
-            status_item = QTableWidgetItem(str(response_status))
-            if 200 <= response_status < 300:
-                status_item.setForeground(Qt.green)
-            elif 400 <= response_status < 500:
-                status_item.setForeground(Qt.yellow)
-            elif response_status >= 500:
-                status_item.setForeground(Qt.red)
-            status_item.setTextAlignment(Qt.AlignCenter)
-            self._table.setItem(row, 6, status_item)
-            
-            response_time_str = str(response_time_ms) if response_time_ms is not None else "-"
-            response_time_item = QTableWidgetItem(response_time_str)
-            response_time_item.setTextAlignment(Qt.AlignCenter)
-            self._table.setItem(row, 7, response_time_item)
-
-            # 操作列：查看详情按钮
-            btn_view = QPushButton("查看")
-            btn_view.setFixedSize(52, 22)
-            btn_view.setStyleSheet("""
-                QPushButton {
-                    font-size: 9pt;
-                    padding: 0px;
-                }
-            """)
-            btn_view.setProperty("query_params", json.dumps(query_params, ensure_ascii=False) if query_params else "")
-            btn_view.setProperty("request_body", json.dumps(request_body, ensure_ascii=False) if request_body else "")
-            btn_view.setProperty("response_status", response_status)
-            btn_view.setProperty("error_message", error_message)
-            btn_view.setProperty("path", path)
-            btn_view.setProperty("method", method)
-            btn_view.setProperty("admin_email", admin_email or "")
-            btn_view.setProperty("user_id", user_id or "")
-            btn_view.setProperty("client_type", client_type)
-            btn_view.setProperty("ip_address", item.get("ip_address") or "")
-            btn_view.setProperty("user_agent", item.get("user_agent") or "")
-            btn_view.setProperty("response_time_ms", response_time_ms or 0)
-            btn_view.clicked.connect(self._on_view_detail_clicked)
-            self._table.setCellWidget(row, 8, btn_view)
-
-    def _on_view_detail_clicked(self):
+    def _on_page_loaded(self, generation: int, offset: int, items: List[Dict[str, Any]]):
+        """一页数据加载完成"""
+        if offset == 0 and generation == self._model.generation:
+            main_window = self.window()
+            if hasattr(main_window, "hide_loading"):
+                main_window.hide_loading()
+        self._model.page_loaded(generation, offset, items)
+
+    def _on_model_state_changed(self):
+        status = self._model.status_text()
+        if self._search_query:
+            status = f"本地搜索：{status or '搜索中...'}"
+        self._status_label.setText(status)
+
+    def _on_search_changed(self, query: str):
+        """本地搜索关键词变化：有关键词时表格改为分页显示本地索引的命中结果，清空后恢复服务器数据"""
+        self._search_query = query
+        self._model.reset()
+        self._model.fetchMore()
+
+    def _on_view_detail_clicked(self, item: Dict[str, Any], _pos: QPoint):
         """查看详情"""
-        btn = self.sender()
-        if not btn:
-            return
-
-        query_params_str = btn.property("query_params") or ""
-        request_body_str = btn.property("request_body") or ""
-        response_status = btn.property("response_status") or 0
-        error_message = btn.property("error_message") or ""
-        path = btn.property("path") or ""
-        method = btn.property("method") or ""
-        admin_email = btn.property("admin_email") or ""
-        ip_address = btn.property("ip_address") or ""
-        user_agent = btn.property("user_agent") or ""
-        response_time_ms = btn.property("response_time_ms") or 0
+        query_params = item.get("query_params")
+        request_body = item.get("request_body")
+        query_params_str = json.dumps(query_params, ensure_ascii=False) if query_params else ""
+        request_body_str = json.dumps(request_body, ensure_ascii=False) if request_body else ""
+        response_status = item.get("response_status", 0) or 0
+        error_message = item.get("error_message") or ""
+        path = item.get("path", "") or ""
+        method = item.get("method", "") or ""
+        ip_address = item.get("ip_address") or ""
+        user_agent = item.get("user_agent") or ""
+        response_time_ms = item.get("response_time_ms") or 0
 
         dlg = QDialog(self)
         dlg.setWindowTitle(f"{method} {path} - 详情")
@@ -622,9 +539,9 @@ class OperationLogView(QWidget):
         text.setReadOnly(True)
         text.setFont(QFont("Consolas", 10))
 
-        client_type = btn.property("client_type") or "admin"
-        admin_email = btn.property("admin_email") or ""
-        user_id = btn.property("user_id") or ""
+        client_type = item.get("client_type", "admin") or "admin"
+        admin_email = item.get("admin_email") or ""
+        user_id = item.get("user_id") or ""
         
         content = []
         if client_type == "admin":
@@ -675,9 +592,11 @@ class OperationLogView(QWidget):
 
         dlg.exec()
 
-    def _on_error(self, error: str):
-        """处理错误"""
-        self._is_loading = False
+    def _on_error(self, error: str, generation: int, offset: int):
+        """处理错误（已被新筛选作废的请求不再提示）"""
+        if generation != self._model.generation:
+            return
+        self._model.page_failed(generation, offset)
         main_window = self.window()
         if hasattr(main_window, "hide_loading"):
             main_window.hide_loading()
@@ -687,3 +606,8 @@ class OperationLogView(QWidget):
     def reload_from_api(self):
         """从API重新加载数据（供主窗口调用）"""
         self._on_filter_clicked()
+
+    def showEvent(self, event):
+        """页面显示时按设置同步本地搜索框（设置页可能刚开启/关闭本地索引）"""
+        super().showEvent(event)
+        self._search_bar.refresh_visibility()
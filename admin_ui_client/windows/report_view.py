@@ -5,9 +5,10 @@
 - 显示报表生成记录列表
 - 支持按报表类型筛选
 - 支持手动生成报表
-- 支持下载报表文件（ZIP压缩）
+- 支持下载报表文件（ZIP压缩）：流式写入磁盘，显示进度，可取消，中断后断点续传
 """
 
+import time
 from datetime import date, datetime
 from typing import List, Dict, Any, Optional, Set
 from pathlib import Path
@@ -17,18 +18,19 @@ from PySide6.QtWidgets import (
     QTableWidget, QTableWidgetItem, QPushButton, QHeaderView,
     QAbstractItemView, QMessageBox, QDialog, QFormLayout,
     QDialogButtonBox, QDateEdit, QLineEdit, QListWidget, QListWidgetItem,
-    QCheckBox, QScrollArea
+    QCheckBox, QScrollArea, QFileDialog, QProgressDialog
 )
 from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QDate
 from PySide6.QtGui import QFont
 
-from utils.api_client import AdminApiClient, ApiError, AuthError
+from utils.api_client import AdminApiClient, ApiError, AuthError, CancelToken, RequestCancelled
 from utils.error_handler import handle_api_error
 from widgets.toast import Toast
 from utils.date_edit_helper import apply_theme_to_date_edit
 
 # 导入周数计算工具（使用管理端客户端独立版本，不依赖后端 jobs 模块）
-from utils.week_calculator import get_week_number, get_week_date_range, get_current_week_number
+from utils.week_calculator import get_week_number, get_week_date_range, get_current_week_number, get_week_workdays
+from utils.workday_calendar import WorkdayCalendar
 
 
 class UserSelectDialog(QDialog):
@@ -291,18 +293,35 @@ class _GenerateReportWorker(QRunnable):
 
 
 class _DownloadReportWorkerSignals(QObject):
-    finished = Signal(bytes, str)  # file_content, filename
+    progress = Signal(object, object)  # 已下载字节, 总字节（未知时为0）；可能超过 int32，用 object
+    finished = Signal(str)  # 保存路径
+    cancelled = Signal()
     error = Signal(str)
 
 
 class _DownloadReportWorker(QRunnable):
-    """后台下载报表文件"""
-    def __init__(self, log_id: int, filename_hint: Optional[str] = None):
+    """后台下载报表文件：直接流式写入保存路径（先写 .part，完成后原子替换）"""
+
+    PROGRESS_INTERVAL = 0.1  # 秒，进度信号最小间隔
+
+    def __init__(self, log_id: int, save_path: str):
         super().__init__()
         self._log_id = log_id
-        self._filename_hint = filename_hint
+        self._save_path = save_path
+        self._cancel_token = CancelToken()
+        self._last_progress = 0.0
         self.signals = _DownloadReportWorkerSignals()
 
+    def cancel(self):
+        """取消下载（任意线程）；已下载部分保留，下次下载到同一路径时续传"""
+        self._cancel_token.cancel()
+
+    def _report_progress(self, done: int, total: int):
+        now = time.monotonic()
+        if now - self._last_progress >= self.PROGRESS_INTERVAL or (total and done >= total):
+            self._last_progress = now
+            self.signals.progress.emit(done, total)
+
     @Slot()
     def run(self) -> None:
         if not AdminApiClient.is_logged_in():
@@ -310,7 +329,7 @@ class _DownloadReportWorker(QRunnable):
             return
         
         try:
-            client = AdminApiClient.from_config()
+            client = AdminApiClient.from_config().with_cancel_token(self._cancel_token)
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
             return
@@ -318,13 +337,11 @@ class _DownloadReportWorker(QRunnable):
             self.signals.error.emit(f"初始化客户端失败：{e}")
             return
 
-        filename = self._filename_hint or f"report_{self._log_id}.zip"
-
         try:
-            file_content, server_filename = client.download_report_with_name(self._log_id)
-            if server_filename:
-                filename = server_filename
-            self.signals.finished.emit(file_content, filename)
+            client.download_report_to_file(self._log_id, self._save_path, progress=self._report_progress)
+            self.signals.finished.emit(self._save_path)
+        except RequestCancelled:
+            self.signals.cancelled.emit()
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
         except Exception as e:
@@ -468,6 +485,10 @@ class ReportView(QWidget):
         self._active_workers: Set[QRunnable] = set()
         
         self._setup_ui()
+        
+        # 预加载工作日日历（生成周报前检查所选周是否有工作日）
+        this_year = date.today().year
+        WorkdayCalendar.preload_in_background([this_year - 1, this_year])
     
     def _setup_ui(self):
         layout = QVBoxLayout(self)
@@ -840,6 +861,16 @@ class ReportView(QWidget):
             if not data.get("start_date") or not data.get("end_date"):
                 QMessageBox.warning(self, "提示", "周报需要指定开始日期和结束日期")
                 return
+            # 按工作日日历检查（日历未加载时按周一至周五，不会拦截）
+            if not get_week_workdays(data["week_number"]):
+                reply = QMessageBox.question(
+                    self,
+                    "确认",
+                    f"第{data['week_number']}周在工作日日历中没有工作日（整周放假），确定仍要生成周报吗？",
+                    QMessageBox.Yes | QMessageBox.No
+                )
+                if reply != QMessageBox.Yes:
+                    return
         else:
             if not data.get("month"):
                 QMessageBox.warning(self, "提示", "月报需要指定月份（格式：YYYY-MM）")
@@ -884,49 +915,74 @@ class ReportView(QWidget):
         handle_api_error(self, Exception(error), "生成报表失败")
     
     def _on_download_clicked(self, log_id: int, filename_hint: Optional[str] = None):
-        """下载报表按钮点击"""
-        # 显示加载中
-        main_window = self.window()
-        if hasattr(main_window, "show_loading"):
-            main_window.show_loading("正在下载报表...")
+        """下载报表按钮点击：先选择保存位置，再后台流式下载"""
+        save_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "保存报表文件",
+            filename_hint or f"report_{log_id}.zip",
+            "ZIP Files (*.zip);;All Files (*)"
+        )
+        if not save_path:
+            return
+        
+        # 进度对话框（每个下载任务一个，总大小未知时显示为忙碌状态）
+        progress = QProgressDialog(f"正在下载报表：{Path(save_path).name}", "取消", 0, 0, self)
+        progress.setWindowTitle("下载报表")
+        progress.setMinimumDuration(500)  # 小文件很快完成时不闪现对话框
+        progress.setAutoClose(False)
+        progress.setAutoReset(False)
         
         # 后台下载
-        worker = _DownloadReportWorker(log_id, filename_hint)
-        worker.signals.finished.connect(self._on_download_success)
-        worker.signals.error.connect(self._on_download_error)
+        worker = _DownloadReportWorker(log_id, save_path)
+        progress.canceled.connect(worker.cancel)
+        worker.signals.progress.connect(
+            lambda done, total, dlg=progress: self._on_download_progress(dlg, done, total)
+        )
+        worker.signals.finished.connect(lambda path, dlg=progress: self._on_download_success(dlg, path))
+        worker.signals.cancelled.connect(lambda dlg=progress: self._on_download_cancelled(dlg))
+        worker.signals.error.connect(lambda error, dlg=progress: self._on_download_error(dlg, error))
         worker.signals.finished.connect(lambda *args, w=worker: self._active_workers.discard(w))
+        worker.signals.cancelled.connect(lambda *args, w=worker: self._active_workers.discard(w))
         worker.signals.error.connect(lambda *args, w=worker: self._active_workers.discard(w))
         self._active_workers.add(worker)
         self._thread_pool.start(worker)
     
-    def _on_download_success(self, file_content: bytes, filename: str):
-        """下载成功"""
-        main_window = self.window()
-        if hasattr(main_window, "hide_loading"):
-            main_window.hide_loading()
-        
-        # 保存文件
-        from PySide6.QtWidgets import QFileDialog
-        save_path, _ = QFileDialog.getSaveFileName(
-            self,
-            "保存报表文件",
-            filename,
-            "ZIP Files (*.zip);;All Files (*)"
-        )
-        
-        if save_path:
-            try:
-                with open(save_path, "wb") as f:
-                    f.write(file_content)
-                Toast.show_message(self, f"报表已保存到：{save_path}")
-            except Exception as e:
-                QMessageBox.critical(self, "保存失败", f"无法保存文件：{e}")
+    @staticmethod
+    def _format_size(size: int) -> str:
+        if size >= 1024 * 1024:
+            return f"{size / (1024 * 1024):.1f} MB"
+        return f"{size / 1024:.0f} KB"
     
-    def _on_download_error(self, error: str):
+    def _on_download_progress(self, progress: QProgressDialog, done: int, total: int):
+        """更新下载进度（按 KB 计，避免超过 QProgressDialog 的 int 范围）"""
+        if progress.wasCanceled():
+            return
+        if total > 0:
+            progress.setMaximum(max(1, total // 1024))
+            progress.setValue(min(done, total) // 1024)
+            progress.setLabelText(f"正在下载报表：{self._format_size(done)} / {self._format_size(total)}")
+        else:
+            progress.setLabelText(f"正在下载报表：已下载 {self._format_size(done)}")
+    
+    @staticmethod
+    def _close_progress(progress: QProgressDialog):
+        progress.blockSignals(True)  # 关闭时不再触发 canceled
+        progress.close()
+        progress.deleteLater()
+    
+    def _on_download_success(self, progress: QProgressDialog, save_path: str):
+        """下载成功（文件已写入保存路径）"""
+        self._close_progress(progress)
+        Toast.show_message(self, f"报表已保存到：{save_path}")
+    
+    def _on_download_cancelled(self, progress: QProgressDialog):
+        """下载已取消"""
+        self._close_progress(progress)
+        Toast.show_message(self, "已取消下载，再次下载到同一位置时将继续未完成的部分")
+    
+    def _on_download_error(self, progress: QProgressDialog, error: str):
         """下载失败"""
-        main_window = self.window()
-        if hasattr(main_window, "hide_loading"):
-            main_window.hide_loading()
+        self._close_progress(progress)
         handle_api_error(self, Exception(error), "下载报表失败")
     
     def reload_from_api(self):
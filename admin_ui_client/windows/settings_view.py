@@ -19,7 +19,6 @@ from PySide6.QtCore import QTimer, QRunnable, QThreadPool, QObject, Signal, Slot
 from typing import Dict, Any
 from datetime import date, datetime, timezone, timedelta
 from pathlib import Path
-import shutil
 import zipfile
 import sys
 
@@ -610,6 +609,29 @@ class SettingsView(QWidget):
         log_retention_row.addStretch()
         log_layout.addLayout(log_retention_row)
 
+        # 操作日志/AI日志/ETL日志页面的本地全文搜索索引
+        log_index_row = QHBoxLayout()
+        log_index_label = QLabel("本地日志搜索索引上限：")
+        self.spin_log_index_max = QSpinBox()
+        self.spin_log_index_max.setRange(0, 200000)
+        self.spin_log_index_max.setSingleStep(5000)
+        self.spin_log_index_max.setSpecialValueText("关闭")
+        self.spin_log_index_max.setValue(int(self.cfg.get("log_search_index_max_entries", 0) or 0))
+        self.spin_log_index_max.setSuffix(" 条")
+        self.spin_log_index_max.setToolTip(
+            "默认关闭。开启后会在本机保存已加载日志的副本用于离线搜索，\n"
+            "密码、令牌、Cookie 等敏感字段写入前会被替换为 ***"
+        )
+        self.spin_log_index_max.valueChanged.connect(self._schedule_save_log_index_max)
+        self._log_index_save_timer = QTimer(self)
+        self._log_index_save_timer.setSingleShot(True)
+        self._log_index_save_timer.setInterval(800)
+        self._log_index_save_timer.timeout.connect(self._auto_save_log_index_max)
+        log_index_row.addWidget(log_index_label)
+        log_index_row.addWidget(self.spin_log_index_max)
+        log_index_row.addStretch()
+        log_layout.addLayout(log_index_row)
+
         export_row = QHBoxLayout()
         self.btn_export_logs = QPushButton("导出最近日志")
         self.btn_export_logs.setFixedWidth(90)
@@ -984,6 +1006,28 @@ class SettingsView(QWidget):
             pass
         Toast.show_message(self, f"日志将保留最近 {hours} 小时")
 
+    def _schedule_save_log_index_max(self, _value: int):
+        """索引上限变化后延迟保存（连续调整时只保存最后一次）"""
+        if self._is_initializing:
+            return
+        self._log_index_save_timer.start()
+
+    def _auto_save_log_index_max(self):
+        """保存本地日志搜索索引上限，并立即按新上限淘汰（设为 0 时清空索引）"""
+        try:
+            self.cfg = ConfigManager.load()
+        except Exception:
+            self.cfg = {}
+        max_entries = max(0, int(self.spin_log_index_max.value()))
+        self.cfg["log_search_index_max_entries"] = max_entries
+        ConfigManager.save(self.cfg)
+        from utils.log_search_index import LogSearchIndex
+        LogSearchIndex.instance().set_max_entries(max_entries)
+        if max_entries:
+            Toast.show_message(self, f"本地日志搜索最多保留 {max_entries} 条")
+        else:
+            Toast.show_message(self, "已关闭本地日志搜索并清空索引")
+
     def _export_logs(self):
         """导出当前保留范围内的日志为 zip"""
         log_dir = Path(CONFIG_PATH.parent / "logs")
@@ -1539,27 +1583,23 @@ class SettingsView(QWidget):
         reply = QMessageBox.question(
             self,
             "清除缓存",
-            "确定要清除所有本地缓存数据吗？\n\n清除后，下次加载数据时会重新从服务器获取。\n\n包括：团队、角色、职级、薪级、GitHub Teams和成员等数据。",
+            "确定要清除所有本地缓存数据吗？\n\n清除后，下次加载数据时会重新从服务器获取。\n\n包括：团队、角色、职级、薪级、GitHub Teams和成员等数据，以及本地日志搜索索引。",
             QMessageBox.Yes | QMessageBox.No,
             QMessageBox.No
         )
         if reply != QMessageBox.Yes:
             return
         
-        # 获取 cache 目录路径
-        from utils.config_manager import CONFIG_PATH
-        cache_dir = CONFIG_PATH.parent / "cache"
+        from utils.dimension_cache import DimensionCache
+        cache_dir = DimensionCache.CACHE_DIR
         
         try:
-            # 如果目录存在，删除目录下的所有文件
+            # 如果目录存在，同时清除内存缓存和目录下的所有文件
+            # 审计日志本地搜索索引也一并清空
+            from utils.log_search_index import LogSearchIndex
+            LogSearchIndex.instance().clear()
             if cache_dir.exists() and cache_dir.is_dir():
-                # 删除目录下的所有文件
-                for cache_file in cache_dir.iterdir():
-                    if cache_file.is_file():
-                        cache_file.unlink()
-                    elif cache_file.is_dir():
-                        shutil.rmtree(cache_file)
-                
+                DimensionCache.clear()
                 Toast.show_message(self, "缓存已清除")
             else:
                 Toast.show_message(self, "缓存目录不存在，无需清除")
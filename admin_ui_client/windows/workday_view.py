@@ -3,14 +3,15 @@
 """
 日历管理页面：
 - 显示工作日日历视图（按月排列）
-- 支持单个日期切换工作日/非工作日
+- 数据来自 utils.workday_calendar（按整年加载，翻页不再请求后端）
+- 支持单个日期切换工作日/非工作日（本地立即生效，停顿后合并为批量请求提交）
 - 支持批量设置日期范围
 - 支持初始化默认工作日（未来N个月）
 - 支持备注说明（如：国庆节调休、春节假期等）
 """
 
-from typing import Dict, Any, List, Optional
-from datetime import date, datetime, timedelta
+from typing import Dict, Any, List
+from datetime import date, timedelta
 from pathlib import Path
 
 from PySide6.QtWidgets import (
@@ -24,22 +25,23 @@ from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal, Slot, QD
 
 from utils.api_client import AdminApiClient, ApiError, AuthError
 from utils.theme_manager import ThemeManager
+from utils.workday_calendar import WorkdayCalendar
 from utils.date_edit_helper import apply_theme_to_date_edit
 from widgets.toast import Toast
 
 
 class _WorkdayListWorkerSignals(QObject):
-    finished = Signal(list)  # List[Dict]
+    finished = Signal(list)  # List[int] 已加载的年份
     error = Signal(str)
 
 
 class _WorkdayListWorker(QRunnable):
-    """后台线程：获取工作日列表"""
-    def __init__(self, start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """后台线程：按整年加载工作日日历"""
+    def __init__(self, years: List[int], force: bool = False):
         super().__init__()
         self.signals = _WorkdayListWorkerSignals()
-        self._start_date = start_date
-        self._end_date = end_date
+        self._years = years
+        self._force = force
 
     @Slot()
     def run(self) -> None:
@@ -49,32 +51,24 @@ class _WorkdayListWorker(QRunnable):
         
         try:
             client = AdminApiClient.from_config()
-            data = client.get_workdays(start_date=self._start_date, end_date=self._end_date)
-            if isinstance(data, dict) and data.get("status") == "success":
-                items = data.get("items", [])
-                self.signals.finished.emit(items)
-            else:
-                message = data.get("message", "获取工作日列表失败") if isinstance(data, dict) else "获取工作日列表失败"
-                self.signals.error.emit(message)
+            WorkdayCalendar.load_years(client, self._years, force=self._force)
+            self.signals.finished.emit(list(self._years))
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
         except Exception as e:
             self.signals.error.emit(f"获取工作日列表失败：{e}")
 
 
-class _WorkdayUpdateWorkerSignals(QObject):
-    finished = Signal()
+class _WorkdayFlushWorkerSignals(QObject):
+    finished = Signal(int)  # 请求次数
     error = Signal(str)
 
 
-class _WorkdayUpdateWorker(QRunnable):
-    """后台线程：更新工作日"""
-    def __init__(self, date_val: date, is_workday: bool, note: Optional[str] = None):
+class _WorkdayFlushWorker(QRunnable):
+    """后台线程：提交日历中待提交的修改（连续同状态日期合并为一次批量请求）"""
+    def __init__(self):
         super().__init__()
-        self.signals = _WorkdayUpdateWorkerSignals()
-        self._date = date_val
-        self._is_workday = is_workday
-        self._note = note
+        self.signals = _WorkdayFlushWorkerSignals()
 
     @Slot()
     def run(self) -> None:
@@ -84,53 +78,13 @@ class _WorkdayUpdateWorker(QRunnable):
         
         try:
             client = AdminApiClient.from_config()
-            data = client.update_workday(self._date, self._is_workday, self._note)
-            if isinstance(data, dict) and data.get("status") == "success":
-                self.signals.finished.emit()
-            else:
-                message = data.get("message", "更新工作日失败") if isinstance(data, dict) else "更新工作日失败"
-                self.signals.error.emit(message)
+            self.signals.finished.emit(WorkdayCalendar.flush(client))
         except (ApiError, AuthError) as e:
             self.signals.error.emit(str(e))
         except Exception as e:
             self.signals.error.emit(f"更新工作日失败：{e}")
 
 
-class _WorkdayBatchUpdateWorkerSignals(QObject):
-    finished = Signal()
-    error = Signal(str)
-
-
-class _WorkdayBatchUpdateWorker(QRunnable):
-    """后台线程：批量设置工作日"""
-    def __init__(self, start_date: date, end_date: date, is_workday: bool, note: Optional[str] = None):
-        super().__init__()
-        self.signals = _WorkdayBatchUpdateWorkerSignals()
-        self._start_date = start_date
-        self._end_date = end_date
-        self._is_workday = is_workday
-        self._note = note
-
-    @Slot()
-    def run(self) -> None:
-        if not AdminApiClient.is_logged_in():
-            self.signals.error.emit("需要先登录")
-            return
-        
-        try:
-            client = AdminApiClient.from_config()
-            data = client.batch_update_workdays(self._start_date, self._end_date, self._is_workday, self._note)
-            if isinstance(data, dict) and data.get("status") == "success":
-                self.signals.finished.emit()
-            else:
-                message = data.get("message", "批量设置工作日失败") if isinstance(data, dict) else "批量设置工作日失败"
-                self.signals.error.emit(message)
-        except (ApiError, AuthError) as e:
-            self.signals.error.emit(str(e))
-        except Exception as e:
-            self.signals.error.emit(f"批量设置工作日失败：{e}")
-
-
 class _WorkdayInitWorkerSignals(QObject):
     finished = Signal()
     error = Signal(str)
@@ -559,6 +513,8 @@ class WorkdayCalendarWidget(QCalendarWidget):
 
 class WorkdayView(QWidget):
     """日历管理页面（日历形式）"""
+    FLUSH_DELAY_MS = 1500  # 最后一次修改后停顿多久提交
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self._workday_map: Dict[date, Dict[str, Any]] = {}
@@ -567,6 +523,14 @@ class WorkdayView(QWidget):
         self._calendar_widgets: List[WorkdayCalendarWidget] = []  # 存储6个月份的日历组件
         self._month_frames: List[QFrame] = []  # 存储6个月份的框架容器
         self._is_dark = self._detect_theme()  # 检测主题
+        self._flushing = False  # 是否有提交中的修改
+
+        # 连续点击多个日期时合并提交
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_DELAY_MS)
+        self._flush_timer.timeout.connect(self._flush_edits)
+
         self._init_ui()
         self._load_workdays()
         
@@ -631,7 +595,7 @@ class WorkdayView(QWidget):
         
         # 刷新按钮
         refresh_btn = QPushButton("刷新")
-        refresh_btn.clicked.connect(self._load_workdays)
+        refresh_btn.clicked.connect(lambda: self._load_workdays(force=True))
         toolbar.addWidget(refresh_btn)
         
         # 批量设置按钮
@@ -801,9 +765,8 @@ class WorkdayView(QWidget):
         self._update_month_label()
         self._load_workdays()
 
-    def _load_workdays(self):
-        """加载工作日列表"""
-        # 加载6个月的数据
+    def _visible_range(self):
+        """当前显示的6个月的起止日期"""
         start_date = self._current_month
         end_month = self._get_month_after(self._current_month, 5)  # 第6个月
         # 计算结束月份的最后一天
@@ -811,20 +774,29 @@ class WorkdayView(QWidget):
             end_date = date(end_month.year, 12, 31)
         else:
             end_date = date(end_month.year, end_month.month + 1, 1) - timedelta(days=1)
+        return start_date, end_date
+
+    def _load_workdays(self, force: bool = False):
+        """加载工作日（按整年加载，已加载的年份直接从本地日历显示）"""
+        start_date, end_date = self._visible_range()
+        years = list(range(start_date.year, end_date.year + 1))
+        if not force and all(WorkdayCalendar.is_year_loaded(y) for y in years):
+            self._apply_calendar()
+            return
         
-        worker = _WorkdayListWorker(start_date, end_date)
+        worker = _WorkdayListWorker(years, force=force)
         worker.signals.finished.connect(self._on_workdays_loaded)
         worker.signals.error.connect(self._on_workdays_error)
         self._thread_pool.start(worker)
 
-    def _on_workdays_loaded(self, items: List[Dict[str, Any]]):
-        """工作日列表加载完成"""
-        self._workday_map = {}
-        for item in items:
-            date_val = item["date"]
-            if isinstance(date_val, str):
-                date_val = datetime.fromisoformat(date_val).date()
-            self._workday_map[date_val] = item
+    def _on_workdays_loaded(self, years: List[int]):
+        """工作日日历加载完成"""
+        self._apply_calendar()
+
+    def _apply_calendar(self):
+        """用本地日历刷新所有月份的显示"""
+        start_date, end_date = self._visible_range()
+        self._workday_map = WorkdayCalendar.items_between(start_date, end_date)
         
         # 更新所有日历的显示
         for calendar in self._calendar_widgets:
@@ -939,12 +911,11 @@ class WorkdayView(QWidget):
         if dialog.exec() != QDialog.Accepted:
             return
         
-        # 更新工作日
+        # 本地立即生效，停顿后统一提交
         note_text = note_edit.text().strip() or None
-        worker = _WorkdayUpdateWorker(date_val, new_is_workday, note_text)
-        worker.signals.finished.connect(self._load_workdays)
-        worker.signals.error.connect(lambda msg: QMessageBox.warning(self, "错误", f"更新工作日失败：{msg}"))
-        self._thread_pool.start(worker)
+        WorkdayCalendar.stage_edit(date_val, date_val, new_is_workday, note_text)
+        self._apply_calendar()
+        self._flush_timer.start()
 
     def _on_batch_update_clicked(self):
         """批量设置工作日"""
@@ -962,15 +933,33 @@ class WorkdayView(QWidget):
             )
             
             if reply == QMessageBox.Yes:
-                worker = _WorkdayBatchUpdateWorker(
-                    data["start_date"],
-                    data["end_date"],
-                    data["is_workday"],
-                    data["note"]
-                )
-                worker.signals.finished.connect(self._load_workdays)
-                worker.signals.error.connect(lambda msg: QMessageBox.warning(self, "错误", f"批量设置失败：{msg}"))
-                self._thread_pool.start(worker)
+                # 与单日修改走同一个提交队列，区间合并为一次批量请求，立即提交
+                WorkdayCalendar.stage_edit(data["start_date"], data["end_date"], data["is_workday"], data["note"])
+                self._apply_calendar()
+                self._flush_edits()
+
+    def _flush_edits(self):
+        """提交日历中待提交的修改（同一时间只有一个提交任务）"""
+        self._flush_timer.stop()
+        if self._flushing or WorkdayCalendar.pending_count() == 0:
+            return
+        self._flushing = True
+        worker = _WorkdayFlushWorker()
+        worker.signals.finished.connect(self._on_flush_finished)
+        worker.signals.error.connect(self._on_flush_error)
+        self._thread_pool.start(worker)
+
+    def _on_flush_finished(self, request_count: int):
+        """提交完成；提交期间又有新修改时继续提交"""
+        self._flushing = False
+        if WorkdayCalendar.pending_count():
+            self._flush_timer.start()
+
+    def _on_flush_error(self, message: str):
+        """提交失败：失败的年份已标记为待重新加载，以后端数据为准刷新"""
+        self._flushing = False
+        QMessageBox.warning(self, "错误", f"更新工作日失败：{message}")
+        self._load_workdays(force=True)
 
     def _on_init_clicked(self):
         """初始化默认工作日"""
@@ -1001,10 +990,15 @@ class WorkdayView(QWidget):
         
         if reply == QMessageBox.Yes:
             worker = _WorkdayInitWorker(months)
-            worker.signals.finished.connect(self._load_workdays)
+            worker.signals.finished.connect(self._on_init_finished)
             worker.signals.error.connect(lambda msg: QMessageBox.warning(self, "错误", f"初始化失败：{msg}"))
             self._thread_pool.start(worker)
     
+    def _on_init_finished(self):
+        """初始化完成：后端新增了日期，重新加载全部年份"""
+        WorkdayCalendar.invalidate_years()
+        self._load_workdays(force=True)
+
     def _check_theme_change(self):
         """检测主题变化并更新所有日历组件"""
         current_is_dark = self._detect_theme()
@@ -1044,3 +1038,8 @@ class WorkdayView(QWidget):
         super().showEvent(event)
         # 立即检测一次主题变化
         self._check_theme_change()
+    
+    def hideEvent(self, event: QEvent):
+        """切换到其他页面时立即提交未提交的修改"""
+        self._flush_edits()
+        super().hideEvent(event)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+头像缓存（全局共享）
+
+- 内存：按 (URL, 尺寸) 缓存已裁成圆形的 QPixmap，LRU 淘汰
+- 磁盘：按 URL 缓存原始图片及 ETag/Last-Modified，过期后条件请求（304 直接沿用）
+- 下载：同一 URL 同时只下载一次，使用有界线程池；应用退出时取消排队任务、不再重试，避免拖住退出
+
+线程约定：后台线程只做磁盘读写和网络请求，不触碰任何 Qt 对象；
+结果放入 Python 队列，由 UI 线程的 QTimer 取出后再创建 QPixmap 并回调
+（Win11/Qt6 下从 Python Thread 调用 Qt API 可能导致原生崩溃）。
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import queue
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from PySide6.QtCore import QCoreApplication, Qt, QTimer
+from PySide6.QtGui import QBrush, QPainter, QPixmap
+
+from utils.config_manager import CONFIG_PATH
+
+logger = logging.getLogger(__name__)
+
+AvatarCallback = Callable[[QPixmap], None]
+
+
+def make_circular_pixmap(pixmap: QPixmap, size: int) -> QPixmap:
+    """将头像转换为圆形"""
+    circular = QPixmap(size, size)
+    circular.fill(Qt.transparent)
+
+    painter = QPainter(circular)
+    painter.setRenderHint(QPainter.Antialiasing)
+    painter.setBrush(QBrush(pixmap.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)))
+    painter.setPen(Qt.NoPen)
+    painter.drawEllipse(0, 0, size, size)
+    painter.end()
+
+    return circular
+
+
+class AvatarCache:
+    """头像缓存服务，通过 AvatarCache.instance() 获取（只能在 UI 线程调用）"""
+
+    MAX_PIXMAPS = 512  # 内存中最多缓存的圆形头像数（按 URL+尺寸计）
+    MAX_DISK_ENTRIES = 1000
+    REVALIDATE_AFTER = 6 * 3600  # seconds，磁盘缓存超过该时长后向服务器确认是否变化
+    MAX_WORKERS = 4
+    TIMEOUT = 5  # seconds
+    MAX_RETRIES = 3
+    DRAIN_INTERVAL_MS = 20
+
+    _instance: Optional["AvatarCache"] = None
+
+    @classmethod
+    def instance(cls) -> "AvatarCache":
+        if cls._instance is None:
+            cls._instance = cls(CONFIG_PATH.parent / "avatar_cache")
+            app = QCoreApplication.instance()
+            if app is not None:
+                app.aboutToQuit.connect(cls._instance.shutdown)
+        return cls._instance
+
+    def __init__(self, cache_dir: Path):
+        self._cache_dir = cache_dir
+        self._pixmaps: "OrderedDict[Tuple[str, int], QPixmap]" = OrderedDict()
+        # 正在获取的 URL -> 等待结果的 (尺寸, 回调)；只在 UI 线程访问
+        self._inflight: Dict[str, List[Tuple[int, AvatarCallback]]] = {}
+        self._pool = ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix="avatar")
+        self._results: "queue.Queue[Tuple[str, Optional[bytes], bool]]" = queue.Queue()
+        self._drain_timer: Optional[QTimer] = None
+        self._closed = False
+
+    def get(self, url: Optional[str], size: int) -> Optional[QPixmap]:
+        """只查内存缓存"""
+        if not url:
+            return None
+        pixmap = self._pixmaps.get((url, size))
+        if pixmap is not None:
+            self._pixmaps.move_to_end((url, size))
+        return pixmap
+
+    def request(self, url: Optional[str], size: int, callback: AvatarCallback) -> Optional[QPixmap]:
+        """
+        获取圆形头像：内存命中直接返回；否则返回 None，稍后在 UI 线程回调 callback(pixmap)。
+
+        磁盘缓存已过期时会先用旧图回调一次，服务器返回新图后再回调一次。
+        调用方需自行处理回调时接收对象已销毁的情况。
+        """
+        pixmap = self.get(url, size)
+        if pixmap is not None or not url or self._closed:
+            return pixmap
+        waiters = self._inflight.get(url)
+        if waiters is not None:
+            waiters.append((size, callback))
+            return None
+        self._inflight[url] = [(size, callback)]
+        self._ensure_drain_timer()
+        self._pool.submit(self._fetch, url)
+        return None
+
+    def shutdown(self):
+        """应用退出时调用：取消排队中的下载，进行中的下载不再重试（线程池线程非守护，会被解释器等待）"""
+        self._closed = True
+        if self._drain_timer is not None:
+            self._drain_timer.stop()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _ensure_drain_timer(self):
+        if self._drain_timer is None:
+            self._drain_timer = QTimer()
+            self._drain_timer.setInterval(self.DRAIN_INTERVAL_MS)
+            self._drain_timer.timeout.connect(self._drain_results)
+        if not self._drain_timer.isActive():
+            self._drain_timer.start()
+
+    # ---------------- 后台线程 ----------------
+
+    def _paths(self, url: str) -> Tuple[Path, Path]:
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return self._cache_dir / f"{name}.img", self._cache_dir / f"{name}.json"
+
+    def _fetch(self, url: str):
+        """磁盘优先，过期或缺失时请求服务器（带 ETag/Last-Modified 条件请求）"""
+        try:
+            data, meta = self._read_disk(url)
+            fresh = data is not None and time.time() - float(meta.get("checked_at", 0)) < self.REVALIDATE_AFTER
+            if data is not None:
+                self._results.put((url, data, fresh))
+                if fresh:
+                    return
+            self._results.put((url, self._download(url, meta if data is not None else {}), True))
+        except Exception as e:
+            logger.warning(f"[AvatarCache] 获取头像失败: {e}")
+            self._results.put((url, None, True))
+
+    def _read_disk(self, url: str) -> Tuple[Optional[bytes], dict]:
+        img_path, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            return img_path.read_bytes(), meta if isinstance(meta, dict) else {}
+        except Exception:
+            return None, {}
+
+    def _download(self, url: str, meta: dict) -> Optional[bytes]:
+        """下载头像；返回新图片 bytes，未变化（304）或失败时返回 None"""
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        retry_delay = 1  # 秒
+        for attempt in range(self.MAX_RETRIES):
+            try:
+                response = httpx.get(url, timeout=self.TIMEOUT, headers=headers, follow_redirects=True)
+                if response.status_code == 304:
+                    self._write_meta(url, dict(meta, checked_at=time.time()))
+                    # 清理按图片修改时间淘汰，确认未变化也算最近使用
+                    with contextlib.suppress(OSError):
+                        os.utime(self._paths(url)[0])
+                    return None
+                if response.status_code == 200 and response.content:
+                    data = bytes(response.content)
+                    self._write_disk(url, data, {
+                        "url": url,
+                        "etag": response.headers.get("etag"),
+                        "last_modified": response.headers.get("last-modified"),
+                        "checked_at": time.time(),
+                    })
+                    return data
+            except Exception as e:
+                logger.warning(f"加载头像失败 (尝试 {attempt + 1}/{self.MAX_RETRIES}): {e}")
+            if self._closed:
+                break
+            if attempt < self.MAX_RETRIES - 1:
+                time.sleep(retry_delay)
+                retry_delay *= 2  # 指数退避
+        return None
+
+    def _write_disk(self, url: str, data: bytes, meta: dict):
+        """原子替换写入，失败只影响缓存"""
+        img_path, _ = self._paths(url)
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = img_path.with_name(img_path.name + ".tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, img_path)
+        except Exception as e:
+            logger.warning(f"[AvatarCache] 保存头像缓存失败: {e}")
+            return
+        self._write_meta(url, meta)
+        self._prune_disk()
+
+    def _write_meta(self, url: str, meta: dict):
+        _, meta_path = self._paths(url)
+        try:
+            self._cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = meta_path.with_name(meta_path.name + ".tmp")
+            tmp_path.write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, meta_path)
+        except Exception as e:
+            logger.warning(f"[AvatarCache] 保存头像缓存信息失败: {e}")
+
+    def _prune_disk(self):
+        """磁盘条目超过上限时删除最久未确认的"""
+        try:
+            images = list(self._cache_dir.glob("*.img"))
+            if len(images) <= self.MAX_DISK_ENTRIES:
+                return
+            images.sort(key=lambda p: p.stat().st_mtime)
+            for img_path in images[:len(images) - self.MAX_DISK_ENTRIES]:
+                img_path.unlink(missing_ok=True)
+                img_path.with_suffix(".json").unlink(missing_ok=True)
+        except Exception as e:
+            logger.debug(f"[AvatarCache] 清理头像缓存失败: {e}")
+
+    # ---------------- UI 线程 ----------------
+
+    def _drain_results(self):
+        while True:
+            try:
+                url, data, final = self._results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                self._apply_result(url, data, final)
+            except Exception as e:
+                logger.error(f"[AvatarCache] 应用头像失败: {e}", exc_info=True)
+        if not self._inflight and self._drain_timer is not None:
+            self._drain_timer.stop()
+
+    def _apply_result(self, url: str, data: Optional[bytes], final: bool):
+        waiters = self._inflight.pop(url, []) if final else list(self._inflight.get(url, []))
+        if not data:
+            return
+        source = QPixmap()
+        if not source.loadFromData(data):
+            return
+        delivered: Dict[int, QPixmap] = {}
+        # 内存中已有的其他尺寸也随新图更新
+        sizes = {size for size, _ in waiters} | {size for (u, size) in self._pixmaps if u == url}
+        for size in sizes:
+            delivered[size] = make_circular_pixmap(source, size)
+            self._store(url, size, delivered[size])
+        for size, callback in waiters:
+            try:
+                callback(delivered[size])
+            except Exception as e:
+                logger.debug(f"[AvatarCache] 头像回调失败: {e}")
+
+    def _store(self, url: str, size: int, pixmap: QPixmap):
+        self._pixmaps[(url, size)] = pixmap
+        self._pixmaps.move_to_end((url, size))
+        while len(self._pixmaps) > self.MAX_PIXMAPS:
+            self._pixmaps.popitem(last=False)
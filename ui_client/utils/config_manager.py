@@ -49,6 +49,12 @@ DEFAULT_CONFIG = {
     "airdrop_discover_scope": "all",
     # 隔空投送：是否启用 mDNS/zeroconf（Win11 若出现 Qt6Core.dll 0xc0000005 可临时关闭用于排查）
     "airdrop_mdns_enabled": True,
+    # 隔空投送：上传总限速（KB/s，0 表示不限速），避免大文件占满上行带宽
+    "airdrop_rate_limit_kbps": 0,
+    # 隔空投送：单个上传任务限速（KB/s，0 表示不限速；剪贴板不受限）
+    "airdrop_per_transfer_rate_kbps": 0,
+    # 隔空投送：同时进行的上传数量上限（多余的按 剪贴板 > 小文件 > 大文件 排队）
+    "airdrop_max_concurrent_sends": 2,
     # 配置架构版本，用于迁移
     "config_version": CURRENT_CONFIG_VERSION,
 }
@@ -86,6 +92,9 @@ USER_DATA_FIELDS = {
     "log_retention_hours",  # 日志保留时长
     "airdrop_discover_scope",  # 隔空投送范围
     "airdrop_mdns_enabled",  # 隔空投送 mDNS 开关
+    "airdrop_rate_limit_kbps",  # 隔空投送上传总限速
+    "airdrop_per_transfer_rate_kbps",  # 隔空投送单任务限速
+    "airdrop_max_concurrent_sends",  # 隔空投送并发上传数
     "global_hotkey_enabled",  # 全局快捷键
 }
 
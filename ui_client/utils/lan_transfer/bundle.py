@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多文件/文件夹打包传输（发送端与接收端共用）
+
+一组文件或整个文件夹在一次 /transfer_request 中声明（总大小、文件数），确认一次后
+以 tar 流的形式一次上传：发送端边读文件边生成 tar 流（不落地临时归档），
+接收端边收边解包写盘。
+"""
+
+import os
+import shutil
+import tarfile
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath, PureWindowsPath
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from .codec import COMPRESSED_SUFFIXES, SUPPORTED_CODECS
+
+TAR_BLOCK_SIZE = tarfile.BLOCKSIZE  # 512
+TAR_END_OF_ARCHIVE = b"\0" * (TAR_BLOCK_SIZE * 2)
+
+
+@dataclass
+class _BundleEntry:
+    """打包条目（文件或目录）"""
+    path: Path
+    header: bytes  # 预先生成的 tar 头部（PAX 格式，支持中文/长文件名）
+    size: int = 0  # 文件大小（目录为 0）
+
+
+@dataclass
+class TransferBundle:
+    """多文件/文件夹打包（发送端）"""
+    name: str  # 接收端保存的文件夹名
+    entries: List[_BundleEntry] = field(default_factory=list)
+    file_count: int = 0  # 文件数（不含目录）
+    total_size: int = 0  # 文件内容总大小
+    stream_size: int = 0  # tar 流总字节数（含头部与填充），即上传的正文长度
+    source_paths: List[Path] = field(default_factory=list)  # 构建时传入的文件/文件夹（用于重建打包）
+
+    @classmethod
+    def from_paths(cls, paths: Sequence[Path], name: Optional[str] = None) -> "TransferBundle":
+        """
+        从拖放的文件/文件夹列表构建打包
+
+        单个文件夹：以文件夹名作为包名，内容放在包的根目录；
+        多个条目：每个条目以自身名字放在包的根目录。
+        符号链接与特殊文件会被跳过。
+        """
+        paths = [Path(p) for p in paths]
+        if not paths:
+            raise ValueError("没有可发送的文件")
+        bundle = cls(name=name or cls._default_name(paths), source_paths=paths)
+        if len(paths) == 1 and paths[0].is_dir():
+            bundle._add_tree(paths[0], PurePosixPath())
+        else:
+            for path in paths:
+                if path.is_dir() and not path.is_symlink():
+                    bundle._add_dir(path, PurePosixPath(path.name))
+                    bundle._add_tree(path, PurePosixPath(path.name))
+                elif path.is_file() and not path.is_symlink():
+                    bundle._add_file(path, PurePosixPath(path.name))
+        bundle.stream_size += len(TAR_END_OF_ARCHIVE)
+        return bundle
+
+    @staticmethod
+    def _default_name(paths: Sequence[Path]) -> str:
+        if len(paths) == 1:
+            return paths[0].name
+        return f"{paths[0].stem} 等{len(paths)}项"
+
+    def _add_tree(self, root: Path, arc_root: PurePosixPath):
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            base = Path(dirpath)
+            arc_base = arc_root.joinpath(*base.relative_to(root).parts)
+            # os.walk 默认不进入符号链接目录，这里同样不为其生成目录条目
+            for dirname in dirnames:
+                sub = base / dirname
+                if not sub.is_symlink():
+                    self._add_dir(sub, arc_base / dirname)
+            for filename in sorted(filenames):
+                file_path = base / filename
+                if file_path.is_file() and not file_path.is_symlink():
+                    self._add_file(file_path, arc_base / filename)
+
+    def _add_dir(self, path: Path, arcname: PurePosixPath):
+        info = tarfile.TarInfo(arcname.as_posix())
+        info.type = tarfile.DIRTYPE
+        info.mode = 0o755
+        info.mtime = int(path.stat().st_mtime)
+        header = info.tobuf(format=tarfile.PAX_FORMAT, encoding="utf-8", errors="surrogateescape")
+        self.entries.append(_BundleEntry(path=path, header=header))
+        self.stream_size += len(header)
+
+    def _add_file(self, path: Path, arcname: PurePosixPath):
+        st = path.stat()
+        info = tarfile.TarInfo(arcname.as_posix())
+        info.size = st.st_size
+        info.mode = 0o644
+        info.mtime = int(st.st_mtime)
+        header = info.tobuf(format=tarfile.PAX_FORMAT, encoding="utf-8", errors="surrogateescape")
+        self.entries.append(_BundleEntry(path=path, header=header, size=st.st_size))
+        self.stream_size += len(header) + st.st_size + (-st.st_size % TAR_BLOCK_SIZE)
+        self.file_count += 1
+        self.total_size += st.st_size
+
+    def offer_codecs(self) -> List[str]:
+        """大部分内容不是已压缩格式时才提供压缩编码（tar 头部本身也可压缩）"""
+        compressible = sum(
+            e.size for e in self.entries if e.path.suffix.lower() not in COMPRESSED_SUFFIXES
+        )
+        if self.total_size == 0 or compressible * 2 >= self.total_size:
+            return list(SUPPORTED_CODECS)
+        return []
+
+    def iter_chunks(self, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        生成 tar 流，总长度严格等于 stream_size
+
+        文件在打包声明后被修改时：变长则截断到声明的大小，变短则抛出 IOError。
+        """
+        for entry in self.entries:
+            yield entry.header
+            if not entry.size:
+                continue
+            remaining = entry.size
+            with open(entry.path, "rb") as f:
+                while remaining > 0:
+                    chunk = f.read(min(chunk_size, remaining))
+                    if not chunk:
+                        raise IOError(f"文件在发送过程中被修改: {entry.path.name}")
+                    remaining -= len(chunk)
+                    yield chunk
+            padding = -entry.size % TAR_BLOCK_SIZE
+            if padding:
+                yield b"\0" * padding
+        yield TAR_END_OF_ARCHIVE
+
+
+class IterReader:
+    """把数据块迭代器包装成只读文件对象（供 tarfile 流式读取）"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+        self._eof = False
+
+    def read(self, size: int = -1) -> bytes:
+        while not self._eof and (size < 0 or len(self._buffer) < size):
+            try:
+                self._buffer += next(self._chunks)
+            except StopIteration:
+                self._eof = True
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def drain(self):
+        """读完剩余数据（tarfile 读到结束块后不会继续读取填充部分）"""
+        while self.read(64 * 1024):
+            pass
+
+
+def _member_dest(target_root: Path, name: str) -> Path:
+    """
+    tar 成员名对应的落盘路径（target_root 已 resolve）；路径可能逃出目标目录时抛出 ValueError
+
+    Windows 下 "\\" 也是分隔符、"C:" 会切换盘符，因此成员名里出现 "\\" 或 ":" 一律拒绝，
+    最后再按 resolve 后的真实路径确认仍在目标目录内（防止已有的符号链接把写入引到别处）。
+    """
+    parts = PurePosixPath(name).parts
+    windows = PureWindowsPath(name)
+    if (
+        not parts
+        or name.startswith("/")
+        or windows.drive
+        or windows.anchor
+        or any(p in ("..", "") or "\\" in p or ":" in p for p in parts)
+    ):
+        raise ValueError(f"非法的文件路径: {name}")
+    dest = target_root.joinpath(*parts)
+    resolved = dest.resolve()
+    if resolved != target_root and target_root not in resolved.parents:
+        raise ValueError(f"非法的文件路径: {name}")
+    return dest
+
+
+def extract_bundle_stream(fileobj, target_dir: Path, chunk_size: int = 64 * 1024) -> int:
+    """
+    流式解包 tar 到目标目录（只解出普通文件与目录，拒绝逃出目标目录的路径，跳过链接等其他类型）
+
+    Returns:
+        解出的文件数
+    """
+    target_dir.mkdir(parents=True, exist_ok=True)
+    target_root = target_dir.resolve()
+    file_count = 0
+    with tarfile.open(fileobj=fileobj, mode="r|", encoding="utf-8", errors="surrogateescape") as tar:
+        for member in tar:
+            # 链接/设备文件等不落盘，但路径同样校验，出现可疑成员即整体拒绝
+            dest = _member_dest(target_root, member.name)
+            if member.isdir():
+                dest.mkdir(parents=True, exist_ok=True)
+            elif member.isfile():
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                src = tar.extractfile(member)
+                with open(dest, "wb") as f:
+                    shutil.copyfileobj(src, f, chunk_size)
+                try:
+                    os.utime(dest, (member.mtime, member.mtime))
+                except OSError:
+                    pass
+                file_count += 1
+            # 其他类型（符号链接/硬链接/设备文件）直接跳过，不创建
+    return file_count
@@ -6,19 +6,32 @@
 """
 
 import os
+import base64
+import time
 import httpx
 import logging
 import json
 from pathlib import Path
-from typing import Optional, Callable
+import threading
+from typing import Optional, Callable, Iterable, Iterator, List, Tuple
 from urllib.parse import quote
 
+from .integrity import HASH_HEADER, HASH_HEADER_VALUE, HASH_DIGEST_SIZE, new_content_hasher
+from .codec import ENCODING_HEADER, offer_codecs, new_compressor
+from .bundle import TransferBundle
+from .fanout import FanoutBuffer
+from .protocol import INLINE_MAX_SIZE
+from .scheduler import is_clipboard_file
+
 logger = logging.getLogger(__name__)
 
 
 class TransferClient:
     """文件传输客户端"""
     
+    # 等待确认时单次长轮询的挂起时间（秒），与接收端 TransferServer.MAX_STATUS_WAIT 一致
+    STATUS_LONG_POLL_WAIT = 25
+    
     def __init__(self, timeout: int = 300, port: int = 8765):
         """
         初始化传输客户端
@@ -35,7 +48,7 @@ class TransferClient:
         发送传输请求（第一步）
         
         Args:
-            file_path: 要发送的文件路径
+            file_path: 要发送的文件路径，或 TransferBundle（多文件/文件夹打包）
             target_ip: 目标设备IP
             target_port: 目标设备端口
             sender_name: 发送者名称
@@ -45,18 +58,25 @@ class TransferClient:
             {
                 "success": bool,
                 "request_id": str,
+                "codec": str | None (协商出的压缩编码),
+                "inline": bool (内容已内嵌在请求中，接受后无需上传),
                 "message": str
             }
         """
-        if not file_path.exists():
+        is_bundle = isinstance(file_path, TransferBundle)
+        if not is_bundle and not file_path.exists():
             return {
                 "success": False,
                 "request_id": None,
                 "message": "文件不存在"
             }
         
-        file_size = file_path.stat().st_size
-        filename = file_path.name
+        if is_bundle:
+            file_size = file_path.stream_size
+            filename = file_path.name
+        else:
+            file_size = file_path.stat().st_size
+            filename = file_path.name
         
         try:
             url = f"http://{target_ip}:{target_port}/transfer_request"
@@ -72,6 +92,22 @@ class TransferClient:
                 "sender_id": sender_id,
                 "sender_port": self._port
             }
+            if is_bundle:
+                # 打包传输：一次请求声明文件数与内容总大小，file_size 为 tar 流长度
+                request_data["bundle"] = {
+                    "file_count": file_path.file_count,
+                    "total_size": file_path.total_size,
+                }
+                codecs = file_path.offer_codecs()
+            elif is_clipboard_file(filename) and file_size <= INLINE_MAX_SIZE:
+                # 小剪贴板内容直接内嵌：接收端接受即可使用，省去第二次连接和上传
+                request_data["inline"] = base64.b64encode(file_path.read_bytes()).decode("ascii")
+                codecs = []
+            else:
+                # 抽样判断值得压缩时才提供编码列表，由接收端选择
+                codecs = offer_codecs(file_path, file_size)
+            if codecs:
+                request_data["codecs"] = codecs
             
             with httpx.Client(timeout=10) as client:
                 response = client.post(
@@ -82,9 +118,17 @@ class TransferClient:
                 
                 if response.status_code == 200:
                     result = response.json()
+                    request_id = result.get("request_id")
+                    codec = result.get("codec") if codecs else None
                     return {
                         "success": True,
-                        "request_id": result.get("request_id"),
+                        "request_id": request_id,
+                        # 协商结果由调用方记录在任务上，上传时传回 send_file
+                        "codec": codec if codec in codecs else None,
+                        # 接收端声明支持摘要尾部校验（旧版本接收端会把尾部当作文件内容写入）
+                        "with_hash": result.get("hash") == HASH_HEADER_VALUE,
+                        # 旧版本接收端会忽略内嵌内容，仍走普通上传
+                        "inline": bool(result.get("inline")) and "inline" in request_data,
                         "message": "请求已发送"
                     }
                 else:
@@ -132,26 +176,34 @@ class TransferClient:
                 "message": str
             }
         """
-        import time
         start_time = time.time()
+        url = f"http://{target_ip}:{target_port}/transfer_status"
         
-        # 轮询检查确认状态
-        while time.time() - start_time < timeout:
-            try:
-                url = f"http://{target_ip}:{target_port}/transfer_status"
-                params = {"request_id": request_id}
-                
-                with httpx.Client(timeout=5) as client:
-                    response = client.get(url, params=params)
+        # 长轮询：接收端在状态变化（接受/拒绝）时立即返回，整个等待过程复用同一个连接
+        with httpx.Client() as client:
+            while True:
+                remaining = timeout - (time.time() - start_time)
+                if remaining <= 0:
+                    break
+                wait = min(remaining, self.STATUS_LONG_POLL_WAIT)
+                long_poll = False
+                try:
+                    response = client.get(
+                        url,
+                        params={"request_id": request_id, "wait": f"{wait:.1f}"},
+                        timeout=wait + 5
+                    )
                     
                     if response.status_code == 200:
                         result = response.json()
                         status = result.get("status")
+                        long_poll = bool(result.get("long_poll"))
                         
                         if status == "accepted":
                             return {
                                 "success": True,
                                 "accepted": True,
+                                "inline": bool(result.get("inline")),  # 内嵌内容已被接收端使用
                                 "message": "已接受"
                             }
                         elif status == "rejected":
@@ -160,10 +212,19 @@ class TransferClient:
                                 "accepted": False,
                                 "message": "已拒绝"
                             }
-            except Exception as e:
-                pass
-            
-            time.sleep(1)  # 每秒检查一次
+                    elif response.status_code in (404, 410):
+                        # 请求已过期或被接收端清理，继续等待没有意义
+                        return {
+                            "success": False,
+                            "accepted": False,
+                            "message": "请求已过期"
+                        }
+                except Exception as e:
+                    logger.debug(f"查询传输状态失败，稍后重试: {e}")
+                
+                if not long_poll:
+                    # 出错或对端是不支持长轮询的旧版本：退化为每秒查询一次
+                    time.sleep(min(1, max(0, timeout - (time.time() - start_time))))
         return {
             "success": False,
             "accepted": False,
@@ -234,16 +295,24 @@ class TransferClient:
     
     def send_file(self, file_path: Path, target_ip: str, target_port: int,
                   request_id: str,
-                  on_progress: Optional[Callable[[int, int], None]] = None) -> dict:
+                  on_progress: Optional[Callable[[int, int], None]] = None,
+                  chunks: Optional[Iterable[bytes]] = None,
+                  throttle: Optional[Callable[[int], None]] = None,
+                  codec: Optional[str] = None,
+                  with_hash: bool = False) -> dict:
         """
         发送文件（第三步：实际传输）
         
         Args:
-            file_path: 文件路径
+            file_path: 文件路径，或 TransferBundle（多文件/文件夹打包）
             target_ip: 目标设备IP
             target_port: 目标设备端口
             request_id: 请求ID
             on_progress: 进度回调 (uploaded, total)
+            chunks: 已准备好的内容数据流（一对多发送时由 FanoutBuffer 提供），为 None 时从 file_path 读取
+            throttle: 限速函数 throttle(nbytes)，每发送一块数据前调用（由 TransferScheduler 提供）
+            codec: send_transfer_request 协商出的压缩编码，None 表示不压缩
+            with_hash: 接收端是否声明支持摘要尾部（send_transfer_request 返回的 with_hash）
         
         Returns:
             {
@@ -253,7 +322,8 @@ class TransferClient:
                 "path": str (接收端保存路径)
             }
         """
-        if not file_path.exists():
+        is_bundle = isinstance(file_path, TransferBundle)
+        if not is_bundle and not file_path.exists():
             return {
                 "success": False,
                 "message": "文件不存在",
@@ -261,34 +331,36 @@ class TransferClient:
                 "path": ""
             }
         
-        file_size = file_path.stat().st_size
-        filename = file_path.name
+        if is_bundle:
+            file_size = file_path.stream_size
+            filename = file_path.name
+        else:
+            file_size = file_path.stat().st_size
+            filename = file_path.name
+        if chunks is None:
+            chunks = self.iter_content_chunks(file_path)
         
         try:
             url = f"http://{target_ip}:{target_port}/transfer"
             
+            # 请求体 = 文件内容（可选压缩）+ 摘要尾部（接收端声明支持时附带，发送时增量计算，无需二次读取文件）
             headers = {
                 'X-Request-ID': request_id,
                 'X-Filename': quote(filename),
-                'Content-Length': str(file_size)
             }
+            if with_hash:
+                headers[HASH_HEADER] = HASH_HEADER_VALUE
+            if codec:
+                # 压缩后长度未知，由 httpx 使用 chunked 编码发送
+                headers[ENCODING_HEADER] = codec
+            else:
+                headers['Content-Length'] = str(file_size + (HASH_DIGEST_SIZE if with_hash else 0))
             
-            # 使用httpx上传（支持进度回调）
+            # 使用httpx流式上传（同一遍读取中完成进度回调、摘要计算和压缩）
             with httpx.Client(timeout=self._timeout) as client:
-                # 如果支持进度回调，使用流式上传
-                if on_progress:
-                    # 流式上传以支持进度
-                    response = self._upload_with_progress(
-                        client, url, file_path, filename, file_size, headers, on_progress
-                    )
-                else:
-                    # 直接上传
-                    with open(file_path, 'rb') as f:
-                        response = client.post(
-                            url,
-                            content=f.read(),
-                            headers=headers
-                        )
+                response = self._upload_with_progress(
+                    client, url, chunks, file_size, headers, on_progress, codec, throttle, with_hash
+                )
                 
                 if response.status_code == 200:
                     result = response.json()
@@ -328,33 +400,112 @@ class TransferClient:
                 "path": ""
             }
     
-    def _upload_with_progress(self, client: httpx.Client, url: str, file_path: Path,
-                             filename: str, file_size: int, headers: dict,
-                             on_progress: Callable[[int, int], None]):
-        """带进度的文件上传"""
-        # 使用简单的POST方式，直接发送文件内容
-        # 服务器端会从X-Filename头部获取文件名
+    def send_file_to_many(self, file_path: Path, targets: List[Tuple[str, int, str, Optional[str], bool]],
+                          on_progress: Optional[Callable[[int, int, int], None]] = None,
+                          throttle: Optional[Callable[[int], None]] = None) -> List[dict]:
+        """
+        一对多发送：文件只从磁盘读取一遍，同时上传给多个已接受的接收端
+        
+        每个接收端一个上传线程，共享 FanoutBuffer 读缓冲；慢的接收端会让读取暂停（背压），
+        总耗时取决于最慢的接收端而不是所有接收端之和。某个接收端失败只影响它自己。
+        
+        Args:
+            file_path: 文件路径，或 TransferBundle（多文件/文件夹打包）
+            targets: [(target_ip, target_port, request_id, codec, with_hash), ...]，后两项见 send_file
+            on_progress: 进度回调 (target_index, uploaded, total)
+            throttle: 限速函数，按所有接收端的总上传量计
         
-        chunk_size = 64 * 1024  # 64KB per chunk
+        Returns:
+            与 targets 顺序一致的 send_file 结果列表
+        """
+        if not targets:
+            return []
+        fanout = FanoutBuffer(self.iter_content_chunks(file_path), len(targets))
+        results: List[dict] = [{} for _ in targets]
         
-        # 读取文件并发送
+        def upload(index: int, target_ip: str, target_port: int, request_id: str,
+                   codec: Optional[str], with_hash: bool):
+            def progress(uploaded: int, total: int):
+                if on_progress:
+                    on_progress(index, uploaded, total)
+            try:
+                results[index] = self.send_file(
+                    file_path, target_ip, target_port, request_id,
+                    on_progress=progress, chunks=fanout.reader(index), throttle=throttle,
+                    codec=codec, with_hash=with_hash
+                )
+            finally:
+                # 上传异常退出时生成器未必被关闭，显式退出共享，避免拖住其他接收端
+                fanout.detach(index)
+        
+        threads = [
+            threading.Thread(target=upload, args=(i, *target), daemon=True)
+            for i, target in enumerate(targets)
+        ]
+        fanout.start()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+    
+    def iter_content_chunks(self, file_path: Path) -> Iterator[bytes]:
+        """上传内容的数据流：普通文件按块读取，TransferBundle 为 tar 流"""
+        if isinstance(file_path, TransferBundle):
+            return file_path.iter_chunks()
+        return self._iter_file_chunks(file_path, file_path.stat().st_size)
+    
+    @staticmethod
+    def _iter_file_chunks(file_path: Path, file_size: int, chunk_size: int = 64 * 1024):
+        """按块读取文件，总长度严格等于 file_size"""
+        remaining = file_size
+        with open(file_path, 'rb') as f:
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    # 文件在发送过程中被截断，长度与请求声明不符，接收端会判定为不完整
+                    raise IOError("文件在发送过程中被修改")
+                remaining -= len(chunk)
+                yield chunk
+    
+    def _upload_with_progress(self, client: httpx.Client, url: str, chunks, file_size: int,
+                             headers: dict, on_progress: Optional[Callable[[int, int], None]],
+                             codec: Optional[str] = None,
+                             throttle: Optional[Callable[[int], None]] = None,
+                             with_hash: bool = True):
+        """带进度的流式上传（可选末尾附带内容摘要，可选流式压缩，可选限速）"""
+        # 使用简单的POST方式，直接发送文件内容（打包传输时为 tar 流）
+        # 服务器端会从 /transfer_request 中记录的信息获取文件名
         uploaded = 0
+        hasher = new_content_hasher() if with_hash else None
+        compressor = new_compressor(codec) if codec else None
         
-        def file_generator():
+        def body_generator():
             nonlocal uploaded
             try:
-                with open(file_path, 'rb') as f:
-                    while True:
-                        chunk = f.read(chunk_size)
+                for chunk in chunks:
+                    if hasher:
+                        hasher.update(chunk)
+                    uploaded += len(chunk)
+                    if on_progress:
+                        try:
+                            on_progress(uploaded, file_size)
+                        except Exception as e:
+                            logger.error(f"[TransferClient] 进度回调异常: {e}", exc_info=True)
+                    if compressor:
+                        chunk = compressor.compress(chunk)
                         if not chunk:
-                            break
-                        uploaded += len(chunk)
-                        if on_progress:
-                            try:
-                                on_progress(uploaded, file_size)
-                            except Exception as e:
-                                logger.error(f"[TransferClient] 进度回调异常: {e}", exc_info=True)
-                        yield chunk
+                            continue
+                    if throttle:
+                        # 按实际发送（压缩后）的字节数限速
+                        throttle(len(chunk))
+                    yield chunk
+                if compressor:
+                    tail = compressor.flush()
+                    if tail:
+                        yield tail
+                if hasher:
+                    yield hasher.digest()
             except Exception as e:
                 logger.error(f"[TransferClient] 文件生成器异常: {e}", exc_info=True)
                 raise
@@ -362,7 +513,7 @@ class TransferClient:
         # 发送请求
         response = client.post(
             url,
-            content=file_generator(),
+            content=body_generator(),
             headers=headers
         )
         return response
@@ -384,3 +535,37 @@ class TransferClient:
             return response.status_code == 200
         except Exception:
             return False
+    
+    def fetch_status(self, target_ip: str, target_port: int, timeout: float = 1.5) -> Optional[dict]:
+        """
+        获取目标设备 /status 内容（含对端 user_id，旧版本客户端没有该字段）
+        
+        Returns:
+            状态字典，不可达返回 None
+        """
+        try:
+            url = f"http://{target_ip}:{target_port}/status"
+            response = httpx.get(url, timeout=timeout)
+            if response.status_code != 200:
+                return None
+            result = response.json()
+            return result if isinstance(result, dict) else None
+        except Exception:
+            return None
+    
+    def probe_status(self, target_ip: str, target_port: int, timeout: float = 1.5) -> Optional[float]:
+        """
+        探测目标设备 /status 的往返时延（用于可达性探测）
+        
+        Returns:
+            RTT 秒数，不可达返回 None
+        """
+        try:
+            url = f"http://{target_ip}:{target_port}/status"
+            start = time.monotonic()
+            response = httpx.get(url, timeout=timeout)
+            if response.status_code != 200:
+                return None
+            return time.monotonic() - start
+        except Exception:
+            return None
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+传输压缩编解码（发送端与接收端共用）
+
+发送端在 /transfer_request 中携带自己支持的编码列表（仅当抽样判断压缩有收益时），
+接收端从中选择一个自己也支持的编码并在响应中返回；上传时发送端边读边压缩，
+接收端边收边解压写盘。已压缩格式（图片/视频/压缩包等）直接跳过。
+"""
+
+import zlib
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+try:
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover - 可选依赖
+    zstandard = None  # type: ignore
+
+# 上传请求头：声明请求体使用的压缩编码
+ENCODING_HEADER = "X-Content-Encoding"
+
+# 按优先级排列，zstd 需要安装可选依赖 zstandard
+SUPPORTED_CODECS: List[str] = (["zstd"] if zstandard is not None else []) + ["zlib"]
+
+# 已压缩或压缩收益很低的文件类型，不做抽样直接跳过
+COMPRESSED_SUFFIXES = {
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".zst", ".lz4", ".br",
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".heic", ".heif", ".avif",
+    ".mp3", ".aac", ".m4a", ".ogg", ".opus", ".flac",
+    ".mp4", ".m4v", ".mov", ".mkv", ".avi", ".webm",
+    ".pdf", ".docx", ".xlsx", ".pptx", ".apk", ".ipa", ".dmg", ".jar", ".whl",
+}
+
+# 小于该大小的文件压缩收益可以忽略
+MIN_COMPRESS_SIZE = 4 * 1024
+# 抽样：文件头/中/尾各取一段，用最快档位试压缩
+SAMPLE_SIZE = 16 * 1024
+# 抽样压缩率低于该值才认为值得压缩
+COMPRESS_RATIO_THRESHOLD = 0.85
+
+
+def offer_codecs(file_path: Path, file_size: int) -> List[str]:
+    """
+    抽样判断文件是否值得压缩
+
+    Returns:
+        值得压缩时返回本端支持的编码列表（按优先级），否则返回空列表
+    """
+    if file_size < MIN_COMPRESS_SIZE or file_path.suffix.lower() in COMPRESSED_SUFFIXES:
+        return []
+    try:
+        offsets = {0}
+        if file_size > SAMPLE_SIZE * 3:
+            offsets.add(file_size // 2)
+            offsets.add(file_size - SAMPLE_SIZE)
+        sample = bytearray()
+        with open(file_path, "rb") as f:
+            for offset in sorted(offsets):
+                f.seek(offset)
+                sample += f.read(SAMPLE_SIZE)
+    except OSError:
+        return []
+    if not sample:
+        return []
+    ratio = len(zlib.compress(bytes(sample), 1)) / len(sample)
+    return list(SUPPORTED_CODECS) if ratio < COMPRESS_RATIO_THRESHOLD else []
+
+
+def choose_codec(offered: Optional[Iterable[str]]) -> Optional[str]:
+    """从发送端提供的编码列表中选择本端支持的第一个（按发送端优先级）"""
+    for codec in offered or []:
+        if codec in SUPPORTED_CODECS:
+            return codec
+    return None
+
+
+def new_compressor(codec: str):
+    """创建流式压缩器（compress()/flush() 接口）"""
+    if codec == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    if codec == "zlib":
+        return zlib.compressobj(1)
+    raise ValueError(f"Unsupported codec: {codec}")
+
+
+def new_decompressor(codec: str):
+    """创建流式解压器（decompress()/flush() 接口）"""
+    if codec == "zstd" and zstandard is not None:
+        return zstandard.ZstdDecompressor().decompressobj()
+    if codec == "zlib":
+        return zlib.decompressobj()
+    raise ValueError(f"Unsupported codec: {codec}")
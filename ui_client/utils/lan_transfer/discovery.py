@@ -1,23 +1,34 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-局域网设备发现模块（使用 mDNS/Bonjour）
+局域网设备发现模块（使用 mDNS/Bonjour；mDNS 被禁用时退化为 UDP 信标）
 """
 
+import asyncio
+import os
+import random
 import socket
+import struct
 import platform
 import sys
 import time
-from typing import Dict, Optional, Callable
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Callable
+from dataclasses import dataclass, field
 try:
     from zeroconf import ServiceInfo, Zeroconf, ServiceBrowser, ServiceListener, IPVersion  # type: ignore
 except Exception:  # pragma: no cover
     from zeroconf import ServiceInfo, Zeroconf, ServiceBrowser, ServiceListener  # type: ignore
     IPVersion = None  # type: ignore
+try:
+    from zeroconf.asyncio import AsyncServiceInfo  # type: ignore
+except Exception:  # pragma: no cover
+    AsyncServiceInfo = None  # type: ignore
 import threading
 import logging
 
+from .jobs import DeadlineHeap
+
 logger = logging.getLogger(__name__)
 
 
@@ -37,6 +48,13 @@ class DeviceInfo:
     device_name: Optional[str] = None  # 设备名称（如：MacBook Pro）
     group_id: Optional[str] = None  # 组ID（由客户端广播）
     discover_scope: Optional[str] = None  # 可被发现范围：all/group/none
+    addresses: List[str] = field(default_factory=list)  # 全部 IPv4 地址（多网卡设备），ip 为其中之一
+    revalidating: bool = False  # 来自本地缓存、尚未重新确认在线
+
+    @property
+    def key(self) -> str:
+        """设备唯一标识 user_id::ip（同名用户的不同设备也能区分），界面行与发送信号共用"""
+        return f"{self.user_id}::{self.ip}"
 
 
 class DeviceDiscovery:
@@ -61,11 +79,15 @@ class DeviceDiscovery:
         self._own_zeroconf: bool = zeroconf is None
         self._browser: Optional[ServiceBrowser] = None
         self._listener: Optional[_DeviceListener] = None
+        self._resolver: Optional[_ServiceResolver] = None
         self._on_device_added = on_device_added
         self._on_device_removed = on_device_removed
         self._devices: Dict[str, DeviceInfo] = {}  # key: service_name
+        self._service_by_key: Dict[str, str] = {}  # key: user_id::ip -> service_name（O(1) 去重）
         self._device_last_seen: Dict[str, float] = {}  # key: service_name, value: timestamp
         self._device_miss_count: Dict[str, int] = {}
+        # 探测判定不可达而移除的设备 user_id::ip -> service_name，探测恢复后据此重新加入
+        self._unreachable: Dict[str, str] = {}
         self._cleanup_timer: Optional[threading.Timer] = None
         # 快速检测但带防抖：TTL 15s，周期 5s，连续 miss>=2 才移除
         self._device_ttl = 15  # seconds
@@ -95,7 +117,10 @@ class DeviceDiscovery:
                 except Exception:
                     self._zeroconf = Zeroconf()
                 self._own_zeroconf = True
+            # 服务解析放到 zeroconf 事件循环里异步批量进行，浏览回调线程只负责登记名字
+            self._resolver = _ServiceResolver(self._zeroconf, self.SERVICE_TYPE)
             self._listener = _DeviceListener(
+                resolver=self._resolver,
                 on_add=self._on_device_found,
                 on_remove=self._on_device_lost
             )
@@ -123,6 +148,9 @@ class DeviceDiscovery:
             if self._browser:
                 self._browser.cancel()
                 self._browser = None
+            if self._resolver:
+                self._resolver.close()
+                self._resolver = None
             if self._zeroconf and self._own_zeroconf:
                 self._zeroconf.close()
                 self._zeroconf = None
@@ -132,8 +160,10 @@ class DeviceDiscovery:
             self._running = False
             with self._lock:
                 self._devices.clear()
+                self._service_by_key.clear()
                 self._device_last_seen.clear()
                 self._device_miss_count.clear()
+                self._unreachable.clear()
             logger.info("设备发现服务已停止")
         except Exception as e:
             logger.error(f"停止设备发现服务失败: {e}")
@@ -146,16 +176,18 @@ class DeviceDiscovery:
             if not addresses:
                 return
             
-            # 获取IP地址（优先IPv4）
-            ip = None
+            # 获取IP地址（优先IPv4；多网卡设备保留全部地址，发送时由探测结果选择最佳路由）
+            ipv4_addresses = []
             for addr in addresses:
+                if len(addr) != 4:
+                    continue
                 addr_str = socket.inet_ntoa(addr)
-                if self._is_ipv4(addr_str):
-                    ip = addr_str
-                    break
+                if self._is_ipv4(addr_str) and addr_str not in ipv4_addresses:
+                    ipv4_addresses.append(addr_str)
             
-            if not ip:
+            if not ipv4_addresses:
                 return
+            ip = ipv4_addresses[0]
             
             port = service_info.port
             
@@ -189,6 +221,7 @@ class DeviceDiscovery:
                 device_name=device_name,
                 group_id=group_id,
                 discover_scope=discover_scope,
+                addresses=ipv4_addresses,
             )
             
             # 使用 user_id + ip 作为唯一标识，支持同一账号多个设备
@@ -201,19 +234,15 @@ class DeviceDiscovery:
             with self._lock:
                 self._device_last_seen[service_name] = time.time()
                 self._device_miss_count[service_name] = 0
+                self._unreachable.pop(device_unique_key, None)
                 # 检查是否已存在相同的设备（user_id + ip）
-                existing_device = None
-                existing_service_name = None
-                for existing_sn, existing_di in self._devices.items():
-                    if existing_di.user_id == user_id and existing_di.ip == ip:
-                        existing_device = existing_di
-                        existing_service_name = existing_sn
-                        logger.info(f"[Discovery] Device already exists: user_id={user_id}, ip={ip}, existing_service_name={existing_service_name}, new_service_name={service_name}")
-                        break
+                existing_service_name = self._service_by_key.get(device_unique_key)
+                existing_device = self._devices.get(existing_service_name) if existing_service_name else None
                 
                 if existing_device is None:
                     # 新设备，添加
                     self._devices[service_name] = device_info
+                    self._service_by_key[device_unique_key] = service_name
                     should_add = True
                     logger.info(f"[Discovery] Adding new device: service_name={service_name}, user_id={user_id}, ip={ip}")
                 else:
@@ -222,13 +251,16 @@ class DeviceDiscovery:
                         self._devices.pop(existing_service_name, None)
                         logger.info(f"[Discovery] Updating device service_name: {existing_service_name} -> {service_name}")
                     self._devices[service_name] = device_info
-                    should_add = True  # 触发回调以让上层刷新显示（scope/group 可能改变）
+                    self._service_by_key[device_unique_key] = service_name
+                    # 信息没有变化（TTL 刷新/重复的 update 事件）时不打扰上层
+                    should_add = existing_device != device_info or existing_service_name != service_name
             
             if should_add and self._on_device_added:
                 logger.info(f"[Discovery] Calling _on_device_added callback for: user_id={user_id}, ip={ip}")
                 self._on_device_added(device_info)
             elif not should_add:
-                logger.info(f"[Discovery] Skipping _on_device_added callback (device already exists): user_id={user_id}, ip={ip}")
+                logger.debug(f"[Discovery] Skipping _on_device_added callback (device unchanged): user_id={user_id}, ip={ip}")
+                return
             
             logger.info(f"发现设备: {name} ({ip}:{port})")
         except Exception as e:
@@ -238,22 +270,18 @@ class DeviceDiscovery:
     def _on_device_lost(self, service_name: str):
         """设备丢失时的处理"""
         try:
+            if self._resolver:
+                self._resolver.forget(service_name)
             with self._lock:
                 self._device_miss_count.pop(service_name, None)
                 device_info = self._devices.pop(service_name, None)
+                if device_info:
+                    # 使用 user_id + ip 作为唯一标识（同一设备只保留一个 service_name 映射）
+                    device_unique_key = f"{device_info.user_id}::{device_info.ip}"
+                    if self._service_by_key.get(device_unique_key) == service_name:
+                        del self._service_by_key[device_unique_key]
             
             if device_info and self._on_device_removed:
-                # 使用 user_id + ip 作为唯一标识来移除设备
-                # 需要移除所有相同 user_id + ip 的设备（可能有多个 service_name 映射）
-                device_unique_key = f"{device_info.user_id}::{device_info.ip}"
-                # 移除所有匹配的设备
-                service_names_to_remove = []
-                for sn, di in list(self._devices.items()):
-                    if f"{di.user_id}::{di.ip}" == device_unique_key:
-                        service_names_to_remove.append(sn)
-                for sn in service_names_to_remove:
-                    self._devices.pop(sn, None)
-                
                 # 传递 user_id, ip, name 以便上层使用 user_id + ip 进行匹配
                 self._on_device_removed(device_info.user_id, device_info.ip, device_info.name)
             
@@ -275,30 +303,15 @@ class DeviceDiscovery:
                 stale = []
                 with self._lock:
                     for sn, last in list(self._device_last_seen.items()):
-                        if now - last > self._device_ttl:
-                            if self._is_self_service(sn):
-                                continue
-                            # 尝试主动刷新一次服务信息，若仍不可得再计入 miss
-                            refreshed = False
-                            try:
-                                if self._zeroconf:
-                                    info = self._zeroconf.get_service_info(self.SERVICE_TYPE, sn)
-                                    if info and info.addresses:
-                                        self._device_last_seen[sn] = now
-                                        self._device_miss_count[sn] = 0
-                                        refreshed = True
-                            except Exception:
-                                pass
-                            if refreshed:
-                                continue
-                            
-                            miss = self._device_miss_count.get(sn, 0) + 1
-                            self._device_miss_count[sn] = miss
-                            # 连续 2 次超时才标记离线，降低误判
-                            if miss >= 2:
-                                stale.append(sn)
+                        if now - last > self._device_ttl and not self._is_self_service(sn):
+                            stale.append(sn)
+                # 超时的设备一次性并发刷新（不在锁内做网络查询），仍不可得再计入 miss
+                resolver = self._resolver
                 for sn in stale:
-                    self._on_device_lost(sn)
+                    if resolver:
+                        resolver.resolve(sn, self._on_refresh_result, use_cache=False)
+                    else:
+                        self._on_refresh_result(sn, None)
             finally:
                 if self._running:
                     self._schedule_cleanup()
@@ -307,6 +320,22 @@ class DeviceDiscovery:
         timer.start()
         self._cleanup_timer = timer
     
+    def _on_refresh_result(self, service_name: str, info: Optional[ServiceInfo]):
+        """超时设备的刷新结果：可解析则续期，否则累计 miss，连续 2 次才标记离线（降低误判）"""
+        lost = False
+        with self._lock:
+            if service_name not in self._device_last_seen:
+                return
+            if info is not None and info.addresses:
+                self._device_last_seen[service_name] = time.time()
+                self._device_miss_count[service_name] = 0
+                return
+            miss = self._device_miss_count.get(service_name, 0) + 1
+            self._device_miss_count[service_name] = miss
+            lost = miss >= 2
+        if lost:
+            self._on_device_lost(service_name)
+    
     def mark_unreachable(self, user_id: str, ip: str):
         """主动标记某设备不可达，触发离线处理"""
         targets = []
@@ -314,9 +343,31 @@ class DeviceDiscovery:
             for sn, di in list(self._devices.items()):
                 if di.user_id == str(user_id) and di.ip == ip:
                     targets.append(sn)
+                    self._unreachable[di.key] = sn
         for sn in targets:
             self._on_device_lost(sn)
 
+    def mark_reachable(self, device: DeviceInfo) -> bool:
+        """
+        探测确认此前标记不可达的设备已恢复：按原 service_name 重新加入（服务记录未变化时 mDNS 不会再通知）
+
+        Returns:
+            是否重新加入（设备未被 mark_unreachable 移除或已重新发现时返回 False）
+        """
+        with self._lock:
+            service_name = self._unreachable.pop(device.key, None)
+            if service_name is None or device.key in self._service_by_key:
+                return False
+            self._devices[service_name] = device
+            self._service_by_key[device.key] = service_name
+            # 之后由周期清理照常刷新：服务确已注销时仍会按 miss 计数移除
+            self._device_last_seen[service_name] = time.time()
+            self._device_miss_count[service_name] = 0
+        logger.info(f"设备已恢复可达: {device.name} ({device.ip})")
+        if self._on_device_added:
+            self._on_device_added(device)
+        return True
+
     def get_devices(self) -> list[DeviceInfo]:
         """获取当前发现的设备列表"""
         # 注意：get_devices 可能被 UI 定时调用（轮询刷新列表），这里必须避免每次都打印日志
@@ -370,29 +421,568 @@ class DeviceDiscovery:
             return False
 
 
+class _ServiceResolver:
+    """
+    服务信息解析器（批量 + 并发 + 缓存）
+
+    浏览回调只登记服务名，BATCH_DELAY 内到达的名字合并成一批：
+    先查 zeroconf 记录缓存（无网络开销），缓存不全的在 zeroconf 自己的事件循环里并发
+    async_request（最多 MAX_CONCURRENT 个同时进行），不阻塞浏览线程。
+    解析成功的 ServiceInfo 按服务名缓存，服务移除时失效。
+    结果回调统一投递到单独的回调线程按顺序执行，处理慢的回调不会拖住 zeroconf 事件循环。
+    """
+
+    BATCH_DELAY = 0.05  # 秒
+    RESOLVE_TIMEOUT_MS = 3000
+    MAX_CONCURRENT = 32
+
+    def __init__(self, zeroconf: Zeroconf, service_type: str):
+        self._zeroconf = zeroconf
+        self._service_type = service_type
+        self._lock = threading.Lock()
+        self._waiting: Dict[str, List[Callable[[str, Optional[ServiceInfo]], None]]] = {}
+        self._inflight: Dict[str, List[Callable[[str, Optional[ServiceInfo]], None]]] = {}
+        self._cache: Dict[str, ServiceInfo] = {}
+        self._flush_timer: Optional[threading.Timer] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # 单线程执行回调，保持同一服务的结果顺序
+        self._callback_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mdns-callback")
+        self._closed = False
+        loop = getattr(zeroconf, "loop", None)
+        self._loop = loop if AsyncServiceInfo is not None and loop is not None else None
+        if self._loop is None:
+            # 旧版 zeroconf 没有异步接口：退化为线程池并发同步解析
+            self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="mdns-resolve")
+
+    def resolve(self, name: str, callback: Callable[[str, Optional[ServiceInfo]], None], use_cache: bool = True):
+        """
+        登记一次解析请求，结果通过 callback(name, info_or_None) 返回（在回调线程触发）
+
+        use_cache=False 时丢弃本地已缓存的 ServiceInfo 重新解析（zeroconf 记录缓存仍按 TTL 生效）
+        """
+        with self._lock:
+            if self._closed:
+                return
+            if not use_cache:
+                self._cache.pop(name, None)
+            cached = self._cache.get(name)
+            if cached is None:
+                if name in self._inflight:
+                    self._inflight[name].append(callback)
+                    return
+                self._waiting.setdefault(name, []).append(callback)
+                if self._flush_timer is None:
+                    self._flush_timer = threading.Timer(self.BATCH_DELAY, self._flush)
+                    self._flush_timer.daemon = True
+                    self._flush_timer.start()
+                return
+        self._dispatch([callback], name, cached)
+
+    def forget(self, name: str):
+        """服务已移除：清除缓存"""
+        with self._lock:
+            self._cache.pop(name, None)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._flush_timer:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._waiting.clear()
+            self._inflight.clear()
+            self._cache.clear()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+        self._callback_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _flush(self):
+        with self._lock:
+            self._flush_timer = None
+            batch, self._waiting = self._waiting, {}
+            self._inflight.update(batch)
+        if not batch:
+            return
+        pending = []
+        for name in batch:
+            # zeroconf 记录缓存里已有完整信息时直接使用（浏览阶段通常已随 PTR 应答一并收到）
+            info = self._new_info(name)
+            try:
+                if info.load_from_cache(self._zeroconf):
+                    self._finish(name, info)
+                    continue
+            except Exception:
+                pass
+            pending.append(name)
+        if not pending:
+            return
+        logger.debug(f"[Discovery] 并发解析 {len(pending)} 个服务")
+        try:
+            if self._loop is not None:
+                future = asyncio.run_coroutine_threadsafe(self._resolve_batch(pending), self._loop)
+                future.add_done_callback(lambda f, names=pending: self._on_batch_done(f, names))
+            else:
+                for name in pending:
+                    self._executor.submit(self._resolve_sync, name)
+        except Exception as e:
+            logger.warning(f"[Discovery] 提交服务解析失败: {e}")
+            for name in pending:
+                self._finish(name, None)
+
+    def _new_info(self, name: str) -> ServiceInfo:
+        cls = AsyncServiceInfo if AsyncServiceInfo is not None else ServiceInfo
+        return cls(self._service_type, name)
+
+    async def _resolve_batch(self, names: List[str]):
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT)
+
+        async def resolve_one(name: str):
+            async with semaphore:
+                info = self._new_info(name)
+                try:
+                    ok = await info.async_request(self._zeroconf, self.RESOLVE_TIMEOUT_MS)
+                except Exception as e:
+                    logger.debug(f"[Discovery] 解析服务失败: {name}: {e}")
+                    ok = False
+                self._finish(name, info if ok else None)
+
+        await asyncio.gather(*(resolve_one(n) for n in names), return_exceptions=True)
+
+    def _on_batch_done(self, future, names: List[str]):
+        # 批次被取消（zeroconf 关闭）时，未完成的请求按失败返回
+        if future.cancelled() or future.exception() is not None:
+            for name in names:
+                self._finish(name, None)
+
+    def _resolve_sync(self, name: str):
+        info = None
+        try:
+            info = self._zeroconf.get_service_info(self._service_type, name, timeout=self.RESOLVE_TIMEOUT_MS)
+        except Exception as e:
+            logger.debug(f"[Discovery] 解析服务失败: {name}: {e}")
+        self._finish(name, info)
+
+    def _finish(self, name: str, info: Optional[ServiceInfo]):
+        with self._lock:
+            callbacks = self._inflight.pop(name, [])
+            if info is not None and not self._closed:
+                self._cache[name] = info
+        self._dispatch(callbacks, name, info)
+
+    def _dispatch(self, callbacks: List[Callable[[str, Optional[ServiceInfo]], None]],
+                  name: str, info: Optional[ServiceInfo]):
+        """把回调投递到回调线程（_finish 可能在 zeroconf 事件循环中被调用，不能在这里执行回调）"""
+        if not callbacks:
+            return
+
+        def run():
+            for callback in callbacks:
+                try:
+                    callback(name, info)
+                except Exception as e:
+                    logger.error(f"[Discovery] 服务解析回调异常: {e}", exc_info=True)
+
+        try:
+            self._callback_executor.submit(run)
+        except RuntimeError:
+            pass  # 已关闭
+
+
 class _DeviceListener(ServiceListener):
-    """设备监听器"""
+    """设备监听器（只登记解析请求，不在 zeroconf 回调线程里阻塞查询）"""
     
-    def __init__(self, on_add: Callable[[str, ServiceInfo], None],
+    def __init__(self, resolver: _ServiceResolver,
+                 on_add: Callable[[str, ServiceInfo], None],
                  on_remove: Callable[[str], None]):
+        self._resolver = resolver
         self._on_add = on_add
         self._on_remove = on_remove
     
-    def add_service(self, zeroconf: Zeroconf, service_type: str, name: str):
-        """服务添加"""
-        info = zeroconf.get_service_info(service_type, name)
+    def _on_resolved(self, name: str, info: Optional[ServiceInfo]):
         if info:
             self._on_add(name, info)
     
+    def add_service(self, zeroconf: Zeroconf, service_type: str, name: str):
+        """服务添加"""
+        self._resolver.resolve(name, self._on_resolved)
+    
     def remove_service(self, zeroconf: Zeroconf, service_type: str, name: str):
         """服务移除"""
+        self._resolver.forget(name)
         self._on_remove(name)
     
     def update_service(self, zeroconf: Zeroconf, service_type: str, name: str):
-        """服务更新"""
-        info = zeroconf.get_service_info(service_type, name)
-        if info:
-            self._on_add(name, info)
+        """服务更新（记录已变化，绕过本地缓存重新解析）"""
+        self._resolver.resolve(name, self._on_resolved, use_cache=False)
+
+
+class BeaconDiscovery:
+    """
+    UDP 信标设备发现（mDNS 被禁用时的后备方案）
+
+    每台设备周期性地向局域网组播一个紧凑的二进制通告（通常不到 200 字节；无法加入组播组时改用广播），
+    收到通告的设备按通告里的 TTL 记录对方，TTL 内没再收到即视为离线；主动退出时发送 goodbye。
+    启动时先发一个查询，其他设备随机延迟后单播回复自己的通告，因此新设备上线很快就能看到全部设备。
+    对外接口与 DeviceDiscovery 一致（同样的 DeviceInfo 回调、get_devices、mark_unreachable）。
+
+    报文格式（网络字节序）：
+        magic(4) = b"AIPB" | version(1) | flags(1) | instance(8) | port(2) | ttl(2)
+        之后（仅 FLAG_ANNOUNCE）依次为 user_id/name/device_name/group_id/discover_scope/avatar_url，
+        每个字段为 长度(2) + UTF-8 字节；超过 MAX_PACKET 时依次清空可选字段（头像、设备名），不截断报文
+    """
+
+    BEACON_PORT = 8764
+    MULTICAST_GROUP = "239.255.77.65"
+    MAGIC = b"AIPB"
+    VERSION = 1
+    FLAG_ANNOUNCE = 0x01
+    FLAG_QUERY = 0x02
+    FLAG_GOODBYE = 0x04
+
+    _HEADER = struct.Struct("!4sBB8sHH")
+    _FIELDS = ("user_id", "name", "device_name", "group_id", "discover_scope", "avatar_url")
+    _OPTIONAL_FIELDS = ("avatar_url", "device_name")  # 报文过大时按此顺序清空
+    MAX_FIELD_BYTES = 512
+    MAX_PACKET = 1400
+
+    # 通告间隔：启动后前几次较快以尽快收敛，之后放慢；每次叠加 ±20% 抖动，避免全网同时发送
+    FAST_INTERVAL = 2.0  # seconds
+    FAST_ROUNDS = 3
+    STEADY_INTERVAL = 15.0  # seconds
+    JITTER = 0.2
+    TTL_FACTOR = 3  # 通告 TTL = 稳定间隔 * 3（允许连续丢 2 个包）
+    REPLY_DELAY_MAX = 0.5  # 回复查询前的最大随机延迟（seconds），分散多台设备的回复
+
+    def __init__(self, port: int, user_id: str, user_name: str,
+                 avatar_url: Optional[str] = None,
+                 device_name: Optional[str] = None,
+                 group_id: Optional[str] = None,
+                 discover_scope: Optional[str] = None,
+                 on_device_added: Optional[Callable[[DeviceInfo], None]] = None,
+                 on_device_removed: Optional[Callable[[str, str, str], None]] = None,
+                 local_ip: Optional[str] = None,
+                 beacon_port: Optional[int] = None):
+        """
+        Args:
+            port: 本机文件传输服务端口（写入通告）
+            discover_scope: all/group/none，none 时不发送通告（仍能发现别人）
+            on_device_added: 设备添加/信息变化时的回调
+            on_device_removed: 设备移除时的回调 (user_id, ip, name)
+            beacon_port: 信标 UDP 端口（默认 BEACON_PORT）
+        """
+        self._port = port
+        self._announce_info = {
+            "user_id": str(user_id),
+            "name": user_name or "",
+            "device_name": device_name or "",
+            "group_id": str(group_id) if group_id else "",
+            "discover_scope": discover_scope or "all",
+            "avatar_url": avatar_url or "",
+        }
+        self._on_device_added = on_device_added
+        self._on_device_removed = on_device_removed
+        self._local_user_id = str(user_id)
+        self._local_ip = local_ip
+        self._beacon_port = beacon_port or self.BEACON_PORT
+        self._instance = os.urandom(8)
+        self._ttl = int(self.STEADY_INTERVAL * self.TTL_FACTOR)
+
+        self._lock = threading.Lock()
+        self._devices: Dict[str, DeviceInfo] = {}  # key: user_id::ip
+        self._unreachable: Dict[str, DeviceInfo] = {}  # 探测判定不可达而移除、等待恢复的设备
+        self._expiry = DeadlineHeap(self._on_expired)
+        self._sock: Optional[socket.socket] = None
+        self._multicast = False  # 已加入组播组：通告只走组播，否则走广播
+        self._running = False
+        self._wakeup = threading.Event()
+        self._last_announce = 0.0
+        self._reply_timer: Optional[threading.Timer] = None
+        self._threads: List[threading.Thread] = []
+
+    # ---- 生命周期 ----
+
+    def start(self):
+        if self._running:
+            return
+        self._sock = self._open_socket()
+        self._running = True
+        self._wakeup.clear()
+        self._threads = [
+            threading.Thread(target=self._receive_loop, name="beacon-recv", daemon=True),
+            threading.Thread(target=self._announce_loop, name="beacon-announce", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        logger.info(f"UDP 信标发现已启动 (port={self._beacon_port}, group={self.MULTICAST_GROUP})")
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup.set()
+        if self._reply_timer:
+            self._reply_timer.cancel()
+            self._reply_timer = None
+        if self._announcing():
+            # goodbye 发两次，降低丢包导致对方残留的概率
+            for _ in range(2):
+                self._send(self.FLAG_GOODBYE)
+        sock, self._sock = self._sock, None
+        if sock:
+            try:
+                sock.close()
+            except Exception:
+                pass
+        for t in self._threads:
+            t.join(timeout=2)
+        self._threads = []
+        self._expiry.stop()
+        with self._lock:
+            self._devices.clear()
+            self._unreachable.clear()
+        logger.info("UDP 信标发现已停止")
+
+    def set_discover_scope(self, scope: str):
+        """更新可被发现范围：none 时发送 goodbye 并停止通告，否则立即按新范围通告"""
+        was_announcing = self._announcing()
+        self._announce_info["discover_scope"] = scope or "all"
+        if not self._running:
+            return
+        if was_announcing and not self._announcing():
+            self._send(self.FLAG_GOODBYE)
+        else:
+            self._wakeup.set()
+
+    # ---- 查询 ----
+
+    def get_devices(self) -> list[DeviceInfo]:
+        with self._lock:
+            return list(self._devices.values())
+
+    def mark_unreachable(self, user_id: str, ip: str):
+        """主动标记某设备不可达，触发离线处理"""
+        key = f"{user_id}::{ip}"
+        with self._lock:
+            device = self._devices.get(key)
+            if device is not None:
+                self._unreachable[key] = device
+        self._remove(key)
+
+    def mark_reachable(self, device: DeviceInfo) -> bool:
+        """探测确认此前标记不可达的设备已恢复：不等下一次通告，按本端 TTL 重新加入"""
+        with self._lock:
+            restored = self._unreachable.pop(device.key, None)
+            if restored is None or device.key in self._devices:
+                return False
+        self._on_announce(restored, self._ttl)
+        return True
+
+    # ---- 发送 ----
+
+    def _announcing(self) -> bool:
+        return self._announce_info.get("discover_scope") != "none"
+
+    def _open_socket(self) -> socket.socket:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            except OSError:
+                pass
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.bind(("", self._beacon_port))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+        interface = socket.inet_aton(self._local_ip) if self._local_ip else socket.inet_aton("0.0.0.0")
+        try:
+            if self._local_ip:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, interface)
+            mreq = struct.pack("4s4s", socket.inet_aton(self.MULTICAST_GROUP), interface)
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+            self._multicast = True
+        except OSError as e:
+            self._multicast = False
+            # 部分网卡/驱动不支持组播，仍可依赖广播
+            logger.warning(f"[Beacon] 加入组播组失败，仅使用广播: {e}")
+        sock.settimeout(1.0)
+        return sock
+
+    def _encode(self, flags: int) -> bytes:
+        header = self._HEADER.pack(self.MAGIC, self.VERSION, flags, self._instance,
+                                   self._port, self._ttl)
+        if not flags & self.FLAG_ANNOUNCE:
+            return header
+        fields = {key: self._truncate_utf8(self._announce_info.get(key, ""), self.MAX_FIELD_BYTES)
+                  for key in self._FIELDS}
+        budget = self.MAX_PACKET - self._HEADER.size - 2 * len(self._FIELDS)  # 字段内容可用字节数
+        for key in self._OPTIONAL_FIELDS:
+            if sum(len(raw) for raw in fields.values()) <= budget:
+                break
+            fields[key] = b""
+        overflow = sum(len(raw) for raw in fields.values()) - budget
+        if overflow > 0:
+            # 必需字段本身就超长（极少见）：缩短显示名，保证 user_id 等标识完整
+            fields["name"] = self._truncate_utf8(fields["name"].decode("utf-8"), len(fields["name"]) - overflow)
+        parts = [header]
+        for key in self._FIELDS:
+            parts.append(struct.pack("!H", len(fields[key])))
+            parts.append(fields[key])
+        return b"".join(parts)
+
+    @staticmethod
+    def _truncate_utf8(text: str, limit: int) -> bytes:
+        """按 UTF-8 编码截到 limit 字节以内，不拆开多字节字符"""
+        raw = (text or "").encode("utf-8")
+        if len(raw) <= limit:
+            return raw
+        return raw[:max(0, limit)].decode("utf-8", errors="ignore").encode("utf-8")
+
+    def _send(self, flags: int, addr: Optional[tuple] = None):
+        """发送报文：指定 addr 时单播，否则组播（未能加入组播组或组播发送失败时改为广播）"""
+        sock = self._sock
+        if sock is None:
+            return
+        packet = self._encode(flags)
+        if addr:
+            targets = [addr]
+        elif self._multicast:
+            targets = [(self.MULTICAST_GROUP, self._beacon_port), ("255.255.255.255", self._beacon_port)]
+        else:
+            targets = [("255.255.255.255", self._beacon_port)]
+        for target in targets:
+            try:
+                sock.sendto(packet, target)
+                break
+            except OSError as e:
+                logger.debug(f"[Beacon] 发送到 {target} 失败: {e}")
+        if flags & self.FLAG_ANNOUNCE and not addr:
+            self._last_announce = time.monotonic()
+
+    def _announce_loop(self):
+        # 启动：通告 + 查询，让已在线的设备尽快回复
+        rounds = 0
+        flags = self.FLAG_QUERY
+        while self._running:
+            if self._announcing():
+                flags |= self.FLAG_ANNOUNCE
+            if flags:
+                self._send(flags)
+            base = self.FAST_INTERVAL if rounds < self.FAST_ROUNDS else self.STEADY_INTERVAL
+            rounds += 1
+            interval = base * random.uniform(1 - self.JITTER, 1 + self.JITTER)
+            # scope 变化时被提前唤醒，立即重新通告
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            flags = 0
+
+    def _schedule_reply(self, addr: tuple):
+        """回复查询：随机延迟后单播；刚刚广播过通告就不必再回复"""
+        if not self._announcing() or time.monotonic() - self._last_announce < 1.0:
+            return
+
+        def reply():
+            if self._running:
+                self._send(self.FLAG_ANNOUNCE, addr)
+
+        timer = threading.Timer(random.uniform(0.05, self.REPLY_DELAY_MAX), reply)
+        timer.daemon = True
+        self._reply_timer = timer
+        timer.start()
+
+    # ---- 接收 ----
+
+    def _receive_loop(self):
+        while self._running:
+            sock = self._sock
+            if sock is None:
+                return
+            try:
+                data, addr = sock.recvfrom(self.MAX_PACKET + 64)
+            except socket.timeout:
+                continue
+            except OSError:
+                if self._running:
+                    time.sleep(0.5)
+                continue
+            try:
+                self._handle_packet(data, addr)
+            except Exception as e:
+                logger.debug(f"[Beacon] 丢弃无效报文 from {addr}: {e}")
+
+    def _decode(self, data: bytes) -> Optional[tuple]:
+        if len(data) < self._HEADER.size:
+            return None
+        magic, version, flags, instance, port, ttl = self._HEADER.unpack_from(data)
+        if magic != self.MAGIC or version != self.VERSION:
+            return None
+        info: Dict[str, str] = {}
+        if flags & self.FLAG_ANNOUNCE:
+            offset = self._HEADER.size
+            for key in self._FIELDS:
+                (length,) = struct.unpack_from("!H", data, offset)
+                offset += 2
+                info[key] = data[offset:offset + length].decode("utf-8", errors="replace")
+                offset += length
+        return flags, instance, port, ttl, info
+
+    def _handle_packet(self, data: bytes, addr: tuple):
+        decoded = self._decode(data)
+        if decoded is None:
+            return
+        flags, instance, port, ttl, info = decoded
+        if instance == self._instance:
+            return  # 自己发出的（广播/组播回环）
+        ip = addr[0]
+        if flags & self.FLAG_QUERY:
+            self._schedule_reply(addr)
+        if flags & self.FLAG_ANNOUNCE and info.get("user_id"):
+            user_id = info["user_id"]
+            if user_id == self._local_user_id and ip == self._local_ip:
+                return
+            device = DeviceInfo(
+                name=info.get("name") or "Unknown",
+                user_id=user_id,
+                ip=ip,
+                port=port,
+                avatar_url=info.get("avatar_url") or None,
+                device_name=info.get("device_name") or None,
+                group_id=info.get("group_id") or None,
+                discover_scope=info.get("discover_scope") or None,
+            )
+            self._on_announce(device, ttl)
+        elif flags & self.FLAG_GOODBYE:
+            # goodbye 不带身份字段，按来源 IP + 端口匹配
+            with self._lock:
+                keys = [k for k, d in self._devices.items() if d.ip == ip and d.port == port]
+                for k in [k for k, d in self._unreachable.items() if d.ip == ip and d.port == port]:
+                    del self._unreachable[k]
+            for key in keys:
+                self._remove(key)
+
+    def _on_announce(self, device: DeviceInfo, ttl: int):
+        key = f"{device.user_id}::{device.ip}"
+        with self._lock:
+            previous = self._devices.get(key)
+            self._devices[key] = device
+            self._unreachable.pop(key, None)
+        self._expiry.schedule(key, time.time() + max(ttl, 5))
+        if previous != device:
+            if previous is None:
+                logger.info(f"发现设备(信标): {device.name} ({device.ip}:{device.port})")
+            if self._on_device_added:
+                self._on_device_added(device)
+
+    def _on_expired(self, key: str):
+        logger.info(f"[Beacon] 设备通告已过期: {key}")
+        self._remove(key)
+
+    def _remove(self, key: str):
+        self._expiry.cancel(key)
+        with self._lock:
+            device = self._devices.pop(key, None)
+        if device and self._on_device_removed:
+            self._on_device_removed(device.user_id, device.ip, device.name)
+            logger.info(f"设备已离线(信标): {device.name} ({device.ip})")
 
 
 def register_service(name: str, port: int, user_id: str, user_name: str,
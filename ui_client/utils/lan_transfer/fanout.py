@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+一对多发送的共享读缓冲
+
+同一个文件发给多台设备时，只从磁盘读取一遍：后台线程按块读入共享窗口，
+每个接收端各自持有读取位置；最慢的接收端决定窗口何时释放（逐端背压），
+窗口写满时读取线程暂停，因此内存占用固定为 window 个块。
+"""
+
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, Optional
+
+
+class FanoutBuffer:
+    """把一个数据块迭代器分发给多个消费者（每个消费者得到完整且相同的数据流）"""
+
+    def __init__(self, chunks: Iterable[bytes], consumer_count: int, window: int = 64):
+        """
+        Args:
+            chunks: 数据源（只会被迭代一次）
+            consumer_count: 消费者数量，reader(0..consumer_count-1)
+            window: 最快与最慢消费者之间最多相差的块数
+        """
+        self._source = iter(chunks)
+        self._window = max(1, window)
+        self._cond = threading.Condition()
+        self._chunks: Deque[bytes] = deque()
+        self._base = 0  # self._chunks[0] 对应的块序号
+        self._produced = 0
+        self._done = False
+        self._error: Optional[BaseException] = None
+        self._cursors: Dict[int, int] = {i: 0 for i in range(consumer_count)}  # 消费者 -> 下一个要读的块序号
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动读取线程"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._produce, daemon=True)
+            self._thread.start()
+
+    def _produce(self):
+        try:
+            while True:
+                with self._cond:
+                    # 背压：等待最慢的消费者跟上；所有消费者都已退出时停止读取
+                    self._cond.wait_for(
+                        lambda: not self._cursors or self._produced - min(self._cursors.values()) < self._window
+                    )
+                    if not self._cursors:
+                        return
+                try:
+                    chunk = next(self._source)
+                except StopIteration:
+                    return
+                with self._cond:
+                    self._chunks.append(chunk)
+                    self._produced += 1
+                    self._cond.notify_all()
+        except BaseException as e:  # 读取失败（文件被修改/删除）时让所有消费者感知
+            with self._cond:
+                self._error = e
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def reader(self, index: int) -> Iterator[bytes]:
+        """第 index 个消费者的数据流（生成器关闭或读完时自动退出共享）"""
+        pos = 0
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: pos < self._produced or self._done)
+                    if pos < self._produced:
+                        chunk = self._chunks[pos - self._base]
+                        pos += 1
+                        self._cursors[index] = pos
+                        self._trim()
+                    elif self._error is not None:
+                        raise IOError(f"读取文件失败: {self._error}")
+                    else:
+                        return
+                yield chunk
+        finally:
+            self.detach(index)
+
+    def detach(self, index: int):
+        """消费者退出（上传失败/完成），不再阻塞其他消费者（可重复调用）"""
+        with self._cond:
+            if self._cursors.pop(index, None) is not None:
+                self._trim()
+
+    def _trim(self):
+        """释放所有消费者都已读过的块（调用方持有锁）"""
+        lowest = min(self._cursors.values()) if self._cursors else self._produced
+        while self._chunks and self._base < lowest:
+            self._chunks.popleft()
+            self._base += 1
+        self._cond.notify_all()
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+设备可达性探测与健康评分
+
+后台线程周期性地并发请求已知设备的 /status（短超时），按路由（ip, port）记录：
+- RTT 指数滑动平均
+- 上传吞吐量指数滑动平均（由实际传输结果回填）
+- 连续失败次数
+
+连续失败达到上限的设备立即通知上层下线（不必等到发送失败或 mDNS 超时清理），
+下线后仍继续探测一段时间，恢复可达时通知上层重新加入；
+多网卡设备（DeviceInfo.addresses 有多个地址）会逐个探测，发送时选择评分最高的地址。
+"""
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .discovery import DeviceInfo
+
+logger = logging.getLogger(__name__)
+
+# 健康等级（数值越小越好，用于界面排序）
+HEALTH_GOOD = 0
+HEALTH_SLOW = 1
+HEALTH_DOWN = 2
+
+# 连续失败达到该次数视为不可达
+FAIL_LIMIT = 2
+
+# 评分参考值：RTT 达到该值记 0 分；吞吐量达到该值记满分
+_RTT_WORST = 0.5  # seconds
+_THROUGHPUT_BEST = 10 * 1024 * 1024  # bytes/s
+
+
+@dataclass
+class PeerHealth:
+    """某条路由（ip:port）的健康状况"""
+    ip: str
+    port: int
+    rtt: Optional[float] = None  # seconds（EWMA）
+    throughput: Optional[float] = None  # bytes/s（EWMA）
+    failures: int = 0  # 连续失败次数
+    last_ok: float = 0.0
+
+    @property
+    def score(self) -> float:
+        """0-100，越高越好；未测过的项按中间值计"""
+        if self.failures >= FAIL_LIMIT:
+            return 0.0
+        rtt_score = 50.0 if self.rtt is None else 100.0 * (1 - min(self.rtt, _RTT_WORST) / _RTT_WORST)
+        if self.throughput is None:
+            tp_score = rtt_score
+        else:
+            tp_score = 100.0 * min(self.throughput / _THROUGHPUT_BEST, 1.0)
+        return max(0.0, 0.6 * rtt_score + 0.4 * tp_score - 20.0 * self.failures)
+
+    @property
+    def rank(self) -> int:
+        if self.failures >= FAIL_LIMIT:
+            return HEALTH_DOWN
+        if self.failures or self.score < 40:
+            return HEALTH_SLOW
+        return HEALTH_GOOD
+
+
+def _candidates(device: DeviceInfo) -> List[str]:
+    """设备的候选地址（discovery 给出的主地址在前）"""
+    ips = [device.ip]
+    for ip in getattr(device, "addresses", None) or []:
+        if ip not in ips:
+            ips.append(ip)
+    return ips
+
+
+class ReachabilityProber:
+    """并发探测已知设备的可达性，维护健康评分"""
+
+    INTERVAL = 10.0  # seconds
+    RECHECK_INTERVAL = 2.0  # 有探测失败时尽快复查，确认下线
+    JITTER = 0.2
+    TIMEOUT = 1.5  # seconds
+    MAX_WORKERS = 16
+    ALPHA = 0.3  # EWMA 权重
+    DOWN_FORGET = 600.0  # 不可达设备被发现模块移除后继续探测的时长（seconds）
+
+    def __init__(self, probe: Callable[[str, int, float], Optional[float]],
+                 get_peers: Callable[[], List[DeviceInfo]],
+                 on_unreachable: Optional[Callable[[DeviceInfo], None]] = None,
+                 on_rank_changed: Optional[Callable[[DeviceInfo, int], None]] = None,
+                 on_recovered: Optional[Callable[[DeviceInfo], None]] = None):
+        """
+        Args:
+            probe: 探测函数 (ip, port, timeout) -> RTT 秒数，不可达返回 None
+            get_peers: 返回当前已知设备列表
+            on_unreachable: 设备变为所有地址都不可达时回调（仅在进入该状态时触发一次，在探测线程触发）
+            on_rank_changed: 设备首次评分及健康等级变化时回调 (device, rank)（在探测线程触发）
+            on_recovered: 不可达设备重新探测成功时回调（在探测线程触发，先于 on_rank_changed）
+        """
+        self._probe = probe
+        self._get_peers = get_peers
+        self._on_unreachable = on_unreachable
+        self._on_rank_changed = on_rank_changed
+        self._on_recovered = on_recovered
+        self._lock = threading.Lock()
+        self._health: Dict[Tuple[str, int], PeerHealth] = {}
+        self._ranks: Dict[str, int] = {}  # key: user_id::ip（设备标识）
+        # 已判定不可达的设备 -> (设备, 判定时间)；即使已从设备列表移除也继续探测，以便发现恢复
+        self._down: Dict[str, Tuple[DeviceInfo, float]] = {}
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._wakeup.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix="peer-probe")
+        self._thread = threading.Thread(target=self._loop, name="peer-prober", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=self.TIMEOUT + 1)
+            self._thread = None
+        if self._pool:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+        with self._lock:
+            self._health.clear()
+            self._ranks.clear()
+            self._down.clear()
+
+    def probe_now(self):
+        """立即开始一轮探测（例如新设备上线、发送失败后）"""
+        self._wakeup.set()
+
+    def health(self, ip: str, port: int) -> Optional[PeerHealth]:
+        with self._lock:
+            return self._health.get((ip, port))
+
+    def rank(self, device: DeviceInfo) -> int:
+        with self._lock:
+            return self._ranks.get(f"{device.user_id}::{device.ip}", HEALTH_GOOD)
+
+    def best_ip(self, device: DeviceInfo) -> str:
+        """评分最高的可达地址；都未探测过时使用 discovery 给出的主地址"""
+        candidates = _candidates(device)
+        if len(candidates) == 1:
+            return device.ip
+        with self._lock:
+            scored = [(self._health[(ip, device.port)].score, -i, ip)
+                      for i, ip in enumerate(candidates) if (ip, device.port) in self._health]
+        if not scored:
+            return device.ip
+        return max(scored)[2]
+
+    def record_throughput(self, ip: str, port: int, nbytes: int, seconds: float):
+        """用一次成功上传的结果更新吞吐量（小文件受 RTT 影响大，不计入）"""
+        if nbytes < 256 * 1024 or seconds <= 0:
+            return
+        rate = nbytes / seconds
+        with self._lock:
+            health = self._health.setdefault((ip, port), PeerHealth(ip=ip, port=port))
+            health.throughput = rate if health.throughput is None else \
+                self.ALPHA * rate + (1 - self.ALPHA) * health.throughput
+
+    def _loop(self):
+        while self._running:
+            had_failure = False
+            try:
+                had_failure = self._probe_all()
+            except Exception as e:
+                logger.error(f"[Prober] 探测异常: {e}", exc_info=True)
+            base = self.RECHECK_INTERVAL if had_failure else self.INTERVAL
+            self._wakeup.wait(base * random.uniform(1 - self.JITTER, 1 + self.JITTER))
+            self._wakeup.clear()
+
+    def _probe_all(self) -> bool:
+        """探测一轮，返回本轮是否有探测失败"""
+        peers = self._with_down_peers(self._get_peers())
+        routes = sorted({(ip, d.port) for d in peers for ip in _candidates(d)})
+        pool = self._pool
+        if not routes or pool is None:
+            self._forget_except(set(), set())
+            return False
+        results = list(pool.map(lambda r: self._probe_route(*r), routes))
+        now = time.time()
+        had_failure = False
+        with self._lock:
+            for (ip, port), rtt in zip(routes, results):
+                health = self._health.setdefault((ip, port), PeerHealth(ip=ip, port=port))
+                if rtt is None:
+                    health.failures += 1
+                    had_failure = True
+                else:
+                    health.failures = 0
+                    health.last_ok = now
+                    health.rtt = rtt if health.rtt is None else self.ALPHA * rtt + (1 - self.ALPHA) * health.rtt
+        self._forget_except(set(routes), {f"{d.user_id}::{d.ip}" for d in peers})
+        for device in peers:
+            self._update_rank(device)
+        return had_failure
+
+    def _with_down_peers(self, peers: List[DeviceInfo]) -> List[DeviceInfo]:
+        """设备列表加上已被移除、仍在观察期内的不可达设备"""
+        now = time.time()
+        keys = {f"{d.user_id}::{d.ip}" for d in peers}
+        with self._lock:
+            for key in [k for k, (_, since) in self._down.items()
+                        if k not in keys and now - since > self.DOWN_FORGET]:
+                del self._down[key]
+            return peers + [d for k, (d, _) in self._down.items() if k not in keys]
+
+    def _probe_route(self, ip: str, port: int) -> Optional[float]:
+        try:
+            return self._probe(ip, port, self.TIMEOUT)
+        except Exception:
+            return None
+
+    def _forget_except(self, routes: set, device_keys: set):
+        """丢弃已不在设备列表中的路由/设备记录"""
+        with self._lock:
+            for route in [r for r in self._health if r not in routes]:
+                del self._health[route]
+            for key in [k for k in self._ranks if k not in device_keys]:
+                del self._ranks[key]
+
+    def _update_rank(self, device: DeviceInfo):
+        key = f"{device.user_id}::{device.ip}"
+        with self._lock:
+            ranks = [self._health[(ip, device.port)].rank for ip in _candidates(device)
+                     if (ip, device.port) in self._health]
+            if not ranks:
+                return
+            rank = min(ranks)  # 任一地址可用即可
+            previous = self._ranks.get(key)  # 首次评分也通知，界面据此记录全部设备的等级
+            self._ranks[key] = rank
+            # 只在状态切换时通知：持续不可达期间每轮复查不再重复下线
+            went_down = rank == HEALTH_DOWN and previous != HEALTH_DOWN
+            recovered = rank != HEALTH_DOWN and self._down.pop(key, None) is not None
+            if went_down:
+                self._down[key] = (device, time.time())
+        if went_down:
+            logger.info(f"[Prober] 设备不可达: {device.name} ({', '.join(_candidates(device))})")
+            if self._on_unreachable:
+                self._on_unreachable(device)
+        if recovered:
+            logger.info(f"[Prober] 设备恢复可达: {device.name} ({', '.join(_candidates(device))})")
+            if self._on_recovered:
+                self._on_recovered(device)
+        if rank != previous and self._on_rank_changed:
+            self._on_rank_changed(device, rank)
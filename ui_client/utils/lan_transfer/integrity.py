@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+传输完整性校验（发送端与接收端共用）
+
+发送端在读取文件的同一遍流式过程中增量计算摘要，并把摘要作为尾部（trailer）
+追加在上传请求体末尾；接收端在写盘的同时增量计算摘要，读完正文后与尾部比对。
+整个过程不需要再次读取文件。
+"""
+
+import hashlib
+
+# 上传请求头：声明请求体末尾附带了摘要尾部，值为 "<算法>-<摘要字节数>"
+HASH_HEADER = "X-Content-Hash"
+HASH_ALGORITHM = "blake2b"
+HASH_DIGEST_SIZE = 32
+HASH_HEADER_VALUE = f"{HASH_ALGORITHM}-{HASH_DIGEST_SIZE}"
+
+
+def new_content_hasher(digest_size: int = HASH_DIGEST_SIZE):
+    """创建增量摘要计算器（BLAKE2b）"""
+    return hashlib.blake2b(digest_size=digest_size)
+
+
+def parse_hash_header(value: str):
+    """
+    解析 X-Content-Hash 请求头
+
+    Returns:
+        摘要字节数；不支持的算法或格式错误时返回 None
+    """
+    try:
+        algorithm, size = (value or "").strip().lower().rsplit("-", 1)
+        size = int(size)
+    except (ValueError, AttributeError):
+        return None
+    if algorithm != HASH_ALGORITHM or not (1 <= size <= 64):
+        return None
+    return size
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+传输任务登记（发送端与接收端共用）
+
+每个传输以 request_id 为键登记一条 TransferJob，状态只能按状态机前进：
+
+    requested -> accepted -> sending -> verifying -> done
+         \\___________\\__________\\___________\\-----> failed
+
+- 按 request_id 直接查找，不再靠文件名 + 大小去匹配请求
+- 过期通过截止时间堆触发（单个定时器指向最早的截止时间），不再定期全量扫描
+- 未结束的任务保存到磁盘，应用重启后可以继续等待确认/重新发送
+"""
+
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class JobState:
+    """传输任务状态"""
+    REQUESTED = "requested"  # 已发出/收到请求，等待接收端确认
+    ACCEPTED = "accepted"  # 已接受，等待上传开始（可能在调度队列中）
+    SENDING = "sending"  # 正在上传/接收
+    VERIFYING = "verifying"  # 数据已发完，等待接收端校验
+    DONE = "done"
+    FAILED = "failed"
+
+    TERMINAL = (DONE, FAILED)
+
+
+_TRANSITIONS = {
+    JobState.REQUESTED: {JobState.ACCEPTED, JobState.FAILED},
+    JobState.ACCEPTED: {JobState.SENDING, JobState.FAILED},
+    JobState.SENDING: {JobState.VERIFYING, JobState.DONE, JobState.FAILED},
+    JobState.VERIFYING: {JobState.DONE, JobState.FAILED},
+    JobState.DONE: set(),
+    JobState.FAILED: set(),
+}
+
+DIRECTION_SEND = "send"
+DIRECTION_RECEIVE = "receive"
+
+
+@dataclass
+class TransferJob:
+    """一次传输（发送或接收）"""
+    request_id: str
+    direction: str  # send / receive
+    filename: str
+    file_size: int
+    state: str = JobState.REQUESTED
+    peer_name: str = ""
+    peer_id: str = ""
+    peer_ip: str = ""
+    peer_port: int = 0
+    peer_key: str = ""  # 发送端：目标设备的 DeviceInfo.key（peer_ip 可能是择优后的地址，与界面行不一致）
+    source_paths: List[str] = field(default_factory=list)  # 发送端：源文件/文件夹（用于重启后重新发送）
+    is_bundle: bool = False
+    inline: bool = False  # 小剪贴板内容已内嵌在请求中（接受即完成，不再上传）
+    codec: Optional[str] = None  # 发送端：与接收端协商的压缩编码
+    with_hash: bool = False  # 发送端：接收端声明支持摘要尾部校验
+    transferred: int = 0
+    message: str = ""
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def finished(self) -> bool:
+        return self.state in JobState.TERMINAL
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TransferJob":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+class DeadlineHeap:
+    """
+    截止时间堆：到期时在定时器线程回调 on_expire(key)
+
+    同一个 key 重新 schedule 会覆盖之前的截止时间（旧堆项惰性删除）；
+    任意时刻只有一个 threading.Timer，指向最早的截止时间。
+    """
+
+    def __init__(self, on_expire: Callable[[str], None]):
+        self._on_expire = on_expire
+        self._lock = threading.Lock()
+        self._heap: List[Tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._timer_deadline: Optional[float] = None
+
+    def schedule(self, key: str, deadline: float):
+        """设置 key 的截止时间（time.time() 时间戳）"""
+        with self._lock:
+            self._deadlines[key] = deadline
+            heapq.heappush(self._heap, (deadline, key))
+            self._arm_locked()
+
+    def cancel(self, key: str):
+        with self._lock:
+            self._deadlines.pop(key, None)
+
+    def stop(self):
+        """取消定时器并清空（之后仍可重新 schedule）"""
+        with self._lock:
+            self._heap.clear()
+            self._deadlines.clear()
+            if self._timer:
+                self._timer.cancel()
+            self._timer = None
+            self._timer_deadline = None
+
+    def _arm_locked(self):
+        # 丢弃已取消/被覆盖的堆顶
+        while self._heap and self._deadlines.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return
+        deadline = self._heap[0][0]
+        if self._timer is not None and self._timer_deadline is not None and self._timer_deadline <= deadline:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(max(0.0, deadline - time.time()), self._fire)
+        self._timer.daemon = True
+        self._timer_deadline = deadline
+        self._timer.start()
+
+    def _fire(self):
+        expired = []
+        with self._lock:
+            self._timer = None
+            self._timer_deadline = None
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                deadline, key = heapq.heappop(self._heap)
+                if self._deadlines.get(key) == deadline:
+                    del self._deadlines[key]
+                    expired.append(key)
+            self._arm_locked()
+        for key in expired:
+            try:
+                self._on_expire(key)
+            except Exception as e:
+                logger.error(f"[DeadlineHeap] 过期回调异常: {e}", exc_info=True)
+
+
+class TransferJobRegistry:
+    """传输任务登记表（线程安全）"""
+
+    # 等待确认的有效期（与接收端 TransferServer.REQUEST_EXPIRY_TIME 一致）
+    REQUEST_TTL = 5 * 60
+    # 已结束的任务在内存中保留的时长（供界面查询结果），之后移除
+    FINISHED_RETENTION = 10 * 60
+
+    def __init__(self, path: Optional[Path] = None,
+                 on_changed: Optional[Callable[[TransferJob], None]] = None):
+        """
+        Args:
+            path: 持久化文件路径（None 表示不持久化）
+            on_changed: 任务状态变化回调（在变更所在线程触发）
+        """
+        self._path = path
+        self._on_changed = on_changed
+        self._lock = threading.RLock()
+        self._jobs: Dict[str, TransferJob] = {}
+        self._deadlines = DeadlineHeap(self._on_deadline)
+
+    def get(self, request_id: str) -> Optional[TransferJob]:
+        with self._lock:
+            return self._jobs.get(request_id)
+
+    def jobs(self, direction: Optional[str] = None) -> List[TransferJob]:
+        with self._lock:
+            return [j for j in self._jobs.values() if direction is None or j.direction == direction]
+
+    def add(self, job: TransferJob) -> TransferJob:
+        """登记新任务（同一 request_id 已存在时覆盖）"""
+        with self._lock:
+            self._jobs[job.request_id] = job
+            self._schedule_locked(job)
+            self._save_locked()
+        self._notify(job)
+        return job
+
+    def transition(self, request_id: str, state: str, message: Optional[str] = None) -> bool:
+        """
+        推进任务状态；不合法的转换（例如已结束的任务）被忽略
+
+        Returns:
+            是否发生了状态变化
+        """
+        with self._lock:
+            job = self._jobs.get(request_id)
+            if job is None or job.state == state or state not in _TRANSITIONS[job.state]:
+                return False
+            job.state = state
+            job.updated_at = time.time()
+            if message is not None:
+                job.message = message
+            self._schedule_locked(job)
+            self._save_locked()
+        self._notify(job)
+        return True
+
+    def fail(self, request_id: str, message: str) -> bool:
+        return self.transition(request_id, JobState.FAILED, message)
+
+    def update_progress(self, request_id: str, transferred: int):
+        """记录已传输字节数（高频调用，只更新内存）"""
+        job = self._jobs.get(request_id)
+        if job is not None:
+            job.transferred = transferred
+
+    def load(self) -> List[TransferJob]:
+        """从磁盘恢复未结束的任务，返回恢复的任务列表"""
+        if not self._path or not self._path.exists():
+            return []
+        try:
+            items = json.loads(self._path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"[TransferJobRegistry] 读取任务记录失败: {e}")
+            return []
+        restored = []
+        with self._lock:
+            for item in items if isinstance(items, list) else []:
+                try:
+                    job = TransferJob.from_dict(item)
+                except Exception:
+                    continue
+                if job.finished or job.request_id in self._jobs:
+                    continue
+                self._jobs[job.request_id] = job
+                self._schedule_locked(job)
+                restored.append(job)
+        return restored
+
+    def close(self):
+        """停止过期定时器，保存未结束的任务并清空内存（再次 load 时恢复）"""
+        self._deadlines.stop()
+        with self._lock:
+            self._save_locked()
+            self._jobs.clear()
+
+    def _schedule_locked(self, job: TransferJob):
+        if job.finished:
+            self._deadlines.schedule(job.request_id, job.updated_at + self.FINISHED_RETENTION)
+        elif job.state == JobState.REQUESTED:
+            self._deadlines.schedule(job.request_id, job.created_at + self.REQUEST_TTL)
+        else:
+            # 已接受/传输中：由上传结果结束，不设截止时间
+            self._deadlines.cancel(job.request_id)
+
+    def _on_deadline(self, request_id: str):
+        with self._lock:
+            job = self._jobs.get(request_id)
+            if job is None:
+                return
+            if job.finished:
+                del self._jobs[request_id]
+                return
+        self.fail(request_id, "请求已过期")
+
+    def _save_locked(self):
+        """只保存未结束的任务（原子替换，写入失败不影响传输）"""
+        if not self._path:
+            return
+        try:
+            data = [asdict(j) for j in self._jobs.values() if not j.finished]
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_name(self._path.name + ".tmp")
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, self._path)
+        except Exception as e:
+            logger.warning(f"[TransferJobRegistry] 保存任务记录失败: {e}")
+
+    def _notify(self, job: TransferJob):
+        if self._on_changed:
+            try:
+                self._on_changed(job)
+            except Exception as e:
+                logger.error(f"[TransferJobRegistry] 状态回调异常: {e}", exc_info=True)
@@ -8,25 +8,35 @@ import logging
 import platform
 import sys
 import os
-import queue
-from typing import Optional, Callable, Dict
+import threading
+import time
+from dataclasses import replace
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Callable, Dict, List, Union
 from pathlib import Path
-from PySide6.QtCore import QObject, Signal, QTimer, Slot, QMetaObject, Qt, Q_ARG, QMetaObject, Qt
+from PySide6.QtCore import QObject, Signal, Slot, QMetaObject, Qt, Q_ARG, QMetaObject, Qt
 try:
     from shiboken6 import isValid as _qt_is_valid
 except Exception:  # pragma: no cover
     _qt_is_valid = None
 
-from utils.config_manager import ConfigManager
+from utils.config_manager import ConfigManager, CONFIG_PATH
+from utils.ui_dispatcher import UiEventQueue
 try:
     # IPVersion 在较新 zeroconf 版本存在；Win11 上强制 IPv4-only 可显著降低底层崩溃概率
     from zeroconf import Zeroconf, IPVersion  # type: ignore
 except Exception:  # pragma: no cover
     from zeroconf import Zeroconf  # type: ignore
     IPVersion = None  # type: ignore
-from .discovery import DeviceDiscovery, DeviceInfo, register_service, get_local_ip
+from .discovery import BeaconDiscovery, DeviceDiscovery, DeviceInfo, register_service, get_local_ip
 from .server import TransferServer
 from .client import TransferClient
+from .bundle import TransferBundle
+from .codec import SUPPORTED_CODECS
+from .scheduler import TransferScheduler, classify_priority, PRIORITY_BULK
+from .jobs import TransferJob, TransferJobRegistry, JobState, DIRECTION_SEND, DIRECTION_RECEIVE
+from .health import ReachabilityProber
+from .peer_cache import PeerCache
 
 logger = logging.getLogger(__name__)
 
@@ -45,10 +55,15 @@ class TransferManager(QObject):
     device_added = Signal(object)  # 设备添加（DeviceInfo）
     device_removed = Signal(str, str, str)  # 设备移除（user_id, ip, name）
     transfer_request_received = Signal(str, str, str, str, int, str, int)  # 收到传输请求 (request_id, sender_name, sender_id, filename, file_size, sender_ip, sender_port)
-    file_received = Signal(str, int, str)  # 文件接收 (save_path_str, file_size, original_filename)
-    transfer_progress = Signal(str, int, int)  # 传输进度 (target_name, uploaded, total)
+    file_received = Signal(str, int, str, str)  # 文件接收 (save_path_str, file_size, original_filename, request_id)
+    transfer_progress = Signal(str, int, int)  # 传输进度 (target_key, uploaded, total)；target_key 为 DeviceInfo.key
     receive_progress = Signal(str, int, int)  # 接收进度 (request_id, received, total)
-    transfer_completed = Signal(str, bool, str)  # 传输完成 (target_name, success, message)
+    receive_failed = Signal(str, str)  # 接收失败（不完整/校验失败，已丢弃）(request_id, message)
+    transfer_completed = Signal(str, bool, str)  # 传输完成 (target_key, success, message)
+    broadcast_completed = Signal(int, int)  # 一对多发送全部结束 (succeeded, total)
+    transfer_queued = Signal(str, int)  # 上传排队中（并发已满）(target_key, position)
+    transfer_started = Signal(str)  # 上传开始（离开队列）(target_key)
+    peer_health_changed = Signal(str, str, int)  # 设备健康等级变化 (user_id, ip, rank)，rank 见 health.HEALTH_*
     
     def __init__(self, user_id: str, user_name: str, avatar_url: Optional[str] = None,
                  group_id: Optional[str] = None, discover_scope: str = "all",
@@ -76,9 +91,22 @@ class TransferManager(QObject):
         self._device_name = self._get_device_name()
 
         # 组件
-        self._discovery: Optional[DeviceDiscovery] = None
+        # mDNS 发现；mDNS 整体禁用时为 UDP 信标发现（接口一致）
+        self._discovery: Optional[Union[DeviceDiscovery, BeaconDiscovery]] = None
         self._server: Optional[TransferServer] = None
         self._client = TransferClient(port=self._port)
+        # 上次在线的设备：启动时先展示（验证中），后台校验后保留或移除
+        self._peer_cache = PeerCache(CONFIG_PATH.parent / "airdrop_peers.json")
+        self._cached_peers: Dict[str, DeviceInfo] = {}  # key: user_id::ip，尚未被发现模块确认的缓存设备
+        self._cached_peers_lock = threading.Lock()
+        # 可达性探测：并发探测已知设备 /status，维护健康评分、尽快清理不可达设备、为多网卡设备选路
+        self._prober = ReachabilityProber(
+            probe=self._client.probe_status,
+            get_peers=self.get_devices,
+            on_unreachable=self._on_peer_unreachable,
+            on_rank_changed=self._on_peer_rank_changed,
+            on_recovered=self._on_peer_recovered,
+        )
         self._zeroconf = None
         self._service_info = None
         self._local_ip = None  # 当前设备的 IP 地址，用于过滤自己
@@ -86,23 +114,19 @@ class TransferManager(QObject):
 
         # 跨线程事件投递到 Qt 主线程（避免在非主线程 emit Qt 信号导致 Qt6Core.dll 0xc0000005）
         # 说明：DeviceDiscovery/TransferServer 的回调都在后台线程触发，必须先切回 QObject 所在线程再 emit。
-        self._ui_event_queue: "queue.Queue[Callable[[], None]]" = queue.Queue()
-        self._ui_dispatch_enabled: bool = True
+        # 传输进度等高频事件按 key 合并，UI 线程按帧率批量执行
+        self._ui_events = UiEventQueue(self, "TransferManager")
         try:
             self.destroyed.connect(self._on_destroyed)  # type: ignore[attr-defined]
         except Exception:
             pass
-        # UI 线程任务调度器：周期性 drain 队列（避免从 Python Thread 里 invokeMethod/emit signal）
-        self._ui_dispatch_timer = QTimer(self)
-        self._ui_dispatch_timer.setInterval(20)
-        self._ui_dispatch_timer.timeout.connect(self._drain_ui_events)
-        self._ui_dispatch_timer.start()
 
         # 可选禁用 mDNS/zeroconf（用于排查 Windows 上的 Access Violation）
         # AI_PERF_DISABLE_MDNS=1      -> 同时关闭广播+发现
         # AI_PERF_DISABLE_MDNS_REGISTER=1 -> 仅关闭广播（仍能发现别人）
         # AI_PERF_DISABLE_MDNS_BROWSE=1   -> 仅关闭发现（仍能被别人发现）
         cfg_mdns_enabled = True
+        cfg: dict = {}
         try:
             cfg = ConfigManager.load()
             cfg_mdns_enabled = bool(cfg.get("airdrop_mdns_enabled", True))
@@ -110,6 +134,25 @@ class TransferManager(QObject):
             cfg_mdns_enabled = True
 
         self._disable_mdns = (os.environ.get("AI_PERF_DISABLE_MDNS") == "1") or (not cfg_mdns_enabled)
+
+        # 发送调度：全局限速、单任务限速、优先级与并发上限（配置单位 KB/s，0 表示不限速）
+        rate_limit_kbps = per_transfer_kbps = 0
+        max_concurrent = 2
+        try:
+            rate_limit_kbps = int(cfg.get("airdrop_rate_limit_kbps", 0) or 0)
+            per_transfer_kbps = int(cfg.get("airdrop_per_transfer_rate_kbps", 0) or 0)
+            max_concurrent = int(cfg.get("airdrop_max_concurrent_sends", 2) or 2)
+        except Exception:
+            pass
+        # 传输任务登记（按 request_id 记录状态，未结束的任务持久化，重启后继续）
+        self._jobs = TransferJobRegistry(CONFIG_PATH.parent / "airdrop_jobs.json")
+        self._scheduler = TransferScheduler(
+            max_concurrent=max_concurrent,
+            rate_limit=rate_limit_kbps * 1024,
+            per_transfer_rate=per_transfer_kbps * 1024,
+            on_queued=self._on_upload_queued,
+            on_started=self._on_upload_started,
+        )
         self._disable_mdns_register = os.environ.get("AI_PERF_DISABLE_MDNS_REGISTER") == "1" or self._disable_mdns
         self._disable_mdns_browse = os.environ.get("AI_PERF_DISABLE_MDNS_BROWSE") == "1" or self._disable_mdns
         
@@ -119,15 +162,15 @@ class TransferManager(QObject):
         """
         从任意线程安全地把工作投递到 TransferManager 所在线程（通常是 UI 主线程）。
         """
-        if not self._ui_dispatch_enabled:
-            return
         # 不在后台线程调用 shiboken6.isValid（Win11/Qt6 环境下有概率引发原生崩溃）；
-        # 直接 try/except + destroyed 标志即可。
-        try:
-            self._ui_event_queue.put_nowait(fn)
-        except Exception as e:
-            logger.error(f"[TransferManager] enqueue ui event failed: {e}", exc_info=True)
-            return
+        # 队列内部只做 Python 操作，owner 销毁后 close() 会丢弃后续投递。
+        self._ui_events.post(fn)
+
+    def _post_latest_to_ui_thread(self, key, fn: Callable[[], None]) -> None:
+        """
+        投递可合并事件（如进度）：同一 key 在 UI 线程执行前只保留最新一次。
+        """
+        self._ui_events.post_latest(key, fn)
 
     def _create_zeroconf(self) -> Zeroconf:
         """
@@ -145,31 +188,7 @@ class TransferManager(QObject):
     @Slot()
     def _on_destroyed(self) -> None:
         # QObject 销毁后，禁止继续向其投递事件
-        self._ui_dispatch_enabled = False
-        try:
-            if hasattr(self, "_ui_dispatch_timer") and self._ui_dispatch_timer:
-                self._ui_dispatch_timer.stop()
-        except Exception:
-            pass
-
-    @Slot()
-    def _drain_ui_events(self) -> None:
-        """
-        在 UI 线程执行队列中的事件。
-        """
-        while True:
-            try:
-                fn = self._ui_event_queue.get_nowait()
-            except queue.Empty:
-                break
-            except Exception as e:
-                logger.error(f"[TransferManager] dequeue ui event failed: {e}", exc_info=True)
-                break
-
-            try:
-                fn()
-            except Exception as e:
-                logger.error(f"[TransferManager] ui event execution failed: {e}", exc_info=True)
+        self._ui_events.close()
     
     def start(self):
         """启动传输服务"""
@@ -185,7 +204,9 @@ class TransferManager(QObject):
                 save_dir=self._save_dir,
                 on_transfer_request=self._on_transfer_request,
                 on_file_received=self._on_file_received,
-                on_receive_progress=self._on_receive_progress
+                on_receive_progress=self._on_receive_progress,
+                on_receive_failed=self._on_receive_failed,
+                status_info={"user_id": str(self._user_id)}
             )
             self._server.start()
             
@@ -221,7 +242,28 @@ class TransferManager(QObject):
                 )
             
             # 发现（浏览服务）
-            if self._disable_mdns_browse:
+            if self._disable_mdns:
+                # mDNS 整体禁用：改用 UDP 信标（同时负责被发现与发现他人）
+                logger.warning("[TransferManager] mDNS 已禁用，使用 UDP 信标发现设备")
+                self._discovery = BeaconDiscovery(
+                    port=self._port,
+                    user_id=self._user_id,
+                    user_name=self._user_name,
+                    avatar_url=self._avatar_url,
+                    device_name=self._device_name,
+                    group_id=self._group_id,
+                    discover_scope=self._discover_scope,
+                    on_device_added=self._on_device_added,
+                    on_device_removed=self._on_device_removed,
+                    local_ip=self._local_ip,
+                )
+                try:
+                    self._discovery.start()
+                except OSError as e:
+                    # 端口被占用/网络不可用时不影响直连传输
+                    logger.error(f"[TransferManager] 启动 UDP 信标发现失败: {e}")
+                    self._discovery = None
+            elif self._disable_mdns_browse:
                 logger.warning("[TransferManager] AI_PERF_DISABLE_MDNS_BROWSE=1，跳过 mDNS 发现（仅能被他人发现或直连 IP）")
             else:
                 _debug_log("Starting DeviceDiscovery...")
@@ -234,8 +276,13 @@ class TransferManager(QObject):
                 )
                 self._discovery.start()
             
+            if self._discovery:
+                self._restore_cached_peers()
+                self._prober.start()
+            
             self._running = True
             logger.info("文件传输管理器已启动")
+            self._resume_jobs()
             _debug_log("TransferManager started successfully")
         except Exception as e:
             logger.error(f"启动文件传输管理器失败: {e}")
@@ -249,6 +296,10 @@ class TransferManager(QObject):
         
         _debug_log("TransferManager.stop() called")
         try:
+            self._prober.stop()
+            self._peer_cache.flush()
+            with self._cached_peers_lock:
+                self._cached_peers.clear()
             if self._discovery:
                 try:
                     self._discovery.stop()
@@ -276,6 +327,11 @@ class TransferManager(QObject):
                 self._server.stop()
                 self._server = None
             
+            dropped = self._scheduler.cancel_pending()
+            if dropped:
+                logger.info(f"[TransferManager] 丢弃 {dropped} 个排队中的上传（任务记录已保存，下次启动继续）")
+            self._jobs.close()
+            
             self._running = False
             logger.info("文件传输管理器已停止")
             _debug_log("TransferManager stopped")
@@ -294,6 +350,10 @@ class TransferManager(QObject):
         if not self._running:
             return
         
+        if isinstance(self._discovery, BeaconDiscovery):
+            self._discovery.set_discover_scope(self._discover_scope)
+            return
+        
         # 1) 如果关闭广播
         if self._discover_scope == "none":
             if self._zeroconf and self._service_info:
@@ -345,6 +405,11 @@ class TransferManager(QObject):
         if not self._discovery:
             return []
         devices = self._discovery.get_devices()
+        # 合并尚未被发现模块确认的缓存设备
+        with self._cached_peers_lock:
+            if self._cached_peers:
+                discovered = {f"{d.user_id}::{d.ip}" for d in devices}
+                devices = devices + [d for k, d in self._cached_peers.items() if k not in discovered]
         # 过滤“自己”：同 user_id 且同 IP 的设备不应展示
         try:
             local_ip = self._local_ip
@@ -354,71 +419,58 @@ class TransferManager(QObject):
             pass
         return devices
     
-    def send_file(self, file_path: Path, target_device: DeviceInfo,
+    def send_file(self, file_path: Union[Path, TransferBundle], target_device: DeviceInfo,
                   on_progress: Optional[Callable[[int, int], None]] = None):
         """
         发送文件到目标设备（两步传输）
         
         Args:
-            file_path: 文件路径
+            file_path: 文件路径，或 TransferBundle（多文件/文件夹打包）
             target_device: 目标设备信息
             on_progress: 进度回调 (uploaded, total)
         """
+        target_key = target_device.key
+        
         def progress_callback(uploaded: int, total: int):
             if on_progress:
                 on_progress(uploaded, total)
             # 避免在后台线程 emit Qt 信号
-            self._post_to_ui_thread(lambda n=target_device.name, u=uploaded, t=total: self.transfer_progress.emit(n, u, t))
+            self._post_latest_to_ui_thread(("send", target_key), lambda k=target_key, u=uploaded, t=total: self.transfer_progress.emit(k, u, t))
         
         def send_in_thread():
             # 第一步：发送传输请求
-            request_result = self._client.send_transfer_request(
-                file_path=file_path,
-                target_ip=target_device.ip,
-                target_port=target_device.port,
-                sender_name=self._user_name,
-                sender_id=self._user_id
-            )
+            request_result = self.send_transfer_request(file_path, target_device)
             
             if not request_result["success"]:
                 self._post_to_ui_thread(
-                    lambda n=target_device.name, m=request_result["message"]: self.transfer_completed.emit(n, False, m)
+                    lambda k=target_key, m=request_result["message"]: self.transfer_completed.emit(k, False, m)
                 )
                 return
             
             request_id = request_result["request_id"]
             
-            # 等待用户确认（这里需要等待，但实际应该由UI处理）
-            # 暂时等待5秒，实际应该由UI调用confirm_transfer
-            import time
-            time.sleep(1)  # 给接收端一点时间处理请求
-            
-            # 检查请求状态（这里简化处理，实际应该由UI控制）
-            # 第二步：确认传输（假设接受，实际应该由接收端UI决定）
-            # 注意：这里不应该自动确认，应该等待接收端响应
-            # 暂时跳过确认步骤，直接传输（实际应该由接收端UI调用confirm_transfer）
+            # 第二步：等待接收端确认（长轮询，接收端点击接受后立即返回）
+            confirm_result = self.wait_for_confirm(request_id, target_device, timeout=60)
+            if not confirm_result.get("accepted"):
+                self._post_to_ui_thread(
+                    lambda k=target_key, m=confirm_result["message"]: self.transfer_completed.emit(k, False, m)
+                )
+                return
             
-            # 第三步：传输文件
-            result = self._client.send_file(
-                file_path=file_path,
-                target_ip=target_device.ip,
-                target_port=target_device.port,
-                request_id=request_id,
-                on_progress=progress_callback
-            )
-            self._post_to_ui_thread(
-                lambda n=target_device.name, s=result.get("success", False), m=result.get("message", ""): self.transfer_completed.emit(n, s, m)
-            )
+            # 第三步：传输文件（交给调度器排队、限速）
+            self._submit_upload(file_path, target_device, request_id, progress_callback)
         
-        # 在后台线程中发送
+        # 在后台线程中发送请求、等待确认（不占用调度器的并发名额）
         import threading
         thread = threading.Thread(target=send_in_thread, daemon=True)
         thread.start()
     
-    def send_transfer_request(self, file_path: Path, target_device: DeviceInfo) -> dict:
+    def send_transfer_request(self, file_path: Union[Path, TransferBundle], target_device: DeviceInfo) -> dict:
         """
         发送传输请求（第一步）
         
+        file_path 可以是单个文件，也可以是 TransferBundle（多文件/文件夹只需一次请求和确认）
+        
         Returns:
             {
                 "success": bool,
@@ -426,13 +478,106 @@ class TransferManager(QObject):
                 "message": str
             }
         """
-        return self._client.send_transfer_request(
+        # 多网卡设备选择当前评分最高的地址，之后的确认/上传沿用同一地址（记录在任务里）
+        target_key = target_device.key
+        target_device = self._route(target_device)
+        result = self._client.send_transfer_request(
             file_path=file_path,
             target_ip=target_device.ip,
             target_port=target_device.port,
             sender_name=self._user_name,
             sender_id=self._user_id
         )
+        if result.get("success") and result.get("request_id"):
+            is_bundle = isinstance(file_path, TransferBundle)
+            self._jobs.add(TransferJob(
+                request_id=result["request_id"],
+                direction=DIRECTION_SEND,
+                filename=file_path.name,
+                file_size=file_path.stream_size if is_bundle else file_path.stat().st_size,
+                peer_name=target_device.name,
+                peer_id=target_device.user_id,
+                peer_ip=target_device.ip,
+                peer_port=target_device.port,
+                peer_key=target_key,
+                source_paths=[str(p) for p in (file_path.source_paths if is_bundle else [file_path])],
+                is_bundle=is_bundle,
+                inline=bool(result.get("inline")),
+                codec=result.get("codec"),
+                with_hash=bool(result.get("with_hash")),
+            ))
+        return result
+    
+    def wait_for_confirm(self, request_id: str, target_device: DeviceInfo, timeout: int = 60) -> dict:
+        """
+        等待接收端确认（第二步，阻塞，需在后台线程调用），同时更新任务状态
+        
+        Returns:
+            {"success": bool, "accepted": bool, "message": str}
+        """
+        target_device = self._route_for_job(request_id, target_device)
+        result = self._client.wait_for_confirm(
+            request_id=request_id,
+            target_ip=target_device.ip,
+            target_port=target_device.port,
+            timeout=timeout
+        )
+        if result.get("accepted"):
+            job = self._jobs.get(request_id)
+            if job is not None and job.inline and not result.get("inline"):
+                # 接收端没有用上内嵌内容（已被取走/请求重建），按普通请求等待上传
+                logger.info(f"[TransferManager] 接收端未使用内嵌内容，改为上传: {request_id}")
+                job.inline = False
+            self._jobs.transition(request_id, JobState.ACCEPTED)
+        else:
+            self._jobs.fail(request_id, result.get("message", ""))
+        return result
+    
+    def get_job(self, request_id: str) -> Optional[TransferJob]:
+        """按 request_id 查找传输任务（发送或接收）"""
+        return self._jobs.get(request_id)
+    
+    def confirm_incoming(self, request_id: str, accepted: bool, fallback: Optional[dict] = None):
+        """
+        接收端接受/拒绝收到的请求（立即唤醒发送端的长轮询）
+        
+        Args:
+            fallback: 服务器端已无该请求时用于重建的请求信息，见 TransferServer.confirm_transfer
+        """
+        if self._server:
+            self._server.confirm_transfer(request_id, accepted, fallback=fallback)
+        if accepted:
+            self._jobs.transition(request_id, JobState.ACCEPTED)
+        else:
+            self._jobs.fail(request_id, "已拒绝")
+    
+    def accept_inline(self, request_id: str, fallback: Optional[dict] = None) -> Optional[bytes]:
+        """
+        接受内嵌了剪贴板内容的请求：取出内容并确认（发送端不会再上传）
+        
+        Returns:
+            内嵌内容；请求没有内嵌内容（或内容已不可用）时返回 None 且不做确认，
+            调用方走普通的 confirm_incoming，发送端会收到非内嵌的确认并照常上传
+        """
+        payload = self._server.take_inline_payload(request_id) if self._server else None
+        if payload is None:
+            return None
+        self.confirm_incoming(request_id, True, fallback=fallback)
+        self._jobs.transition(request_id, JobState.SENDING)
+        self._jobs.transition(request_id, JobState.DONE)
+        return payload
+    
+    def save_inline_payload(self, filename: str, payload: bytes) -> Optional[Path]:
+        """把内嵌内容保存到接收目录（用户选择存为文件/打开时）"""
+        if not self._server:
+            return None
+        return self._server.save_inline_payload(filename, payload)
+    
+    def get_pending_request(self, request_id: str) -> Optional[dict]:
+        """获取接收端记录的传输请求信息（含 bundle/codec 等协商结果）"""
+        if not self._server:
+            return None
+        return self._server.get_pending_request(request_id)
     
     def confirm_transfer_request(self, request_id: str, target_ip: str, target_port: int, accepted: bool) -> dict:
         """
@@ -452,28 +597,53 @@ class TransferManager(QObject):
         """
         return self._client.confirm_transfer(request_id, target_ip, target_port, accepted)
     
-    def send_file_after_confirm(self, file_path: Path, target_device: DeviceInfo, request_id: str,
+    def send_file_after_confirm(self, file_path: Union[Path, TransferBundle], target_device: DeviceInfo,
+                                 request_id: str,
                                  on_progress: Optional[Callable[[int, int], None]] = None):
         """
         确认后发送文件（第三步）
         
         Args:
-            file_path: 文件路径
+            file_path: 文件路径，或 TransferBundle（多文件/文件夹打包）
             target_device: 目标设备信息
             request_id: 请求ID
             on_progress: 进度回调
         """
-        import sys
+        target_key = target_device.key
+        
         def progress_callback(uploaded: int, total: int):
             try:
                 if on_progress:
                     on_progress(uploaded, total)
                 # 避免在后台线程 emit Qt 信号
-                self._post_to_ui_thread(lambda n=target_device.name, u=uploaded, t=total: self.transfer_progress.emit(n, u, t))
+                self._post_latest_to_ui_thread(("send", target_key), lambda k=target_key, u=uploaded, t=total: self.transfer_progress.emit(k, u, t))
             except Exception as e:
                 logger.error(f"[TransferManager] 进度回调异常: {e}", exc_info=True)
         
-        def send_in_thread():
+        self._submit_upload(file_path, target_device, request_id, progress_callback)
+    
+    def _submit_upload(self, file_path: Union[Path, TransferBundle], target_device: DeviceInfo,
+                       request_id: str, progress_callback: Callable[[int, int], None],
+                       target_key: Optional[str] = None):
+        """
+        把单设备上传交给调度器（按优先级排队、限速、限制并发）
+
+        target_key 为信号中使用的设备标识，默认取 target_device.key
+        """
+        target_key = target_key or target_device.key
+        if self._finish_inline_job(request_id, target_key, progress_callback):
+            return
+        target_device = self._route_for_job(request_id, target_device)
+        
+        def tracked_progress(uploaded: int, total: int):
+            self._track_upload_progress(request_id, uploaded, total)
+            progress_callback(uploaded, total)
+        
+        job = self._jobs.get(request_id)
+        
+        def upload(throttle: Callable[[int], None]):
+            self._jobs.transition(request_id, JobState.SENDING)
+            started = time.monotonic()
             try:
                 logger.info(f"[TransferManager] 开始发送文件: {file_path} -> {target_device.ip}:{target_device.port}")
                 result = self._client.send_file(
@@ -481,37 +651,281 @@ class TransferManager(QObject):
                     target_ip=target_device.ip,
                     target_port=target_device.port,
                     request_id=request_id,
-                    on_progress=progress_callback
+                    on_progress=tracked_progress,
+                    throttle=throttle,
+                    codec=job.codec if job else None,
+                    with_hash=job.with_hash if job else False
                 )
                 logger.info(f"[TransferManager] 文件发送完成: success={result.get('success')}, message={result.get('message')}")
+                self._finish_upload_job(request_id, result, target_device, time.monotonic() - started)
                 self._post_to_ui_thread(
-                    lambda n=target_device.name, s=result.get("success", False), m=result.get("message", ""): self.transfer_completed.emit(n, s, m)
+                    lambda k=target_key, s=result.get("success", False), m=result.get("message", ""): self.transfer_completed.emit(k, s, m)
                 )
             except Exception as e:
                 logger.error(f"[TransferManager] 发送文件时发生异常: {e}", exc_info=True)
+                self._jobs.fail(request_id, f"发送失败: {e}")
                 self._post_to_ui_thread(
-                    lambda n=target_device.name, m=str(e): self.transfer_completed.emit(n, False, f"发送失败: {m}")
+                    lambda k=target_key, m=str(e): self.transfer_completed.emit(k, False, f"发送失败: {m}")
                 )
         
+        self._scheduler.submit(upload, self._upload_priority(file_path), [target_key])
+    
+    def _finish_inline_job(self, request_id: str, target_key: str,
+                           progress_callback: Optional[Callable[[int, int], None]] = None) -> bool:
+        """内容已内嵌在请求中并被接受：无需上传，直接完成。返回是否为内嵌任务"""
+        job = self._jobs.get(request_id)
+        if job is None or not job.inline:
+            return False
+        self._jobs.transition(request_id, JobState.SENDING)
+        self._jobs.transition(request_id, JobState.DONE)
+        if progress_callback:
+            progress_callback(job.file_size, job.file_size)
+        self._post_to_ui_thread(lambda k=target_key: self.transfer_completed.emit(k, True, "发送成功"))
+        return True
+    
+    def _track_upload_progress(self, request_id: str, uploaded: int, total: int):
+        self._jobs.update_progress(request_id, uploaded)
+        if uploaded >= total:
+            # 数据已全部发出，等待接收端校验摘要并落盘
+            self._jobs.transition(request_id, JobState.VERIFYING)
+    
+    def _finish_upload_job(self, request_id: str, result: dict,
+                           device: Optional[DeviceInfo] = None, elapsed: float = 0.0):
+        if result.get("success"):
+            job = self._jobs.get(request_id)
+            if device is not None and job is not None:
+                self._prober.record_throughput(device.ip, device.port, job.file_size, elapsed)
+            self._jobs.transition(request_id, JobState.DONE)
+        else:
+            self._jobs.fail(request_id, result.get("message", ""))
+    
+    @staticmethod
+    def _upload_priority(file_path: Union[Path, TransferBundle]) -> int:
+        if isinstance(file_path, TransferBundle):
+            return classify_priority(file_path.name, file_path.stream_size)
+        try:
+            return classify_priority(file_path.name, file_path.stat().st_size)
+        except OSError:
+            return PRIORITY_BULK
+    
+    def send_file_to_devices(self, file_path: Union[Path, TransferBundle], target_devices: List[DeviceInfo],
+                             confirm_timeout: int = 60):
+        """
+        一对多发送：并行向多台设备发送请求，文件只读取一遍同时上传给所有已接受的设备
+        
+        每台设备各自走 transfer_progress / transfer_completed 信号（与单设备发送一致），
+        全部结束后发出 broadcast_completed(成功数, 设备数)。
+        
+        Args:
+            file_path: 文件路径，或 TransferBundle（多文件/文件夹打包）
+            target_devices: 目标设备列表
+            confirm_timeout: 等待每台设备接受的超时时间（秒）
+        """
+        devices = list(target_devices)
+        if not devices:
+            return
+        
+        def request_and_wait(device: DeviceInfo) -> Optional[str]:
+            """发送请求并等待接受，返回 request_id；失败时直接发出该设备的完成信号"""
+            result = self.send_transfer_request(file_path, device)
+            request_id = result.get("request_id")
+            if result["success"] and request_id:
+                result = self.wait_for_confirm(request_id, device, timeout=confirm_timeout)
+                if result.get("accepted"):
+                    return request_id
+            self._post_to_ui_thread(
+                lambda k=device.key, m=result.get("message", ""): self.transfer_completed.emit(k, False, m)
+            )
+            return None
+        
+        def send_in_thread():
+            try:
+                def request_one(device: DeviceInfo) -> Optional[str]:
+                    try:
+                        return request_and_wait(device)
+                    except Exception as e:
+                        logger.error(f"[TransferManager] 一对多请求失败: {device.ip}: {e}", exc_info=True)
+                        self._post_to_ui_thread(
+                            lambda k=device.key, m=str(e): self.transfer_completed.emit(k, False, f"发送失败: {m}")
+                        )
+                        return None
+                
+                # 第一步/第二步：并行发送请求、并行等待接受
+                with ThreadPoolExecutor(max_workers=min(len(devices), 16)) as pool:
+                    request_ids = list(pool.map(request_one, devices))
+                accepted = [(d, rid) for d, rid in zip(devices, request_ids) if rid]
+                # 内嵌内容的设备接受即完成，其余设备共享一次文件读取
+                inline_done = [(d, rid) for d, rid in accepted if self._finish_inline_job(rid, d.key)]
+                accepted = [item for item in accepted if item not in inline_done]
+                if inline_done and not accepted:
+                    self._post_to_ui_thread(lambda s=len(inline_done), t=len(devices): self.broadcast_completed.emit(s, t))
+                    return
+                if not accepted:
+                    self._post_to_ui_thread(lambda t=len(devices): self.broadcast_completed.emit(0, t))
+                    return
+                
+                # 第三步：文件读取一遍，扇出给所有已接受的设备（作为一个任务交给调度器）
+                def progress_callback(index: int, uploaded: int, total: int):
+                    device, rid = accepted[index]
+                    self._track_upload_progress(rid, uploaded, total)
+                    self._post_latest_to_ui_thread(("send", device.key), lambda k=device.key, u=uploaded, t=total: self.transfer_progress.emit(k, u, t))
+                
+                def upload(throttle: Callable[[int], None]):
+                    succeeded = len(inline_done)
+                    for _, rid in accepted:
+                        self._jobs.transition(rid, JobState.SENDING)
+                    started = time.monotonic()
+                    try:
+                        routes = [self._route_for_job(rid, d) for d, rid in accepted]
+                        jobs = [self._jobs.get(rid) for _, rid in accepted]
+                        results = self._client.send_file_to_many(
+                            file_path,
+                            [
+                                (r.ip, r.port, rid, job.codec if job else None, job.with_hash if job else False)
+                                for r, (_, rid), job in zip(routes, accepted, jobs)
+                            ],
+                            on_progress=progress_callback,
+                            throttle=throttle
+                        )
+                        elapsed = time.monotonic() - started
+                        for (device, rid), route, result in zip(accepted, routes, results):
+                            self._finish_upload_job(rid, result, route, elapsed)
+                            ok = bool(result.get("success", False))
+                            succeeded += ok
+                            self._post_to_ui_thread(
+                                lambda k=device.key, s=ok, m=result.get("message", ""): self.transfer_completed.emit(k, s, m)
+                            )
+                        logger.info(f"[TransferManager] 一对多发送完成: {succeeded}/{len(devices)}")
+                    except Exception as e:
+                        logger.error(f"[TransferManager] 一对多发送异常: {e}", exc_info=True)
+                        for _, rid in accepted:
+                            self._jobs.fail(rid, f"发送失败: {e}")
+                    self._post_to_ui_thread(lambda s=succeeded, t=len(devices): self.broadcast_completed.emit(s, t))
+                
+                self._scheduler.submit(upload, self._upload_priority(file_path), [d.key for d, _ in accepted])
+            except Exception as e:
+                logger.error(f"[TransferManager] 一对多发送异常: {e}", exc_info=True)
+                self._post_to_ui_thread(lambda t=len(devices): self.broadcast_completed.emit(0, t))
+        
         import threading
         thread = threading.Thread(target=send_in_thread, daemon=True)
         thread.start()
     
     # 兼容旧代码：保留槽函数名，避免外部 invokeMethod 失败（内部已统一走 _post_to_ui_thread）
     @Slot(str, bool, str)
-    def _emit_transfer_completed_slot(self, target_name: str, success: bool, message: str):
+    def _emit_transfer_completed_slot(self, target_key: str, success: bool, message: str):
         try:
-            self.transfer_completed.emit(target_name, success, message)
+            self.transfer_completed.emit(target_key, success, message)
         except Exception as e:
             logger.error(f"[TransferManager] 发送传输完成信号失败: {e}", exc_info=True)
 
     @Slot(str, int, int)
-    def _emit_transfer_progress_slot(self, target_name: str, uploaded: int, total: int):
+    def _emit_transfer_progress_slot(self, target_key: str, uploaded: int, total: int):
         try:
-            self.transfer_progress.emit(target_name, uploaded, total)
+            self.transfer_progress.emit(target_key, uploaded, total)
         except Exception as e:
             logger.error(f"[TransferManager] 发送传输进度信号失败: {e}", exc_info=True)
     
+    def set_rate_limit(self, kbps: int):
+        """设置全局上传限速（KB/s，0 表示不限速），对进行中的上传立即生效"""
+        self._scheduler.set_rate_limit(max(0, int(kbps or 0)) * 1024)
+    
+    def get_rate_limit(self) -> int:
+        """当前全局上传限速（KB/s，0 表示不限速）"""
+        return int(self._scheduler.rate_limit // 1024)
+    
+    def _on_upload_queued(self, targets: tuple, position: int):
+        for key in targets:
+            self._post_to_ui_thread(lambda k=key, p=position: self.transfer_queued.emit(k, p))
+    
+    def _on_upload_started(self, targets: tuple):
+        for key in targets:
+            self._post_to_ui_thread(lambda k=key: self.transfer_started.emit(k))
+    
+    def _route(self, device: DeviceInfo) -> DeviceInfo:
+        """按探测结果选择设备的最佳地址（返回副本，设备标识仍以 discovery 的主地址为准）"""
+        best_ip = self._prober.best_ip(device)
+        return device if best_ip == device.ip else replace(device, ip=best_ip)
+    
+    def _route_for_job(self, request_id: str, device: DeviceInfo) -> DeviceInfo:
+        """同一请求的确认/上传沿用发送请求时选定的地址"""
+        job = self._jobs.get(request_id)
+        if job is not None and job.peer_ip and job.peer_ip != device.ip:
+            return replace(device, ip=job.peer_ip)
+        return device
+    
+    def get_peer_health_rank(self, device: DeviceInfo) -> int:
+        """设备健康等级（health.HEALTH_GOOD/SLOW/DOWN），未探测过按 GOOD"""
+        return self._prober.rank(device)
+    
+    def _on_peer_unreachable(self, device: DeviceInfo):
+        """探测确认设备所有地址都不可达：交给发现模块做离线处理（探测线程）"""
+        self._drop_cached_peer(device)
+        discovery = self._discovery
+        if discovery:
+            discovery.mark_unreachable(device.user_id, device.ip)
+    
+    def _on_peer_recovered(self, device: DeviceInfo):
+        """此前判定不可达的设备重新探测成功：交给发现模块重新加入（经 device_added 回到界面，探测线程）"""
+        discovery = self._discovery
+        if discovery and discovery.mark_reachable(device):
+            logger.info(f"[TransferManager] 设备恢复可达，已重新加入: {device.name} ({device.ip})")
+    
+    def _restore_cached_peers(self):
+        """展示上次在线的设备（验证中），并在后台并发校验"""
+        peers = []
+        with self._cached_peers_lock:
+            for device in self._peer_cache.load():
+                if device.user_id == self._user_id and device.ip == self._local_ip:
+                    continue
+                device = replace(device, revalidating=True)
+                self._cached_peers[f"{device.user_id}::{device.ip}"] = device
+                peers.append(device)
+        if not peers:
+            return
+        logger.info(f"[TransferManager] 从缓存恢复 {len(peers)} 台设备（验证中）")
+        for device in peers:
+            self._post_to_ui_thread(lambda d=device: self.device_added.emit(d))
+        threading.Thread(target=self._revalidate_cached_peers, args=(peers,), daemon=True).start()
+    
+    def _revalidate_cached_peers(self, peers: List[DeviceInfo]):
+        """并发请求缓存设备的 /status：可达且 user_id 一致则确认，否则移除"""
+        def check(device: DeviceInfo) -> bool:
+            for ip in [device.ip] + [a for a in device.addresses if a != device.ip]:
+                status = self._client.fetch_status(ip, device.port, timeout=ReachabilityProber.TIMEOUT)
+                if status is not None:
+                    # 旧版本客户端的 /status 不带 user_id，可达即认为仍是同一设备
+                    return str(status.get("user_id", device.user_id)) == str(device.user_id)
+            return False
+        
+        with ThreadPoolExecutor(max_workers=min(len(peers), ReachabilityProber.MAX_WORKERS)) as pool:
+            results = list(pool.map(check, peers))
+        for device, alive in zip(peers, results):
+            key = f"{device.user_id}::{device.ip}"
+            if not alive:
+                logger.info(f"[TransferManager] 缓存设备已不可用，移除: {device.name} ({device.ip})")
+                self._drop_cached_peer(device)
+                continue
+            confirmed = replace(device, revalidating=False)
+            with self._cached_peers_lock:
+                if key not in self._cached_peers:
+                    continue  # 已被发现模块确认（或已移除）
+                self._cached_peers[key] = confirmed
+            self._post_to_ui_thread(lambda d=confirmed: self.device_added.emit(d))
+    
+    def _drop_cached_peer(self, device: DeviceInfo):
+        """移除缓存设备（若仍在展示则通知界面）"""
+        with self._cached_peers_lock:
+            cached = self._cached_peers.pop(f"{device.user_id}::{device.ip}", None)
+        self._peer_cache.forget(device.user_id, device.ip)
+        if cached is not None:
+            self._post_to_ui_thread(
+                lambda uid=cached.user_id, dip=cached.ip, dn=cached.name: self.device_removed.emit(uid, dip, dn)
+            )
+    
+    def _on_peer_rank_changed(self, device: DeviceInfo, rank: int):
+        self._post_to_ui_thread(lambda uid=device.user_id, ip=device.ip, r=rank: self.peer_health_changed.emit(uid, ip, r))
+    
     def _on_device_added(self, device: DeviceInfo):
         """设备添加回调"""
         # 过滤掉自己（相同 user_id 且相同 IP），但保留同一账号的其他设备（相同 user_id 但不同 IP）
@@ -521,6 +935,9 @@ class TransferManager(QObject):
             return
         
         logger.info(f"[TransferManager] Device discovered: {device.name} ({device.ip}:{device.port}) user_id={device.user_id}, current_user_id={self._user_id}, local_ip={self._local_ip}")
+        with self._cached_peers_lock:
+            self._cached_peers.pop(f"{device.user_id}::{device.ip}", None)
+        self._peer_cache.remember(device)
         _debug_log(f"Discovered device: {device.name} ({device.ip}:{device.port}) user_id={device.user_id}")
         # DeviceDiscovery 回调通常在非 UI 线程，必须切回 UI 线程再 emit
         self._post_to_ui_thread(lambda d=device: self.device_added.emit(d))
@@ -528,6 +945,9 @@ class TransferManager(QObject):
     def _on_device_removed(self, user_id: str, ip: str, device_name: str):
         """设备移除回调"""
         _debug_log(f"Device removed: {device_name} (user_id={user_id}, ip={ip})")
+        with self._cached_peers_lock:
+            self._cached_peers.pop(f"{user_id}::{ip}", None)
+        self._peer_cache.forget(user_id, ip)
         # 过滤掉自己（相同 user_id 且相同 IP），但保留同一账号的其他设备（相同 user_id 但不同 IP）
         # 注意：这里不需要过滤，因为"自己"设备在添加时就被过滤了，不会出现在列表中
         # 但如果是"自己"的另一设备（相同 user_id 但不同 IP），需要正常处理
@@ -536,6 +956,18 @@ class TransferManager(QObject):
     def _on_transfer_request(self, request_id: str, sender_name: str, sender_id: str,
                              filename: str, file_size: int, sender_ip: str = None, sender_port: int = None):
         """传输请求回调"""
+        request_info = self._server.get_pending_request(request_id) if self._server else None
+        self._jobs.add(TransferJob(
+            request_id=request_id,
+            direction=DIRECTION_RECEIVE,
+            filename=filename,
+            file_size=file_size,
+            peer_name=sender_name,
+            peer_id=sender_id,
+            peer_ip=sender_ip or "",
+            peer_port=sender_port or 0,
+            is_bundle=bool(request_info and request_info.get('bundle') is not None),
+        ))
         # TransferServer 回调在 HTTPServer 线程
         self._post_to_ui_thread(
             lambda rid=request_id, sn=sender_name, sid=sender_id, fn=filename, fs=file_size, sip=(sender_ip or ""), sp=(sender_port or 8765):
@@ -544,14 +976,72 @@ class TransferManager(QObject):
     
     def _on_receive_progress(self, request_id: str, received: int, total: int):
         """接收进度回调"""
-        self._post_to_ui_thread(lambda rid=request_id, r=received, t=total: self.receive_progress.emit(rid, r, t))
+        job = self._jobs.get(request_id)
+        if job is not None:
+            job.transferred = received
+            if job.state == JobState.ACCEPTED:
+                self._jobs.transition(request_id, JobState.SENDING)
+            if received >= total:
+                self._jobs.transition(request_id, JobState.VERIFYING)
+        self._post_latest_to_ui_thread(("receive", request_id), lambda rid=request_id, r=received, t=total: self.receive_progress.emit(rid, r, t))
+    
+    def _on_receive_failed(self, request_id: str, message: str):
+        """接收失败回调（不完整或校验失败，接收端已丢弃临时文件）"""
+        self._jobs.fail(request_id, message)
+        self._post_to_ui_thread(lambda rid=request_id, m=message: self.receive_failed.emit(rid, m))
     
-    def _on_file_received(self, save_path: Path, file_size: int, original_filename: str):
+    def _on_file_received(self, save_path: Path, file_size: int, original_filename: str, request_id: str = ""):
         """文件接收回调"""
+        self._jobs.transition(request_id, JobState.DONE)
         self._post_to_ui_thread(
-            lambda p=str(save_path), s=file_size, n=original_filename: self.file_received.emit(p, s, n)
+            lambda p=str(save_path), s=file_size, n=original_filename, rid=request_id: self.file_received.emit(p, s, n, rid)
         )
     
+    def _resume_jobs(self):
+        """
+        恢复上次运行未结束的任务
+        
+        发送端：等待确认/已接受（排队中）的任务重新查询对方状态，仍有效则继续发送，
+        沿用任务里保存的压缩编码与摘要尾部设置（接收端按请求时的协商结果解码/校验）；
+        传输中被中断的任务和接收端任务无法续传，标记为失败。
+        """
+        for job in self._jobs.load():
+            if job.direction != DIRECTION_SEND or job.state not in (JobState.REQUESTED, JobState.ACCEPTED):
+                self._jobs.fail(job.request_id, "应用重启，传输已中断")
+                continue
+            sources = [Path(p) for p in job.source_paths]
+            if not sources or not all(p.exists() for p in sources):
+                self._jobs.fail(job.request_id, "源文件不存在")
+                continue
+            if job.codec and job.codec not in SUPPORTED_CODECS:
+                # 例如重启后缺少 zstandard：不压缩发送会被接收端按协商的编码解码失败
+                self._jobs.fail(job.request_id, f"本机不再支持压缩编码 {job.codec}")
+                continue
+            threading.Thread(target=self._resume_send_job, args=(job, sources), daemon=True).start()
+    
+    def _resume_send_job(self, job: TransferJob, sources: List[Path]):
+        try:
+            file_path = TransferBundle.from_paths(sources, name=job.filename) if job.is_bundle else sources[0]
+            device = DeviceInfo(name=job.peer_name, user_id=job.peer_id, ip=job.peer_ip, port=job.peer_port)
+            remaining = TransferJobRegistry.REQUEST_TTL - (time.time() - job.created_at)
+            # 已接受的请求会立即返回 accepted；对方已重启/过期则返回失败
+            result = self.wait_for_confirm(job.request_id, device, timeout=max(1, int(remaining)))
+            if not result.get("accepted"):
+                return
+            logger.info(
+                f"[TransferManager] 恢复未完成的发送: {job.filename} -> {device.ip}:{device.port} "
+                f"(codec={job.codec}, with_hash={job.with_hash})"
+            )
+            key = job.peer_key or device.key
+            self._submit_upload(
+                file_path, device, job.request_id,
+                lambda u, t, k=key: self._post_latest_to_ui_thread(("send", k), lambda: self.transfer_progress.emit(k, u, t)),
+                target_key=key
+            )
+        except Exception as e:
+            logger.error(f"[TransferManager] 恢复发送任务失败: {e}", exc_info=True)
+            self._jobs.fail(job.request_id, f"恢复失败: {e}")
+    
     def accept_transfer(self, request_id: str, target_ip: str, target_port: int) -> dict:
         """接受传输请求"""
         return self._client.confirm_transfer(request_id, target_ip, target_port, True)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+已发现设备的本地缓存
+
+打开 AirDrop 时先展示上次在线的设备（标记为“验证中”），再由后台校验：
+仍可达且 /status 返回的 user_id 一致的保留，其余移除。这样设备列表不必等 mDNS 应答即可使用。
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, fields
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .discovery import DeviceInfo
+
+logger = logging.getLogger(__name__)
+
+
+class PeerCache:
+    """设备缓存（线程安全，写入合并延迟执行）"""
+
+    # 超过该时长未见过的设备不再展示
+    MAX_AGE = 7 * 24 * 3600
+    MAX_ENTRIES = 200
+    SAVE_DELAY = 2.0  # seconds
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}  # key: user_id::ip
+        self._save_timer: Optional[threading.Timer] = None
+
+    def load(self) -> List[DeviceInfo]:
+        """读取缓存，返回最近见过的设备（按最近见到的时间倒序）"""
+        try:
+            items = json.loads(self._path.read_text(encoding="utf-8")) if self._path.exists() else []
+        except Exception as e:
+            logger.warning(f"[PeerCache] 读取设备缓存失败: {e}")
+            items = []
+        known = {f.name for f in fields(DeviceInfo)}
+        now = time.time()
+        devices = []
+        with self._lock:
+            self._entries.clear()
+            for item in items if isinstance(items, list) else []:
+                if not isinstance(item, dict) or now - float(item.get("last_seen", 0)) > self.MAX_AGE:
+                    continue
+                try:
+                    device = DeviceInfo(**{k: v for k, v in item.items() if k in known})
+                except Exception:
+                    continue
+                self._entries[f"{device.user_id}::{device.ip}"] = item
+                devices.append((item.get("last_seen", 0), device))
+        devices.sort(key=lambda x: x[0], reverse=True)
+        return [d for _, d in devices]
+
+    def remember(self, device: DeviceInfo):
+        """记录在线设备（更新最近见到的时间）"""
+        item = asdict(device)
+        item.pop("revalidating", None)
+        item["last_seen"] = time.time()
+        with self._lock:
+            self._entries[f"{device.user_id}::{device.ip}"] = item
+            if len(self._entries) > self.MAX_ENTRIES:
+                oldest = sorted(self._entries, key=lambda k: self._entries[k].get("last_seen", 0))
+                for key in oldest[:len(self._entries) - self.MAX_ENTRIES]:
+                    del self._entries[key]
+        self._schedule_save()
+
+    def forget(self, user_id: str, ip: str):
+        """设备已离线/校验失败，下次启动不再展示"""
+        with self._lock:
+            if self._entries.pop(f"{user_id}::{ip}", None) is None:
+                return
+        self._schedule_save()
+
+    def flush(self):
+        """立即写盘（退出时调用）"""
+        with self._lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+        self._save()
+
+    def _schedule_save(self):
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.SAVE_DELAY, self._save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save(self):
+        """原子替换写入，失败不影响发现"""
+        with self._lock:
+            self._save_timer = None
+            data = list(self._entries.values())
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path.with_name(self._path.name + ".tmp")
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, self._path)
+        except Exception as e:
+            logger.warning(f"[PeerCache] 保存设备缓存失败: {e}")
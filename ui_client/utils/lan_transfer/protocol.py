@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+传输协议常量（发送端与接收端共用）
+
+两端必须取相同的值，放在这里避免服务端反过来依赖发送端的调度模块。
+"""
+
+# 不超过该大小的剪贴板内容直接内嵌在 /transfer_request 中（接受即完成，不再上传）；
+# 接收端按同一上限校验内嵌内容的 base64 长度
+INLINE_MAX_SIZE = 256 * 1024
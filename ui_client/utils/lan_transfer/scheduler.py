@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+发送调度（限速 + 优先级 + 并发上限）
+
+所有上传都经由 TransferScheduler 排队执行，避免大文件占满上行带宽影响接口请求、屏幕共享等交互流量：
+- 全局令牌桶：限制所有上传的总速率（0 表示不限速）
+- 单任务令牌桶：限制每个上传任务的速率（剪贴板不受限）
+- 优先级：剪贴板 > 小文件 > 大文件，同优先级先到先发
+- 并发上限：同时进行的上传数量有限，多余的排队；剪贴板内容很小，不占并发名额直接发送
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 优先级（数值越小越优先）
+PRIORITY_CLIPBOARD = 0
+PRIORITY_SMALL = 1
+PRIORITY_BULK = 2
+
+# 不超过该大小视为小文件
+SMALL_FILE_SIZE = 8 * 1024 * 1024
+
+# 上传任务：接收一个限速函数 throttle(nbytes)，每发送 nbytes 字节前调用
+UploadTask = Callable[[Callable[[int], None]], None]
+
+
+def is_clipboard_file(filename: str) -> bool:
+    """剪贴板临时文件以 clipboard_ 开头"""
+    return Path(filename).name.startswith("clipboard_")
+
+
+def classify_priority(filename: str, size: int) -> int:
+    """根据文件名与大小确定优先级"""
+    if is_clipboard_file(filename):
+        return PRIORITY_CLIPBOARD
+    if size <= SMALL_FILE_SIZE:
+        return PRIORITY_SMALL
+    return PRIORITY_BULK
+
+
+class TokenBucket:
+    """令牌桶限速（线程安全，允许透支：单次请求大于桶容量时按欠额等待）"""
+
+    def __init__(self, rate: float = 0, burst: Optional[float] = None):
+        """
+        Args:
+            rate: 速率（字节/秒），<= 0 表示不限速
+            burst: 桶容量（字节），默认为 1/4 秒的流量
+        """
+        self._lock = threading.Lock()
+        self._rate = 0.0
+        self._burst = 0.0
+        self._fixed_burst = burst
+        self._tokens = 0.0
+        self._last = time.monotonic()
+        self.set_rate(rate)
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._rate = max(0.0, float(rate or 0))
+            self._burst = self._fixed_burst or max(self._rate / 4, 64 * 1024)
+            self._tokens = min(self._tokens, self._burst)
+            self._last = time.monotonic()
+
+    def consume(self, amount: int):
+        """取出 amount 个令牌，不足时阻塞等待"""
+        with self._lock:
+            if self._rate <= 0:
+                return
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._last) * self._rate)
+            self._last = now
+            self._tokens -= amount
+            delay = -self._tokens / self._rate if self._tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+
+
+class TransferScheduler:
+    """上传调度器：按优先级排队，限制并发与速率"""
+
+    def __init__(self, max_concurrent: int = 2, rate_limit: float = 0, per_transfer_rate: float = 0,
+                 on_queued: Optional[Callable[[Tuple[str, ...], int], None]] = None,
+                 on_started: Optional[Callable[[Tuple[str, ...]], None]] = None):
+        """
+        Args:
+            max_concurrent: 同时进行的上传数量上限（剪贴板除外）
+            rate_limit: 全局速率上限（字节/秒），0 表示不限速
+            per_transfer_rate: 单任务速率上限（字节/秒），0 表示不限速
+            on_queued: 任务进入等待队列时的回调 (targets, 排队位置，从 1 开始)，在调用 submit 的线程触发
+            on_started: 任务开始执行时的回调 (targets)，在调度线程触发
+        """
+        self._lock = threading.Lock()
+        self._max_concurrent = max(1, int(max_concurrent))
+        self._global_bucket = TokenBucket(rate_limit)
+        self._per_transfer_rate = max(0.0, float(per_transfer_rate or 0))
+        self._on_queued = on_queued
+        self._on_started = on_started
+        self._queue: List[Tuple[int, int, Tuple[str, ...], UploadTask]] = []  # (priority, seq, targets, job)
+        self._seq = itertools.count()
+        self._running = 0
+
+    @property
+    def rate_limit(self) -> float:
+        return self._global_bucket.rate
+
+    def set_rate_limit(self, rate: float):
+        """设置全局速率上限（字节/秒），对正在进行的上传立即生效"""
+        self._global_bucket.set_rate(rate)
+
+    def set_per_transfer_rate(self, rate: float):
+        """设置单任务速率上限（字节/秒），对之后开始的上传生效"""
+        self._per_transfer_rate = max(0.0, float(rate or 0))
+
+    def set_max_concurrent(self, value: int):
+        with self._lock:
+            self._max_concurrent = max(1, int(value))
+            started = self._pop_startable()
+        self._start(started)
+
+    def snapshot(self) -> dict:
+        """当前状态 {"running": int, "queued": int, "rate_limit": float}"""
+        with self._lock:
+            return {"running": self._running, "queued": len(self._queue), "rate_limit": self.rate_limit}
+
+    def submit(self, job: UploadTask, priority: int, targets: Sequence[str]):
+        """
+        提交上传任务
+
+        Args:
+            job: 上传函数，参数为限速函数 throttle(nbytes)
+            priority: PRIORITY_CLIPBOARD / PRIORITY_SMALL / PRIORITY_BULK
+            targets: 目标设备标识 DeviceInfo.key（用于排队/开始回调）
+        """
+        targets = tuple(targets)
+        position = 0
+        with self._lock:
+            key = (priority, next(self._seq))
+            heapq.heappush(self._queue, (*key, targets, job))
+            started = self._pop_startable()
+            if not any(item[3] is job for item in started):
+                position = 1 + sum(1 for item in self._queue if item[:2] < key)
+        self._start(started)
+        if position and self._on_queued:
+            try:
+                self._on_queued(targets, position)
+            except Exception as e:
+                logger.error(f"[TransferScheduler] 排队回调异常: {e}", exc_info=True)
+
+    def cancel_pending(self) -> int:
+        """丢弃所有尚未开始的任务（服务停止时调用），返回丢弃数量"""
+        with self._lock:
+            dropped = len(self._queue)
+            self._queue.clear()
+        return dropped
+
+    def _pop_startable(self) -> list:
+        """取出可以开始的任务（调用方持有锁）"""
+        started = []
+        while self._queue:
+            if self._queue[0][0] != PRIORITY_CLIPBOARD and self._running >= self._max_concurrent:
+                break
+            item = heapq.heappop(self._queue)
+            if item[0] != PRIORITY_CLIPBOARD:
+                self._running += 1
+            started.append(item)
+        return started
+
+    def _start(self, items: list):
+        for priority, _, targets, job in items:
+            threading.Thread(target=self._run, args=(priority, targets, job), daemon=True).start()
+
+    def _run(self, priority: int, targets: Tuple[str, ...], job: UploadTask):
+        bucket = None
+        if priority != PRIORITY_CLIPBOARD and self._per_transfer_rate > 0:
+            bucket = TokenBucket(self._per_transfer_rate)
+
+        def throttle(nbytes: int):
+            if bucket is not None:
+                bucket.consume(nbytes)
+            self._global_bucket.consume(nbytes)
+
+        try:
+            if self._on_started:
+                self._on_started(targets)
+            job(throttle)
+        except Exception as e:
+            logger.error(f"[TransferScheduler] 上传任务异常: {e}", exc_info=True)
+        finally:
+            with self._lock:
+                if priority != PRIORITY_CLIPBOARD:
+                    self._running -= 1
+                started = self._pop_startable()
+            self._start(started)
@@ -6,19 +6,86 @@
 """
 
 import os
+import base64
+import binascii
 import json
 import logging
+import contextlib
+import shutil
 import uuid
 from pathlib import Path
 from typing import Optional, Callable, Dict
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import threading
 import time
 
+from .integrity import HASH_HEADER, HASH_HEADER_VALUE, new_content_hasher, parse_hash_header
+from .codec import ENCODING_HEADER, SUPPORTED_CODECS, choose_codec, new_decompressor
+from .jobs import DeadlineHeap
+from .bundle import IterReader, extract_bundle_stream
+from .protocol import INLINE_MAX_SIZE
+
 logger = logging.getLogger(__name__)
 
 
+class _ReceiveError(Exception):
+    """接收数据与请求声明不符"""
+
+
+def _discard_partial(part_path: Path):
+    """删除未完成的临时文件/目录"""
+    if part_path.is_dir():
+        shutil.rmtree(part_path, ignore_errors=True)
+    else:
+        with contextlib.suppress(OSError):
+            part_path.unlink()
+
+
+def _split_trailer(chunks, size: int, trailer: bytearray):
+    """透传数据块，但扣留最后 size 个字节（摘要尾部），读完后写入 trailer"""
+    tail = b''
+    for chunk in chunks:
+        buf = tail + chunk
+        if len(buf) > size:
+            yield buf[:-size]
+            tail = buf[-size:]
+        else:
+            tail = buf
+    trailer[:] = tail
+
+
+def _unique_save_path(save_dir: Path, filename: str, is_bundle: bool = False) -> Path:
+    """保存路径：只取文件名最后一段（防止路径穿越），已存在时添加序号（文件夹名不拆分扩展名）"""
+    save_name = Path(str(filename).replace('\\', '/')).name or 'unknown_file'
+    save_path = save_dir / save_name
+    if is_bundle:
+        stem, suffix = save_path.name, ''
+    else:
+        stem, suffix = save_path.stem, save_path.suffix
+    counter = 1
+    while save_path.exists():
+        save_path = save_dir / f"{stem}_{counter}{suffix}"
+        counter += 1
+    return save_path
+
+
+def _decode_inline_payload(request_data: dict, file_size: int) -> Optional[bytes]:
+    """解析请求中内嵌的小剪贴板内容（base64），大小不符或超限时忽略（退回普通上传）"""
+    inline = request_data.get('inline')
+    if not isinstance(inline, str) or request_data.get('bundle') is not None:
+        return None
+    if len(inline) > (INLINE_MAX_SIZE + 2) // 3 * 4:
+        return None
+    try:
+        payload = base64.b64decode(inline, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    if len(payload) != file_size:
+        return None
+    return payload
+
+
 class TransferRequestHandler(BaseHTTPRequestHandler):
     """文件传输请求处理器"""
     
@@ -26,19 +93,27 @@ class TransferRequestHandler(BaseHTTPRequestHandler):
                  on_transfer_request: Optional[Callable] = None,
                  on_file_received: Optional[Callable] = None,
                  on_receive_progress: Optional[Callable[[str, int, int], None]] = None,
+                 on_receive_failed: Optional[Callable[[str, str], None]] = None,
                  pending_requests: Dict = None,
                  lock: threading.Lock = None,
+                 status_changed: Optional[threading.Condition] = None,
+                 deadlines: Optional[DeadlineHeap] = None,
+                 status_info: Optional[dict] = None,
                  **kwargs):
         self._save_dir = save_dir or Path.home() / "Downloads"
         self._on_transfer_request = on_transfer_request
         self._on_file_received = on_file_received
         self._on_receive_progress = on_receive_progress
+        self._on_receive_failed = on_receive_failed
         # 重要：必须使用传入的字典，不能创建新字典
         if pending_requests is None:
             self._pending_requests = {}
         else:
             self._pending_requests = pending_requests
         self._lock = lock  # 共享锁，用于保护 pending_requests
+        self._status_changed = status_changed  # 基于同一把锁的条件变量，请求状态变化时 notify_all
+        self._deadlines = deadlines  # 请求过期定时堆
+        self._status_info = status_info or {}  # /status 附带的本机身份（供对端校验缓存的设备）
         super().__init__(*args, **kwargs)
     
     def _get_client_ip(self) -> str:
@@ -109,6 +184,17 @@ class TransferRequestHandler(BaseHTTPRequestHandler):
             sender_ip = self._get_client_ip()
             sender_port = request_data.get('sender_port', 8765)  # 默认端口
             
+            # 协商压缩编码：发送端仅在抽样判断压缩有收益时才提供 codecs
+            codec = choose_codec(request_data.get('codecs'))
+            
+            # 打包传输（多文件/文件夹）：file_size 为 tar 流长度，bundle 中为文件数与内容总大小
+            bundle = request_data.get('bundle')
+            if bundle is not None and not isinstance(bundle, dict):
+                bundle = {}
+            
+            # 小剪贴板内容直接内嵌在请求中：接受后立即可用，不再需要 /transfer 上传
+            inline_payload = _decode_inline_payload(request_data, file_size)
+            
             # 保存待处理的请求（使用锁保护）
             current_timestamp = time.time()
             request_data_dict = {
@@ -118,14 +204,21 @@ class TransferRequestHandler(BaseHTTPRequestHandler):
                 'sender_id': sender_id,
                 'sender_ip': sender_ip,
                 'sender_port': sender_port,
+                'codec': codec,
+                'bundle': bundle,
                 'timestamp': current_timestamp,
                 'status': 'pending'  # pending, accepted, rejected
             }
+            if inline_payload is not None:
+                request_data_dict['inline'] = True
+                request_data_dict['inline_data'] = inline_payload
             if self._lock:
                 with self._lock:
                     self._pending_requests[request_id] = request_data_dict
             else:
                 self._pending_requests[request_id] = request_data_dict
+            if self._deadlines:
+                self._deadlines.schedule(request_id, current_timestamp + TransferServer.REQUEST_EXPIRY_TIME)
             
             logger.info(f"收到传输请求: {request_id}, filename={filename}, timestamp={current_timestamp}, 有效期={TransferServer.REQUEST_EXPIRY_TIME}秒")
             
@@ -148,6 +241,10 @@ class TransferRequestHandler(BaseHTTPRequestHandler):
             response = {
                 "status": "success",
                 "request_id": request_id,
+                "codec": codec,
+                "inline": inline_payload is not None,
+                # 声明支持摘要尾部校验，发送端据此决定是否附带 X-Content-Hash 和尾部
+                "hash": HASH_HEADER_VALUE,
                 "message": "Transfer request received"
             }
             self._send_response(200, response)
@@ -192,8 +289,10 @@ class TransferRequestHandler(BaseHTTPRequestHandler):
                         self._send_response(410, {"error": "Request expired"})  # 410 Gone
                         return
                     
-                    # 更新请求状态
+                    # 更新请求状态，并唤醒等待确认的长轮询
                     request_info['status'] = 'accepted' if accepted else 'rejected'
+                    if self._status_changed:
+                        self._status_changed.notify_all()
             else:
                 request_info = self._pending_requests.get(request_id)
                 if not request_info:
@@ -265,59 +364,128 @@ class TransferRequestHandler(BaseHTTPRequestHandler):
                 # 已接受的请求不检查过期（因为正在传输中）
                 # 只有在pending状态时才检查过期
             
-            # 获取Content-Length
+            # 请求体长度：Content-Length 或 chunked（压缩上传时发送端无法预知长度）
+            chunked = 'chunked' in (self.headers.get('Transfer-Encoding') or '').lower()
             content_length = int(self.headers.get('Content-Length', 0))
-            if content_length == 0:
+            if content_length == 0 and not chunked:
                 self._send_response(400, {"error": "Empty file"})
                 return
             
-            # 获取文件名
-            filename = request_info['filename']
+            # 发送端可在请求体末尾附带摘要尾部（X-Content-Hash），用于端到端完整性校验
+            digest_size = 0
+            hash_header = self.headers.get(HASH_HEADER)
+            if hash_header:
+                digest_size = parse_hash_header(hash_header)
+                if digest_size is None:
+                    self._send_response(400, {"error": f"Unsupported content hash: {hash_header}"})
+                    return
+                if not chunked and content_length < digest_size:
+                    self._send_response(400, {"error": "Invalid content length"})
+                    return
+            hasher = new_content_hasher(digest_size) if digest_size else None
             
-            # 保存文件
-            save_path = self._save_dir / filename
+            # 压缩编码（在 /transfer_request 中协商），接收时边解压边写盘
+            codec = self.headers.get(ENCODING_HEADER) or None
+            if codec and codec not in SUPPORTED_CODECS:
+                self._send_response(415, {"error": f"Unsupported content encoding: {codec}"})
+                return
+            decompressor = new_decompressor(codec) if codec else None
             
-            # 如果文件已存在，添加序号
-            counter = 1
-            original_path = save_path
-            while save_path.exists():
-                stem = original_path.stem
-                suffix = original_path.suffix
-                save_path = self._save_dir / f"{stem}_{counter}{suffix}"
-                counter += 1
+            # 解压后的文件大小：未压缩时由 Content-Length 决定，压缩时以请求中声明的大小为准
+            if codec or chunked:
+                payload_length = int(request_info.get('file_size', 0) or 0)
+            else:
+                payload_length = content_length - digest_size
+            
+            # 获取文件名（打包传输时为文件夹名）
+            filename = request_info['filename']
+            is_bundle = request_info.get('bundle') is not None
+            save_path = _unique_save_path(self._save_dir, filename, is_bundle)
+            
+            # 先写入临时文件/目录，校验通过后再原子重命名，避免留下不完整的文件
+            part_path = save_path.with_name(f".{save_path.name}.part")
             
             # 读取文件内容并保存（带进度回调）
             # 使用较小的chunk大小（16KB）来更频繁地读取和更新进度
             # 这样可以更及时地反映接收进度，避免与发送端进度差异过大
             bytes_read = 0
             chunk_size = 16 * 1024  # 16KB，更频繁地读取和更新进度
-            
-            with open(save_path, 'wb') as f:
-                while bytes_read < content_length:
-                    # 计算本次读取的大小
-                    read_size = min(chunk_size, content_length - bytes_read)
-                    chunk = self.rfile.read(read_size)
+            trailer = bytearray()
+            error = None
+            
+            body = self._iter_request_body(content_length, chunked, chunk_size)
+            if digest_size:
+                body = _split_trailer(body, digest_size, trailer)
+            
+            def iter_payload():
+                """解压、计算摘要并上报进度后的正文数据"""
+                nonlocal bytes_read
+                for raw in body:
+                    chunk = decompressor.decompress(raw) if decompressor else raw
                     if not chunk:
-                        break
-                    f.write(chunk)
+                        continue
+                    if hasher:
+                        hasher.update(chunk)
                     bytes_read += len(chunk)
+                    if bytes_read > payload_length:
+                        raise _ReceiveError("文件大小与请求不符")
                     
                     # 每次读取后立即更新进度，确保及时反映接收状态
                     # 使用较小的chunk可以更频繁地更新，减少与发送端进度的差异
                     if self._on_receive_progress:
                         try:
-                            self._on_receive_progress(request_id, bytes_read, content_length)
+                            self._on_receive_progress(request_id, bytes_read, payload_length)
                         except Exception as e:
                             logger.warning(f"接收进度回调失败: {e}")
+                    yield chunk
+                if decompressor:
+                    tail = decompressor.flush()
+                    if tail:
+                        if hasher:
+                            hasher.update(tail)
+                        bytes_read += len(tail)
+                        yield tail
+            
+            try:
+                if is_bundle:
+                    # 打包传输：边收边解包到临时目录
+                    reader = IterReader(iter_payload())
+                    extract_bundle_stream(reader, part_path)
+                    reader.drain()
+                else:
+                    with open(part_path, 'wb') as f:
+                        for chunk in iter_payload():
+                            f.write(chunk)
+                
+                if bytes_read != payload_length:
+                    error = f"文件接收不完整（{bytes_read}/{payload_length} bytes）"
+                elif hasher and bytes(trailer) != hasher.digest():
+                    error = "文件校验失败，内容在传输中被损坏"
+                
+                if error is None:
+                    os.replace(part_path, save_path)
+            except _ReceiveError as e:
+                error = str(e)
+            except Exception as e:
+                # 连接中断、解压或解包失败，同样视为接收失败
+                logger.error(f"文件接收异常: {e}", exc_info=True)
+                error = f"接收中断: {e}"
+            
+            if error is not None:
+                # 校验失败：丢弃不完整的文件，并通知上层
+                _discard_partial(part_path)
+                self._finish_request(request_id)
+                logger.error(f"文件接收失败: {filename} - {error}")
+                if self._on_receive_failed:
+                    try:
+                        self._on_receive_failed(request_id, error)
+                    except Exception as e:
+                        logger.error(f"接收失败回调失败: {e}")
+                self._send_response(422, {"error": error})
+                return
             
             # 删除待处理的请求（使用锁保护）
-            if self._lock:
-                with self._lock:
-                    if request_id in self._pending_requests:
-                        del self._pending_requests[request_id]
-            else:
-                if request_id in self._pending_requests:
-                    del self._pending_requests[request_id]
+            self._finish_request(request_id)
             
             # 发送成功响应
             response = {
@@ -326,12 +494,14 @@ class TransferRequestHandler(BaseHTTPRequestHandler):
                 "path": str(save_path),
                 "size": bytes_read
             }
+            if hasher:
+                response["hash"] = hasher.hexdigest()
             self._send_response(200, response)
             
             # 触发回调
             if self._on_file_received:
                 try:
-                    self._on_file_received(save_path, bytes_read, filename)
+                    self._on_file_received(save_path, bytes_read, filename, request_id)
                 except Exception as e:
                     logger.error(f"文件接收回调失败: {e}")
             
@@ -340,13 +510,57 @@ class TransferRequestHandler(BaseHTTPRequestHandler):
             logger.error(f"文件上传处理失败: {e}")
             self._send_response(500, {"error": str(e)})
     
+    def _iter_request_body(self, content_length: int, chunked: bool, chunk_size: int):
+        """按块读取请求体（支持 Content-Length 与 chunked 两种方式）"""
+        if not chunked:
+            remaining = content_length
+            while remaining > 0:
+                chunk = self.rfile.read(min(chunk_size, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+            return
+        
+        while True:
+            size_line = self.rfile.readline(65537)
+            if not size_line:
+                raise IOError("连接已断开")
+            size = int(size_line.split(b';', 1)[0].strip(), 16)
+            if size == 0:
+                # 跳过 chunked trailer 头部，直到空行
+                while self.rfile.readline(65537) not in (b'\r\n', b'\n', b''):
+                    pass
+                return
+            remaining = size
+            while remaining > 0:
+                chunk = self.rfile.read(min(chunk_size, remaining))
+                if not chunk:
+                    raise IOError("连接已断开")
+                remaining -= len(chunk)
+                yield chunk
+            self.rfile.readline(65537)  # chunk 结尾的 CRLF
+    
+    def _finish_request(self, request_id: str):
+        """从待处理列表中移除请求（使用锁保护）"""
+        if self._lock:
+            with self._lock:
+                self._pending_requests.pop(request_id, None)
+        else:
+            self._pending_requests.pop(request_id, None)
+    
     def _handle_status(self):
         """处理状态查询"""
-        response = {"status": "running"}
+        response = {"status": "running", **self._status_info}
         self._send_response(200, response)
     
     def _handle_transfer_status(self):
-        """处理传输状态查询（用于发送端轮询确认状态）"""
+        """
+        处理传输状态查询（发送端等待确认）
+        
+        支持长轮询：带 wait=<秒> 参数时，pending 状态的请求会挂起到状态变化（接受/拒绝/过期）
+        或等待超时再返回，接收端点击接受后发送端可立即开始上传，且不产生轮询流量。
+        """
         try:
             # 解析查询参数
             parsed_path = urlparse(self.path)
@@ -357,67 +571,50 @@ class TransferRequestHandler(BaseHTTPRequestHandler):
                 self._send_response(400, {"error": "Missing request_id"})
                 return
             
-            # 添加调试日志
-            logger.debug(f"查询传输状态: request_id={request_id}, 当前请求数={len(self._pending_requests)}")
-            all_request_ids = list(self._pending_requests.keys())
-            logger.debug(f"当前所有请求ID: {all_request_ids}")
-            
-            # 检查请求是否存在（使用锁保护）
-            if self._lock:
-                with self._lock:
-                    request_info = self._pending_requests.get(request_id)
-                    if not request_info:
-                        self._send_response(404, {"error": "Request not found or expired"})
-                        return
-                    
+            try:
+                wait = float(query_params.get('wait', ['0'])[0])
+            except ValueError:
+                wait = 0.0
+            wait = max(0.0, min(wait, TransferServer.MAX_STATUS_WAIT))
+            
+            logger.debug(f"查询传输状态: request_id={request_id}, wait={wait}")
+            
+            def still_pending() -> bool:
+                info = self._pending_requests.get(request_id)
+                if not info or info.get('status', 'pending') != 'pending':
+                    return False
+                return time.time() - info.get('timestamp', 0) <= TransferServer.REQUEST_EXPIRY_TIME
+            
+            # 检查请求是否存在（使用锁保护；响应在释放锁之后再发送）
+            with (self._status_changed or self._lock or contextlib.nullcontext()):
+                if wait and self._status_changed and still_pending():
+                    # 长轮询：等待 UI 接受/拒绝（confirm_transfer 会 notify_all）
+                    self._status_changed.wait_for(lambda: not still_pending(), timeout=wait)
+                
+                request_info = self._pending_requests.get(request_id)
+                if not request_info:
+                    status_code, response = 404, {"error": "Request not found or expired"}
+                else:
                     # 检查请求是否过期（但已接受的请求不应该过期，因为正在传输中）
                     timestamp = request_info.get('timestamp', 0)
                     status = request_info.get('status', 'pending')
                     
                     # 如果请求已接受或已拒绝，不检查过期（因为需要让发送端看到状态）
-                    if status == 'accepted' or status == 'rejected':
-                        response = {
-                            "status": status,
-                            "request_id": request_id
-                        }
-                    elif time.time() - timestamp > TransferServer.REQUEST_EXPIRY_TIME:
+                    if status == 'pending' and time.time() - timestamp > TransferServer.REQUEST_EXPIRY_TIME:
                         # 只有pending状态的请求才检查过期
                         del self._pending_requests[request_id]
-                        self._send_response(410, {"error": "Request expired", "status": "expired"})  # 410 Gone
-                        return
+                        status_code, response = 410, {"error": "Request expired", "status": "expired"}  # 410 Gone
                     else:
-                        response = {
-                            "status": status,  # pending
-                            "request_id": request_id
+                        status_code, response = 200, {
+                            "status": status,  # pending / accepted / rejected
+                            "request_id": request_id,
+                            "long_poll": True
                         }
-            else:
-                request_info = self._pending_requests.get(request_id)
-                if not request_info:
-                    self._send_response(404, {"error": "Request not found or expired"})
-                    return
-                
-                # 检查请求是否过期（但已接受的请求不应该过期，因为正在传输中）
-                timestamp = request_info.get('timestamp', 0)
-                status = request_info.get('status', 'pending')
-                
-                # 如果请求已接受或已拒绝，不检查过期（因为需要让发送端看到状态）
-                if status == 'accepted' or status == 'rejected':
-                    response = {
-                        "status": status,
-                        "request_id": request_id
-                    }
-                elif time.time() - timestamp > TransferServer.REQUEST_EXPIRY_TIME:
-                    # 只有pending状态的请求才检查过期
-                    del self._pending_requests[request_id]
-                    self._send_response(410, {"error": "Request expired", "status": "expired"})  # 410 Gone
-                    return
-                else:
-                    response = {
-                        "status": status,  # pending
-                        "request_id": request_id
-                    }
+                        if request_info.get('inline'):
+                            # 内嵌内容已在接收端使用，发送端无需再上传
+                            response["inline"] = True
             
-            self._send_response(200, response)
+            self._send_response(status_code, response)
         except Exception as e:
             logger.error(f"处理传输状态查询失败: {e}")
             self._send_response(500, {"error": str(e)})
@@ -441,11 +638,17 @@ class TransferServer:
     
     # 请求有效期（秒），默认5分钟
     REQUEST_EXPIRY_TIME = 5 * 60
+    # /transfer_status 长轮询单次最长挂起时间（秒）
+    MAX_STATUS_WAIT = 25
+    # 内嵌内容的请求确认后保留的时间（秒），供发送端取得确认结果
+    INLINE_RETENTION = 60
     
     def __init__(self, port: int = 8765, save_dir: Optional[Path] = None,
                  on_transfer_request: Optional[Callable[[str, str, str, str, int, str, int], None]] = None,
-                 on_file_received: Optional[Callable[[Path, int, str], None]] = None,
-                 on_receive_progress: Optional[Callable[[str, int, int], None]] = None):
+                 on_file_received: Optional[Callable[[Path, int, str, str], None]] = None,
+                 on_receive_progress: Optional[Callable[[str, int, int], None]] = None,
+                 on_receive_failed: Optional[Callable[[str, str], None]] = None,
+                 status_info: Optional[dict] = None):
         """
         初始化传输服务器
         
@@ -453,20 +656,25 @@ class TransferServer:
             port: 监听端口
             save_dir: 文件保存目录（默认：~/Downloads）
             on_transfer_request: 收到传输请求时的回调函数 (request_id, sender_name, sender_id, filename, file_size)
-            on_file_received: 文件接收完成时的回调函数 (save_path, file_size, original_filename)
+            on_file_received: 文件接收完成时的回调函数 (save_path, file_size, original_filename, request_id)
             on_receive_progress: 接收进度回调函数 (request_id, received, total)
+            on_receive_failed: 接收失败（不完整/校验失败）回调函数 (request_id, message)
+            status_info: /status 响应中附带的本机信息（如 user_id），用于对端确认 IP 上仍是同一设备
         """
         self._port = port
         self._save_dir = save_dir or (Path.home() / "Downloads")
         self._on_transfer_request = on_transfer_request
         self._on_file_received = on_file_received
         self._on_receive_progress = on_receive_progress
-        self._server: Optional[HTTPServer] = None
+        self._on_receive_failed = on_receive_failed
+        self._status_info = dict(status_info or {})
+        self._server: Optional[ThreadingHTTPServer] = None
         self._thread: Optional[threading.Thread] = None
-        self._cleanup_timer: Optional[threading.Timer] = None
+        self._deadlines: Optional[DeadlineHeap] = None  # 请求过期定时堆（替代定期全量扫描）
         self._running = False
         self._pending_requests: Dict[str, dict] = {}  # 待处理的传输请求
         self._lock = threading.Lock()  # 保护 pending_requests 的锁
+        self._status_changed = threading.Condition(self._lock)  # 请求状态变化通知（长轮询）
     
     def start(self):
         """启动服务器"""
@@ -477,6 +685,9 @@ class TransferServer:
             # 确保保存目录存在
             self._save_dir.mkdir(parents=True, exist_ok=True)
             
+            # 过期请求由截止时间堆按需清理（每个请求到期时触发一次）
+            self._deadlines = DeadlineHeap(self._expire_request)
+            
             # 创建请求处理器工厂
             def handler_factory(*args, **kwargs):
                 handler = TransferRequestHandler(
@@ -485,22 +696,24 @@ class TransferServer:
                     on_transfer_request=self._on_transfer_request,
                     on_file_received=self._on_file_received,
                     on_receive_progress=self._on_receive_progress,
+                    on_receive_failed=self._on_receive_failed,
                     pending_requests=self._pending_requests,
                     lock=self._lock,
+                    status_changed=self._status_changed,
+                    deadlines=self._deadlines,
+                    status_info=self._status_info,
                     **kwargs
                 )
                 return handler
             
-            # 创建HTTP服务器
-            self._server = HTTPServer(('0.0.0.0', self._port), handler_factory)
+            # 创建HTTP服务器（每个连接一个线程：长轮询等待确认时不会阻塞上传/其他请求）
+            self._server = ThreadingHTTPServer(('0.0.0.0', self._port), handler_factory)
+            self._server.daemon_threads = True
             
             # 在后台线程中运行服务器
             self._thread = threading.Thread(target=self._run_server, daemon=True)
             self._thread.start()
             
-            # 启动过期请求清理任务
-            self._start_cleanup_timer()
-            
             self._running = True
             logger.info(f"文件传输服务器已启动，监听端口: {self._port}")
         except Exception as e:
@@ -513,8 +726,9 @@ class TransferServer:
             return
         
         try:
-            # 停止清理定时器
-            self._stop_cleanup_timer()
+            # 停止过期定时器
+            if self._deadlines:
+                self._deadlines.stop()
             
             if self._server:
                 self._server.shutdown()
@@ -530,15 +744,16 @@ class TransferServer:
         except Exception as e:
             logger.error(f"停止文件传输服务器失败: {e}")
     
-    def confirm_transfer(self, request_id: str, accepted: bool):
+    def confirm_transfer(self, request_id: str, accepted: bool, fallback: Optional[dict] = None):
         """
-        确认传输请求（由UI调用）
+        确认传输请求（由UI调用），并立即唤醒发送端等待确认的长轮询
         
         Args:
             request_id: 请求ID
             accepted: 是否接受
+            fallback: 服务器端已无该请求时用于重建的请求信息（UI 层缓存），为 None 时忽略
         """
-        with self._lock:
+        with self._status_changed:
             # 打印所有待处理的请求ID，用于调试
             all_request_ids = list(self._pending_requests.keys())
             logger.info(f"confirm_transfer: 当前待处理请求列表: {all_request_ids}")
@@ -553,13 +768,49 @@ class TransferServer:
                         request_id = req_id
                         break
                 else:
-                    return
+                    if fallback is None:
+                        return
+                    request_data = dict(fallback)
+                    request_data.setdefault('timestamp', time.time())
+                    self._pending_requests[request_id] = request_data
             
             request_data = self._pending_requests[request_id]
             old_status = request_data.get('status', 'unknown')
             request_data['status'] = 'accepted' if accepted else 'rejected'
+            if request_data.get('inline'):
+                # 内嵌请求不会再有上传：保留一段时间供发送端查询结果后清理
+                request_data.pop('inline_data', None)
+                request_data['inline_retain_until'] = time.time() + self.INLINE_RETENTION
+                if self._deadlines:
+                    self._deadlines.schedule(request_id, request_data['inline_retain_until'])
+            self._status_changed.notify_all()
             logger.info(f"确认传输请求: {request_id}, 状态从 {old_status} 变为 {request_data['status']}")
     
+    def take_inline_payload(self, request_id: str) -> Optional[bytes]:
+        """
+        取出请求中内嵌的剪贴板内容（只能取一次；没有内嵌内容时返回 None）
+
+        待确认的请求标记了内嵌却取不到内容时清除 inline 标记，之后的确认按普通请求处理，
+        发送端查询状态时不会收到 inline，会照常上传
+        """
+        with self._lock:
+            request_data = self._pending_requests.get(request_id)
+            if not request_data or request_data.get('status', 'pending') != 'pending':
+                return None
+            payload = request_data.pop('inline_data', None)
+            if payload is None and request_data.get('inline'):
+                request_data['inline'] = False
+            return payload
+    
+    def save_inline_payload(self, filename: str, payload: bytes) -> Path:
+        """把内嵌内容保存为文件（用户选择“存为文件/打开”时）"""
+        self._save_dir.mkdir(parents=True, exist_ok=True)
+        save_path = _unique_save_path(self._save_dir, filename)
+        part_path = save_path.with_name(f".{save_path.name}.part")
+        part_path.write_bytes(payload)
+        os.replace(part_path, save_path)
+        return save_path
+    
     def get_pending_request(self, request_id: str) -> Optional[dict]:
         """
         获取待处理的请求（自动检查过期）
@@ -599,44 +850,23 @@ class TransferServer:
             logger.debug(f"请求 {request_id} 有效 (已过 {elapsed_time:.1f} 秒，剩余 {self.REQUEST_EXPIRY_TIME - elapsed_time:.1f} 秒)")
             return request_data
     
-    def _start_cleanup_timer(self):
-        """启动过期请求清理定时器"""
-        def cleanup_expired_requests():
-            """清理过期的请求"""
-            if not self._running:
+    def _expire_request(self, request_id: str):
+        """
+        请求到期：仍在等待确认的请求被移除（已接受的请求等待文件传输，不清理）；
+        内嵌内容的请求确认后没有上传，保留期满后移除
+        """
+        with self._status_changed:
+            request_data = self._pending_requests.get(request_id)
+            if not request_data:
                 return
-            
-            current_time = time.time()
-            expired_ids = []
-            
-            with self._lock:
-                for request_id, request_data in list(self._pending_requests.items()):
-                    timestamp = request_data.get('timestamp', 0)
-                    # 只清理 pending 状态的过期请求，accepted 状态的请求等待文件传输
-                    if request_data.get('status') == 'pending' and current_time - timestamp > self.REQUEST_EXPIRY_TIME:
-                        expired_ids.append(request_id)
-                
-                # 删除过期的请求
-                for request_id in expired_ids:
-                    del self._pending_requests[request_id]
-                    logger.info(f"自动清理过期请求: {request_id}")
-            
-            # 如果还有请求，继续定时清理
-            if self._running:
-                self._cleanup_timer = threading.Timer(60.0, cleanup_expired_requests)  # 每60秒清理一次
-                self._cleanup_timer.daemon = True
-                self._cleanup_timer.start()
-        
-        # 启动第一次清理（60秒后）
-        self._cleanup_timer = threading.Timer(60.0, cleanup_expired_requests)
-        self._cleanup_timer.daemon = True
-        self._cleanup_timer.start()
-    
-    def _stop_cleanup_timer(self):
-        """停止清理定时器"""
-        if self._cleanup_timer:
-            self._cleanup_timer.cancel()
-            self._cleanup_timer = None
+            if request_data.get('status') != 'pending':
+                if time.time() < request_data.get('inline_retain_until', float('inf')):
+                    return
+            elif time.time() - request_data.get('timestamp', 0) < self.REQUEST_EXPIRY_TIME:
+                return
+            del self._pending_requests[request_id]
+            self._status_changed.notify_all()
+        logger.info(f"自动清理过期请求: {request_id}")
     
     def _run_server(self):
         """运行服务器（在后台线程中）"""
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨线程 UI 事件队列
+
+后台线程不能调用任何 Qt API（包括 emit 信号、QTimer、invokeMethod，Win11/Qt6 下可能
+导致 Qt6Core.dll 0xc0000005），只能把 Python 可调用对象放进队列，由 UI 线程取出执行。
+
+- post(fn)：普通事件，按投递顺序逐个执行
+- post_latest(key, fn)：可合并事件（如传输进度），同一 key 未执行前再次投递只保留最新一次，
+  并移到队尾，保证与其他事件的先后关系按最后一次投递计算
+- 唤醒：后台线程只向本地 socketpair 写 1 字节（纯 Python 调用），UI 线程的 QSocketNotifier
+  收到后按帧间隔（约 60 FPS）统一执行一批；空闲时没有任何定时器在跑
+- socketpair/QSocketNotifier 不可用时回退为帧间隔轮询
+"""
+
+import contextlib
+import itertools
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from PySide6.QtCore import QObject, QSocketNotifier, QTimer
+
+logger = logging.getLogger(__name__)
+
+UiEvent = Callable[[], None]
+
+
+class UiEventQueue:
+    """跨线程 UI 事件队列；需在 UI 线程创建，owner 为承载定时器的 QObject"""
+
+    FRAME_INTERVAL_MS = 16
+
+    def __init__(self, owner: QObject, name: str = "ui"):
+        self._name = name
+        self._lock = threading.Lock()
+        # 普通事件用自增序号作 key，可合并事件用 ("latest", key)
+        self._events: "OrderedDict[Hashable, UiEvent]" = OrderedDict()
+        self._seq = itertools.count()
+        self._enabled = True
+        self._signaled = False  # 已写入唤醒字节且尚未执行的标志（受 _lock 保护）
+        self._last_drain = 0.0
+
+        self._frame_timer = QTimer(owner)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.timeout.connect(self._drain)
+
+        self._wake_reader: Optional[socket.socket] = None
+        self._wake_writer: Optional[socket.socket] = None
+        self._notifier: Optional[QSocketNotifier] = None
+        try:
+            self._wake_reader, self._wake_writer = socket.socketpair()
+            self._wake_reader.setblocking(False)
+            self._wake_writer.setblocking(False)
+            self._notifier = QSocketNotifier(self._wake_reader.fileno(), QSocketNotifier.Read, owner)
+            self._notifier.activated.connect(self._on_wakeup)
+        except Exception as e:
+            logger.warning(f"[UiEventQueue:{name}] 唤醒通道创建失败，改为轮询: {e}")
+            self._close_wake_channel()
+            self._frame_timer.setSingleShot(False)
+            self._frame_timer.setInterval(self.FRAME_INTERVAL_MS)
+            self._frame_timer.start()
+
+    # ---------------- 任意线程 ----------------
+
+    def post(self, fn: UiEvent) -> None:
+        """投递普通事件（任意线程）"""
+        self._enqueue(next(self._seq), fn)
+
+    def post_latest(self, key: Hashable, fn: UiEvent) -> None:
+        """投递可合并事件（任意线程）：同一 key 只执行最新一次"""
+        self._enqueue(("latest", key), fn)
+
+    def _enqueue(self, key: Hashable, fn: UiEvent) -> None:
+        if not self._enabled:
+            return
+        with self._lock:
+            self._events.pop(key, None)
+            self._events[key] = fn
+            if self._signaled:
+                return
+            self._signaled = True
+        writer = self._wake_writer
+        if writer is None:
+            return
+        # 缓冲区满（BlockingIOError）说明已有未读的唤醒字节；已关闭时直接忽略
+        with contextlib.suppress(OSError):
+            writer.send(b"\x00")
+
+    # ---------------- UI 线程 ----------------
+
+    def _on_wakeup(self, *args) -> None:
+        reader = self._wake_reader
+        if reader is not None:
+            with contextlib.suppress(OSError):
+                while reader.recv(4096):
+                    pass
+        if not self._enabled or self._frame_timer.isActive():
+            return
+        # 距上次执行不足一帧时延后，把这一帧内的事件合并成一批
+        elapsed_ms = (time.monotonic() - self._last_drain) * 1000
+        self._frame_timer.start(max(0, int(self.FRAME_INTERVAL_MS - elapsed_ms)))
+
+    def _drain(self) -> None:
+        with self._lock:
+            events = list(self._events.values())
+            self._events.clear()
+            self._signaled = False
+        self._last_drain = time.monotonic()
+        for fn in events:
+            if not self._enabled:
+                break
+            try:
+                fn()
+            except Exception as e:
+                logger.error(f"[UiEventQueue:{self._name}] ui event execution failed: {e}", exc_info=True)
+
+    def close(self) -> None:
+        """停止投递与执行（owner 销毁时调用），未执行的事件直接丢弃"""
+        self._enabled = False
+        with contextlib.suppress(Exception):
+            self._frame_timer.stop()
+        with contextlib.suppress(Exception):
+            if self._notifier is not None:
+                self._notifier.setEnabled(False)
+        with self._lock:
+            self._events.clear()
+        # 只关闭读端：后台线程可能仍持有写端，立即关闭会让文件描述符被复用，交给 GC 回收
+        with contextlib.suppress(OSError):
+            if self._wake_reader is not None:
+                self._wake_reader.close()
+        self._wake_reader = self._wake_writer = None
+
+    def _close_wake_channel(self) -> None:
+        for sock in (self._wake_reader, self._wake_writer):
+            if sock is not None:
+                with contextlib.suppress(OSError):
+                    sock.close()
+        self._wake_reader = self._wake_writer = None
@@ -7,23 +7,26 @@
 """
 
 import base64
+import bisect
 import contextlib
 import imghdr
 import os
 import threading
-import queue
 import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Dict, Tuple, Set
+from typing import Callable, List, Optional, Dict, Tuple, Set
 from datetime import datetime
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame,
-    QListWidget, QListWidgetItem, QMessageBox, QGraphicsOpacityEffect,
+    QListView, QStyledItemDelegate, QMessageBox, QStyle,
     QApplication,
     QMenu, QFileDialog, QScrollArea, QSizePolicy, QSpacerItem
 )
 from PySide6.QtCore import (
     Qt,
+    QAbstractListModel,
+    QModelIndex,
     QSize,
     QTimer,
     Signal,
@@ -41,6 +44,7 @@ from PySide6.QtCore import (
 )
 from PySide6.QtGui import (
     QFont,
+    QFontMetrics,
     QPixmap,
     QPainter,
     QColor,
@@ -61,13 +65,17 @@ try:
     from shiboken6 import isValid as _qt_is_valid
 except Exception:  # pragma: no cover
     _qt_is_valid = None
-import httpx
 import logging
 import sys
 
 from utils.lan_transfer.manager import TransferManager
 from utils.lan_transfer.discovery import DeviceInfo
+from utils.lan_transfer.bundle import TransferBundle
+from utils.lan_transfer.jobs import JobState
+from utils.lan_transfer.health import HEALTH_GOOD
 from utils.api_client import ApiClient
+from utils.avatar_cache import AvatarCache
+from utils.ui_dispatcher import UiEventQueue
 from widgets.toast import Toast
 from utils.notification import send_notification
 from utils.theme_manager import ThemeManager
@@ -76,7 +84,7 @@ from utils.config_manager import ConfigManager
 logger = logging.getLogger(__name__)
 
 
-class NonScrollListWidget(QListWidget):
+class NonScrollListView(QListView):
     """禁用自身滚动，交由外层 QScrollArea 接管。"""
 
     def __init__(self, *args, **kwargs):
@@ -131,512 +139,569 @@ def _debug_log(message: str):
     pass
 
 
-class CircularProgressAvatar(QLabel):
-    """带圆形进度条的头像"""
-    
-    def __init__(self, avatar_size: int = 64, parent=None):
+def _detect_base64_image(text: str) -> Tuple[bool, Optional[str]]:
+    """检测文本是否为base64图片"""
+    if not text:
+        return False, None
+    data = text.strip()
+    header_format = None
+    base64_data = data
+    if data.startswith("data:image/") and "," in data:
+        header, _, base64_data = data.partition(',')
+        try:
+            header_format = header.split('/')[1].split(';')[0]
+        except IndexError:
+            header_format = None
+    base64_data = ''.join(base64_data.split())
+    try:
+        decoded = base64.b64decode(base64_data, validate=True)
+    except Exception:
+        return False, None
+    detected = imghdr.what(None, decoded)
+    image_format = detected or header_format
+    if not image_format:
+        return False, None
+    return True, image_format
+
+
+def _create_clipboard_text_temp_file(text: str) -> Optional[Path]:
+    """将文本（可能包含base64图片）保存到临时文件"""
+    if not text:
+        return None
+    is_image, image_format = _detect_base64_image(text)
+    temp_dir = Path(os.getenv("TEMP", "/tmp"))
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = int(time.time())
+    if is_image:
+        safe_format = (image_format or "png").replace("/", "_")
+        filename = f"clipboard_image_{safe_format}-{timestamp}.b64img"
+    else:
+        filename = f"clipboard_{timestamp}.txt"
+    temp_path = temp_dir / filename
+    temp_path.write_text(text, encoding='utf-8')
+    return temp_path
+
+
+def _create_clipboard_image_temp_file(image: QImage) -> Optional[Path]:
+    """将剪贴板图片保存为临时PNG文件"""
+    if image.isNull():
+        return None
+    temp_dir = Path(os.getenv("TEMP", "/tmp"))
+    temp_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = int(time.time())
+    filename = f"clipboard_image_png-{timestamp}.png"
+    temp_path = temp_dir / filename
+    if image.save(str(temp_path), "PNG"):
+        return temp_path
+    return None
+
+
+@dataclass
+class _DeviceRow:
+    """设备列表中的一行"""
+    key: str  # user_id::ip
+    device: DeviceInfo  # 卡片上展示的设备信息（自己的其他设备名称为“你自己”）
+    sort_key: tuple
+    status: Optional[str] = None  # 覆盖设备名显示的状态文本
+    status_color: Optional[str] = None
+    progress: int = 0  # 0-100
+
+
+class DeviceListModel(QAbstractListModel):
+    """
+    设备列表数据模型
+
+    按 user_id::ip 建立行索引：发现/移除设备、重新排序、更新进度和状态都只通知变化的那一行，
+    视图无需重建卡片或整表重新布局。行顺序由 sort_key 决定（值越小越靠前）。
+    """
+
+    DeviceRole = Qt.UserRole + 1
+
+    def __init__(self, sort_key: Callable[[DeviceInfo], tuple], parent=None):
         super().__init__(parent)
-        self._avatar_size = avatar_size
-        self._progress = 0  # 0-100
-        # 留出进度条空间（上下左右各4像素）
-        container_size = avatar_size + 8
-        self.setFixedSize(container_size, container_size)
-        self.setScaledContents(False)  # 不使用自动缩放，手动控制居中显示
-        self.setAcceptDrops(True)
-        # 确保布局方向正确
-        self.setLayoutDirection(Qt.LeftToRight)
-    
-    def set_progress(self, progress: int):
-        """设置进度（0-100）"""
-        self._progress = max(0, min(100, progress))
-        self.update()  # 触发重绘
-    
-    def paintEvent(self, event):
-        """绘制头像和进度条"""
-        # 手动绘制头像（完全填满容器，内外层尺寸对齐）
-        painter = QPainter(self)
+        self._sort_key = sort_key
+        self._rows: List[_DeviceRow] = []
+        self._index: Dict[str, int] = {}  # key -> row
+
+    @staticmethod
+    def key_of(device: DeviceInfo) -> str:
+        return device.key
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        row = self.row_at(index.row()) if index.isValid() else None
+        if row is None:
+            return None
+        if role == Qt.DisplayRole:
+            return row.device.name
+        if role == Qt.ToolTipRole:
+            return row.device.device_name or row.device.ip
+        if role == self.DeviceRole:
+            return row.device
+        return None
+
+    def row_at(self, row: int) -> Optional[_DeviceRow]:
+        if 0 <= row < len(self._rows):
+            return self._rows[row]
+        return None
+
+    def row_of(self, key: str) -> Optional[int]:
+        return self._index.get(key)
+
+    def device_at(self, row: int) -> Optional[DeviceInfo]:
+        item = self.row_at(row)
+        return item.device if item else None
+
+    def devices(self) -> List[DeviceInfo]:
+        return [r.device for r in self._rows]
+
+    def keys(self) -> Set[str]:
+        return set(self._index)
+
+    def find_row(self, predicate: Callable[[DeviceInfo], bool]) -> Optional[int]:
+        """第一个满足条件的行（按当前显示顺序）"""
+        for i, item in enumerate(self._rows):
+            if predicate(item.device):
+                return i
+        return None
+
+    def rows_for_user(self, user_id: str) -> List[int]:
+        return [i for i, item in enumerate(self._rows) if item.device.user_id == user_id]
+
+    def add_device(self, device: DeviceInfo) -> Optional[int]:
+        """按排序规则插入设备，返回所在行；已存在时返回 None"""
+        key = self.key_of(device)
+        if key in self._index:
+            return None
+        sort_key = self._sort_key(device)
+        pos = bisect.bisect_right([r.sort_key for r in self._rows], sort_key)
+        self.beginInsertRows(QModelIndex(), pos, pos)
+        self._rows.insert(pos, _DeviceRow(key=key, device=device, sort_key=sort_key))
+        self._reindex(pos)
+        self.endInsertRows()
+        return pos
+
+    def remove_device(self, key: str) -> bool:
+        row = self._index.get(key)
+        if row is None:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        del self._index[key]
+        self._reindex(row)
+        self.endRemoveRows()
+        return True
+
+    def replace_device(self, row: int, device: DeviceInfo):
+        """更新设备信息（同一 key），保留进度"""
+        item = self.row_at(row)
+        if item is None:
+            return
+        item.device = device
+        self._emit_row_changed(row)
+
+    def set_status(self, row: int, text: Optional[str], color: Optional[str] = None):
+        item = self.row_at(row)
+        if item is None:
+            return
+        text = text or None
+        if item.status == text and item.status_color == color:
+            return
+        item.status = text
+        item.status_color = color if text else None
+        self._emit_row_changed(row)
+
+    def set_progress(self, row: int, progress: int):
+        item = self.row_at(row)
+        if item is None:
+            return
+        progress = max(0, min(100, int(progress)))
+        if item.progress == progress:
+            return
+        item.progress = progress
+        self._emit_row_changed(row)
+
+    def resort_user(self, user_id: str) -> bool:
+        """排序依据变化后，把该账号的设备移动到新位置；返回是否有行移动"""
+        moved = False
+        for key in [item.key for item in self._rows if item.device.user_id == user_id]:
+            moved = self._resort_row(self._index[key]) or moved
+        return moved
+
+    def _resort_row(self, row: int) -> bool:
+        item = self._rows[row]
+        item.sort_key = self._sort_key(item.device)
+        others = [r.sort_key for i, r in enumerate(self._rows) if i != row]
+        pos = bisect.bisect_right(others, item.sort_key)
+        if pos == row:
+            return False
+        # beginMoveRows 的目标位置按移动前的行号计算
+        dest = pos if pos < row else pos + 1
+        if not self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), dest):
+            return False
+        self._rows.pop(row)
+        self._rows.insert(pos, item)
+        self._reindex(min(row, pos))
+        self.endMoveRows()
+        return True
+
+    def avatar_changed(self, url: str):
+        """头像加载完成：只刷新使用该头像的行"""
+        for i, item in enumerate(self._rows):
+            if item.device.avatar_url == url:
+                self._emit_row_changed(i)
+
+    def refresh_all(self):
+        """主题变化等需要整体重绘时调用"""
+        if self._rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._rows) - 1, 0))
+
+    def _emit_row_changed(self, row: int):
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index)
+
+    def _reindex(self, start: int):
+        for i in range(start, len(self._rows)):
+            self._index[self._rows[i].key] = i
+
+
+class DeviceItemDelegate(QStyledItemDelegate):
+    """设备卡片绘制（苹果风格）：圆形头像 + 进度环，下方为名字和设备名/状态"""
+
+    AVATAR_SIZE = 64
+    # 头像容器比头像大一圈，留给进度环
+    CONTAINER_SIZE = AVATAR_SIZE + 8
+    DEVICE_TEXT_MAX_PX = 160  # 设备名单行显示的最大像素宽度（超出中间省略）
+    MIN_ITEM_WIDTH = 110
+    MIN_ITEM_HEIGHT = 118
+
+    def __init__(self, get_colors: Callable[[], dict], is_dark: Callable[[], bool], parent=None):
+        super().__init__(parent)
+        self._get_colors = get_colors
+        self._is_dark = is_dark
+        # PySide6 6.5 兼容：使用 setter 方式避免静态检查误报
+        self._name_font = QFont()
+        self._name_font.setFamily("SF Pro Display")
+        self._name_font.setPointSize(12)
+        self._name_font.setWeight(QFont.Weight.Medium)
+        self._device_font = QFont()
+        self._device_font.setFamily("SF Pro Display")
+        self._device_font.setPixelSize(10)
+        self._status_font = QFont(self._device_font)
+        self._status_font.setPixelSize(9)
+        self._name_height = QFontMetrics(self._name_font).height()
+        self._device_height = QFontMetrics(self._device_font).height()
+        self._content_height = self.CONTAINER_SIZE + 2 + self._name_height + 1 + self._device_height
+        # 上边距6 + 内容 + 下边距4
+        self._item_size = QSize(self.MIN_ITEM_WIDTH, max(self.MIN_ITEM_HEIGHT, 6 + self._content_height + 4))
+        self._default_avatars: Dict[tuple, QPixmap] = {}  # (首字母, 背景色, 深色) -> 默认头像
+
+    def item_size(self) -> QSize:
+        return QSize(self._item_size)
+
+    def set_item_width(self, width: int) -> bool:
+        """所有卡片统一宽度（由窗口宽度和每行数量决定）；返回是否变化"""
+        width = max(1, int(width))
+        if width == self._item_size.width():
+            return False
+        self._item_size.setWidth(width)
+        return True
+
+    def clear_cache(self):
+        """主题变化后重新生成默认头像"""
+        self._default_avatars.clear()
+
+    def sizeHint(self, option, index) -> QSize:
+        return QSize(self._item_size)
+
+    def avatar_rect(self, rect: QRect) -> QRect:
+        """卡片区域内头像容器的位置（用于绘制、右键菜单命中、气泡定位）"""
+        top = rect.top() + max(0, (rect.height() - self._content_height) // 2)
+        left = rect.left() + (rect.width() - self.CONTAINER_SIZE) // 2
+        return QRect(left, top, self.CONTAINER_SIZE, self.CONTAINER_SIZE)
+
+    def paint(self, painter: QPainter, option, index):
+        model = index.model()
+        item = model.row_at(index.row()) if isinstance(model, DeviceListModel) else None
+        if item is None:
+            return
+        view = self.parent()
+        colors = self._get_colors()
+        rect = option.rect
+        painter.save()
         try:
             painter.setRenderHint(QPainter.Antialiasing, True)
             painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
-            high_quality_hint = getattr(QPainter, "HighQualityAntialiasing", None)
-            if high_quality_hint is not None:
-                painter.setRenderHint(high_quality_hint, True)
-            
-            pixmap = self.pixmap()
-            if pixmap and not pixmap.isNull():
-                container_size = self.width()
-                scaled_pixmap = pixmap.scaled(
-                    container_size,
-                    container_size,
-                    Qt.KeepAspectRatioByExpanding,
-                    Qt.SmoothTransformation
-                )
-                x = (container_size - scaled_pixmap.width()) // 2
-                y = (container_size - scaled_pixmap.height()) // 2
-                painter.drawPixmap(x, y, scaled_pixmap)
-            
-            if self._progress > 0:
+            if isinstance(view, DeviceListView):
+                painter.setOpacity(view.fade_opacity(item.key))
+
+            # 卡片边框（多选时填充选中底色）
+            if option.state & QStyle.State_Selected:
+                painter.setPen(Qt.NoPen)
+                painter.setBrush(QColor(0, 122, 255, 31))
+                painter.drawRoundedRect(QRectF(rect).adjusted(0.5, 0.5, -0.5, -0.5), 8, 8)
+            painter.setPen(QPen(QColor(colors.get('item_border', '#E5E5EA')), 1))
+            painter.setBrush(Qt.NoBrush)
+            painter.drawRoundedRect(QRectF(rect).adjusted(0.5, 0.5, -0.5, -0.5), 8, 8)
+
+            # 头像（拖拽悬停时高亮）
+            avatar_rect = self.avatar_rect(rect)
+            if isinstance(view, DeviceListView) and view.drop_key() == item.key:
+                painter.fillRect(avatar_rect, QColor(0, 122, 255, 51))
+            pixmap = self._avatar(model, item.device.avatar_url) or self._default_avatar(item.device, colors)
+            painter.drawPixmap(avatar_rect.topLeft(), pixmap)
+
+            if item.progress > 0:
                 pen_width = 3
-                pen = painter.pen()
+                pen = QPen(QColor(0, 122, 255))
                 pen.setWidth(pen_width)
                 pen.setCapStyle(Qt.RoundCap)
-                pen.setColor(QColor(0, 122, 255))
                 painter.setPen(pen)
-                
-                arc_rect = QRectF(
-                    pen_width / 2,
-                    pen_width / 2,
-                    self.width() - pen_width,
-                    self.height() - pen_width
+                arc_rect = QRectF(avatar_rect).adjusted(pen_width / 2, pen_width / 2, -pen_width / 2, -pen_width / 2)
+                painter.drawArc(arc_rect, 90 * 16, -int(item.progress * 360 * 16 / 100))
+
+            # 名字
+            y = avatar_rect.bottom() + 1 + 2
+            painter.setFont(self._name_font)
+            painter.setPen(QColor(colors['text_primary']))
+            name = painter.fontMetrics().elidedText(item.device.name, Qt.ElideRight, rect.width())
+            painter.drawText(QRect(rect.left(), y, rect.width(), self._name_height), Qt.AlignCenter, name)
+
+            # 设备名 / 状态
+            y += self._name_height + 1
+            if item.status:
+                painter.setFont(self._status_font)
+                painter.setPen(QColor(item.status_color or colors['text_tertiary']))
+                text = painter.fontMetrics().elidedText(item.status, Qt.ElideRight, rect.width())
+            else:
+                painter.setFont(self._device_font)
+                painter.setPen(QColor(colors['text_tertiary']))
+                device_text = item.device.device_name or item.device.ip
+                text = painter.fontMetrics().elidedText(
+                    device_text, Qt.ElideMiddle, min(self.DEVICE_TEXT_MAX_PX, rect.width())
                 )
-                start_angle = 90 * 16
-                span_angle = -int(self._progress * 360 * 16 / 100)
-                painter.drawArc(arc_rect, start_angle, span_angle)
+            painter.drawText(QRect(rect.left(), y, rect.width(), self._device_height), Qt.AlignCenter, text)
         finally:
-            painter.end()
+            painter.restore()
 
+    def _avatar(self, model: DeviceListModel, url: Optional[str]) -> Optional[QPixmap]:
+        """共享头像缓存中的圆形头像；未命中时按需加载（只有实际绘制到的卡片才会加载），完成后刷新对应行"""
+        if not url:
+            return None
+        return AvatarCache.instance().request(
+            url, self.CONTAINER_SIZE, lambda _pixmap, u=url: model.avatar_changed(u)
+        )
+
+    def _default_avatar(self, device: DeviceInfo, colors: dict) -> QPixmap:
+        """默认头像：灰色圆形 + 名字首字母（按首字母/主题缓存）"""
+        first_char = device.name[0].upper() if device.name else "?"
+        bg_color_str = colors.get('avatar_bg', '#E5E5EA')
+        is_dark = self._is_dark()
+        cache_key = (first_char, bg_color_str, is_dark)
+        cached = self._default_avatars.get(cache_key)
+        if cached is not None:
+            return cached
+
+        bg_color = QColor(bg_color_str) if bg_color_str.startswith('#') else QColor(142, 142, 147)
+        # 文字颜色：深色主题用白色，亮色主题用深色
+        text_color = QColor(255, 255, 255) if is_dark else QColor(0, 0, 0)
+        container_size = self.CONTAINER_SIZE
+        pixmap = QPixmap(container_size, container_size)
+        pixmap.fill(Qt.transparent)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setBrush(QBrush(bg_color))
+        painter.setPen(Qt.NoPen)
+        # 绘制圆形，在容器中心，半径为avatar_size/2
+        center = container_size // 2
+        radius = self.AVATAR_SIZE // 2
+        painter.drawEllipse(center - radius, center - radius, self.AVATAR_SIZE, self.AVATAR_SIZE)
+        painter.setPen(text_color)
+        avatar_font = QFont()
+        avatar_font.setFamily("SF Pro Display")
+        avatar_font.setPointSize(32)
+        avatar_font.setWeight(QFont.Weight.Medium)
+        painter.setFont(avatar_font)
+        painter.drawText(center - radius, center - radius, self.AVATAR_SIZE, self.AVATAR_SIZE, Qt.AlignCenter, first_char)
+        painter.end()
+
+        self._default_avatars[cache_key] = pixmap
+        return pixmap
+
+
+class DeviceListView(NonScrollListView):
+    """设备列表视图：按位置定位设备处理拖放/右键菜单，新加入的设备淡入"""
 
-class DeviceItemWidget(QWidget):
-    """设备列表项（支持拖放，苹果风格）"""
-    
     # Windows/Qt6：避免在 Signal 签名里使用非 Qt 元类型（Path/自定义 dataclass），否则在跨线程/排队投递时可能触发原生崩溃
-    file_dropped = Signal(object, object)  # (file_path: Path, device: DeviceInfo)
-    
-    def __init__(self, device: DeviceInfo, parent=None):
-        super().__init__(parent)
-        self._device = device
-        self._progress = 0
-        self._parent_airdrop_view = None  # 用于获取主题颜色
-        self._is_dark = False  # 主题状态
-        self._device_text_max_px = 160  # 设备名单行显示的最大像素宽度（超出中间省略）
-        if parent:
-            # 向上查找 AirDropView
-            widget = parent
-            while widget:
-                if isinstance(widget, AirDropView):
-                    self._parent_airdrop_view = widget
-                    self._is_dark = widget._is_dark
-                    break
-                widget = widget.parent()
-        # 后台下载头像后，使用 invokeMethod 在 UI 线程应用（避免从 Python Thread 里 emit Qt signal 导致 Qt6Core.dll 0xc0000005）
-        self._pending_avatar_bytes: Optional[bytes] = None
-        self._avatar_apply_scheduled: bool = False
+    file_dropped = Signal(object, object)  # (file_path: Path | list[Path], device: DeviceInfo)；多文件/文件夹为 list
+    files_dropped_to_devices = Signal(object, object)  # (file_path: Path | list[Path], devices: list[DeviceInfo])；一对多发送
 
-        self._setup_ui()
+    FADE_DURATION = 0.2  # seconds
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
         self.setAcceptDrops(True)
-    
-    def sizeHint(self) -> QSize:
-        """返回基于内容的推荐大小"""
-        if hasattr(self, "name_label"):
-            name_width = self.name_label.fontMetrics().horizontalAdvance(self.name_label.text())
-            name_height = self.name_label.fontMetrics().height()
+        self.viewport().setAcceptDrops(True)
+        self.setDragEnabled(False)
+        self._drop_key: Optional[str] = None
+        self._fade_started: Dict[str, float] = {}  # key -> 开始淡入的时间
+        self._fade_timer = QTimer(self)
+        self._fade_timer.setInterval(16)
+        self._fade_timer.timeout.connect(self._on_fade_tick)
+
+    def _device_model(self) -> Optional[DeviceListModel]:
+        model = self.model()
+        return model if isinstance(model, DeviceListModel) else None
+
+    def _delegate(self) -> Optional[DeviceItemDelegate]:
+        delegate = self.itemDelegate()
+        return delegate if isinstance(delegate, DeviceItemDelegate) else None
+
+    def device_at(self, pos: QPoint) -> Optional[DeviceInfo]:
+        index = self.indexAt(pos)
+        model = self._device_model()
+        if not index.isValid() or model is None:
+            return None
+        return model.device_at(index.row())
+
+    def avatar_rect(self, row: int) -> Optional[QRect]:
+        """指定行头像在 viewport 中的位置"""
+        model = self._device_model()
+        delegate = self._delegate()
+        if model is None or delegate is None or not 0 <= row < model.rowCount():
+            return None
+        rect = self.visualRect(model.index(row, 0))
+        if not rect.isValid():
+            return None
+        return delegate.avatar_rect(rect)
+
+    def drop_key(self) -> Optional[str]:
+        return self._drop_key
+
+    def fade_in(self, key: str):
+        self._fade_started[key] = time.monotonic()
+        if not self._fade_timer.isActive():
+            self._fade_timer.start()
+
+    def fade_opacity(self, key: str) -> float:
+        started = self._fade_started.get(key)
+        if started is None:
+            return 1.0
+        t = min(1.0, (time.monotonic() - started) / self.FADE_DURATION)
+        return 1 - (1 - t) ** 3  # OutCubic
+
+    def _on_fade_tick(self):
+        now = time.monotonic()
+        for key in [k for k, started in self._fade_started.items() if now - started >= self.FADE_DURATION]:
+            del self._fade_started[key]
+        if not self._fade_started:
+            self._fade_timer.stop()
+        self.viewport().update()
+
+    def _set_drop_key(self, key: Optional[str]):
+        if key != self._drop_key:
+            self._drop_key = key
+            self.viewport().update()
+
+    def _update_drop_target(self, event) -> Optional[DeviceInfo]:
+        device = self.device_at(event.position().toPoint())
+        self._set_drop_key(DeviceListModel.key_of(device) if device else None)
+        return device
+
+    def _targets_for(self, device: DeviceInfo) -> List[DeviceInfo]:
+        """操作落在已多选（Ctrl/Shift 点选 2 台及以上）的设备上时返回全部选中设备，否则只返回该设备"""
+        model = self._device_model()
+        selection = self.selectionModel()
+        if model is None or selection is None:
+            return [device]
+        rows = sorted(index.row() for index in selection.selectedIndexes())
+        selected = [d for d in (model.device_at(row) for row in rows) if d is not None]
+        key = DeviceListModel.key_of(device)
+        if len(selected) < 2 or all(DeviceListModel.key_of(d) != key for d in selected):
+            return [device]
+        return selected
+
+    def _emit_send(self, file_path, device: DeviceInfo):
+        targets = self._targets_for(device)
+        if len(targets) > 1:
+            self.files_dropped_to_devices.emit(file_path, targets)
         else:
-            name_width = 0
-            name_height = 20
-        
-        if hasattr(self, "device_label"):
-            device_width = self.device_label.fontMetrics().horizontalAdvance(self.device_label.text())
-            device_height = self.device_label.fontMetrics().height()
+            self.file_dropped.emit(file_path, device)
+
+    def dragEnterEvent(self, event: QDragEnterEvent):
+        """拖拽进入事件"""
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+            self._update_drop_target(event)
         else:
-            device_width = 0
-            device_height = 15
-        
-        content_width = max(72, name_width, device_width)
-        # 宽度将由 _update_item_widths() 动态设置，这里只计算最小宽度
-        # 左右内边距各0px（已改为0），所以最小宽度 = 内容宽度
-        w: int = int(max(110, content_width))
-        # 调整高度计算：上内边距6px，下内边距4px，间距2+1=3px，头像72px
-        h: int = int(6 + 72 + 2 + name_height + 1 + device_height + 4)  # 上边距+头像+间距+名字+间距+设备名+下边距
-        h = max(118, h)
-        # 使用与构造函数参数名匹配的变量名，并明确类型
-        return QSize(w, h)
-    
-    def _setup_ui(self):
-        self._avatar_size = 64
-        # 确保布局方向是从上到下
-        self.setLayoutDirection(Qt.LeftToRight)
-        
-        layout = QVBoxLayout(self)
-        # 调整内边距，特别是减小底部内边距
-        layout.setContentsMargins(0, 0, 0, 0)
-        layout.setSpacing(0)
-        layout.setAlignment(Qt.AlignCenter)
-
-        # 宽度将在窗口大小确定后动态设置（窗口宽度的1/4，考虑滚动条）
-        # PySide6 6.5 兼容：分别设置宽度和高度
-        self.setMinimumHeight(118)
-        
-        # 确保 widget 在 item 中水平居中
-        self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-
-        # 使用带进度条的头像组件
-        # 注意：CircularProgressAvatar的容器大小是avatar_size+8，所以传入avatar_size即可
-        self.avatar_label = CircularProgressAvatar(self._avatar_size, self)
-        self.avatar_label.setAcceptDrops(True)
-        # 设置头像在中心位置（考虑进度条的空间）
-        self.avatar_label.setAlignment(Qt.AlignCenter)
-        self.avatar_label.setStyleSheet(f"""
-            QLabel {{
-                border: none;
-                border-radius: {(self._avatar_size + 8) // 2}px;
-                background-color: transparent;
-            }}
-            QLabel:hover {{
-                border: none;
-                background-color: transparent;
-            }}
-        """)
+            event.ignore()
 
-        # 确保顺序：名字 -> 头像 -> 设备名（从上到下）
-        # 第一步：先加载头像内容，然后添加头像到布局（最上方，第一行）
-        self._load_avatar()
-        layout.addWidget(self.avatar_label, alignment=Qt.AlignCenter)
-        layout.addSpacing(2)  # 头像和名字之间的间距
-        
-        # 第二步：添加同事名字（中间，第二行）
-        self.name_label = QLabel(self._device.name)
-        self.name_label.setAlignment(Qt.AlignCenter)
-        # PySide6 6.5 兼容：使用 setter 方式避免静态检查误报
-        name_font = QFont()
-        name_font.setFamily("SF Pro Display")
-        name_font.setPointSize(12)
-        name_font.setWeight(QFont.Weight.Medium)
-        self.name_label.setFont(name_font)
-        self.name_label.setStyleSheet("background-color: transparent;")
-        layout.addWidget(self.name_label, alignment=Qt.AlignCenter)
-        layout.addSpacing(1)  # 名字和设备名之间的间距
-        
-        # 第三步：添加设备名（最下方，第三行）
-        device_text = self._device.device_name or self._device.ip
-        self._default_device_text = device_text
-        self.device_label = QLabel(device_text)
-        self.device_label.setAlignment(Qt.AlignCenter)
-        # 限制设备名单行显示并中间省略，避免撑高/换行
-        self.device_label.setWordWrap(False)
-        if self._device_text_max_px:
-            fm = self.device_label.fontMetrics()
-            elided = fm.elidedText(device_text, Qt.ElideMiddle, self._device_text_max_px)
-            self.device_label.setText(elided)
-            self.device_label.setMaximumWidth(self._device_text_max_px)
-            self.device_label.setMinimumWidth(0)
-        device_font = QFont()
-        device_font.setFamily("SF Pro Display")
-        device_font.setPointSize(9)
-        self.device_label.setFont(device_font)
-        # 使用主题颜色
-        colors = self._get_theme_colors()
-        self._default_device_style = f"color: {colors['text_tertiary']}; font-size: 10px; padding-top: 0px; background-color: transparent;"
-        self.device_label.setStyleSheet(self._default_device_style)
-        layout.addWidget(self.device_label, alignment=Qt.AlignCenter)
-        # 移除 addStretch()，减小底部内边距
-    
-    def _get_theme_colors(self) -> dict:
-        """获取主题颜色（从父窗口或使用默认值）"""
-        if self._parent_airdrop_view and hasattr(self._parent_airdrop_view, '_get_theme_colors'):
-            return self._parent_airdrop_view._get_theme_colors()
-        # 默认使用亮色主题
-        return {
-            "text_primary": "#000000",
-            "text_secondary": "#111111",
-            "text_tertiary": "#999999",
-            "avatar_bg": "#E5E5EA",
-        }
-    
-    def _update_theme_colors(self, colors: dict):
-        """更新主题颜色"""
-        self.name_label.setStyleSheet(f"background-color: transparent; color: {colors['text_primary']};")
-        self._default_device_style = f"color: {colors['text_tertiary']}; font-size: 10px; padding-top: 0px; background-color: transparent;"
-        if self.device_label.text() == self._default_device_text:
-            self.device_label.setStyleSheet(self._default_device_style)
-        # 重新绘制默认头像（如果有）
-        if not self.avatar_label.pixmap() or not self.avatar_label.pixmap().isNull():
-            # 检查是否是默认头像（通过检查是否有图片URL）
-            if not hasattr(self._device, 'avatar_url') or not self._device.avatar_url:
-                self._set_default_avatar()
-
-    def set_device_status(self, text: Optional[str], color: Optional[str] = None):
-        """更新设备名区域的状态文本"""
-        if text:
-            if color is None:
-                colors = self._get_theme_colors()
-                color = colors['text_tertiary']
-            self.device_label.setText(text)
-            self.device_label.setStyleSheet(
-                f"color: {color}; font-size: 9px; padding-top: 0px; background-color: transparent;"
-            )
+    def dragMoveEvent(self, event):
+        if not event.mimeData().hasUrls():
+            event.ignore()
+            return
+        if self._update_drop_target(event):
+            event.acceptProposedAction()
         else:
-            self.device_label.setText(self._default_device_text)
-            self.device_label.setStyleSheet(self._default_device_style)
-    
+            event.ignore()
+
+    def dragLeaveEvent(self, event):
+        """拖拽离开事件"""
+        self._set_drop_key(None)
+
+    def dropEvent(self, event: QDropEvent):
+        """拖放事件"""
+        device = self.device_at(event.position().toPoint())
+        self._set_drop_key(None)
+        if device is not None and event.mimeData().hasUrls():
+            paths = [Path(url.toLocalFile()) for url in event.mimeData().urls() if url.isLocalFile()]
+            if len(paths) == 1 and paths[0].is_file():
+                self._emit_send(paths[0], device)
+            elif paths:
+                # 多个文件或文件夹：打包为一次请求、一次确认、一次上传
+                self._emit_send(paths, device)
+        event.acceptProposedAction()
+
     def contextMenuEvent(self, event: QContextMenuEvent):
+        index = self.indexAt(event.pos())
+        if not index.isValid():
+            return
+        avatar_rect = self.avatar_rect(index.row())
+        device = self.device_at(event.pos())
+        if device is None or avatar_rect is None or not avatar_rect.contains(event.pos()):
+            return
+
         menu = QMenu(self)
         clipboard = QApplication.clipboard()
         has_clip_text = bool(clipboard.mimeData().hasText())
         image = clipboard.image()
         has_clip_image = image is not None and not image.isNull()
         paste_action = None
-        
-        if not self.avatar_label.geometry().contains(event.pos()):
-            return
-        
         if has_clip_text or has_clip_image:
             paste_action = menu.addAction("粘贴并发送")
         browse_action = menu.addAction("浏览...")
-        
+
         action = menu.exec(event.globalPos())
         if paste_action and action == paste_action:
             temp_path = None
             if has_clip_image:
-                temp_path = self._create_clipboard_image_temp_file(image)
+                temp_path = _create_clipboard_image_temp_file(image)
             else:
                 text = clipboard.text().strip()
                 if text:
-                    temp_path = self._create_clipboard_text_temp_file(text)
+                    temp_path = _create_clipboard_text_temp_file(text)
             if temp_path:
-                self.file_dropped.emit(temp_path, self._device)
+                self._emit_send(temp_path, device)
         elif action == browse_action:
-            file_path, _ = QFileDialog.getOpenFileName(self, "选择要发送的文件")
-            if file_path:
-                self.file_dropped.emit(Path(file_path), self._device)
-    
-    def dragEnterEvent(self, event: QDragEnterEvent):
-        """拖拽进入事件"""
-        if event.mimeData().hasUrls():
-            event.acceptProposedAction()
-        self.avatar_label.setStyleSheet("""
-            QLabel {
-                border: none;
-                border-radius: 0;
-                background-color: rgba(0, 122, 255, 0.2);
-            }
-        """)
-    
-    def dragLeaveEvent(self, event):
-        """拖拽离开事件"""
-        self.avatar_label.setStyleSheet(f"""
-            QLabel {{
-                border: none;
-                border-radius: {(self._avatar_size + 8) // 2}px;
-                background-color: transparent;
-            }}
-            QLabel:hover {{
-                border: none;
-                background-color: transparent;
-            }}
-        """)
-    
-    def dropEvent(self, event: QDropEvent):
-        """拖放事件"""
-        self.avatar_label.setStyleSheet(f"""
-            QLabel {{
-                border: none;
-                border-radius: {(self._avatar_size + 8) // 2}px;
-                background-color: transparent;
-            }}
-            QLabel:hover {{
-                border: none;
-                background-color: transparent;
-            }}
-        """)
-        
-        if event.mimeData().hasUrls():
-            urls = event.mimeData().urls()
-            if urls:
-                file_path = Path(urls[0].toLocalFile())
-                if file_path.is_file():
-                    self.file_dropped.emit(file_path, self._device)
-        event.acceptProposedAction()
-    
-    def _load_avatar(self):
-        """加载头像"""
-        # 先设置默认占位，确保 UI 有内容；异步失败也不在后台线程触碰 UI
-        self._set_default_avatar()
-        if self._device.avatar_url:
-            self._load_avatar_async(self._device.avatar_url)
-    
-    def _load_avatar_async(self, url: str):
-        """
-        异步加载头像（后台线程只做网络请求，不创建/绘制 QPixmap）。
-
-        说明：QPixmap/QPainter 不是线程安全的，尤其在 Windows/Qt6 上会引发 0xc0000005。
-        """
-        def load():
-            max_retries = 3
-            retry_delay = 1  # 秒
-
-            for attempt in range(max_retries):
-                try:
-                    response = httpx.get(url, timeout=5)
-                    if response.status_code == 200 and response.content:
-                        data = bytes(response.content)
-                        self._post_avatar_bytes_to_ui(data)
-                        return
-                except Exception as e:
-                    logger.warning(f"加载头像失败 (尝试 {attempt + 1}/{max_retries}): {e}")
-
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                    retry_delay *= 2  # 指数退避
-
-            # 全部失败：保留默认占位，不在后台线程做任何 UI 操作
-            return
-
-        thread = threading.Thread(target=load, daemon=True)
-        thread.start()
-
-    def _post_avatar_bytes_to_ui(self, data: bytes) -> None:
-        """
-        后台线程调用：把头像 bytes 投递到 UI 线程应用。
-
-        重要：Win11/Qt6 下避免从 Python Thread 里调用任何 Qt API（包括 invokeMethod/emit signal）。
-        这里仅通过父窗口的 Python 队列投递，UI 线程定时 drain 执行。
-        """
-        try:
-            parent_view = getattr(self, "_parent_airdrop_view", None)
-            if parent_view and hasattr(parent_view, "_post_to_ui_thread"):
-                parent_view._post_to_ui_thread(lambda raw=data: self._apply_avatar_bytes(raw))
-        except Exception:
-            pass
-
-    def _apply_avatar_bytes(self, raw: bytes) -> None:
-        """UI 线程：将头像 bytes 转成 pixmap 并更新头像。"""
-        try:
-            if not raw:
-                return
-            pixmap = QPixmap()
-            if not pixmap.loadFromData(raw):
-                return
-            container_size = getattr(self, "_avatar_size", 64) + 8
-            circular_pixmap = self._make_circular(pixmap, container_size)
-            self.avatar_label.setPixmap(circular_pixmap)
-        except Exception:
-            # 静默失败，避免影响主流程
-            pass
-
-    def _create_clipboard_text_temp_file(self, text: str) -> Optional[Path]:
-        """将文本（可能包含base64图片）保存到临时文件"""
-        if not text:
-            return None
-        is_image, image_format = self._detect_base64_image(text)
-        temp_dir = Path(os.getenv("TEMP", "/tmp"))
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        timestamp = int(time.time())
-        if is_image:
-            safe_format = (image_format or "png").replace("/", "_")
-            filename = f"clipboard_image_{safe_format}-{timestamp}.b64img"
-        else:
-            filename = f"clipboard_{timestamp}.txt"
-        temp_path = temp_dir / filename
-        temp_path.write_text(text, encoding='utf-8')
-        return temp_path
-
-    def _create_clipboard_image_temp_file(self, image: QImage) -> Optional[Path]:
-        """将剪贴板图片保存为临时PNG文件"""
-        if image.isNull():
-            return None
-        temp_dir = Path(os.getenv("TEMP", "/tmp"))
-        temp_dir.mkdir(parents=True, exist_ok=True)
-        timestamp = int(time.time())
-        filename = f"clipboard_image_png-{timestamp}.png"
-        temp_path = temp_dir / filename
-        if image.save(str(temp_path), "PNG"):
-            return temp_path
-        return None
-
-    @staticmethod
-    def _detect_base64_image(text: str) -> Tuple[bool, Optional[str]]:
-        """检测文本是否为base64图片"""
-        if not text:
-            return False, None
-        data = text.strip()
-        header_format = None
-        base64_data = data
-        if data.startswith("data:image/") and "," in data:
-            header, _, base64_data = data.partition(',')
-            try:
-                header_format = header.split('/')[1].split(';')[0]
-            except IndexError:
-                header_format = None
-        base64_data = ''.join(base64_data.split())
-        try:
-            decoded = base64.b64decode(base64_data, validate=True)
-        except Exception:
-            return False, None
-        detected = imghdr.what(None, decoded)
-        image_format = detected or header_format
-        if not image_format:
-            return False, None
-        return True, image_format
-    
-    def _set_default_avatar(self):
-        """设置默认头像"""
-        # 获取主题颜色
-        colors = self._get_theme_colors()
-        # 解析头像背景色
-        bg_color_str = colors.get('avatar_bg', '#E5E5EA')
-        if bg_color_str.startswith('#'):
-            bg_color = QColor(bg_color_str)
-        else:
-            bg_color = QColor(142, 142, 147)  # 默认灰色
-        
-        # 文字颜色：深色主题用白色，亮色主题用深色
-        text_color = QColor(255, 255, 255) if self._is_dark else QColor(0, 0, 0)
-        
-        # 容器大小是avatar_size+8，pixmap大小要和容器一致，确保内外层尺寸对齐
-        container_size = self._avatar_size + 8
-        pixmap = QPixmap(container_size, container_size)
-        pixmap.fill(Qt.transparent)  # 透明背景
-        
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setBrush(QBrush(bg_color))
-        painter.setPen(Qt.NoPen)
-        # 绘制圆形，在容器中心，半径为avatar_size/2
-        center = container_size // 2
-        radius = self._avatar_size // 2
-        painter.drawEllipse(center - radius, center - radius, self._avatar_size, self._avatar_size)
-        
-        painter.setPen(text_color)
-        # PySide6 6.5 兼容：使用 setter 方式避免静态检查误报
-        avatar_font = QFont()
-        avatar_font.setFamily("SF Pro Display")
-        avatar_font.setPointSize(32)
-        avatar_font.setWeight(QFont.Weight.Medium)
-        painter.setFont(avatar_font)
-        first_char = self._device.name[0].upper() if self._device.name else "?"
-        # 文字绘制在圆形区域内
-        painter.drawText(center - radius, center - radius, self._avatar_size, self._avatar_size, Qt.AlignCenter, first_char)
-        painter.end()
-        
-        # 将头像设置为圆形（传入容器大小，确保内外层尺寸对齐）
-        circular_pixmap = self._make_circular(pixmap, container_size)
-        # 设置pixmap，大小和容器完全一致
-        self.avatar_label.setPixmap(circular_pixmap)
-    
-    @staticmethod
-    def _make_circular(pixmap: QPixmap, size: int) -> QPixmap:
-        """将头像转换为圆形"""
-        circular = QPixmap(size, size)
-        circular.fill(Qt.transparent)
-        
-        painter = QPainter(circular)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setBrush(QBrush(pixmap.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)))
-        painter.setPen(Qt.NoPen)
-        painter.drawEllipse(0, 0, size, size)
-        painter.end()
-        
-        return circular
-    
-    def set_progress(self, progress: int):
-        """设置传输进度（0-100）"""
-        self._progress = progress
-        if hasattr(self.avatar_label, 'set_progress'):
-            self.avatar_label.set_progress(progress)
-    
-    @property
-    def device(self) -> DeviceInfo:
-        return self._device
+            file_paths, _ = QFileDialog.getOpenFileNames(self, "选择要发送的文件")
+            if len(file_paths) == 1:
+                self._emit_send(Path(file_paths[0]), device)
+            elif file_paths:
+                # 多个文件：打包为一次请求发送
+                self._emit_send([Path(p) for p in file_paths], device)
 
 
 class TrianglePointer(QWidget):
@@ -689,10 +754,15 @@ class TransferRequestBubble(QWidget):
     save_as_file = Signal()      # 剪贴板“另存为TXT”
     rejected = Signal()
     
+    AVATAR_SIZE = 28
+
     def __init__(self, sender_name: str, filename: str, file_size: int, parent=None,
-                 is_clipboard: bool = False, is_clipboard_image: bool = False):
+                 is_clipboard: bool = False, is_clipboard_image: bool = False,
+                 avatar_url: Optional[str] = None):
         super().__init__(parent)
         self._sender_name = sender_name
+        self._avatar_url = avatar_url
+        self._avatar_label: Optional[QLabel] = None
         self._filename = filename
         self._file_size = file_size
         self._is_clipboard = is_clipboard
@@ -800,7 +870,22 @@ class TransferRequestBubble(QWidget):
         title.setWordWrap(True)
         colors = self._get_theme_colors()
         title.setStyleSheet(f"font-size: 12px; font-weight: 600; color: {colors['text_secondary']}; background-color: transparent;")
-        container_layout.addWidget(title)
+        if self._avatar_url:
+            # 发送方头像（共享头像缓存，通常已在设备列表中加载过）
+            header_layout = QHBoxLayout()
+            header_layout.setContentsMargins(0, 0, 0, 0)
+            header_layout.setSpacing(8)
+            self._avatar_label = QLabel()
+            self._avatar_label.setFixedSize(self.AVATAR_SIZE, self.AVATAR_SIZE)
+            self._avatar_label.setStyleSheet("background-color: transparent;")
+            header_layout.addWidget(self._avatar_label, 0, Qt.AlignTop)
+            header_layout.addWidget(title, 1)
+            container_layout.addLayout(header_layout)
+            pixmap = AvatarCache.instance().request(self._avatar_url, self.AVATAR_SIZE, self._set_avatar_pixmap)
+            if pixmap is not None:
+                self._set_avatar_pixmap(pixmap)
+        else:
+            container_layout.addWidget(title)
         
         if self._is_clipboard and self._is_clipboard_image:
             size_label = QLabel("这是一张图片")
@@ -894,6 +979,12 @@ class TransferRequestBubble(QWidget):
         outer_layout.addSpacerItem(spacer)
         QTimer.singleShot(0, self._position_pointer)
     
+    def _set_avatar_pixmap(self, pixmap: QPixmap):
+        """头像加载完成（气泡可能已关闭）"""
+        if self._avatar_label is None or (_qt_is_valid is not None and not _qt_is_valid(self._avatar_label)):
+            return
+        self._avatar_label.setPixmap(pixmap)
+
     def lock_size_for_screen(self, screen):
         """根据屏幕锁定尺寸，切换屏幕后重新计算一次"""
         name = screen.name() if screen else None
@@ -1358,6 +1449,11 @@ class AirDropView(QWidget):
     # Windows/Qt6：避免 dict 这种非 Qt 元类型作为 Signal 签名，使用 object 更安全
     transfer_request_result = Signal(object, str, str, str, int, str)  # result(dict), file_path, device_name, device_ip, device_port, request_id
     
+    # 上传限速选项 (KB/s, 显示文本)，0 表示不限速
+    RATE_LIMIT_OPTIONS = [(0, "不限速"), (10 * 1024, "10 MB/s"), (5 * 1024, "5 MB/s"), (2 * 1024, "2 MB/s"), (1024, "1 MB/s")]
+    # 设备列表兜底核对间隔（正常情况下由发现事件增量更新）
+    DEVICE_RECONCILE_INTERVAL_MS = 30_000
+    
     def _load_discover_scope(self) -> str:
         """读取可被发现范围配置，默认 all"""
         try:
@@ -1435,21 +1531,19 @@ class AirDropView(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         # 跨线程 UI 任务投递（严禁在 Python Thread 里直接调用 QTimer/操作 Qt，Win11/Qt6 易触发 Qt6Core.dll 0xc0000005）
-        self._ui_event_queue: "queue.Queue[callable]" = queue.Queue()
-        self._ui_dispatch_enabled: bool = True
+        # UI 线程按帧率批量执行，空闲时由唤醒通道触发（不再固定周期轮询）
+        self._ui_events = UiEventQueue(self, "AirDropView")
         try:
             self.destroyed.connect(self._on_destroyed)  # type: ignore[attr-defined]
         except Exception:
             pass
-        # UI 线程任务调度器：周期性 drain 队列（避免从 Python Thread 里 invokeMethod/emit signal）
-        self._ui_dispatch_timer = QTimer(self)
-        self._ui_dispatch_timer.setInterval(20)
-        self._ui_dispatch_timer.timeout.connect(self._drain_ui_events)
-        self._ui_dispatch_timer.start()
         _debug_log("Initializing AirDropView...")
         self._transfer_manager: Optional[TransferManager] = None
-        self._transferring = False
-        self._current_target: Optional[DeviceInfo] = None
+        # 正在发送的目标设备（按 DeviceInfo.key 即 user_id::ip，与 TransferManager 信号中的 target_key 一致）；
+        # 同一设备同时只发一个，不同设备的发送交给 TransferScheduler 排队/并发
+        self._active_targets: Dict[str, DeviceInfo] = {}
+        # 一对多发送中的设备 key：逐台结果只更新设备状态，汇总提示在 broadcast_completed 时显示
+        self._broadcast_targets: Set[str] = set()
         self._pending_requests: Dict[str, dict] = {}  # 待处理的传输请求
         self._was_hidden_to_icon = False  # 标记窗口是否被隐藏到图标
         self._changing_window_state = False  # 防止 changeEvent 递归的标志
@@ -1460,18 +1554,18 @@ class AirDropView(QWidget):
         self._device_discovery_times: Dict[str, float] = {}  # 设备发现时间 {user_id: timestamp}
         self._device_transfer_times: Dict[str, float] = {}  # 设备传输时间 {user_id: timestamp}
         self._device_group_ids: Dict[str, Optional[str]] = {}  # 设备组ID {user_id: group_id}
+        self._device_health_ranks: Dict[str, int] = {}  # 设备健康等级 {user_id::ip: rank}（可达性探测结果）
         self._discover_scope: str = self._load_discover_scope()  # 可被发现范围 all/group/none
         self._scope_change_thread: Optional[threading.Thread] = None  # 更新可见范围的后台任务
         self._temp_visible_devices: Set[str] = set()  # 临时显示的设备（发送请求方）
         self._temp_device_timers: Dict[str, QTimer] = {}  # 临时设备的定时移除器
-        # 发送等待倒计时
-        self._wait_countdown_timer: Optional[QTimer] = None
-        self._wait_countdown_remaining: int = 0
-        self._wait_countdown_device: Optional[DeviceInfo] = None
+        # 发送等待倒计时（每个目标设备一个，按 DeviceInfo.key）
+        self._wait_countdown_timers: Dict[str, QTimer] = {}
         # 设备列表最小高度（保证提示区在底部，即使只有一行/无同事）
         self._devices_min_height = None  # 启动后根据初始列表高度动态确定
-        # 淡入动画引用，避免被GC
-        self._fade_animations: list = []
+        # 上次应用的卡片布局 (可用宽度, 每行数量)，未变化时不重新布局
+        self._device_grid_layout: Tuple[int, int] = (0, 0)
+        self._device_layout_pending: bool = False
         # 记录最近一次有效的设备列表可用宽度，隐藏状态下回退使用
         self._last_viewport_width: int = 0
         # 记录最近一次有效的设备列表可用高度，隐藏状态下回退使用
@@ -1506,41 +1600,11 @@ class AirDropView(QWidget):
 
     def _post_to_ui_thread(self, fn):
         """从任意线程安全投递到 UI 线程执行。"""
-        if not getattr(self, "_ui_dispatch_enabled", True):
-            return
-        try:
-            self._ui_event_queue.put_nowait(fn)
-        except Exception as e:
-            try:
-                logger.error(f"[AirDropView] enqueue ui event failed: {e}", exc_info=True)
-            except Exception:
-                pass
-            return
-
-    @Slot()
-    def _drain_ui_events(self):
-        """在 UI 线程执行队列中的任务。"""
-        while True:
-            try:
-                fn = self._ui_event_queue.get_nowait()
-            except queue.Empty:
-                break
-            except Exception as e:
-                logger.error(f"[AirDropView] dequeue ui event failed: {e}", exc_info=True)
-                break
-            try:
-                fn()
-            except Exception as e:
-                logger.error(f"[AirDropView] ui event execution failed: {e}", exc_info=True)
+        self._ui_events.post(fn)
 
     @Slot()
     def _on_destroyed(self) -> None:
-        self._ui_dispatch_enabled = False
-        try:
-            if hasattr(self, "_ui_dispatch_timer") and self._ui_dispatch_timer:
-                self._ui_dispatch_timer.stop()
-        except Exception:
-            pass
+        self._ui_events.close()
 
     def _snapshot_viewport_metrics(self):
         """记录当前设备列表的可用宽度/高度，避免隐藏后视口为0时无法计算布局。"""
@@ -1625,9 +1689,6 @@ class AirDropView(QWidget):
             QLabel {{
                 color: {colors['text_primary']};
             }}
-            DeviceItemWidget {{
-                /* 确保子组件布局方向正确 */
-            }}
         """)
         
         # 主内容区域（设备列表 + 提示内容），整体作为滚动内容
@@ -1639,35 +1700,39 @@ class AirDropView(QWidget):
         content_layout.setContentsMargins(0, 10, 0, 0)
         content_layout.setSpacing(0)
 
-        self.devices_list = NonScrollListWidget()
+        self.devices_list = DeviceListView()
         self.devices_list.setSpacing(1)
-        self.devices_list.setSelectionMode(QListWidget.NoSelection)
+        # Ctrl/Shift 点选多台设备后拖放/右键发送，一次读取文件同时发给所有选中设备
+        self.devices_list.setSelectionMode(QListView.ExtendedSelection)
         self.devices_list.setFocusPolicy(Qt.NoFocus)
-        # 禁用QListWidget自己的滚动条，使用外层QScrollArea的滚动条
+        # 禁用列表自己的滚动条，使用外层QScrollArea的滚动条
         self.devices_list.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.devices_list.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         # 设置大小策略，允许根据内容自动调整高度
         self.devices_list.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Minimum)
-        # 设置视图模式为IconMode，允许item自由设置大小
-        self.devices_list.setViewMode(QListWidget.IconMode)
+        # 设置视图模式为IconMode，按网格横向排列
+        self.devices_list.setViewMode(QListView.IconMode)
         # 设置流式布局，横向排列
-        self.devices_list.setFlow(QListWidget.LeftToRight)
-        # 设置item大小模式为固定
-        self.devices_list.setResizeMode(QListWidget.Fixed)
-        # 去掉QListWidget本身的边框，但给item添加边框，并设置内边距和居中对齐
+        self.devices_list.setFlow(QListView.LeftToRight)
+        # 设置item大小模式为固定，卡片不可拖动
+        self.devices_list.setResizeMode(QListView.Fixed)
+        self.devices_list.setMovement(QListView.Static)
+        # 所有卡片尺寸一致，布局时无需逐项询问 sizeHint
+        self.devices_list.setUniformItemSizes(True)
+        # 卡片边框由 delegate 绘制
         self.devices_list.setStyleSheet(f"""
-            QListWidget {{
+            QListView {{
                 border: none;
                 background-color: {colors['bg_primary']};
             }}
-            QListWidget::item {{
-                border: 1px solid {colors['item_border']};
-                border-radius: 8px;
-                background-color: transparent;
-                padding: 0px;
-                text-align: center;
-            }}
         """)
+        # 设备数据由模型维护，发现/移除/重排只通知变化的行
+        self._device_model = DeviceListModel(lambda d: self._get_device_sort_key(d.user_id), self)
+        self._device_delegate = DeviceItemDelegate(self._get_theme_colors, lambda: self._is_dark, self.devices_list)
+        self.devices_list.setModel(self._device_model)
+        self.devices_list.setItemDelegate(self._device_delegate)
+        self.devices_list.file_dropped.connect(self._on_file_dropped)
+        self.devices_list.files_dropped_to_devices.connect(self._on_files_dropped_to_devices)
         content_layout.addWidget(self.devices_list, 0)
         
         # 提示内容区域（作为正常内容，跟随在同事列表后面）
@@ -1853,7 +1918,7 @@ class AirDropView(QWidget):
                 logger.warning(f"更新 discover_scope 到 TransferManager 失败: {e}")
     
     def _on_discover_clicked(self):
-        """展示自定义下拉（向上弹出），选项暂不改逻辑，仅UI"""
+        """展示自定义下拉（向上弹出）：可被发现范围 + 上传限速"""
         colors = self._get_theme_colors()
         menu = QMenu(self)
         menu.setStyleSheet(f"""
@@ -1872,6 +1937,18 @@ class AirDropView(QWidget):
         actions = []
         for key, label in options:
             actions.append((menu.addAction(label), key))
+        
+        # 上传限速（大文件发送时给接口请求、屏幕共享等交互流量留出带宽）
+        rate_actions = []
+        if self._transfer_manager:
+            menu.addSeparator()
+            rate_menu = menu.addMenu("上传限速")
+            current_rate = self._transfer_manager.get_rate_limit()
+            for kbps, label in self.RATE_LIMIT_OPTIONS:
+                action = rate_menu.addAction(label)
+                action.setCheckable(True)
+                action.setChecked(kbps == current_rate)
+                rate_actions.append((action, kbps))
     
         # 计算向上弹出的位置
         anchor = self._discover_button.mapToGlobal(QPoint(self._discover_button.width() // 2, 0))
@@ -1884,6 +1961,22 @@ class AirDropView(QWidget):
                     # 仅更新广播/配置，不拦截发送，失败交由对方拒绝
                     self._apply_discover_scope(key, persist=True, update_service=True)
                     break
+            for action, kbps in rate_actions:
+                if action == chosen:
+                    self._apply_rate_limit(kbps)
+                    break
+
+    def _apply_rate_limit(self, kbps: int):
+        """设置上传总限速（KB/s，0 表示不限速），立即生效并保存配置"""
+        if self._transfer_manager:
+            self._transfer_manager.set_rate_limit(kbps)
+        try:
+            cfg = ConfigManager.load()
+            cfg["airdrop_rate_limit_kbps"] = int(kbps)
+            ConfigManager.save(cfg)
+        except Exception as e:
+            logger.warning(f"保存 airdrop_rate_limit_kbps 配置失败: {e}")
+        Toast.show_message(self, "上传不限速" if not kbps else f"上传限速 {self._format_file_size(kbps * 1024)}/s")
 
     def _log_initial_layout_metrics(self):
         """打印未启动服务时提示区域的相对位置，便于校准"""
@@ -1925,7 +2018,7 @@ class AirDropView(QWidget):
         # 窗口大小改变时，更新所有 item 的宽度和 devices_list 的大小
         if hasattr(self, 'devices_list'):
             QTimer.singleShot(0, self._update_item_widths)
-            if self.devices_list.count() > 0:
+            if self._device_model.rowCount() > 0:
                 QTimer.singleShot(0, self._adjust_devices_list_size)
     
     def showEvent(self, event):
@@ -2734,7 +2827,12 @@ class AirDropView(QWidget):
             self._transfer_manager.file_received.connect(self._on_file_received)
             self._transfer_manager.transfer_progress.connect(self._on_transfer_progress)
             self._transfer_manager.receive_progress.connect(self._on_receive_progress)
+            self._transfer_manager.receive_failed.connect(self._on_receive_failed)
             self._transfer_manager.transfer_completed.connect(self._on_transfer_completed)
+            self._transfer_manager.broadcast_completed.connect(self._on_broadcast_completed)
+            self._transfer_manager.transfer_queued.connect(self._on_transfer_queued)
+            self._transfer_manager.transfer_started.connect(self._on_transfer_started)
+            self._transfer_manager.peer_health_changed.connect(self._on_peer_health_changed)
             
             # 传输请求结果不再使用 Qt Signal 从后台线程回传，统一走 _post_to_ui_thread 直接回到 UI 线程调用
 
@@ -2765,24 +2863,21 @@ class AirDropView(QWidget):
     def _on_transfer_manager_started(self):
         """TransferManager 启动完成后在主线程回调"""
         _debug_log("TransferManager.start() invoked from AirDropView")
+        # 设备列表由 device_added/device_removed 事件驱动；启动时对齐一次已知设备，
+        # 之后低频兜底核对（只比较 key 集合，无变化时不触碰视图）
+        self._refresh_devices()
         self._refresh_timer = QTimer()
         self._refresh_timer.timeout.connect(self._refresh_devices)
-        self._refresh_timer.start(2000)
-        _debug_log("AirDrop device refresh timer started (2s)")
+        self._refresh_timer.start(self.DEVICE_RECONCILE_INTERVAL_MS)
+        _debug_log("AirDrop device reconcile timer started")
     
     def _get_device_unique_id(self, device: DeviceInfo) -> str:
         """获取设备的唯一标识（user_id + ip，支持同一账号多个设备）"""
-        return f"{device.user_id}::{device.ip}"
+        return DeviceListModel.key_of(device)
 
     def _has_device_in_list(self, key: str) -> bool:
         """当前列表中是否已有该设备"""
-        for i in range(self.devices_list.count()):
-            item = self.devices_list.item(i)
-            widget = self.devices_list.itemWidget(item)
-            if isinstance(widget, DeviceItemWidget):
-                if self._get_device_unique_id(widget.device) == key:
-                    return True
-        return False
+        return self._device_model.row_of(key) is not None
 
     def _resolve_device_name(self, user_id: str, ip: str, fallback: str) -> str:
         """根据已知设备缓存获取设备名，找不到则用 fallback"""
@@ -2841,14 +2936,8 @@ class AirDropView(QWidget):
         if timer:
             timer.stop()
             timer.deleteLater()
-        # 删除列表中的对应 item
-        for i in range(self.devices_list.count() - 1, -1, -1):
-            item = self.devices_list.item(i)
-            widget = self.devices_list.itemWidget(item)
-            if isinstance(widget, DeviceItemWidget):
-                if self._get_device_unique_id(widget.device) == key:
-                    self.devices_list.takeItem(i)
-        QTimer.singleShot(0, self._adjust_devices_list_size)
+        # 删除列表中的对应设备
+        self._remove_device_row(key)
 
     def _remove_temp_device_by_sender(self, sender_id: str, sender_ip: str):
         key = f"{sender_id or ''}::{sender_ip or ''}"
@@ -2889,14 +2978,17 @@ class AirDropView(QWidget):
         _debug_log(f"[UI] Device discovered in AirDropView: {device.name} ({device.ip}) user_id={device.user_id}, unique_id={device_unique_id}")
         
         # 使用 user_id + ip 作为唯一标识，支持同一账号多个设备
-        for i in range(self.devices_list.count()):
-            item = self.devices_list.item(i)
-            widget = self.devices_list.itemWidget(item)
-            if isinstance(widget, DeviceItemWidget):
-                existing_unique_id = self._get_device_unique_id(widget.device)
-                if existing_unique_id == device_unique_id:
-                    _debug_log(f"[UI] Device already exists: {device_unique_id}, skipping")
-                    return  # 相同的设备（user_id + ip）已存在
+        row = self._device_model.row_of(device_unique_id)
+        if row is not None:
+            existing = self._device_model.device_at(row)
+            if existing is not None and existing.revalidating and not device.revalidating:
+                # 缓存中恢复的设备已确认在线：更新设备信息并清除“验证中”状态
+                self._device_model.replace_device(row, self._display_device(device))
+                self._device_model.set_status(row, None)
+                _debug_log(f"[UI] Cached device confirmed: {device_unique_id}")
+                return
+            _debug_log(f"[UI] Device already exists: {device_unique_id}, skipping")
+            return  # 相同的设备（user_id + ip）已存在
         
         _debug_log(f"[UI] Adding new device: {device_unique_id}")
         
@@ -2911,6 +3003,18 @@ class AirDropView(QWidget):
         # 在正确的位置插入设备（根据排序规则）
         self._add_device_widget_at_sorted_position(device)
     
+    def _on_peer_health_changed(self, user_id: str, ip: str, rank: int):
+        """可达性探测结果变化：健康等级影响同一优先级内的排序（只在等级变化时重排）"""
+        before = self._get_user_health_rank(user_id)
+        self._device_health_ranks[f"{user_id}::{ip}"] = rank
+        if self._get_user_health_rank(user_id) != before:
+            QTimer.singleShot(0, lambda uid=user_id: self._reorder_device(uid))
+    
+    def _get_user_health_rank(self, user_id: str) -> int:
+        """同一账号取最好的设备等级（任一设备可达即可）"""
+        prefix = f"{user_id}::"
+        return min((r for k, r in self._device_health_ranks.items() if k.startswith(prefix)), default=HEALTH_GOOD)
+    
     def _get_device_sort_key(self, user_id: str) -> tuple:
         """获取设备的排序键"""
         # 1. 优先级：最近传输过的 > 同组的 > 其他组的
@@ -2934,87 +3038,70 @@ class AirDropView(QWidget):
             # 其他组的按发现时间倒序
             sort_time = self._device_discovery_times.get(user_id, 0)
         
-        # 返回排序键：(优先级, -时间戳) 时间戳取负号实现倒序
-        return (priority, -sort_time)
-    
-    def _find_insert_position(self, device: DeviceInfo) -> int:
-        """找到设备应该插入的位置（根据排序规则）"""
-        new_key = self._get_device_sort_key(device.user_id)
-        
-        # 遍历现有items，找到第一个应该在新设备后面的位置
-        for i in range(self.devices_list.count()):
-            item = self.devices_list.item(i)
-            widget = self.devices_list.itemWidget(item)
-            if isinstance(widget, DeviceItemWidget):
-                existing_key = self._get_device_sort_key(widget.device.user_id)
-                # 如果新设备的排序键小于现有设备，应该插入到这里
-                if new_key < existing_key:
-                    return i
-        
-        # 如果没有找到合适的位置，插入到最后
-        return self.devices_list.count()
+        # 返回排序键：(优先级, 健康等级, -时间戳) 时间戳取负号实现倒序；响应慢/不可达的排在同优先级后面
+        return (priority, self._get_user_health_rank(user_id), -sort_time)
     
-    def _add_device_widget_at_sorted_position(self, device: DeviceInfo):
-        """在排序后的正确位置添加设备卡片"""
-        # 如果是同一账号的其他设备，将名称改为"你自己"
-        display_device = device
+    def _display_device(self, device: DeviceInfo) -> DeviceInfo:
+        """卡片上展示的设备信息：同一账号的其他设备名称显示为“你自己”"""
         if self._current_user_id and device.user_id == self._current_user_id:
             # 创建新的 DeviceInfo 对象，将 name 改为"你自己"
-            display_device = DeviceInfo(
+            return DeviceInfo(
                 name="你自己",
                 user_id=device.user_id,
                 ip=device.ip,
                 port=device.port,
                 avatar_url=device.avatar_url,
                 device_name=device.device_name,
-                group_id=getattr(device, "group_id", None)
+                group_id=getattr(device, "group_id", None),
+                addresses=list(device.addresses),
+                revalidating=device.revalidating,
             )
-        
-        item = QListWidgetItem()
-        # 先给 AirDropView 作为父对象，便于 DeviceItemWidget 在 __init__ 中正确获取主题/深色模式；
-        # setItemWidget 时 Qt 会把其重新挂到 viewport 下。
-        widget = DeviceItemWidget(display_device, parent=self)
-        widget.file_dropped.connect(self._on_file_dropped)
-        # 先设置为透明，插入后再做淡入动画
-        opacity = QGraphicsOpacityEffect(widget)
-        opacity.setOpacity(0.0)
-        widget.setGraphicsEffect(opacity)
-        
-        # 找到正确的插入位置
-        insert_pos = self._find_insert_position(device)
-        
-        # 在正确位置插入
-        self.devices_list.insertItem(insert_pos, item)
-        self.devices_list.setItemWidget(item, widget)
-        # 设置父窗口引用，用于主题适配
-        widget._parent_airdrop_view = self
-        # 应用当前主题颜色
-        colors = self._get_theme_colors()
-        widget._update_theme_colors(colors)
-        
-        # 根据widget的sizeHint设置item大小，确保头像和文字完全显示
-        size_hint = widget.sizeHint()
-        if size_hint.isValid():
-            item.setSizeHint(size_hint)
-            # 确保 item 中的内容水平居中
-            item.setTextAlignment(Qt.AlignCenter)
-        
-        # 更新所有 item 的宽度
-        self._update_item_widths()
-        # 调整 QListWidget 大小以显示所有内容
-        self._adjust_devices_list_size()
-        # 更新窗口标题（显示在线人数）
-        self._update_window_title()
-        # 淡入显示
-        self._fade_in_widget(widget)
+        return device
     
+    def _add_device_widget_at_sorted_position(self, device: DeviceInfo):
+        """在排序后的正确位置添加设备卡片（模型只插入这一行）"""
+        display_device = self._display_device(device)
+        row = self._device_model.add_device(display_device)
+        if row is None:
+            return
+        if device.revalidating:
+            # 缓存中恢复的设备，后台确认在线后清除
+            self._device_model.set_status(row, "验证中...", self._get_theme_colors()['text_tertiary'])
+        # 淡入显示
+        self.devices_list.fade_in(self._get_device_unique_id(display_device))
+        self._schedule_device_layout()
+
+    def _remove_device_row(self, key: str) -> bool:
+        """从列表移除设备（模型只移除这一行）"""
+        if not self._device_model.remove_device(key):
+            return False
+        _debug_log(f"[UI] Removed device: {key}")
+        self._schedule_device_layout()
+        return True
+
+    def _schedule_device_layout(self):
+        """设备数量变化后合并到下一轮事件循环统一调整布局，批量上线/下线时只计算一次"""
+        if self._device_layout_pending:
+            return
+        self._device_layout_pending = True
+
+        def apply():
+            self._device_layout_pending = False
+            # 更新卡片宽度（每行数量变化时才会重新布局）
+            self._update_item_widths()
+            # 调整列表大小以显示所有内容
+            self._adjust_devices_list_size()
+            # 更新窗口标题（显示在线人数）
+            self._update_window_title()
+        QTimer.singleShot(0, apply)
+
     def _add_device_widget(self, device: DeviceInfo):
         """统一添加设备卡片（保留用于兼容性）"""
         self._add_device_widget_at_sorted_position(device)
     
     def _update_item_widths(self):
         """根据列表数量动态更新所有 item 的宽度"""
-        if not hasattr(self, 'devices_list') or self.devices_list.count() == 0:
+        if not hasattr(self, 'devices_list') or self._device_model.rowCount() == 0:
             return
         # 窗口未显示时跳过计算，标记待刷新
         if not self.isVisible():
@@ -3034,7 +3121,7 @@ class AirDropView(QWidget):
         self._last_viewport_width = available_width
 
         # 根据列表数量动态计算每行显示的 item 数量
-        total_count = self.devices_list.count()
+        total_count = self._device_model.rowCount()
         if total_count >= 5:
             # 数量 >= 5：每行4个
             items_per_row = 4
@@ -3051,33 +3138,28 @@ class AirDropView(QWidget):
             # 数量 = 1：每行1个
             items_per_row = 1
         
+        # 可用宽度和每行数量都没变时不需要重新布局
+        if self._device_grid_layout == (available_width, items_per_row):
+            return
+        self._device_grid_layout = (available_width, items_per_row)
+
         # 计算每个 item 的宽度：可用宽度 / 每行数量 (2*items_per_row 为边框自身所占总宽度)
         item_width = (available_width - 2*items_per_row) // items_per_row
         
-        # 更新所有 item 的宽度
-        for i in range(self.devices_list.count()):
-            item = self.devices_list.item(i)
-            if item:
-                widget = self.devices_list.itemWidget(item)
-                if widget:
-                    # 获取当前 item 的高度
-                    current_size = item.sizeHint()
-                    current_height = current_size.height() if current_size.isValid() else 118
-                    # 更新 item 的宽度，保持高度不变
-                    item.setSizeHint(QSize(item_width, current_height))
-                    # 将卡片固定为该行应占的宽度，保证平分并居中
-                    widget.setMinimumWidth(item_width)
-                    widget.setMaximumWidth(item_width)
-                    widget.setFixedWidth(item_width)
+        # 所有卡片统一宽度，由 delegate 按该尺寸绘制
+        if self._device_delegate.set_item_width(item_width):
+            # uniformItemSizes 会缓存卡片尺寸，宽度变化后需清除缓存
+            self.devices_list.reset()
+        item_size = self._device_delegate.item_size()
         # 确保列表本身宽度与可用宽度对齐，避免剩余空白
         self.devices_list.setMinimumWidth(available_width)
         self.devices_list.setMaximumWidth(available_width)
         # 设定统一网格尺寸，确保 IconMode 平均分配
-        self.devices_list.setGridSize(QSize(item_width, current_height if 'current_height' in locals() else 118))
+        self.devices_list.setGridSize(item_size)
     
     def _adjust_devices_list_size(self):
         """调整 devices_list 的大小以显示所有内容"""
-        if self.devices_list.count() == 0:
+        if self._device_model.rowCount() == 0:
             min_h = self._devices_min_height or 0
             self.devices_list.setMinimumHeight(min_h)
             self.devices_list.setMaximumHeight(min_h)
@@ -3087,12 +3169,8 @@ class AirDropView(QWidget):
             self._layout_dirty = True
             return
         
-        # 获取第一个 item 的大小作为参考
-        first_item = self.devices_list.item(0)
-        if not first_item:
-            return
-        
-        item_size = first_item.sizeHint()
+        # 所有卡片尺寸一致
+        item_size = self._device_delegate.item_size()
         if not item_size.isValid():
             return
         
@@ -3100,7 +3178,7 @@ class AirDropView(QWidget):
         item_height = item_size.height()
         spacing = self.devices_list.spacing()
         
-        # 获取 QListWidget 的可用宽度
+        # 获取列表的可用宽度
         # 需要等待布局完成，所以使用 QTimer 延迟执行
         QTimer.singleShot(0, lambda: self._do_adjust_devices_list_size(item_width, item_height, spacing))
     
@@ -3110,7 +3188,7 @@ class AirDropView(QWidget):
         if not self.isVisible():
             self._layout_dirty = True
             return
-        if self.devices_list.count() == 0:
+        if self._device_model.rowCount() == 0:
             # 无设备时按照 MINH 规则布置，使提示区完整可见且不滚动
             min_h = self._devices_min_height or 0
             viewport_h = 0
@@ -3143,7 +3221,7 @@ class AirDropView(QWidget):
                 self._scroll_area.setVerticalScrollBarPolicy(_Qt.ScrollBarAlwaysOff)
             return
         
-        # 获取 QListWidget 的可用宽度（减去滚动条宽度）
+        # 获取列表的可用宽度（减去滚动条宽度）
         available_width = self.devices_list.viewport().width()
         if available_width <= 0:
             # 如果宽度还没计算出来，延迟重试
@@ -3154,7 +3232,7 @@ class AirDropView(QWidget):
         items_per_row = max(1, (available_width + spacing) // (item_width + spacing))
         
         # 计算需要多少行
-        total_items = self.devices_list.count()
+        total_items = self._device_model.rowCount()
         rows = (total_items + items_per_row - 1) // items_per_row  # 向上取整
         
         # 计算总高度：行数 * (item高度 + 间距) + 一些边距
@@ -3240,7 +3318,7 @@ class AirDropView(QWidget):
                 return
             
             # 统计设备列表数量（包括"你自己"和其他设备）
-            device_count = self.devices_list.count()
+            device_count = self._device_model.rowCount()
             
             # 更新窗口标题
             if device_count > 0:
@@ -3253,86 +3331,111 @@ class AirDropView(QWidget):
             # 静默失败，不干扰主程序
             pass
 
-    def _fade_in_widget(self, widget: QWidget, duration: int = 200):
-        """淡入显示新加入的设备卡片"""
-        try:
-            effect = widget.graphicsEffect()
-            if not isinstance(effect, QGraphicsOpacityEffect):
-                effect = QGraphicsOpacityEffect(widget)
-                effect.setOpacity(0.0)
-                widget.setGraphicsEffect(effect)
-            anim = QPropertyAnimation(effect, b"opacity", widget)
-            anim.setDuration(duration)
-            anim.setStartValue(effect.opacity())
-            anim.setEndValue(1.0)
-            anim.setEasingCurve(QEasingCurve.OutCubic)
-            self._fade_animations.append(anim)
-            def on_finished():
-                try:
-                    effect.setOpacity(1.0)
-                    if anim in self._fade_animations:
-                        self._fade_animations.remove(anim)
-                except Exception:
-                    pass
-            anim.finished.connect(on_finished)
-            anim.start()
-        except Exception:
-            pass
-    
     def _on_device_removed(self, user_id: str, ip: str, device_name: str):
         """设备移除（通过 user_id + ip 唯一标识，支持"自己"设备的正确匹配）"""
         _debug_log(f"[UI] Device removed from AirDropView: {device_name} (user_id={user_id}, ip={ip})")
         # 使用 user_id + ip 作为唯一标识来匹配设备，而不是使用 device_name
         # 因为"自己"的设备在 UI 中显示为"你自己"，但传入的 device_name 是原始名称
         device_unique_id = f"{user_id}::{ip}"
-        removed = False
-        for i in range(self.devices_list.count() - 1, -1, -1):  # 倒序遍历，避免索引问题
-            item = self.devices_list.item(i)
-            widget = self.devices_list.itemWidget(item)
-            if isinstance(widget, DeviceItemWidget):
-                widget_unique_id = self._get_device_unique_id(widget.device)
-                if widget_unique_id == device_unique_id:
-                    self.devices_list.takeItem(i)
-                    removed = True
-                    _debug_log(f"[UI] Removed device: {widget_unique_id}")
-        
-        if removed:
-            # 更新所有 item 的宽度（根据新的设备数量重新计算排列方式）
-            self._update_item_widths()
-            # 调整 QListWidget 大小
-            self._adjust_devices_list_size()
-            # 更新窗口标题（显示在线人数）
-            self._update_window_title()
+        self._device_health_ranks.pop(device_unique_id, None)
+        self._remove_device_row(device_unique_id)
     
     def _on_file_dropped(self, file_path: Path, device: DeviceInfo):
         """文件拖放到设备头像"""
-        if self._transferring:
-            Toast.show_message(self, "正在传输中，请稍候...")
+        if device.key in self._active_targets:
+            Toast.show_message(self, "正在向该设备传输，请稍候...")
             return
         
-        if not file_path.exists() or not file_path.is_file():
+        if isinstance(file_path, list):
+            file_path = [p for p in file_path if p.is_file() or p.is_dir()]
+            if not file_path:
+                Toast.show_message(self, "无效的文件")
+                return
+        elif not file_path.exists() or not file_path.is_file():
             Toast.show_message(self, "无效的文件")
             return
         
         self._send_transfer_request(file_path, device)
     
+    def _on_files_dropped_to_devices(self, file_path, devices: List[DeviceInfo]):
+        """文件拖放到多选的设备上：一对多发送（文件只读取一遍）"""
+        if not self._transfer_manager:
+            return
+        busy = [d for d in devices if d.key in self._active_targets]
+        devices = [d for d in devices if d.key not in self._active_targets]
+        if not devices:
+            Toast.show_message(self, "正在向所选设备传输，请稍候...")
+            return
+        
+        if isinstance(file_path, list):
+            file_path = [p for p in file_path if p.is_file() or p.is_dir()]
+            if not file_path:
+                Toast.show_message(self, "无效的文件")
+                return
+        elif not file_path.exists() or not file_path.is_file():
+            Toast.show_message(self, "无效的文件")
+            return
+        if busy:
+            Toast.show_message(self, f"{len(busy)} 台设备正在传输，已跳过")
+        
+        for device in devices:
+            self._active_targets[device.key] = device
+            self._broadcast_targets.add(device.key)
+            self._start_wait_countdown(device, 60)
+        
+        def send_in_thread():
+            source = file_path
+            if isinstance(source, list):
+                # 多文件/文件夹：在后台线程遍历目录并生成打包清单
+                try:
+                    source = TransferBundle.from_paths(source)
+                except Exception as e:
+                    self._post_to_ui_thread(lambda m=str(e): self._handle_broadcast_failure(devices, m))
+                    return
+                if not source.entries:
+                    self._post_to_ui_thread(lambda: self._handle_broadcast_failure(devices, "没有可发送的文件"))
+                    return
+            self._transfer_manager.send_file_to_devices(source, devices, confirm_timeout=60)
+        
+        import threading
+        thread = threading.Thread(target=send_in_thread, daemon=True)
+        thread.start()
+    
+    def _handle_broadcast_failure(self, devices: List[DeviceInfo], message: str):
+        for device in devices:
+            self._broadcast_targets.discard(device.key)
+            self._handle_send_request_failure(device, message)
+    
+    def _on_broadcast_completed(self, succeeded: int, total: int):
+        """一对多发送全部结束"""
+        if succeeded == total:
+            Toast.show_message(self, f"文件已成功发送到 {total} 台设备")
+        else:
+            Toast.show_message(self, f"文件已发送到 {succeeded}/{total} 台设备")
+    
     def _send_transfer_request(self, file_path: Path, device: DeviceInfo):
         """发送传输请求"""
         if not self._transfer_manager:
             return
         
-        self._transferring = True
-        self._current_target = device
+        self._active_targets[device.key] = device
         colors = self._get_theme_colors()
         self._set_device_status(device, "等待中...", colors['status_waiting'])
         self._start_wait_countdown(device, 60)
         
         def send_in_thread():
             try:
-                result = self._transfer_manager.send_transfer_request(file_path, device)
+                source = file_path
+                if isinstance(source, list):
+                    # 多文件/文件夹：在后台线程遍历目录并生成打包清单
+                    source = TransferBundle.from_paths(source)
+                    if not source.entries:
+                        self._post_to_ui_thread(lambda: self._handle_send_request_failure(device, "没有可发送的文件"))
+                        return
+                result = self._transfer_manager.send_transfer_request(source, device)
                 if result.get("success"):
                     request_id = result.get("request_id")
-                    self._wait_and_transfer(file_path, device, request_id)
+                    self._wait_and_transfer(source, device, request_id)
                 else:
                     msg = result.get("message", "请求失败")
                     self._post_to_ui_thread(lambda m=msg: self._handle_send_request_failure(device, m))
@@ -3346,30 +3449,27 @@ class AirDropView(QWidget):
     def _wait_and_transfer(self, file_path: Path, device: DeviceInfo, request_id: str):
         """等待确认后传输"""
         def wait_in_thread():
-            result = self._transfer_manager._client.wait_for_confirm(
-                request_id=request_id,
-                target_ip=device.ip,
-                target_port=device.port,
-                timeout=60
-            )
+            result = self._transfer_manager.wait_for_confirm(request_id, device, timeout=60)
             # 不要在 Python Thread 里 emit Qt signal（Win11/Qt6 下可能直接 0xc0000005），统一投递到 UI 线程执行
             self._post_to_ui_thread(
-                lambda res=result, fp=str(file_path), dn=device.name, dip=device.ip, dport=device.port, rid=request_id:
-                self._on_transfer_request_result_signal(res, fp, dn, dip, dport, rid)
+                lambda res=result, fp=file_path, dn=device.name, dip=device.ip, dport=device.port, rid=request_id, uid=device.user_id:
+                self._on_transfer_request_result_signal(res, fp, dn, dip, dport, rid, uid)
             )
         
         import threading
         thread = threading.Thread(target=wait_in_thread, daemon=True)
         thread.start()
     
-    def _on_transfer_request_result_signal(self, result: dict, file_path_str: str, device_name: str,
-                                           device_ip: str, device_port: int, request_id: str):
-        """处理传输请求结果信号（在主线程中执行）"""
-        file_path = Path(file_path_str)
+    def _on_transfer_request_result_signal(self, result: dict, file_path, device_name: str,
+                                           device_ip: str, device_port: int, request_id: str,
+                                           device_user_id: str = ""):
+        """处理传输请求结果信号（在主线程中执行）；file_path 为 Path/str 或 TransferBundle"""
+        if isinstance(file_path, str):
+            file_path = Path(file_path)
         # 重新构建 DeviceInfo
         device = DeviceInfo(
             name=device_name,
-            user_id="",  # 不需要
+            user_id=device_user_id,  # 与 ip 组成 DeviceInfo.key，定位界面行与发送信号
             ip=device_ip,
             port=device_port
         )
@@ -3377,14 +3477,14 @@ class AirDropView(QWidget):
 
     def _handle_transfer_request_result(self, result: dict, file_path: Path, device: DeviceInfo, request_id: str):
         """在主线程处理传输请求结果"""
-        self._stop_wait_countdown()
+        self._stop_wait_countdown(device)
         if result.get("success") and result.get("accepted"):
             self._set_device_status(device, None)
             self._transfer_file(file_path, device, request_id)
             return
         
         # 处理拒绝或失败的情况
-        self._transferring = False
+        self._active_targets.pop(device.key, None)
         self.status_label.setVisible(False)
         colors = self._get_theme_colors()
         
@@ -3398,8 +3498,6 @@ class AirDropView(QWidget):
             message = result.get("message", "请求失败")
             self._set_device_status(device, message, colors['status_error'])
             Toast.show_message(self, f"传输失败: {message}")
-        
-        self._current_target = None
     
     def _transfer_file(self, file_path: Path, device: DeviceInfo, request_id: str):
         """传输文件"""
@@ -3441,6 +3539,18 @@ class AirDropView(QWidget):
         is_clipboard_image = self._is_clipboard_image_filename(filename)
         clipboard_image_format = self._extract_clipboard_image_format(filename) if is_clipboard_image else None
         is_clipboard_image_base64 = filename.endswith('.b64img')
+        # 打包传输（多文件/文件夹）：展示文件数与内容总大小
+        bundle_info = None
+        if self._transfer_manager:
+            bundle_info = (self._transfer_manager.get_pending_request(request_id) or {}).get('bundle')
+        display_name, display_size, bundle_file_count = filename, file_size, 0
+        if bundle_info is not None:
+            bundle_file_count = int(bundle_info.get('file_count', 0) or 0)
+            display_size = int(bundle_info.get('total_size', file_size) or 0)
+            display_name = f"{filename}（{bundle_file_count} 个文件）"
+            # 打包名不会被当作剪贴板内容处理
+            is_clipboard = is_clipboard_image = is_clipboard_image_base64 = False
+            clipboard_image_format = None
         self._pending_requests[request_id] = {
             'sender_name': sender_name,
             'sender_id': sender_id,
@@ -3454,13 +3564,17 @@ class AirDropView(QWidget):
             'is_clipboard_image': is_clipboard_image,
             'clipboard_image_format': clipboard_image_format,
             'clipboard_image_base64': is_clipboard_image and is_clipboard_image_base64,
+            'is_bundle': bundle_info is not None,
+            'bundle_file_count': bundle_file_count,
+            'display_name': display_name,
+            'display_size': display_size,
             'dialog': None,
             'auto_expired': False,
             'received_at': time.time()
         }
         self._schedule_request_expiration(request_id)
         
-        size_str = self._format_file_size(file_size)
+        size_str = self._format_file_size(display_size)
         
         def notification_callback():
             if self.parent():
@@ -3472,7 +3586,7 @@ class AirDropView(QWidget):
         send_notification(
             title="文件传输请求",
             message=f"{sender_name} 想要发送文件给您",
-            subtitle=f"{filename} ({size_str})",
+            subtitle=f"{display_name} ({size_str})",
             notification_id=hash(request_id),
             click_callback=notification_callback
         )
@@ -3499,13 +3613,16 @@ class AirDropView(QWidget):
         sender_id_local = request_info.get('sender_id', '')
         sender_ip_local = request_info.get('sender_ip', '')
         
+        sender_row = self._find_device_row_for_request(request_info)
+        sender_device = self._device_model.device_at(sender_row) if sender_row is not None else None
         bubble = TransferRequestBubble(
             sender_name=request_info['sender_name'],
-            filename=request_info['filename'],
-            file_size=request_info['file_size'],
+            filename=request_info.get('display_name', request_info['filename']),
+            file_size=request_info.get('display_size', request_info['file_size']),
             parent=None,
             is_clipboard=is_clipboard,
-            is_clipboard_image=is_clipboard_image
+            is_clipboard_image=is_clipboard_image,
+            avatar_url=sender_device.avatar_url if sender_device else None
         )
         request_info['dialog'] = bubble
         bubble.destroyed.connect(lambda _=None, rid=request_id: self._on_request_dialog_closed(rid))
@@ -3530,24 +3647,24 @@ class AirDropView(QWidget):
                     Toast.show_message(self, "无法获取发送端信息，请让发送方重新发送")
                     return
                 
-                if self._transfer_manager._server:
-                    with self._transfer_manager._server._lock:
-                        if request_id in self._transfer_manager._server._pending_requests:
-                            self._transfer_manager._server._pending_requests[request_id]['status'] = 'accepted'
-                        else:
-                            self._transfer_manager._server._pending_requests[request_id] = {
-                                'status': 'accepted',
-                                'timestamp': time.time(),
-                                'sender_ip': sender_ip,
-                                'sender_port': sender_port,
-                                'filename': filename,
-                                'file_size': req_local.get('file_size', 0)
-                            }
+                # 通过 confirm_incoming 更新状态，发送端的长轮询会被立即唤醒；
+                # 小剪贴板内容已内嵌在请求中时直接取出使用，发送端不再上传
+                fallback = {
+                    'sender_ip': sender_ip,
+                    'sender_port': sender_port,
+                    'filename': filename,
+                    'file_size': req_local.get('file_size', 0)
+                }
+                payload = self._transfer_manager.accept_inline(request_id, fallback=fallback)
+                if payload is None:
+                    self._transfer_manager.confirm_incoming(request_id, True, fallback=fallback)
                 
                 req_local['accepted'] = True
                 req_local['paste_to_clipboard'] = paste_to_clipboard
                 req_local['open_after_accept'] = open_after
                 bubble.close()
+                if payload is not None:
+                    self._apply_inline_clipboard(request_id, payload)
             except Exception as e:
                 Toast.show_message(self, f"接受失败: {e}")
         
@@ -3555,8 +3672,8 @@ class AirDropView(QWidget):
             auto_expired = False
             if request_id in self._pending_requests:
                 auto_expired = self._pending_requests[request_id].get('auto_expired', False)
-            if self._transfer_manager and self._transfer_manager._server and not auto_expired:
-                self._transfer_manager._server.confirm_transfer(request_id, False)
+            if self._transfer_manager and not auto_expired:
+                self._transfer_manager.confirm_incoming(request_id, False)
             if request_id in self._pending_requests:
                 del self._pending_requests[request_id]
             # 拒绝后移除临时设备
@@ -3588,11 +3705,10 @@ class AirDropView(QWidget):
                 
                 # 直接从UI层的_pending_requests获取请求信息（包含sender_ip和sender_port）
                 if request_id not in self._pending_requests:
-                    if self._transfer_manager and self._transfer_manager._server:
-                        with self._transfer_manager._server._lock:
-                            server_request = self._transfer_manager._server._pending_requests.get(request_id)
-                            if server_request and server_request.get('status') == 'accepted':
-                                return
+                    job = self._transfer_manager.get_job(request_id) if self._transfer_manager else None
+                    if job and job.state != JobState.REQUESTED:
+                        # 已接受（可能正在接收或已完成）
+                        return
                     Toast.show_message(self, "请求不存在，请让发送方重新发送")
                     return
                 
@@ -3608,19 +3724,13 @@ class AirDropView(QWidget):
                     Toast.show_message(self, "无法获取发送端信息，请让发送方重新发送")
                     return
                 
-                if self._transfer_manager._server:
-                    with self._transfer_manager._server._lock:
-                        if request_id in self._transfer_manager._server._pending_requests:
-                            self._transfer_manager._server._pending_requests[request_id]['status'] = 'accepted'
-                        else:
-                            self._transfer_manager._server._pending_requests[request_id] = {
-                                'status': 'accepted',
-                                'timestamp': time.time(),
-                                'sender_ip': sender_ip,
-                                'sender_port': sender_port,
-                                'filename': request_info_local.get('filename', 'unknown'),
-                                'file_size': request_info_local.get('file_size', 0)
-                            }
+                # 通过 confirm_incoming 更新状态，发送端的长轮询会被立即唤醒
+                self._transfer_manager.confirm_incoming(request_id, True, fallback={
+                    'sender_ip': sender_ip,
+                    'sender_port': sender_port,
+                    'filename': request_info_local.get('filename', 'unknown'),
+                    'file_size': request_info_local.get('file_size', 0)
+                })
                 
                 if request_id in self._pending_requests:
                     self._pending_requests[request_id]['accepted'] = True
@@ -3636,8 +3746,8 @@ class AirDropView(QWidget):
             auto_expired = False
             if request_id in self._pending_requests:
                 auto_expired = self._pending_requests[request_id].get('auto_expired', False)
-            if self._transfer_manager and self._transfer_manager._server and not auto_expired:
-                self._transfer_manager._server.confirm_transfer(request_id, False)
+            if self._transfer_manager and not auto_expired:
+                self._transfer_manager.confirm_incoming(request_id, False)
             if request_id in self._pending_requests:
                 req_info_local = self._pending_requests[request_id]
                 self._remove_temp_device_by_sender(req_info_local.get('sender_id', ""), req_info_local.get('sender_ip', ""))
@@ -3658,53 +3768,63 @@ class AirDropView(QWidget):
             del self._pending_requests[request_id]
             logger.debug(f"已从UI层删除请求: {request_id}")
     
-    def _on_transfer_progress(self, target_name: str, uploaded: int, total: int):
-        """传输进度更新"""
-        if self._current_target and hasattr(self._current_target, 'name') and target_name == self._current_target.name:
+    def _on_transfer_progress(self, target_key: str, uploaded: int, total: int):
+        """传输进度更新（target_key 为 DeviceInfo.key）"""
+        if target_key in self._active_targets:
+            self._stop_wait_countdown_by_key(target_key)
             progress = int((uploaded / total) * 100) if total > 0 else 0
             self.status_label.setVisible(False)
             # 更新设备项的头像进度条
             try:
-                for i in range(self.devices_list.count()):
-                    item = self.devices_list.item(i)
-                    if item is None:
-                        continue
-                    widget = self.devices_list.itemWidget(item)
-                    if (isinstance(widget, DeviceItemWidget) and 
-                        hasattr(widget, 'device') and widget.device is not None and
-                        hasattr(widget.device, 'name') and widget.device.name == target_name):
-                        widget.set_progress(progress)
-                        break
+                row = self._device_model.row_of(target_key)
+                if row is not None:
+                    self._device_model.set_progress(row, progress)
             except Exception as e:
                 logger.error(f"更新传输进度时出错: {e}", exc_info=True)
     
-    def _on_transfer_completed(self, target_name: str, success: bool, message: str):
-        """传输完成"""
+    def _on_transfer_queued(self, target_key: str, position: int):
+        """上传已确认但并发已满，排队等待"""
+        colors = self._get_theme_colors()
+        self._stop_wait_countdown_by_key(target_key)
+        self._set_device_status_by_key(target_key, f"排队中({position})...", colors['status_waiting'])
+
+    def _on_transfer_started(self, target_key: str):
+        """上传离开队列开始发送"""
+        self._stop_wait_countdown_by_key(target_key)
+        self._set_device_status_by_key(target_key, None)
+
+    def _set_device_status_by_key(self, target_key: str, text: Optional[str], color: Optional[str] = None):
+        row = self._device_model.row_of(target_key)
+        if row is not None:
+            self._device_model.set_status(row, text, color)
+
+    def _on_transfer_completed(self, target_key: str, success: bool, message: str):
+        """传输完成（target_key 为 DeviceInfo.key）"""
         try:
-            logger.info(f"[AirDropView] 传输完成: target_name={target_name}, success={success}, message={message}")
-            self._transferring = False
+            logger.info(f"[AirDropView] 传输完成: target_key={target_key}, success={success}, message={message}")
+            active_device = self._active_targets.pop(target_key, None)
+            self._stop_wait_countdown_by_key(target_key)
+            in_broadcast = target_key in self._broadcast_targets
+            self._broadcast_targets.discard(target_key)
+            target_name = active_device.name if active_device else target_key
             
             self.status_label.setVisible(False)
             
             # 清除设备项的头像进度条，并记录传输时间
-            current_device = self._current_target
             target_user_id = None
             target_device = None
             try:
-                for i in range(self.devices_list.count()):
-                    item = self.devices_list.item(i)
-                    if item is None:
-                        continue
-                    widget = self.devices_list.itemWidget(item)
-                    if (isinstance(widget, DeviceItemWidget) and 
-                        hasattr(widget, 'device') and widget.device is not None and
-                        hasattr(widget.device, 'name') and widget.device.name == target_name):
-                        widget.set_progress(0)
-                        widget.set_device_status(None)
-                        if hasattr(widget.device, 'user_id'):
-                            target_user_id = widget.device.user_id
-                        target_device = widget.device
-                        break
+                row = self._device_model.row_of(target_key)
+                if row is not None:
+                    self._device_model.set_progress(row, 0)
+                    if in_broadcast and not success:
+                        # 一对多：失败原因留在设备状态上，汇总提示由 broadcast_completed 显示
+                        self._device_model.set_status(row, message or "发送失败", self._get_theme_colors()['status_error'])
+                    else:
+                        self._device_model.set_status(row, None)
+                    target_device = self._device_model.device_at(row)
+                    target_user_id = target_device.user_id
+                    target_name = target_device.name
             except Exception as e:
                 logger.error(f"处理传输完成时查找设备失败: {e}", exc_info=True)
             
@@ -3716,14 +3836,14 @@ class AirDropView(QWidget):
                     # 传输成功后延迟重新排序该账号的所有设备（因为排序是基于 user_id 的）
                     # 使用 QTimer.singleShot 延迟执行，避免在 Qt 布局更新过程中操作列表导致崩溃
                     QTimer.singleShot(100, lambda uid=target_user_id: self._reorder_devices_by_user_id(uid))
-                    Toast.show_message(self, f"文件已成功发送到 {target_name}")
+                    if not in_broadcast:
+                        Toast.show_message(self, f"文件已成功发送到 {target_name}")
                 except Exception as e:
                     logger.error(f"处理传输成功时出错: {e}", exc_info=True)
-                    Toast.show_message(self, f"文件已成功发送到 {target_name}")
-            else:
+                    if not in_broadcast:
+                        Toast.show_message(self, f"文件已成功发送到 {target_name}")
+            elif not in_broadcast:
                 Toast.show_message(self, f"发送失败: {message}")
-            
-            self._current_target = None
         except Exception as e:
             logger.error(f"[AirDropView] 传输完成回调发生未捕获异常: {e}", exc_info=True)
             # 确保即使发生异常也不会导致应用退出
@@ -3743,16 +3863,9 @@ class AirDropView(QWidget):
             # 更新设备项的头像进度条（如果有对应的设备）
             sender_id = self._pending_requests[request_id].get('sender_id', '')
             try:
-                for i in range(self.devices_list.count()):
-                    item = self.devices_list.item(i)
-                    if item is None:
-                        continue
-                    widget = self.devices_list.itemWidget(item)
-                    if (isinstance(widget, DeviceItemWidget) and 
-                        hasattr(widget, 'device') and widget.device is not None and
-                        hasattr(widget.device, 'user_id') and widget.device.user_id == sender_id):
-                        widget.set_progress(progress)
-                        break
+                row = self._device_model.find_row(lambda d: d.user_id == sender_id)
+                if row is not None:
+                    self._device_model.set_progress(row, progress)
             except Exception as e:
                 logger.error(f"更新接收进度时出错: {e}", exc_info=True)
         else:
@@ -3760,14 +3873,66 @@ class AirDropView(QWidget):
             progress = int((received / total) * 100) if total > 0 else 0
             self.status_label.setVisible(False)
     
-    def _on_file_received(self, save_path: str, file_size: int, original_filename: str):
+    def _on_receive_failed(self, request_id: str, message: str):
+        """接收失败（不完整或校验失败，接收端已丢弃临时文件）"""
+        self.status_label.setVisible(False)
+        req_info = self._pending_requests.pop(request_id, None)
+        if req_info:
+            sender_id = req_info.get('sender_id', '')
+            self._remove_temp_device_by_sender(sender_id, req_info.get('sender_ip', ''))
+            self._reset_device_progress({sender_id} if sender_id else None)
+            filename = req_info.get('filename', '未知文件')
+            Toast.show_message(self, f"接收失败: {filename}\n{message}")
+        else:
+            self._reset_device_progress()
+            Toast.show_message(self, f"接收失败: {message}")
+    
+    def _apply_inline_clipboard(self, request_id: str, payload: bytes):
+        """使用请求中内嵌的剪贴板内容：放入剪贴板时不落盘，存为文件/打开时保存后走普通接收流程"""
+        req_info = self._pending_requests.get(request_id) or {}
+        filename = req_info.get('filename', 'clipboard.txt')
+        if req_info.get('paste_to_clipboard', False):
+            applied = False
+            if req_info.get('is_clipboard_image', False) and not filename.endswith('.b64img'):
+                image = QImage.fromData(payload)
+                if not image.isNull():
+                    QApplication.clipboard().setImage(image)
+                    Toast.show_message(self, "图片已复制到剪贴板")
+                    applied = True
+            elif req_info.get('is_clipboard_image', False):
+                content = payload.decode('utf-8', errors='replace')
+                if self._copy_image_to_clipboard_from_base64(content, req_info.get('clipboard_image_format')):
+                    Toast.show_message(self, "图片已复制到剪贴板")
+                    applied = True
+            else:
+                QApplication.clipboard().setText(payload.decode('utf-8', errors='replace'))
+                Toast.show_message(self, "文本已复制到剪贴板")
+                applied = True
+            if applied:
+                self._pending_requests.pop(request_id, None)
+                sender_id = req_info.get('sender_id', '')
+                self._remove_temp_device_by_sender(sender_id, req_info.get('sender_ip', ''))
+                self._reset_device_progress({sender_id} if sender_id else None)
+                return
+        # 存为文件/打开（或放入剪贴板失败）：保存到接收目录，复用文件接收完成的处理
+        try:
+            save_path = self._transfer_manager.save_inline_payload(filename, payload) if self._transfer_manager else None
+        except OSError as e:
+            logger.error(f"保存剪贴板内容失败: {e}")
+            save_path = None
+        if save_path is None:
+            self._pending_requests.pop(request_id, None)
+            Toast.show_message(self, "保存剪贴板内容失败")
+            return
+        self._on_file_received(str(save_path), len(payload), filename, request_id)
+    
+    def _on_file_received(self, save_path: str, file_size: int, original_filename: str, request_id: str = ""):
         """文件接收完成"""
         save_path = Path(save_path)
         # 隐藏状态
         self.status_label.setVisible(False)
         
-        # 清理所有已接受的请求（通过匹配文件名和文件大小）
-        # 因为_on_file_received没有request_id，需要通过文件名和大小匹配
+        # 按 request_id 直接找到对应的请求并清理
         request_ids_to_remove = []
         sender_ids_to_reset = set()
         paste_to_clipboard = False
@@ -3775,27 +3940,28 @@ class AirDropView(QWidget):
         is_clipboard_image = False
         clipboard_image_format = None
         open_after_accept = False
-        for req_id, req_info in self._pending_requests.items():
-            if (req_info.get('filename') == original_filename and 
-                req_info.get('accepted', False) and
-                req_info.get('file_size', 0) == file_size):
-                request_ids_to_remove.append(req_id)
-                sender_id = req_info.get('sender_id')
-                sender_ip = req_info.get('sender_ip', "")
-                if sender_id:
-                    sender_ids_to_reset.add(sender_id)
-                if req_info.get('paste_to_clipboard', False):
-                    paste_to_clipboard = True
-                if req_info.get('is_clipboard', False):
-                    is_clipboard_request = True
-                if req_info.get('is_clipboard_image', False):
-                    is_clipboard_image = True
-                    clipboard_image_format = clipboard_image_format or req_info.get('clipboard_image_format')
-                if req_info.get('open_after_accept', False):
-                    open_after_accept = True
-                # 清理临时可见设备
-                key = f"{sender_id or ''}::{sender_ip or ''}"
-                self._remove_temp_device_by_key(key)
+        bundle_req_info = None
+        req_info = self._pending_requests.get(request_id)
+        if req_info is not None:
+            request_ids_to_remove.append(request_id)
+            sender_id = req_info.get('sender_id')
+            sender_ip = req_info.get('sender_ip', "")
+            if sender_id:
+                sender_ids_to_reset.add(sender_id)
+            if req_info.get('paste_to_clipboard', False):
+                paste_to_clipboard = True
+            if req_info.get('is_clipboard', False):
+                is_clipboard_request = True
+            if req_info.get('is_clipboard_image', False):
+                is_clipboard_image = True
+                clipboard_image_format = clipboard_image_format or req_info.get('clipboard_image_format')
+            if req_info.get('open_after_accept', False):
+                open_after_accept = True
+            if req_info.get('is_bundle', False):
+                bundle_req_info = req_info
+            # 清理临时可见设备
+            key = f"{sender_id or ''}::{sender_ip or ''}"
+            self._remove_temp_device_by_key(key)
         
         message_shown = False
         clipboard_image_base64 = clipboard_image_format is not None and original_filename.endswith('.b64img')
@@ -3865,6 +4031,14 @@ class AirDropView(QWidget):
                             )
                             message_shown = True
         
+        if not message_shown and bundle_req_info is not None:
+            size_str = self._format_file_size(bundle_req_info.get('display_size', file_size))
+            Toast.show_message(
+                self,
+                f"收到文件夹: {save_path.name}（{bundle_req_info.get('bundle_file_count', 0)} 个文件，{size_str}）\n保存位置: {save_path.parent}"
+            )
+            message_shown = True
+        
         if not message_shown:
             size_str = self._format_file_size(file_size)
             Toast.show_message(
@@ -3887,111 +4061,39 @@ class AirDropView(QWidget):
         self._reset_device_progress(sender_ids_to_reset)
     
     def _refresh_devices(self):
-        """刷新设备列表"""
+        """
+        核对设备列表与已知设备（兜底，正常由 device_added/device_removed 增量更新）。
+
+        只按 key 集合比较，无差异时不触碰视图；临时展示的发送方不在已知设备中，保留。
+        """
         if not self._transfer_manager:
             return
         
         # 使用 user_id + ip 作为唯一标识，支持同一账号多个设备
-        current_devices = {self._get_device_unique_id(d) for d in self._transfer_manager.get_devices()}
-        _debug_log(f"[UI] _refresh_devices: current_devices={current_devices}, list_count={self.devices_list.count()}")
-        
-        # 检查是否有新设备需要添加
-        existing_device_ids = set()
-        for i in range(self.devices_list.count()):
-            item = self.devices_list.item(i)
-            widget = self.devices_list.itemWidget(item)
-            if isinstance(widget, DeviceItemWidget):
-                device_unique_id = self._get_device_unique_id(widget.device)
-                existing_device_ids.add(device_unique_id)
-        
-        # 添加新发现的设备
-        for device in self._transfer_manager.get_devices():
-            device_unique_id = self._get_device_unique_id(device)
-            if device_unique_id not in existing_device_ids:
-                if not self._is_device_visible(device):
-                    _debug_log(f"[UI] Skip device by scope: {device_unique_id}, scope={getattr(device, 'discover_scope', None)}")
-                    continue
-                _debug_log(f"[UI] _refresh_devices: Adding new device {device_unique_id}")
-                # 记录设备发现时间
-                import time
-                if device.user_id not in self._device_discovery_times:
-                    self._device_discovery_times[device.user_id] = time.time()
-                # 记录设备携带的组信息（每个客户端自行广播，无需单独请求接口）
-                self._update_device_group_cache(device, reorder_if_changed=True)
-                # 添加设备
-                self._add_device_widget_at_sorted_position(device)
+        devices = self._transfer_manager.get_devices()
+        current_devices = {self._get_device_unique_id(d) for d in devices}
+        _debug_log(f"[UI] _refresh_devices: current_devices={current_devices}, list_count={self._device_model.rowCount()}")
+        
+        # 添加遗漏的设备（已存在的设备在 _on_device_added 中按索引直接跳过）
+        for device in devices:
+            self._on_device_added(device)
         
         # 移除不存在的设备
-        for i in range(self.devices_list.count() - 1, -1, -1):
-            item = self.devices_list.item(i)
-            widget = self.devices_list.itemWidget(item)
-            if isinstance(widget, DeviceItemWidget):
-                device_unique_id = self._get_device_unique_id(widget.device)
-                if device_unique_id not in current_devices:
-                    _debug_log(f"[UI] _refresh_devices: Removing device {device_unique_id}")
-                    self.devices_list.takeItem(i)
-        
-        # 刷新后调整大小
-        QTimer.singleShot(0, self._update_item_widths)
-        QTimer.singleShot(0, self._adjust_devices_list_size)
+        for key in self._device_model.keys() - current_devices - self._temp_visible_devices:
+            _debug_log(f"[UI] _refresh_devices: Removing device {key}")
+            self._remove_device_row(key)
     
     def _reorder_devices_by_user_id(self, user_id: str):
         """
         重新排序指定 user_id 的所有设备（传输后需要移动到前面）。
 
-        重要：在 Windows/Qt6 上，QListWidget + setItemWidget 的组合如果通过 takeItem/insertItem
-        复用旧的 QWidget，非常容易触发 Qt6Core.dll 0xc0000005（C++ 侧 use-after-free）。
-        这里改为“先移除旧项，再按最新排序规则重新创建 widget 插回”，稳定优先。
+        排序依据（传输时间/组/健康等级）变化后由模型移动对应行，视图只处理行移动，不重建卡片。
         """
-        if not user_id:
-            return
-
-        if not hasattr(self, "devices_list") or self.devices_list is None:
+        if not user_id or not hasattr(self, "_device_model"):
             return
-
         try:
-            rows: list[int] = []
-            devices: list[DeviceInfo] = []
-
-            # 收集该账号的所有设备（保持原顺序）
-            for i in range(self.devices_list.count()):
-                item = self.devices_list.item(i)
-                if item is None:
-                    continue
-                widget = self.devices_list.itemWidget(item)
-                if not isinstance(widget, DeviceItemWidget):
-                    continue
-                try:
-                    dev = widget.device
-                except RuntimeError:
-                    continue
-                if getattr(dev, "user_id", None) == user_id:
-                    rows.append(i)
-                    devices.append(dev)
-
-            if not devices:
-                return
-
-            was_updates_enabled = self.devices_list.updatesEnabled()
-            try:
-                self.devices_list.setUpdatesEnabled(False)
-
-                # 移除旧项（倒序避免索引变化）
-                for row in reversed(rows):
-                    with contextlib.suppress(Exception):
-                        self.devices_list.takeItem(row)
-
-                # 重新插入（内部会根据 _get_device_sort_key 计算正确位置）
-                for dev in devices:
-                    with contextlib.suppress(Exception):
-                        self._add_device_widget_at_sorted_position(dev)
-            finally:
-                self.devices_list.setUpdatesEnabled(was_updates_enabled)
-
-            # 延迟刷新，避开 paint/layout 进行中窗口
-            QTimer.singleShot(0, self._update_item_widths)
-            QTimer.singleShot(0, self._adjust_devices_list_size)
-            QTimer.singleShot(0, self._update_window_title)
+            if self._device_model.resort_user(user_id):
+                QTimer.singleShot(0, self._adjust_devices_list_size)
         except Exception as e:
             logger.error(f"重新排序设备失败 (user_id={user_id}): {e}", exc_info=True)
     
@@ -4013,79 +4115,72 @@ class AirDropView(QWidget):
     
     def _reset_device_progress(self, user_ids: Optional[Set[str]] = None):
         """根据 user_id 重置设备头像进度"""
-        for i in range(self.devices_list.count()):
-            item = self.devices_list.item(i)
-            widget = self.devices_list.itemWidget(item)
-            if not isinstance(widget, DeviceItemWidget):
-                continue
-            if not user_ids or widget.device.user_id in user_ids:
-                widget.set_progress(0)
+        for row, device in enumerate(self._device_model.devices()):
+            if not user_ids or device.user_id in user_ids:
+                self._device_model.set_progress(row, 0)
                 if user_ids:
-                    widget.set_device_status(None)
+                    self._device_model.set_status(row, None)
 
     def _set_device_status(self, device: Optional[DeviceInfo], text: Optional[str], color: Optional[str] = None):
         """更新指定设备的状态文本"""
         if not device:
             return
-        target_id = getattr(device, "user_id", "") or ""
-        for i in range(self.devices_list.count()):
-            item = self.devices_list.item(i)
-            widget = self.devices_list.itemWidget(item)
-            if not isinstance(widget, DeviceItemWidget):
-                continue
-            same_device = False
-            if target_id and widget.device.user_id == target_id:
-                same_device = True
-            elif widget.device.ip == device.ip and widget.device.name == device.name:
-                same_device = True
-            if same_device:
-                widget.set_device_status(text, color)
-                break
+        # 按 user_id::ip 定位（同一账号的多台设备各占一行）；没有 user_id 的旧调用退回按 ip + 名称匹配
+        row = self._device_model.row_of(device.key)
+        if row is None and not device.user_id:
+            row = self._device_model.find_row(lambda d: d.ip == device.ip and d.name == device.name)
+        if row is not None:
+            self._device_model.set_status(row, text, color)
 
     def _start_wait_countdown(self, device: DeviceInfo, seconds: int = 60):
-        """启动“等待中”倒计时并更新设备状态文本"""
-        self._stop_wait_countdown()
-        self._wait_countdown_device = device
-        self._wait_countdown_remaining = seconds
+        """启动该设备的“等待中”倒计时并更新设备状态文本"""
+        self._stop_wait_countdown(device)
+        remaining = [seconds]
         colors = self._get_theme_colors()
-        self._set_device_status(device, f"等待中({self._wait_countdown_remaining})...", colors['status_waiting'])
+        self._set_device_status(device, f"等待中({remaining[0]})...", colors['status_waiting'])
         
         timer = QTimer(self)
         timer.setInterval(1000)
         
         def tick():
-            self._wait_countdown_remaining -= 1
-            remaining = max(self._wait_countdown_remaining, 0)
-            self._set_device_status(device, f"等待中({remaining})...", colors['status_waiting'])
-            if remaining <= 0:
-                self._stop_wait_countdown()
-                # 超时仍未确认，重置传输状态并提示
-                self._transferring = False
+            remaining[0] = max(remaining[0] - 1, 0)
+            self._set_device_status(device, f"等待中({remaining[0]})...", colors['status_waiting'])
+            if remaining[0] <= 0:
+                self._stop_wait_countdown(device)
+                # 超时仍未确认，重置该设备的传输状态并提示
+                self._active_targets.pop(device.key, None)
                 self.status_label.setVisible(False)
-                if self._current_target and getattr(self._current_target, "ip", None) == device.ip:
-                    self._current_target = None
                 timeout_msg = "等待对方响应超时"
                 self._set_device_status(device, timeout_msg, colors.get('status_error'))
                 Toast.show_message(self, timeout_msg)
         
         timer.timeout.connect(tick)
         timer.start()
-        self._wait_countdown_timer = timer
-
-    def _stop_wait_countdown(self):
-        """停止倒计时"""
-        if self._wait_countdown_timer:
-            self._wait_countdown_timer.stop()
-            self._wait_countdown_timer.deleteLater()
-        self._wait_countdown_timer = None
-        self._wait_countdown_device = None
-        self._wait_countdown_remaining = 0
+        self._wait_countdown_timers[device.key] = timer
+
+    def _stop_wait_countdown(self, device: Optional[DeviceInfo] = None):
+        """停止指定设备的倒计时（device 为 None 时停止全部）"""
+        if device is None:
+            timers = list(self._wait_countdown_timers.values())
+            self._wait_countdown_timers.clear()
+        else:
+            timer = self._wait_countdown_timers.pop(device.key, None)
+            timers = [timer] if timer else []
+        for timer in timers:
+            timer.stop()
+            timer.deleteLater()
+    
+    def _stop_wait_countdown_by_key(self, target_key: str):
+        timer = self._wait_countdown_timers.pop(target_key, None)
+        if timer:
+            timer.stop()
+            timer.deleteLater()
     
     def _handle_send_request_failure(self, device: DeviceInfo, message: str):
         """发送请求失败时的统一处理"""
-        self._transferring = False
+        self._active_targets.pop(device.key, None)
         self.status_label.setVisible(False)
-        self._stop_wait_countdown()
+        self._stop_wait_countdown(device)
         
         # 更友好的错误提示
         friendly = message
@@ -4133,48 +4228,37 @@ class AirDropView(QWidget):
         super().resizeEvent(event)
         self._reposition_all_bubbles()
     
-    def _find_device_widget_for_request(self, request_info: dict) -> Optional[DeviceItemWidget]:
-        """根据请求信息查找对应头像的设备项"""
+    def _find_device_row_for_request(self, request_info: dict) -> Optional[int]:
+        """根据请求信息查找对应头像的设备行"""
         sender_id = request_info.get('sender_id') or ""
         sender_name = request_info.get('sender_name') or ""
         sender_ip = request_info.get('sender_ip') or ""
         sender_port = request_info.get('sender_port')
-        
-        for i in range(self.devices_list.count()):
-            item = self.devices_list.item(i)
-            widget = self.devices_list.itemWidget(item)
-            if not isinstance(widget, DeviceItemWidget):
-                continue
-            
+
+        def matches(device: DeviceInfo) -> bool:
             # 优先匹配 user_id
-            if sender_id and widget.device.user_id == sender_id:
-                return widget
-            
+            if sender_id and device.user_id == sender_id:
+                return True
             # 其次匹配名字
-            if sender_name and widget.device.name == sender_name:
-                return widget
-            
+            if sender_name and device.name == sender_name:
+                return True
             # 再匹配 IP 和端口
-            if sender_ip and widget.device.ip == sender_ip:
-                if sender_port is None or widget.device.port == sender_port:
-                    return widget
-        
-        return None
+            if sender_ip and device.ip == sender_ip:
+                return sender_port is None or device.port == sender_port
+            return False
+
+        return self._device_model.find_row(matches)
     
-    def _scroll_to_device_widget(self, widget: QWidget, margin: int = 24):
+    def _scroll_to_device_row(self, row: int, margin: int = 24):
         """滚动确保指定设备卡片可见"""
-        if not widget or not hasattr(self, "_scroll_area") or not self._scroll_area:
+        if not hasattr(self, "_scroll_area") or not self._scroll_area or not self._scroll_area.widget():
             return
         try:
-            self._scroll_area.ensureWidgetVisible(widget, margin, margin)
-            return
-        except Exception:
-            pass
-        try:
-            vbar = self._scroll_area.verticalScrollBar()
-            if vbar:
-                target_y = widget.mapTo(self._scroll_area.widget(), QPoint(0, 0)).y()
-                vbar.setValue(max(0, target_y - margin))
+            rect = self.devices_list.visualRect(self._device_model.index(row, 0))
+            if not rect.isValid():
+                return
+            center = self.devices_list.viewport().mapTo(self._scroll_area.widget(), rect.center())
+            self._scroll_area.ensureVisible(center.x(), center.y(), margin + rect.width() // 2, margin + rect.height() // 2)
         except Exception:
             pass
     
@@ -4216,9 +4300,9 @@ class AirDropView(QWidget):
                 pass
             
             # 确保对应设备卡片在可视区域
-            target_widget = self._find_device_widget_for_request(req_info)
-            if target_widget:
-                self._scroll_to_device_widget(target_widget)
+            target_row = self._find_device_row_for_request(req_info)
+            if target_row is not None:
+                self._scroll_to_device_row(target_row)
             
             # 确保气泡存在并可见
             dialog = req_info.get("dialog")
@@ -4298,12 +4382,13 @@ class AirDropView(QWidget):
         else:
             bubble.show()
         
-        target_widget = self._find_device_widget_for_request(request_info)
+        target_row = self._find_device_row_for_request(request_info)
+        avatar_rect = self.devices_list.avatar_rect(target_row) if target_row is not None else None
         screen_point = None
-        if target_widget and hasattr(target_widget, "avatar_label"):
-            avatar = target_widget.avatar_label
-            center = avatar.mapToGlobal(avatar.rect().center())
-            top = avatar.mapToGlobal(avatar.rect().topLeft()).y()
+        if avatar_rect is not None:
+            viewport = self.devices_list.viewport()
+            center = viewport.mapToGlobal(avatar_rect.center())
+            top = viewport.mapToGlobal(avatar_rect.topLeft()).y()
             x = int(center.x() - bubble.width() / 2)
             y = int(top - bubble.height() - margin)
             screen_point = center
@@ -4364,8 +4449,8 @@ class AirDropView(QWidget):
             if dialog:
                 dialog.reject()
             else:
-                if self._transfer_manager and self._transfer_manager._server:
-                    self._transfer_manager._server.confirm_transfer(request_id, False)
+                if self._transfer_manager:
+                    self._transfer_manager.confirm_incoming(request_id, False)
                 self._pending_requests.pop(request_id, None)
         QTimer.singleShot(60_000, expire)
 
@@ -4544,17 +4629,10 @@ class AirDropView(QWidget):
         # 更新设备列表样式
         if hasattr(self, 'devices_list'):
             self.devices_list.setStyleSheet(f"""
-                QListWidget {{
+                QListView {{
                     border: none;
                     background-color: {colors['bg_primary']};
                 }}
-                QListWidget::item {{
-                    border: 1px solid {colors['item_border']};
-                    border-radius: 8px;
-                    background-color: transparent;
-                    padding: 0px;
-                    text-align: center;
-                }}
             """)
         
         # 更新背景标签颜色
@@ -4565,17 +4643,10 @@ class AirDropView(QWidget):
         if hasattr(self, 'status_label'):
             self.status_label.setStyleSheet(f"color: {colors['text_tertiary']}; font-size: 13px;")
         
-        # 更新所有设备项的颜色
-        if hasattr(self, 'devices_list'):
-            for i in range(self.devices_list.count()):
-                item = self.devices_list.item(i)
-                widget = self.devices_list.itemWidget(item)
-                if isinstance(widget, DeviceItemWidget):
-                    widget._is_dark = self._is_dark
-                    widget._update_theme_colors(colors)
-                    # 重新绘制默认头像（如果有）
-                    if hasattr(widget, '_device') and not widget.avatar_label.pixmap():
-                        widget._set_default_avatar()
+        # 更新所有设备项的颜色（delegate 绘制时读取主题颜色，默认头像按新主题重新生成）
+        if hasattr(self, '_device_model'):
+            self._device_delegate.clear_cache()
+            self._device_model.refresh_all()
         
         # 更新信号图标颜色
         if hasattr(self, '_background_frame'):
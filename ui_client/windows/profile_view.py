@@ -10,8 +10,9 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame, QScrollArea, QApplication
 )
 from PySide6.QtCore import Qt, QRunnable, QThreadPool, QObject, Signal
-from PySide6.QtGui import QFont
+from PySide6.QtGui import QFont, QPixmap
 from utils.api_client import ApiClient
+from utils.avatar_cache import AvatarCache
 from widgets.toast import Toast
 
 
@@ -77,9 +78,12 @@ class _AccountBindingsWorker(QRunnable):
 class ProfileView(QWidget):
     """我的页面"""
     
+    AVATAR_SIZE = 48
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self._api_client = None
+        self._avatar_url = None
         self._init_ui()
     
     def _init_ui(self):
@@ -122,7 +126,16 @@ class ProfileView(QWidget):
         title.setFont(title_font)
         # 允许选择和复制文本
         title.setTextInteractionFlags(Qt.TextSelectableByMouse | Qt.TextSelectableByKeyboard)
-        layout.addWidget(title)
+        # 头像（与隔空投送共用头像缓存），加载前隐藏
+        title_layout = QHBoxLayout()
+        title_layout.setSpacing(12)
+        self.avatar_label = QLabel()
+        self.avatar_label.setFixedSize(self.AVATAR_SIZE, self.AVATAR_SIZE)
+        self.avatar_label.setVisible(False)
+        title_layout.addWidget(self.avatar_label)
+        title_layout.addWidget(title)
+        title_layout.addStretch()
+        layout.addLayout(title_layout)
         
         # 信息容器
         info_frame = QFrame()
@@ -261,6 +274,17 @@ class ProfileView(QWidget):
         """用户信息加载成功"""
         self.refresh_btn.setEnabled(True)
         
+        # 头像
+        avatar_url = data.get('avatar_url') or None
+        self._avatar_url = avatar_url
+        pixmap = AvatarCache.instance().request(
+            avatar_url, self.AVATAR_SIZE, lambda pm, url=avatar_url: self._on_avatar_loaded(url, pm)
+        )
+        if pixmap is not None:
+            self._on_avatar_loaded(avatar_url, pixmap)
+        elif not avatar_url:
+            self.avatar_label.setVisible(False)
+        
         # 更新标签
         self.user_id_label.setText(f"用户ID：{data.get('user_id', '--')}")
         
@@ -341,6 +365,13 @@ class ProfileView(QWidget):
         else:
             self.responsibilities_label.setText("岗位职责：--")
     
+    def _on_avatar_loaded(self, url: str, pixmap: QPixmap):
+        """头像加载完成（磁盘缓存过期时可能先后回调旧图和新图）"""
+        if url != self._avatar_url:
+            return  # 期间已切换账号
+        self.avatar_label.setPixmap(pixmap)
+        self.avatar_label.setVisible(True)
+    
     def _on_user_info_error(self, error_msg: str):
         """用户信息加载失败"""
         self.refresh_btn.setEnabled(True)